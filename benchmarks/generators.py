@@ -0,0 +1,40 @@
+"""Synthetic metrics of a configurable size and dimension cardinality."""
+import random
+import typing
+
+# 2024-01-01T00:00:00Z
+START = 1704067200000
+MINUTE = 60 * 1000
+
+
+def datapoints(size: int, cardinality: int = 1, start: int = START, step_ms: int = MINUTE,
+               seed: int = 0) -> list[dict]:
+    """`size` datapoints as JSON objects, `cardinality` distinct values of the `series` dimension.
+
+    Every `cardinality` consecutive datapoints share a timestamp, one per series, like a metric reported by several
+    hosts. Values follow a random walk.
+    """
+    rng = random.Random(seed)
+    levels = [100.0] * cardinality
+    result = []
+    for i in range(size):
+        series = i % cardinality
+        levels[series] += rng.gauss(0, 1)
+        result.append({
+            "timestamp": start + i // cardinality * step_ms,
+            "dimensions": {"series": f"s{series}"} if cardinality > 1 else {},
+            "value": round(levels[series], 3),
+        })
+    return result
+
+
+def dtos(points: list[dict]) -> list:
+    """Datapoints of the server's data store."""
+    from src.dao import data_dao
+    return [data_dao.DatapointDto(**point) for point in points]
+
+
+def sdk_series(points: list[dict]) -> typing.Any:
+    """Datapoints of the Python SDK."""
+    from impulses_sdk import Datapoint, DatapointSeries
+    return DatapointSeries([Datapoint(point["timestamp"], point["value"], point["dimensions"]) for point in points])
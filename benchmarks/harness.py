@@ -0,0 +1,108 @@
+"""Timing of benchmarks and comparison of their results with a baseline."""
+import dataclasses
+import fnmatch
+import gc
+import statistics
+import sys
+import time
+import typing
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# server modules are imported as `src.*`, like when the server runs from server/
+sys.path.insert(0, str(ROOT / "server"))
+sys.path.insert(0, str(ROOT / "client-sdks" / "python3"))
+
+
+@dataclasses.dataclass
+class Result:
+    """Durations (seconds) of every run of a benchmark doing `ops` operations per run."""
+    name: str
+    params: dict
+    runs: list[float]
+    ops: int = 1
+    extra: dict = dataclasses.field(default_factory=dict)
+
+    @property
+    def median_s(self) -> float:
+        return statistics.median(self.runs)
+
+    def to_json(self) -> dict:
+        return {
+            "name": self.name,
+            "params": self.params,
+            "runs": len(self.runs),
+            "ops": self.ops,
+            "min_s": min(self.runs),
+            "median_s": self.median_s,
+            "mean_s": statistics.fmean(self.runs),
+            "ops_per_s": self.ops / self.median_s if self.median_s else None,
+            **self.extra,
+        }
+
+
+@dataclasses.dataclass
+class Config:
+    """Size of the generated metrics and how the benchmarks run."""
+    size: int = 10_000
+    cardinality: int = 10
+    repeat: int = 5
+    pattern: typing.Optional[str] = None
+    base_url: typing.Optional[str] = None
+    concurrency: int = 8
+
+
+class Bench:
+    """Runs the benchmarks a suite defines and collects their results."""
+    def __init__(self, config: Config):
+        self.config = config
+        self.results: list[Result] = []
+
+    def selected(self, name: str) -> bool:
+        return self.config.pattern is None or fnmatch.fnmatch(name, self.config.pattern)
+
+    def measure(self, name: str, fn: typing.Callable[[typing.Any], typing.Any],
+                setup: typing.Callable[[], typing.Any] = lambda: None, ops: int = 1, **params) -> None:
+        """Times fn(setup()) `repeat` times after a warmup run, setup isn't timed."""
+        if not self.selected(name):
+            return
+        runs = []
+        for i in range(self.config.repeat + 1):
+            arg = setup()
+            gc.collect()
+            start = time.perf_counter()
+            fn(arg)
+            elapsed = time.perf_counter() - start
+            if i > 0:
+                runs.append(elapsed)
+        self.add(Result(name, params, runs, ops))
+
+    def add(self, result: Result) -> None:
+        self.results.append(result)
+        ops_per_s = result.ops / result.median_s if result.median_s else float("inf")
+        print(f"  {result.name:<45} median {result.median_s * 1000:10.3f} ms  {ops_per_s:14,.0f} ops/s")
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    """Medians of results against the baseline's, slower by more than tolerance (0.2 = 20%) is a regression."""
+    by_name = {entry["name"]: entry for entry in baseline}
+    comparison = []
+    for result in results:
+        entry = {"name": result["name"], "median_s": result["median_s"]}
+        base = by_name.get(result["name"])
+        if base is None:
+            entry["status"] = "new"
+        elif base["params"] != result["params"]:
+            # a different size or cardinality isn't comparable
+            entry["status"] = "incomparable"
+        else:
+            ratio = result["median_s"] / base["median_s"] if base["median_s"] else 1.0
+            entry.update(baseline_median_s=base["median_s"], ratio=ratio)
+            if ratio > 1 + tolerance:
+                entry["status"] = "regression"
+            elif ratio < 1 / (1 + tolerance):
+                entry["status"] = "improvement"
+            else:
+                entry["status"] = "ok"
+        comparison.append(entry)
+    return comparison
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Run the benchmarks, write their results as JSON and compare them with a baseline."""
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+
+from harness import Bench, Config, compare
+
+THIS_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = THIS_DIR / "baseline.json"
+
+SUITES = [
+    "storage",
+    "evaluation",
+    "auth",
+    "http",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run benchmarks of the storage, ingest, query and evaluation hot paths",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                   Run every suite, compare with baseline.json
+  %(prog)s -s storage,auth                   Run the storage and auth suites
+  %(prog)s -p 'evaluation.sliding_window.*'  Run benchmarks matching a pattern
+  %(prog)s --base-url http://localhost:8000  Include the HTTP suite against a running server
+  %(prog)s --save-baseline                   Make the results the new baseline
+        """
+    )
+    parser.add_argument('-s', '--suites', type=str, default=",".join(SUITES),
+                        help=f'Comma separated suites to run (default: {",".join(SUITES)})')
+    parser.add_argument('-p', '--pattern', type=str, metavar='PATTERN',
+                        help='Run benchmarks matching glob pattern (e.g., "storage.*")')
+    parser.add_argument('--size', type=int, default=Config.size, help='Datapoints per generated metric')
+    parser.add_argument('--cardinality', type=int, default=Config.cardinality,
+                        help='Distinct dimension values per generated metric')
+    parser.add_argument('--repeat', type=int, default=Config.repeat, help='Timed runs per benchmark')
+    parser.add_argument('--concurrency', type=int, default=Config.concurrency, help='Concurrent HTTP clients')
+    parser.add_argument('--base-url', type=str, default=os.environ.get("BASE_URL"),
+                        help='Server for the HTTP suite (default: $BASE_URL, skipped if unset)')
+    parser.add_argument('-o', '--output', type=Path, default=THIS_DIR / "results.json",
+                        help='Where to write the results (default: results.json)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                        help='Results to compare with (default: baseline.json)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Slowdown of a median over the baseline counted as a regression (default: 0.25)')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results to the baseline as well')
+    args = parser.parse_args()
+
+    config = Config(size=args.size, cardinality=args.cardinality, repeat=args.repeat, pattern=args.pattern,
+                    base_url=args.base_url, concurrency=args.concurrency)
+    bench = Bench(config)
+    for suite in args.suites.split(","):
+        suite = suite.strip()
+        if suite not in SUITES:
+            print(f"[ERROR] Unknown suite {suite} (available: {', '.join(SUITES)})")
+            sys.exit(1)
+        print(f"\n== {suite} ==")
+        importlib.import_module(f"suites.{suite}").run(bench)
+
+    results = [result.to_json() for result in bench.results]
+    report = {
+        "meta": {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": config.size,
+            "cardinality": config.cardinality,
+            "repeat": config.repeat,
+        },
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())
+        report["baseline"] = {"path": str(args.baseline), "tolerance": args.tolerance, "meta": baseline["meta"]}
+        report["comparison"] = compare(results, baseline["results"], args.tolerance)
+        print(f"\n== Compared with {args.baseline.name} (tolerance {args.tolerance:.0%}) ==")
+        for entry in report["comparison"]:
+            ratio = f"{entry['ratio']:.2f}x" if "ratio" in entry else ""
+            print(f"  {entry['name']:<45} {ratio:>8}  {entry['status']}")
+        regressions = [entry for entry in report["comparison"] if entry["status"] == "regression"]
+
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nResults written to {args.output}")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if regressions:
+        print(f"\n[RESULT] {len(regressions)} benchmark(s) regressed")
+        sys.exit(1)
+    print(f"\n[RESULT] {len(results)} benchmark(s) ran")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Authentication of API tokens: TokenCache.get."""
+import random
+import time
+
+from harness import Bench
+
+TOKENS = 10_000
+LOOKUPS = 100_000
+
+
+def run(bench: Bench) -> None:
+    from src.auth.token_cache import TokenCache
+
+    cache = TokenCache()
+    expires_at = int(time.time()) + 3600
+    tokens = [f"token-{i}" for i in range(TOKENS)]
+    for i, token in enumerate(tokens):
+        cache.add(token, f"user-{i % 100}", "API", expires_at)
+    rng = random.Random(0)
+    # a tenth of the lookups are of unknown tokens
+    lookups = [rng.choice(tokens) if rng.random() < 0.9 else f"unknown-{i}" for i in range(LOOKUPS)]
+
+    def get_all(_):
+        for token in lookups:
+            cache.get(token)
+    bench.measure("auth.token_cache.get", get_all, ops=LOOKUPS, tokens=TOKENS)
@@ -0,0 +1,25 @@
+"""The SDK's series operations: compose_impulses and sliding_window."""
+import statistics
+
+import generators
+from harness import Bench
+
+HOUR = 60 * 60 * 1000
+
+
+def run(bench: Bench) -> None:
+    from impulses_sdk import Percentile, operations
+
+    size = bench.config.size
+    series = [generators.sdk_series(generators.datapoints(size, seed=seed)) for seed in range(3)]
+
+    bench.measure("evaluation.compose_impulses.sum",
+                  lambda _: operations.compose_impulses(series, operations.SUM), ops=3 * size, size=size, impulses=3)
+    bench.measure("evaluation.compose_impulses.callable",
+                  lambda _: operations.compose_impulses(series, lambda values: max(values) - min(values)),
+                  ops=3 * size, size=size, impulses=3)
+
+    for name, operation in [("sum", sum), ("mean", statistics.fmean), ("p95", Percentile(95)),
+                            ("p95_sketch", Percentile(95, accuracy=0.01))]:
+        bench.measure(f"evaluation.sliding_window.{name}", lambda _: series[0].sliding_window(HOUR, operation),
+                      ops=size, size=size, window_ms=HOUR)
@@ -0,0 +1,87 @@
+"""The /data endpoints of a running server under concurrent load."""
+import concurrent.futures
+import itertools
+import statistics
+import time
+
+import requests
+
+import generators
+from harness import Bench, Result
+
+# requests per client and run
+REQUESTS = 10
+BATCH = 100
+
+
+def percentile(latencies: list[float], percent: int) -> float:
+    return sorted(latencies)[int(percent / 100 * (len(latencies) - 1))]
+
+
+def load(bench: Bench, name: str, request, **params) -> None:
+    """Times `repeat` runs of `concurrency` clients each sending REQUESTS requests.
+
+    request(session, i) sends one, i numbers the requests of all runs.
+    """
+    if not bench.selected(name):
+        return
+    concurrency = bench.config.concurrency
+    latencies, runs = [], []
+    sequence = itertools.count()
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        def client(_) -> list[float]:
+            session = requests.Session()
+            timings = []
+            for _ in range(REQUESTS):
+                start = time.perf_counter()
+                request(session, next(sequence))
+                timings.append(time.perf_counter() - start)
+            return timings
+        for i in range(bench.config.repeat + 1):
+            start = time.perf_counter()
+            timings = [t for client_timings in pool.map(client, range(concurrency)) for t in client_timings]
+            if i > 0:
+                runs.append(time.perf_counter() - start)
+                latencies.extend(timings)
+    bench.add(Result(name, {**params, "concurrency": concurrency, "requests": REQUESTS}, runs, concurrency * REQUESTS, {
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p95_ms": percentile(latencies, 95) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "latency_mean_ms": statistics.fmean(latencies) * 1000,
+    }))
+
+
+def run(bench: Bench) -> None:
+    base_url = bench.config.base_url
+    if base_url is None:
+        print("  skipped, no --base-url")
+        return
+    size, cardinality = bench.config.size, bench.config.cardinality
+
+    session = requests.Session()
+    email = f"bench_{int(time.time())}@example.com"
+    resp = session.post(f"{base_url}/user", json={"email": email, "password": "Password123!", "role": "STANDARD"})
+    resp.raise_for_status()
+    session.post(f"{base_url}/user/login", json={"email": email, "password": "Password123!"}).raise_for_status()
+    resp = session.post(f"{base_url}/token", json={"name": f"bench-{int(time.time())}", "capability": "SUPER",
+                                                   "expires_at": int(time.time()) + 3600})
+    resp.raise_for_status()
+    headers = {"X-Data-Token": resp.json()["token_plaintext"]}
+
+    try:
+        resp = session.post(f"{base_url}/data/bench_read", headers=headers,
+                            json=generators.datapoints(size, cardinality))
+        resp.raise_for_status()
+
+        for name, accept in [("json", "application/json"), ("binary", "application/vnd.impulses.series")]:
+            def get(client, _, accept=accept):
+                client.get(f"{base_url}/data/bench_read", headers={**headers, "Accept": accept}).raise_for_status()
+            load(bench, f"http.data.get.{name}", get, size=size, cardinality=cardinality)
+
+        def post(client, i):
+            batch = generators.datapoints(BATCH, cardinality, start=generators.START + i * BATCH * generators.MINUTE)
+            client.post(f"{base_url}/data/bench_write_{i % bench.config.concurrency}", headers=headers,
+                        json=batch).raise_for_status()
+        load(bench, "http.data.post", post, batch=BATCH, cardinality=cardinality)
+    finally:
+        session.delete(f"{base_url}/user")
@@ -0,0 +1,59 @@
+"""The data store: DataDao ingest and reads, PersistentDao flush and read."""
+import pathlib
+import tempfile
+
+import generators
+from harness import Bench
+
+USER_ID = "bench-user"
+BATCH = 100
+
+
+def run(bench: Bench) -> None:
+    from src.dao import data_dao
+    from src.db import dao
+
+    size, cardinality = bench.config.size, bench.config.cardinality
+    dtos = generators.dtos(generators.datapoints(size, cardinality))
+    batch = generators.dtos(generators.datapoints(BATCH, cardinality, start=dtos[-1].timestamp + generators.MINUTE))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        counter = iter(range(1_000_000))
+        def fresh_dir() -> pathlib.Path:
+            return pathlib.Path(tmp) / str(next(counter))
+
+        def new_metric():
+            return data_dao.DataDao(dao.PersistentDao(fresh_dir()))
+        bench.measure("storage.data_dao.add.new_metric", lambda data: data.add(USER_ID, "m", dtos),
+                      setup=new_metric, ops=size, size=size, cardinality=cardinality)
+
+        def existing_metric():
+            data = new_metric()
+            data.add(USER_ID, "m", dtos)
+            return data
+        bench.measure("storage.data_dao.add.append_batch", lambda data: data.add(USER_ID, "m", batch),
+                      setup=existing_metric, ops=BATCH, size=size, cardinality=cardinality, batch=BATCH)
+
+        storage_dir = fresh_dir()
+        data_dao.DataDao(dao.PersistentDao(storage_dir)).add(USER_ID, "m", dtos)
+        bench.measure("storage.data_dao.get_metric.cold",
+                      lambda data: data.get_metric_by_metric_name(USER_ID, "m"),
+                      setup=lambda: data_dao.DataDao(dao.PersistentDao(storage_dir)),
+                      size=size, cardinality=cardinality)
+        warm = data_dao.DataDao(dao.PersistentDao(storage_dir))
+        warm.get_metric_by_metric_name(USER_ID, "m")
+        bench.measure("storage.data_dao.get_metric.cached",
+                      lambda data: data.get_metric_by_metric_name(USER_ID, "m"),
+                      setup=lambda: warm, size=size, cardinality=cardinality)
+
+        value = data_dao.DatapointsDto(dtos)
+        persistent = dao.PersistentDao(fresh_dir())
+        bench.measure("storage.persistent_dao.flush",
+                      lambda _: persistent.flush(["bench", "m"], value, data_dao.MetricType),
+                      size=size, cardinality=cardinality)
+        def uncached():
+            persistent.cache.clear()
+            return persistent
+        bench.measure("storage.persistent_dao.read",
+                      lambda store: store.read(["bench", "m"], data_dao.MetricType),
+                      setup=uncached, size=size, cardinality=cardinality)
@@ -12,9 +12,12 @@ from .exceptions import (
     ValidationError,
     ServerError,
     NetworkError,
+    PulseLangError,
 )
 from .models import Datapoint, DatapointSeries, ConstantImpulse
-from .operations import compose_impulses
+from .binary_format import SeriesColumns
+from .operations import compose_impulses, BulkOperation, SUM, PRODUCT, DIFFERENCE
+from .quantiles import Percentile, QuantileSketch
 
 __version__ = "0.2.0"
 
@@ -27,8 +30,16 @@ __all__ = [
     "ValidationError",
     "ServerError",
     "NetworkError",
+    "PulseLangError",
     "Datapoint",
     "DatapointSeries",
     "ConstantImpulse",
-    "compose_impulses"
+    "SeriesColumns",
+    "compose_impulses",
+    "BulkOperation",
+    "SUM",
+    "PRODUCT",
+    "DIFFERENCE",
+    "Percentile",
+    "QuantileSketch",
 ]
@@ -0,0 +1,97 @@
+"""Packed binary wire format of a datapoint series (application/vnd.impulses.series).
+
+Layout (little-endian): 16 byte header (b"IMPS", format version u16, reserved u16, count u32, dims length u32),
+then count int64 timestamps, count float64 values, count uint32 dimension indices and a JSON list of dimensions.
+"""
+import array
+import json
+import struct
+import sys
+
+from . import models
+
+MEDIA_TYPE = "application/vnd.impulses.series"
+MAGIC = b"IMPS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+
+
+class SeriesColumns:
+    """Column view of a series.
+
+    On little-endian hosts the timestamp, value and dimension index columns are memoryviews over the
+    response buffer, so loading them doesn't copy anything.
+
+    Example:
+        >>> columns = client.fetch_columns('cpu.usage')
+        >>> timestamps, values = columns.to_numpy()  # requires numpy
+    """
+    def __init__(self, timestamps, values, dimension_indices, dimensions: list[dict]):
+        self.timestamps = timestamps
+        self.values = values
+        self.dimension_indices = dimension_indices
+        self.dimensions = dimensions
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    def to_numpy(self):
+        """Returns (timestamps, values) as numpy arrays sharing memory with the columns."""
+        import numpy
+        return numpy.frombuffer(self.timestamps, dtype=numpy.int64), numpy.frombuffer(self.values, dtype=numpy.float64)
+    def to_series(self) -> models.DatapointSeries:
+        dims = self.dimensions
+        return models.DatapointSeries([models.Datapoint(t, v, dims[d])
+                                       for t, v, d in zip(self.timestamps, self.values, self.dimension_indices)])
+
+
+def _column(view: memoryview, typecode: str):
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    arr = array.array(typecode, view.tobytes())
+    arr.byteswap()
+    return memoryview(arr)
+
+
+def decode(buf: bytes) -> SeriesColumns:
+    if len(buf) < HEADER.size:
+        raise ValueError("Payload shorter than the binary series header")
+    magic, format_version, _, count, dims_len = HEADER.unpack_from(buf)
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary series payload ({magic!r}, version {format_version})")
+    if len(buf) != HEADER.size + count * 20 + dims_len:
+        raise ValueError("Binary series payload length doesn't match its header")
+
+    view = memoryview(buf)
+    offset = HEADER.size
+    timestamps = _column(view[offset:offset + count * 8], "q")
+    offset += count * 8
+    values = _column(view[offset:offset + count * 8], "d")
+    offset += count * 8
+    dimension_indices = _column(view[offset:offset + count * 4], "I")
+    offset += count * 4
+    return SeriesColumns(timestamps, values, dimension_indices, json.loads(bytes(view[offset:])))
+
+
+def encode(series: models.DatapointSeries) -> bytes:
+    dims_indices: dict[frozenset, int] = {}
+    dims = []
+    indices = []
+    for dp in series:
+        key = frozenset(dp.dimensions.items())
+        index = dims_indices.get(key)
+        if index is None:
+            index = dims_indices[key] = len(dims)
+            dims.append(dict(dp.dimensions))
+        indices.append(index)
+
+    columns = [
+        array.array("q", [dp.timestamp for dp in series]),
+        array.array("d", [dp.value for dp in series]),
+        array.array("I", indices),
+    ]
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+    dims_json = json.dumps(dims, separators=(",", ":")).encode()
+    return b"".join([HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(series), len(dims_json)),
+                     *(column.tobytes() for column in columns),
+                     dims_json])
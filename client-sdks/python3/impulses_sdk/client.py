@@ -1,12 +1,16 @@
 """Impulses SDK Client with comprehensive error handling."""
 import requests
 import logging
+from typing import Optional
 
+from . import binary_format
 from . import models
 from . import exceptions
 
 logger = logging.getLogger(__name__)
 
+COLUMNAR_MEDIA_TYPE = "application/vnd.impulses.columnar+json"
+
 class ImpulsesClient:
     """Client for interacting with Impulses API.
     
@@ -14,6 +18,7 @@ class ImpulsesClient:
         url: Base URL of the Impulses API (e.g., 'http://localhost:8000')
         token_value: Plaintext value of the data token
         timeout: Request timeout in seconds (default: 3)
+        binary: Transfer datapoints in the packed binary format, which needs a server supporting it (default: False)
     
     Raises:
         ValueError: If url or token_value is empty
@@ -26,7 +31,7 @@ class ImpulsesClient:
         >>> metrics = client.list_metric_names()
     """
 
-    def __init__(self, url: str, token_value: str, timeout: int = 3):
+    def __init__(self, url: str, token_value: str, timeout: int = 3, binary: bool = False):
         if not url:
             raise ValueError("url must not be empty")
         if not token_value:
@@ -35,11 +40,14 @@ class ImpulsesClient:
         self.url = url.rstrip("/")  # Remove trailing slash if present
         self.token_value = token_value
         self.timeout = timeout
+        self.binary = binary
         
         self.headers = {
             "X-Data-Token": f"{self.token_value}",
             "Content-Type": "application/json",
         }
+        # metric name -> (version, datapoints) of the last fetch, lets us fetch only what changed since
+        self._series_cache: dict[str, tuple[int, list[models.Datapoint]]] = {}
         
         logger.info(f"Initialized ImpulsesClient for {self.url}")
     
@@ -112,6 +120,9 @@ class ImpulsesClient:
     def fetch_datapoints(self, metric_name: str) -> models.DatapointSeries:
         """Fetch datapoints for a specific metric.
 
+        Fetched series are cached together with the metric's version, so fetching the same metric again only
+        transfers the datapoints added or changed since the previous fetch (nothing at all if the metric didn't change).
+
         Example:
             >>> series = client.fetch_datapoints('cpu.usage')
             >>> for dp in series:
@@ -122,19 +133,32 @@ class ImpulsesClient:
         
         try:
             logger.debug(f"Fetching datapoints for metric: {metric_name}")
+            cached = self._series_cache.get(metric_name)
+            accept = f"{COLUMNAR_MEDIA_TYPE}, application/json;q=0.9"
+            if self.binary:
+                accept = f"{binary_format.MEDIA_TYPE}, {COLUMNAR_MEDIA_TYPE};q=0.9, application/json;q=0.8"
+            headers = {**self.headers, "Accept": accept}
+            params = None
+            if cached is not None:
+                headers["If-None-Match"] = f'W/"{cached[0]}"'
+                params = {"since_version": cached[0]}
             resp = requests.get(
                 f"{self.url}/data/{metric_name}",
-                headers=self.headers,
+                headers=headers,
+                params=params,
                 timeout=self.timeout
             )
             self._handle_response(resp, f"Fetch datapoints for '{metric_name}'")
-            data = resp.json()
-            
-            # Handle both list and RootModel (with 'root' field) formats
-            if isinstance(data, list):
-                return models.DatapointSeries.from_api_obj(data)
-            else:
-                raise exceptions.ImpulsesError(f"Unexpected response format: {type(data)}")
+            if resp.status_code == 304 and cached is not None:
+                logger.debug(f"Metric {metric_name} not modified since version {cached[0]}")
+                return models.DatapointSeries(list(cached[1]))
+            dps = self._parse_series(resp).series
+            if cached is not None and resp.headers.get("X-Metric-Delta") == "true":
+                dps = _merge_datapoints(cached[1], dps)
+            version = resp.headers.get("X-Metric-Version")
+            if version is not None:
+                self._series_cache[metric_name] = (int(version), dps)
+            return models.DatapointSeries(list(dps))
         
         except requests.exceptions.Timeout:
             raise exceptions.NetworkError(f"Request timed out after {self.timeout}s")
@@ -142,6 +166,164 @@ class ImpulsesClient:
             raise exceptions.NetworkError(f"Connection failed: {e}")
         except requests.exceptions.RequestException as e:
             raise exceptions.NetworkError(f"Network error: {e}")
+
+    def fetch_columns(self, metric_name: str) -> binary_format.SeriesColumns:
+        """Fetch datapoints for a specific metric as columns, without creating a Datapoint per datapoint.
+
+        Cheaper than fetch_datapoints for big metrics; the result isn't cached.
+
+        Example:
+            >>> columns = client.fetch_columns('cpu.usage')
+            >>> print(sum(columns.values) / len(columns))
+        """
+        if not metric_name:
+            raise ValueError("metric_name must not be empty")
+
+        try:
+            logger.debug(f"Fetching datapoint columns for metric: {metric_name}")
+            resp = requests.get(
+                f"{self.url}/data/{metric_name}",
+                headers={**self.headers, "Accept": binary_format.MEDIA_TYPE},
+                timeout=self.timeout
+            )
+            self._handle_response(resp, f"Fetch datapoints for '{metric_name}'")
+            if not resp.headers.get("Content-Type", "").startswith(binary_format.MEDIA_TYPE):
+                raise exceptions.ImpulsesError(f"Unexpected response format: {resp.headers.get('Content-Type')}")
+            return binary_format.decode(resp.content)
+
+        except requests.exceptions.Timeout:
+            raise exceptions.NetworkError(f"Request timed out after {self.timeout}s")
+        except requests.exceptions.ConnectionError as e:
+            raise exceptions.NetworkError(f"Connection failed: {e}")
+        except requests.exceptions.RequestException as e:
+            raise exceptions.NetworkError(f"Network error: {e}")
+
+    def _parse_series(self, resp: requests.Response) -> models.DatapointSeries:
+        content_type = resp.headers.get("Content-Type", "")
+        if content_type.startswith(binary_format.MEDIA_TYPE):
+            return binary_format.decode(resp.content).to_series()
+        data = resp.json()
+        if content_type.startswith(COLUMNAR_MEDIA_TYPE):
+            return models.DatapointSeries.from_columnar_api_obj(data)
+        if isinstance(data, list):
+            return models.DatapointSeries.from_api_obj(data)
+        raise exceptions.ImpulsesError(f"Unexpected response format: {type(data)}")
+
+    def export_data(self, path: str) -> None:
+        """Stream every metric of the token's user into an NDJSON file at path.
+
+        Example:
+            >>> client.export_data('backup.ndjson')
+        """
+        try:
+            logger.debug(f"Exporting data to {path}")
+            with requests.get(f"{self.url}/data-transfer/export", headers=self.headers, stream=True,
+                              timeout=self.timeout) as resp:
+                self._handle_response(resp, "Export data")
+                with open(path, "wb") as file:
+                    for chunk in resp.iter_content(chunk_size=1024 * 1024):
+                        file.write(chunk)
+            logger.info(f"Successfully exported data to {path}")
+
+        except requests.exceptions.Timeout:
+            raise exceptions.NetworkError(f"Request timed out after {self.timeout}s")
+        except requests.exceptions.ConnectionError as e:
+            raise exceptions.NetworkError(f"Connection failed: {e}")
+        except requests.exceptions.RequestException as e:
+            raise exceptions.NetworkError(f"Network error: {e}")
+
+    def import_data(self, path: str, chunk_size: int = 8 * 1024 * 1024, max_retries: int = 3) -> dict:
+        """Import an NDJSON file produced by export_data.
+
+        The file is uploaded in chunks; after a failed chunk the upload resumes from the offset the server has.
+        Returns the import summary (imported metrics and datapoints, skipped 'imp.' metrics).
+
+        Example:
+            >>> client.import_data('backup.ndjson')
+            {'metrics': 12, 'datapoints': 48210, 'skipped_metrics': []}
+        """
+        try:
+            resp = requests.post(f"{self.url}/data-transfer/import", headers=self.headers, timeout=self.timeout)
+            self._handle_response(resp, "Create import")
+            upload_id = resp.json()["upload_id"]
+            upload_url = f"{self.url}/data-transfer/import/{upload_id}"
+
+            with open(path, "rb") as file:
+                offset = 0
+                failures = 0
+                while True:
+                    file.seek(offset)
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+                    try:
+                        resp = requests.put(upload_url, data=chunk, timeout=self.timeout, headers={
+                            **self.headers,
+                            "Content-Type": "application/octet-stream",
+                            "Upload-Offset": str(offset),
+                        })
+                        if resp.status_code != 409:
+                            self._handle_response(resp, f"Upload import chunk at offset {offset}")
+                    except (requests.exceptions.RequestException, exceptions.ServerError) as e:
+                        failures += 1
+                        if failures > max_retries:
+                            raise
+                        logger.warning(f"Import chunk at offset {offset} failed ({e}), resuming")
+                        resp = requests.get(upload_url, headers=self.headers, timeout=self.timeout)
+                        self._handle_response(resp, "Get import offset")
+                    offset = resp.json()["offset"] if resp.status_code != 409 \
+                        else int(resp.headers["Upload-Offset"])
+
+            resp = requests.post(f"{upload_url}/commit", headers=self.headers, timeout=max(self.timeout, 60))
+            self._handle_response(resp, "Commit import")
+            self._series_cache.clear()
+            logger.info(f"Successfully imported data from {path}")
+            return resp.json()
+
+        except requests.exceptions.Timeout:
+            raise exceptions.NetworkError(f"Request timed out after {self.timeout}s")
+        except requests.exceptions.ConnectionError as e:
+            raise exceptions.NetworkError(f"Connection failed: {e}")
+        except requests.exceptions.RequestException as e:
+            raise exceptions.NetworkError(f"Network error: {e}")
+
+    def compute(self, program: str, variables: Optional[list[str]] = None,
+                start: Optional[int] = None, end: Optional[int] = None) -> dict[str, models.DatapointSeries]:
+        """Evaluate a PulseLang program on the server (with COMMON_LIBRARY preloaded).
+
+        Returns the series bindings among variables (all of them if not given), restricted to [start, end].
+        The server only reads the parts of the metrics needed for that range.
+
+        Example:
+            >>> streams = client.compute('(define spent (sum-window (data "transactions") "30d"))',
+            ...                          start=1700000000000)
+            >>> print(len(streams['spent']))
+        """
+        if not program:
+            raise ValueError("program must not be empty")
+
+        try:
+            logger.debug(f"Computing program on the server, variables: {variables}")
+            resp = requests.post(
+                f"{self.url}/compute",
+                headers=self.headers,
+                json={"program": program, "variables": variables, "start": start, "end": end},
+                timeout=self.timeout
+            )
+            self._handle_response(resp, "Compute program")
+            return {name: models.DatapointSeries.from_api_obj(points)
+                    for name, points in resp.json()["series"].items()}
+
+        except requests.exceptions.Timeout:
+            raise exceptions.NetworkError(f"Request timed out after {self.timeout}s")
+        except requests.exceptions.ConnectionError as e:
+            raise exceptions.NetworkError(f"Connection failed: {e}")
+        except requests.exceptions.RequestException as e:
+            raise exceptions.NetworkError(f"Network error: {e}")
+
+    def clear_cache(self) -> None:
+        """Drop all series cached by fetch_datapoints."""
+        self._series_cache.clear()
     
     def upload_datapoints(self, metric_name: str, datapoints: models.DatapointSeries) -> None:
         """Upload datapoints for a specific metric.
@@ -159,13 +341,20 @@ class ImpulsesClient:
         
         try:
             logger.debug(f"Uploading {len(datapoints)} datapoints to metric: {metric_name}")
-            payload = datapoints.to_api_obj()
-            resp = requests.post(
-                f"{self.url}/data/{metric_name}",
-                headers=self.headers,
-                json=payload,
-                timeout=self.timeout
-            )
+            if self.binary:
+                resp = requests.post(
+                    f"{self.url}/data/{metric_name}",
+                    headers={**self.headers, "Content-Type": binary_format.MEDIA_TYPE},
+                    data=binary_format.encode(datapoints),
+                    timeout=self.timeout
+                )
+            else:
+                resp = requests.post(
+                    f"{self.url}/data/{metric_name}",
+                    headers=self.headers,
+                    json=datapoints.to_api_obj(),
+                    timeout=self.timeout
+                )
             self._handle_response(resp, f"Upload datapoints to '{metric_name}'")
             logger.info(f"Successfully uploaded {len(datapoints)} datapoints to {metric_name}")
         
@@ -193,6 +382,7 @@ class ImpulsesClient:
                 timeout=self.timeout
             )
             self._handle_response(resp, f"Delete metric '{metric_name}'")
+            self._series_cache.pop(metric_name, None)
             logger.info(f"Successfully deleted metric: {metric_name}")
         
         except requests.exceptions.Timeout:
@@ -201,3 +391,11 @@ class ImpulsesClient:
             raise exceptions.NetworkError(f"Connection failed: {e}")
         except requests.exceptions.RequestException as e:
             raise exceptions.NetworkError(f"Network error: {e}")
+
+
+def _merge_datapoints(old: list[models.Datapoint], changed: list[models.Datapoint]) -> list[models.Datapoint]:
+    """Overlays changed datapoints over old ones, keyed by timestamp and dimensions."""
+    merged = {(dp.timestamp, frozenset(dp.dimensions.items())): dp for dp in old}
+    for dp in changed:
+        merged[(dp.timestamp, frozenset(dp.dimensions.items()))] = dp
+    return sorted(merged.values(), key=lambda dp: dp.timestamp)
@@ -30,4 +30,9 @@ class ServerError(ImpulsesError):
 
 class NetworkError(ImpulsesError):
     """Raised when network/connection fails."""
-    pass
\ No newline at end of file
+    pass
+
+
+class PulseLangError(ImpulsesError):
+    """Raised when a PulseLang program can't be parsed or evaluated."""
+    pass
@@ -0,0 +1,125 @@
+"""
+Buckets of the bucketize methods of DatapointSeries: fixed windows, calendar days, weeks and months in an IANA
+time zone.
+
+Days, weeks and months follow the zone's calendar, so a day bucket spanning a daylight saving time change is 23 or 25
+hours long. Fixed windows are aligned to the local start of the day of the first point.
+"""
+from __future__ import annotations
+
+import bisect
+import dataclasses
+import datetime
+import functools
+import operator
+import typing
+import zoneinfo
+
+UTC = "UTC"
+
+_EPOCH = datetime.date(1970, 1, 1).toordinal()
+# the first Monday after the epoch, weeks are counted from it
+_EPOCH_MONDAY = datetime.date(1970, 1, 5).toordinal()
+
+
+@functools.lru_cache(maxsize=256)
+def time_zone(name: str) -> datetime.tzinfo:
+    if name == UTC:
+        return datetime.timezone.utc
+    try:
+        return zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone '{name}'") from None
+
+
+@dataclasses.dataclass(frozen=True)
+class Calendar:
+    """`size` milliseconds long fixed windows, or `size` days, weeks or months long calendar buckets of `zone`."""
+    unit: typing.Literal["fixed", "days", "weeks", "months"]
+    size: int
+    zone: str = UTC
+
+    def __post_init__(self):
+        if self.unit == "fixed" and self.size <= 0:
+            raise ValueError("Bucket duration must be positive")
+        if self.unit != "fixed" and (self.size <= 0 or int(self.size) != self.size):
+            raise ValueError(f"Bucket size ({self.unit}) must be a positive integer")
+        object.__setattr__(self, "size", int(self.size))
+        time_zone(self.zone)
+
+    def first_start(self, timestamp: int) -> int:
+        """Start of the bucket of timestamp when it's the first point of the series."""
+        date = self._local(timestamp).date()
+        match self.unit:
+            case "fixed":
+                anchor = self._start_of(date)
+                return anchor + (timestamp - anchor) // self.size * self.size
+            case "days":
+                days = date.toordinal() - _EPOCH
+                return self._start_of(datetime.date.fromordinal(_EPOCH + days - days % self.size))
+            case "weeks":
+                weeks = (date.toordinal() - _EPOCH_MONDAY) // 7
+                return self._start_of(datetime.date.fromordinal(_EPOCH_MONDAY + (weeks - weeks % self.size) * 7))
+            case _:
+                index = date.year * 12 + date.month - 1
+                return self._start_of_month(index - index % 12 + index % 12 // self.size * self.size)
+
+    def next_start(self, start: int) -> int:
+        """Start of the bucket after the one starting at start."""
+        match self.unit:
+            case "fixed":
+                return start + self.size
+            case "days" | "weeks":
+                date = self._local(start).date()
+                return self._start_of(date + datetime.timedelta(days=self.size * (7 if self.unit == "weeks" else 1)))
+            case _:
+                date = self._local(start)
+                return self._start_of_month(date.year * 12 + date.month - 1 + self.size)
+
+    def starts(self, first: int, last: int) -> list[int]:
+        """Starts of the buckets from the one of the first point to the one of the last point, and of the next one."""
+        starts = [self.first_start(first)]
+        if self.unit == "fixed":
+            count = (last - starts[0]) // self.size + 2
+            return list(range(starts[0], starts[0] + count * self.size, self.size))
+        while starts[-1] <= last:
+            starts.append(self.next_start(starts[-1]))
+        return starts
+
+    def _local(self, timestamp: int) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(timestamp / 1000, tz=time_zone(self.zone))
+
+    def _start_of(self, date: datetime.date) -> int:
+        # a midnight skipped by a daylight saving time change resolves to the instant the day starts
+        return int(datetime.datetime.combine(date, datetime.time(), tzinfo=time_zone(self.zone)).timestamp()) * 1000
+
+    def _start_of_month(self, index: int) -> int:
+        return self._start_of(datetime.date(index // 12, index % 12 + 1, 1))
+
+
+def segments(timestamps: list[int], starts: list[int]) -> list[int]:
+    """Offsets of the first timestamp at or after every start, for timestamps sorted and within the starts."""
+    offsets = [0]
+    for start in starts[1:-1]:
+        offsets.append(bisect.bisect_left(timestamps, start, offsets[-1]))
+    offsets.append(len(timestamps))
+    return offsets
+
+
+def bucketize(timestamps: list[int], values: list[float], calendar: Calendar,
+              aggregate: typing.Callable[[list[float]], float],
+              init_val: float) -> list[tuple[int, float]]:
+    """(start, aggregate of its values) of every bucket from the first to the last timestamp, init_val if empty.
+
+    The points are sorted once (unless they are in time order already) and the values of every bucket are a slice of
+    the sorted ones, so aggregates like sum or max reduce each bucket without going through its values in Python.
+    """
+    if not timestamps:
+        return []
+    if not all(map(operator.le, timestamps, timestamps[1:])):
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        timestamps, values = [timestamps[i] for i in order], [values[i] for i in order]
+    starts = calendar.starts(timestamps[0], timestamps[-1])
+    offsets = segments(timestamps, starts)
+    return [(start, aggregate(values[lo:hi]) if hi > lo else init_val)
+            for start, lo, hi in zip(starts, offsets, offsets[1:])]
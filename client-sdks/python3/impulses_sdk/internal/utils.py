@@ -0,0 +1,18 @@
+import re
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+_DURATION_REGEX = re.compile(r"(-?\d+)(d|h|min|ms|m|s)")
+_UNIT_MS = {
+    "d": DAY_MS,
+    "h": 60 * 60 * 1000,
+    "min": 60 * 1000,
+    "m": 60 * 1000,
+    "s": 1000,
+    "ms": 1,
+}
+
+
+def parse_duration(duration: str) -> int:
+    """Parses durations like "1h30min" into milliseconds. Returns 0 if nothing matches."""
+    return sum(int(amount) * _UNIT_MS[unit] for amount, unit in _DURATION_REGEX.findall(duration))
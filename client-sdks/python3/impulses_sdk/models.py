@@ -1,6 +1,9 @@
 import abc
 from typing import Mapping, Tuple, Optional, Callable, Self
 
+from . import quantiles
+from .internal import buckets
+
 class Datapoint:
     def __init__(self, timestamp: int, value: float, dimensions: Optional[Mapping[str, str]] = None):
         self.timestamp = timestamp
@@ -100,6 +103,7 @@ class DatapointSeries(EvaluatedImpulse):
         Example:
             >>> series.sliding_window(30, sum)  # 30-day rolling sum
             >>> series.sliding_window(7, statistics.mean)  # 7-day moving average
+            >>> series.sliding_window(7, Percentile(95))  # 7-day p95, without sorting every window
         """
         import heapq
         import collections
@@ -110,6 +114,8 @@ class DatapointSeries(EvaluatedImpulse):
         result_dps = []
         val_cnt = 0
         values = collections.defaultdict(int)
+        # Percentiles keep the window's values in order instead of sorting them at every point
+        ordered = operation.window() if isinstance(operation, quantiles.Percentile) else None
         events = [(dp.timestamp, "add", dp.value) for dp in self]
         heapq.heapify(events)
         
@@ -119,11 +125,20 @@ class DatapointSeries(EvaluatedImpulse):
                 break
             if kind == "add":
                 val_cnt += 1
-                values[val] += 1
+                if ordered is None:
+                    values[val] += 1
+                else:
+                    ordered.add(val)
                 heapq.heappush(events, (time + window, "remove", val))
             else:
                 val_cnt -= 1
-                values[val] -= 1
+                if ordered is None:
+                    values[val] -= 1
+                    # forget values that left the window
+                    if values[val] == 0:
+                        del values[val]
+                else:
+                    ordered.remove(val)
             
             # Don't push two datapoints with the same timestamp
             if events and events[0][0] == time:
@@ -134,6 +149,10 @@ class DatapointSeries(EvaluatedImpulse):
                 result_dps.append(Datapoint(time, self.init_val))
                 continue
             
+            if ordered is not None:
+                result_dps.append(Datapoint(time, operation.of(ordered)))
+                continue
+            
             # Flatten values for operation
             flat = []
             for v, c in values.items():
@@ -145,6 +164,46 @@ class DatapointSeries(EvaluatedImpulse):
             result_dps.pop()
         
         return DatapointSeries(result_dps, self.init_val)
+    def shift(self, duration: int) -> 'DatapointSeries':
+        """Move every datapoint `duration` milliseconds forward in time."""
+        return DatapointSeries([Datapoint(dp.timestamp + duration, dp.value, dp.dimensions) for dp in self.series],
+                               self.init_val)
+    def bucketize(self, duration: int, aggregate: Callable[[list[float]], float],
+                  zone: str = buckets.UTC) -> 'DatapointSeries':
+        """Aggregate values into consecutive buckets of `duration` milliseconds, aligned to the day of the first datapoint
+        in the IANA time zone `zone`.
+
+        Empty buckets get init_val.
+
+        Example:
+            >>> series.bucketize(60 * 60 * 1000, sum)  # hourly sums
+        """
+        return self._bucketize(buckets.Calendar("fixed", duration, zone), aggregate)
+    def bucketize_days(self, days: int, aggregate: Callable[[list[float]], float],
+                       zone: str = buckets.UTC) -> 'DatapointSeries':
+        """Aggregate values into buckets of `days` calendar days in the IANA time zone `zone`, aligned to 1970-01-01.
+
+        Example:
+            >>> series.bucketize_days(1, sum, "Europe/Warsaw")  # daily sums, 23 or 25 hours long across DST changes
+        """
+        return self._bucketize(buckets.Calendar("days", days, zone), aggregate)
+    def bucketize_weeks(self, weeks: int, aggregate: Callable[[list[float]], float],
+                        zone: str = buckets.UTC) -> 'DatapointSeries':
+        """Aggregate values into buckets of `weeks` weeks starting on Monday in the IANA time zone `zone`."""
+        return self._bucketize(buckets.Calendar("weeks", weeks, zone), aggregate)
+    def bucketize_months(self, months: int, aggregate: Callable[[list[float]], float],
+                         zone: str = buckets.UTC) -> 'DatapointSeries':
+        """Aggregate values into buckets of `months` calendar months in the IANA time zone `zone`, aligned to the start
+        of the year.
+
+        Example:
+            >>> series.bucketize_months(3, sum)  # quarterly sums
+        """
+        return self._bucketize(buckets.Calendar("months", months, zone), aggregate)
+    def _bucketize(self, calendar: buckets.Calendar, aggregate: Callable[[list[float]], float]) -> 'DatapointSeries':
+        bucketized = buckets.bucketize([dp.timestamp for dp in self.series], [dp.value for dp in self.series],
+                                       calendar, aggregate, self.init_val)
+        return DatapointSeries([Datapoint(start, value) for start, value in bucketized], self.init_val)
     def __iter__(self):
         return self.series.__iter__()
     def to_api_obj(self):
@@ -152,6 +211,12 @@ class DatapointSeries(EvaluatedImpulse):
     @staticmethod
     def from_api_obj(series):
         return DatapointSeries(series = [Datapoint.from_api_obj(dp) for dp in series])
+    @staticmethod
+    def from_columnar_api_obj(columns):
+        """Decodes the columnar shape: {"t": timestamps, "v": values, "d": indices into "dims", "dims": dimensions}."""
+        dims = columns["dims"]
+        return DatapointSeries(series = [Datapoint(t, v, dims[d])
+                                         for t, v, d in zip(columns["t"], columns["v"], columns["d"])])
     def __str__(self):
         return "DatapointSeries{series=[" + ", ".join([str(dp) for dp in self.series]) + \
                 "], init_val=" + str(self.init_val) + "}"
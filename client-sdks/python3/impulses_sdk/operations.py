@@ -1,41 +1,110 @@
+import functools
 import heapq
-import collections
+import math
+import operator
 import typing
 from . import models
 
+
+class BulkOperation:
+    """An operation on the latest values of composed impulses that can also be applied to whole columns at once.
+
+    `columns` receives one numpy array per impulse (the impulse's latest value at every output timestamp) and
+    must compute the same values as `scalar` does for each of them.
+    """
+    def __init__(self, scalar: typing.Callable[[list], float], columns: typing.Callable[[list], typing.Any]):
+        self.scalar = scalar
+        self.columns = columns
+    def __call__(self, values: list) -> float:
+        return self.scalar(values)
+
+
+SUM = BulkOperation(sum, lambda columns: functools.reduce(operator.add, columns, 0))
+PRODUCT = BulkOperation(math.prod, lambda columns: functools.reduce(operator.mul, columns, 1))
+DIFFERENCE = BulkOperation(lambda values: values[0] - values[1], lambda columns: columns[0] - columns[1])
+
+
+def _numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
 def compose_impulses(evaled_impulses: typing.List[models.EvaluatedImpulse], operation):
     """Composes impulses, e.g. adding or multiplying them.
+
+    The operation is applied to the latest values of all impulses at every timestamp of any of them. If numpy is
+    installed, BulkOperations (SUM, PRODUCT, DIFFERENCE) are applied to all timestamps at once, arbitrary callables
+    are applied while merging the impulses.
     """
+    new_init = operation([evaled_impulse.get_init_val() for evaled_impulse in evaled_impulses])
+    series = [None if evaled_impulse.is_constant() else evaled_impulse.as_dp_series()
+              for evaled_impulse in evaled_impulses]
+    if all(s is None or s.is_empty() for s in series):
+        return models.ConstantImpulse(new_init)
+
+    numpy = _numpy() if isinstance(operation, BulkOperation) else None
+    if numpy is not None:
+        result = _compose_columns(numpy, evaled_impulses, series, operation)
+    else:
+        result = _compose_merging(evaled_impulses, series, operation)
+    return models.DatapointSeries(series=result, init_val=new_init)
+
+
+def _compose_columns(numpy, evaled_impulses, series, operation: BulkOperation) -> typing.List[models.Datapoint]:
+    """Aligns the impulses on the union of their timestamps, forward-filling each of them."""
+    columns = [None if s is None or s.is_empty() else s.decompose() for s in series]
+    timestamps = numpy.sort(numpy.concatenate([numpy.asarray(column[0], dtype=numpy.int64)
+                                               for column in columns if column is not None]))
+    timestamps = timestamps[numpy.concatenate(([True], timestamps[1:] != timestamps[:-1]))]
+    aligned = []
+    for evaled_impulse, column in zip(evaled_impulses, columns):
+        init_val = evaled_impulse.get_init_val()
+        if column is None:
+            aligned.append(numpy.full(len(timestamps), init_val, dtype=numpy.float64))
+            continue
+        # index of the last datapoint at or before every timestamp (-1 before the first one): the last datapoint
+        # of every timestamp of the impulse marks its position, carried forward by a running maximum
+        impulse_timestamps = numpy.asarray(column[0], dtype=numpy.int64)
+        last = numpy.append(impulse_timestamps[1:] != impulse_timestamps[:-1], True)
+        marks = numpy.zeros(len(timestamps), dtype=numpy.int64)
+        marks[numpy.searchsorted(timestamps, impulse_timestamps[last])] = numpy.flatnonzero(last) + 1
+        idx = numpy.maximum.accumulate(marks) - 1
+        values = numpy.asarray(column[1], dtype=numpy.float64)[numpy.maximum(idx, 0)]
+        aligned.append(numpy.where(idx >= 0, values, init_val))
+    with numpy.errstate(all="ignore"):
+        # like the scalar operations, inf - inf is nan without a warning
+        values = numpy.broadcast_to(operation.columns(aligned), timestamps.shape)
+    return [models.Datapoint(timestamp, value) for timestamp, value in zip(timestamps.tolist(), values.tolist())]
+
+
+def _compose_merging(evaled_impulses, series, operation) -> typing.List[models.Datapoint]:
+    """k-way merge of the impulses, with one heap entry per impulse."""
     indices = [0 for _ in evaled_impulses]
     last_vals = [evaled_impulse.get_init_val() for evaled_impulse in evaled_impulses]
-    new_init = operation([series.get_init_val() for series in evaled_impulses])
 
     pq = []
-    constant = True
-    for i, evaled_impulse in enumerate(evaled_impulses):
-        if evaled_impulse.is_constant():
-            continue
-        series = evaled_impulse.as_dp_series()
-        constant = False
-        pq.append((series.time_at(0), series.value_at(0), i))
-    if constant or not pq:
-        return models.ConstantImpulse(new_init)
+    for i, s in enumerate(series):
+        if s is not None and not s.is_empty():
+            pq.append((s.time_at(0), s.value_at(0), i))
     heapq.heapify(pq)
 
     result = []
 
-    curr_time = min(dp_with_index[0] for dp_with_index in pq)
+    curr_time = pq[0][0]
     def flush(new_time: int) -> None:
         nonlocal curr_time
         result.append(models.Datapoint(curr_time, operation(last_vals)))
         curr_time = new_time
     def maybe_heappush_from(series_idx: int) -> None:
         indices[series_idx] += 1
-        if indices[series_idx] < len(evaled_impulses[series_idx].as_dp_series()):
-            datapoint = evaled_impulses[series_idx].as_dp_series()[indices[series_idx]]
+        if indices[series_idx] < len(series[series_idx]):
+            datapoint = series[series_idx][indices[series_idx]]
             heapq.heappush(pq, (datapoint.timestamp, datapoint.value, series_idx))
-        
-    # pq is always non-empty at the beginning, thus new_time 
+
+    # pq is always non-empty at the beginning, thus new_time
     # is guaranteed to be populated with a proper value
     new_time = -1
     while pq:
@@ -45,5 +114,4 @@ def compose_impulses(evaled_impulses: typing.List[models.EvaluatedImpulse], oper
             flush(new_time)
         last_vals[series_idx] = new_val
     flush(new_time)
-
-    return models.DatapointSeries(series=result, init_val=new_init)
\ No newline at end of file
+    return result
@@ -0,0 +1,12 @@
+"""PulseLang interpreter (see docs/PulseLang.md)."""
+
+from .parser import parse
+from .evaluator import Runtime, compute
+from .library import COMMON_LIBRARY
+
+__all__ = [
+    "parse",
+    "Runtime",
+    "compute",
+    "COMMON_LIBRARY",
+]
@@ -0,0 +1,452 @@
+"""PulseLang evaluator, mirroring the TypeScript SDK's interpreter."""
+import concurrent.futures
+import inspect
+import math
+import re
+import statistics
+import time
+from typing import Any, Callable, Optional, Sequence
+
+from .. import models
+from .. import operations
+from .. import quantiles
+from ..exceptions import PulseLangError
+from ..internal import buckets, utils
+from .parser import AstNode, ListNode, NumberNode, StringNode, SymbolNode, parse
+
+Resolver = Callable[[str], models.DatapointSeries]
+
+
+class Environment:
+    def __init__(self, parent: Optional['Environment'] = None):
+        self.values: dict[str, Any] = {}
+        self.parent = parent
+    def define(self, name: str, value) -> None:
+        self.values[name] = value
+    def assign(self, name: str, value) -> None:
+        if name in self.values:
+            self.values[name] = value
+        elif self.parent is not None:
+            self.parent.assign(name, value)
+        else:
+            raise PulseLangError(f"Undefined symbol '{name}'")
+    def lookup(self, name: str):
+        env = self
+        while env is not None:
+            if name in env.values:
+                return env.values[name]
+            env = env.parent
+        raise PulseLangError(f"Undefined symbol '{name}'")
+    def snapshot(self) -> dict[str, Any]:
+        return dict(self.values)
+
+
+class NativeFunction:
+    """A builtin. Like in the TypeScript interpreter, extra arguments are dropped and missing ones are None."""
+    def __init__(self, name: str, impl: Callable):
+        self.name = name
+        self.impl = impl
+        params = inspect.signature(impl).parameters.values()
+        self.variadic = any(param.kind == param.VAR_POSITIONAL for param in params)
+        self.arity = sum(1 for param in params if param.kind == param.POSITIONAL_OR_KEYWORD)
+    def __call__(self, args: list):
+        if not self.variadic:
+            args = (list(args) + [None] * self.arity)[:self.arity]
+        return self.impl(*args)
+    def __repr__(self):
+        return f"<native {self.name}>"
+
+
+class PercentileFunction(NativeFunction):
+    """The aggregate of (p percent [accuracy]), which windows and buckets apply to their values directly."""
+    def __init__(self, percentile: quantiles.Percentile):
+        super().__init__("percentile", lambda values: percentile(expect_number_list(values)))
+        self.percentile = percentile
+
+
+class Lambda:
+    def __init__(self, params: list[str], body: tuple, env: Environment):
+        self.params = params
+        self.body = body
+        self.env = env
+    def __repr__(self):
+        return f"<lambda ({' '.join(self.params)})>"
+
+
+def truthy(value) -> bool:
+    if isinstance(value, (bool, int, float, str, list)):
+        return bool(value)
+    return value is not None
+
+
+def expect_number(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise PulseLangError("Expected number")
+    return value
+
+
+def expect_string(value) -> str:
+    if not isinstance(value, str):
+        raise PulseLangError("Expected string")
+    return value
+
+
+def expect_zone(value) -> str:
+    """An IANA time zone name, UTC if omitted."""
+    return buckets.UTC if value is None else expect_string(value)
+
+
+def expect_series(value) -> models.DatapointSeries:
+    if not isinstance(value, models.DatapointSeries):
+        raise PulseLangError("Expected datapoint series")
+    return value
+
+
+def expect_function(value):
+    if not isinstance(value, (NativeFunction, Lambda)):
+        raise PulseLangError("Expected function value")
+    return value
+
+
+def expect_datapoint(value) -> models.Datapoint:
+    if isinstance(value, models.Datapoint):
+        return value
+    if isinstance(value, models.DatapointSeries):
+        raise PulseLangError("Expected datapoint but received series")
+    raise PulseLangError("Expected datapoint")
+
+
+def expect_number_list(value) -> list[float]:
+    if not isinstance(value, list):
+        raise PulseLangError("Expected list of numbers")
+    return [expect_number(item) for item in value]
+
+
+class Runtime:
+    """Evaluates programs in a global environment that's kept between evaluate() calls.
+
+    `data` calls go through the resolver and are memoized for the lifetime of the runtime.
+
+    Example:
+        >>> runtime = Runtime(client.fetch_datapoints)
+        >>> runtime.evaluate(COMMON_LIBRARY)
+        >>> runtime.evaluate('(define hourly (buckets (data "cpu") HOUR))')["hourly"]
+    """
+    def __init__(self, resolver: Resolver):
+        self.resolver = resolver
+        self.resolver_cache: dict[str, models.DatapointSeries] = {}
+        self.builtins_env = Environment()
+        self._register_builtins()
+        self.global_env = Environment(self.builtins_env)
+
+    def evaluate(self, source: str) -> dict[str, Any]:
+        return self.evaluate_nodes(parse(source))
+
+    def evaluate_nodes(self, nodes: Sequence[AstNode]) -> dict[str, Any]:
+        for node in nodes:
+            self.eval_node(node, self.global_env)
+        return self.global_env.snapshot()
+
+    def eval_node(self, node: AstNode, env: Environment):
+        if isinstance(node, (NumberNode, StringNode)):
+            return node.value
+        if isinstance(node, SymbolNode):
+            return env.lookup(node.name)
+        return self._eval_list(node, env)
+
+    def _eval_list(self, node: ListNode, env: Environment):
+        if not node.items:
+            return []
+
+        head = node.items[0]
+        if head == SymbolNode("define"):
+            if len(node.items) < 2 or not isinstance(node.items[1], SymbolNode):
+                raise PulseLangError("define expects a symbol name")
+            if len(node.items) < 3:
+                raise PulseLangError("define missing value expression")
+            value = self.eval_node(node.items[2], env)
+            env.define(node.items[1].name, value)
+            return value
+
+        if head == SymbolNode("lambda"):
+            if len(node.items) < 2 or not isinstance(node.items[1], ListNode):
+                raise PulseLangError("lambda expects a parameter list")
+            params = []
+            for param in node.items[1].items:
+                if not isinstance(param, SymbolNode):
+                    raise PulseLangError("lambda parameter must be a symbol")
+                params.append(param.name)
+            return Lambda(params, node.items[2:], env)
+
+        fn = self.eval_node(head, env)
+        return self.call_function(fn, [self.eval_node(item, env) for item in node.items[1:]])
+
+    def call_function(self, fn, args: list):
+        if isinstance(fn, NativeFunction):
+            try:
+                return fn(args)
+            except (TypeError, ValueError, ZeroDivisionError, re.error) as e:
+                raise PulseLangError(f"{fn.name}: {e}") from e
+        if not isinstance(fn, Lambda):
+            raise PulseLangError("Attempted to call non-function value")
+        scope = Environment(fn.env)
+        for i, param in enumerate(fn.params):
+            scope.define(param, args[i] if i < len(args) else None)
+        result = 0
+        for expr in fn.body:
+            result = self.eval_node(expr, scope)
+        return result
+
+    def _aggregate_with(self, fn) -> Callable[[list[float]], float]:
+        return lambda values: expect_number(self.call_function(fn, [values]))
+
+    def _values_aggregate(self, fn) -> Callable[[list[float]], float]:
+        """Builtin aggregates reduce the values of a window or bucket directly, they are numbers already."""
+        if isinstance(fn, PercentileFunction):
+            return fn.percentile
+        for name, reduce in [("sum", sum), ("count", len), ("avg", statistics.fmean), ("min", min), ("max", max)]:
+            if fn is self.builtins_env.values.get(name):
+                return reduce
+        return self._aggregate_with(fn)
+
+    def _define_native(self, name: str, impl: Callable) -> None:
+        self.builtins_env.define(name, NativeFunction(name, impl))
+
+    def _register_builtins(self) -> None:
+        def data(name):
+            metric_name = expect_string(name)
+            if metric_name not in self.resolver_cache:
+                self.resolver_cache[metric_name] = self.resolver(metric_name)
+            return self.resolver_cache[metric_name]
+
+        def window(series, duration, aggregate):
+            series = expect_series(series)
+            duration = utils.parse_duration(expect_string(duration))
+            if duration == 0:
+                raise PulseLangError("Duration of a window must be non-zero")
+            return series.sliding_window(duration, self._values_aggregate(expect_function(aggregate)))
+
+        def prefix(series, aggregate):
+            return expect_series(series).prefix_op(self._aggregate_with(expect_function(aggregate)))
+
+        def bucketize(series, duration, aggregate, zone=None):
+            series = expect_series(series)
+            duration = utils.parse_duration(expect_string(duration))
+            return series.bucketize(duration, self._values_aggregate(expect_function(aggregate)), expect_zone(zone))
+
+        def bucketize_days(series, days, aggregate, zone=None):
+            series = expect_series(series)
+            days = expect_number(days)
+            return series.bucketize_days(days, self._values_aggregate(expect_function(aggregate)), expect_zone(zone))
+
+        def bucketize_weeks(series, weeks, aggregate, zone=None):
+            series = expect_series(series)
+            weeks = expect_number(weeks)
+            return series.bucketize_weeks(weeks, self._values_aggregate(expect_function(aggregate)), expect_zone(zone))
+
+        def bucketize_months(series, months, aggregate, zone=None):
+            series = expect_series(series)
+            months = expect_number(months)
+            return series.bucketize_months(months, self._values_aggregate(expect_function(aggregate)),
+                                           expect_zone(zone))
+
+        def shift(duration, series):
+            duration = utils.parse_duration(expect_string(duration))
+            return expect_series(series).shift(duration)
+
+        def before_now():
+            return NativeFunction("before-now-predicate",
+                                  lambda _value, dp: expect_datapoint(dp).timestamp < time.time() * 1000)
+
+        def filter_(target, predicate):
+            predicate = expect_function(predicate)
+            return expect_series(target).filter(lambda dp: truthy(self.call_function(predicate, [dp.value, dp])))
+
+        def map_(target, *mappers):
+            series = expect_series(target)
+            for mapper in mappers:
+                series = series.map(self._mapping_with(expect_function(mapper)))
+            return series
+
+        def compose(*args):
+            if len(args) < 2:
+                raise PulseLangError("compose expects at least one stream and an aggregate function")
+            aggregate = expect_function(args[-1])
+            streams = [expect_series(stream) for stream in args[:-1]]
+            operation = self._bulk_operation(aggregate, len(streams))
+            if operation is None:
+                operation = lambda values: expect_number(self.call_function(aggregate, list(values)))
+            result = operations.compose_impulses(streams, operation)
+            if result.is_constant():
+                return models.DatapointSeries([], result.get_init_val())
+            return result
+
+        def not_(predicate):
+            predicate = expect_function(predicate)
+            return NativeFunction("not-predicate", lambda *args: not truthy(self.call_function(predicate, list(args))))
+
+        def and_(*predicates):
+            predicates = [expect_function(predicate) for predicate in predicates]
+            return NativeFunction("and-predicate", lambda *args: all(
+                truthy(self.call_function(predicate, list(args))) for predicate in predicates))
+
+        def or_(*predicates):
+            predicates = [expect_function(predicate) for predicate in predicates]
+            return NativeFunction("or-predicate", lambda *args: any(
+                truthy(self.call_function(predicate, list(args))) for predicate in predicates))
+
+        def dimension_is(key, value):
+            key, expected = expect_string(key), expect_string(value)
+            return NativeFunction("dimension-is-predicate",
+                                  lambda _value, dp: expect_datapoint(dp).dimensions.get(key) == expected)
+
+        def dim_matches(key, regex):
+            key, regex = expect_string(key), re.compile(expect_string(regex))
+            def predicate(_value, dp):
+                value = expect_datapoint(dp).dimensions.get(key)
+                return value is not None and regex.search(value) is not None
+            return NativeFunction("dim-matches-predicate", predicate)
+
+        def no_dimension(key):
+            key = expect_string(key)
+            return NativeFunction("no-dimension-predicate", lambda _value, dp: key not in expect_datapoint(dp).dimensions)
+
+        for name, impl in [("data", data), ("window", window), ("prefix", prefix), ("bucketize", bucketize),
+                           ("bucketize-days", bucketize_days), ("bucketize-weeks", bucketize_weeks),
+                           ("bucketize-months", bucketize_months), ("shift", shift), ("before-now", before_now),
+                           ("filter", filter_), ("map", map_), ("compose", compose), ("not", not_), ("and", and_),
+                           ("or", or_), ("dimension-is", dimension_is), ("dim-matches", dim_matches),
+                           ("no-dimension", no_dimension)]:
+            self._define_native(name, impl)
+        self._install_comparators()
+        self._install_arithmetic()
+        self._install_aggregates()
+
+    def _mapping_with(self, mapper) -> Callable[[models.Datapoint], models.Datapoint]:
+        def mapping(dp: models.Datapoint) -> models.Datapoint:
+            mapped = self.call_function(mapper, [dp.value, dp])
+            if isinstance(mapped, models.Datapoint):
+                return mapped
+            return models.Datapoint(dp.timestamp, expect_number(mapped), dp.dimensions)
+        return mapping
+
+    def _bulk_operation(self, aggregate, stream_count: int) -> Optional[operations.BulkOperation]:
+        """The bulk equivalent of composing stream_count streams with a builtin, if there is one."""
+        if aggregate is self.builtins_env.values.get("+"):
+            return operations.SUM
+        if aggregate is self.builtins_env.values.get("*"):
+            return operations.PRODUCT
+        if aggregate is self.builtins_env.values.get("-") and stream_count == 2:
+            return operations.DIFFERENCE
+        return None
+
+    def _install_arithmetic(self) -> None:
+        self._define_native("+", lambda *args: sum(expect_number(arg) for arg in args))
+        self._define_native("-", lambda a, b: expect_number(a) - expect_number(b))
+        self._define_native("*", lambda *args: math.prod(expect_number(arg) for arg in args))
+        self._define_native("/", lambda a, b: _divide(expect_number(a), expect_number(b)))
+        self._define_native("exp", lambda a, b: math.pow(expect_number(a), expect_number(b)))
+        self._define_native("abs", lambda value: abs(expect_number(value)))
+        self._define_native("sgn", lambda value: _sign(expect_number(value)))
+
+    def _install_comparators(self) -> None:
+        def register(name: str, op: Callable[[float, float], bool]) -> None:
+            def comparator(a, b):
+                if b is None:
+                    bound = expect_number(a)
+                    return NativeFunction(f"{name}-predicate", lambda value: op(expect_number(value), bound))
+                return op(expect_number(a), expect_number(b))
+            self._define_native(name, comparator)
+
+        register("<", lambda l, r: l < r)
+        register(">", lambda l, r: l > r)
+        register("<=", lambda l, r: l <= r)
+        register(">=", lambda l, r: l >= r)
+        register("=", lambda l, r: l == r)
+
+    def _install_aggregates(self) -> None:
+        def aggregate_from(fn):
+            binary = expect_function(fn)
+            def aggregate(values):
+                values = expect_number_list(values)
+                if not values:
+                    return 0
+                acc = values[0]
+                for value in values[1:]:
+                    acc = expect_number(self.call_function(binary, [acc, value]))
+                return acc
+            return NativeFunction("aggregate-from-result", aggregate)
+
+        def percentile(percent, accuracy=None):
+            percent = expect_number(percent)
+            try:
+                return PercentileFunction(
+                    quantiles.Percentile(percent, None if accuracy is None else expect_number(accuracy)))
+            except ValueError as e:
+                raise PulseLangError(str(e))
+
+        def std(values):
+            values = expect_number_list(values)
+            return statistics.stdev(values) if len(values) > 1 else 0
+
+        self._define_native("aggregate-from", aggregate_from)
+        self._define_native("p", percentile)
+        self._define_native("count", lambda values: len(expect_number_list(values)))
+        self._define_native("sum", lambda values: sum(expect_number_list(values)))
+        self._define_native("avg", lambda values: statistics.fmean(values) if expect_number_list(values) else 0)
+        self._define_native("min", lambda values: min(expect_number_list(values), default=0))
+        self._define_native("max", lambda values: max(expect_number_list(values), default=0))
+        self._define_native("std", std)
+
+
+def _divide(a: float, b: float) -> float:
+    if b == 0:
+        # same as in the TypeScript interpreter
+        return math.nan if a == 0 else math.copysign(math.inf, a)
+    return a / b
+
+
+def _sign(value: float) -> float:
+    return (value > 0) - (value < 0) if not math.isnan(value) else math.nan
+
+
+def referenced_metrics(nodes: Sequence[AstNode]) -> set[str]:
+    """Names used in literal (data "name") calls, which can be fetched before evaluation."""
+    names = set()
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, ListNode):
+            continue
+        if len(node.items) == 2 and node.items[0] == SymbolNode("data") and isinstance(node.items[1], StringNode):
+            names.add(node.items[1].value)
+        stack.extend(node.items)
+    return names
+
+
+def compute(client, library: str, program: str, max_workers: int = 8) -> dict[str, models.DatapointSeries]:
+    """Evaluates the library and then the program, returning the series bound at the top level.
+
+    Every metric the program (or library) references with a literal (data "name") is fetched concurrently
+    before evaluation starts; other names are fetched when evaluated. Each metric is fetched at most once.
+
+    Example:
+        >>> from impulses_sdk.pulselang import compute, COMMON_LIBRARY
+        >>> compute(client, COMMON_LIBRARY, '(define daily (buckets (data "cpu") DAY))')["daily"]
+    """
+    library_nodes = parse(library)
+    program_nodes = parse(program)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(client.fetch_datapoints, name)
+                   for name in referenced_metrics(library_nodes + program_nodes)}
+
+        def resolve(metric_name: str) -> models.DatapointSeries:
+            future = futures.get(metric_name)
+            if future is None:
+                return client.fetch_datapoints(metric_name)
+            return future.result()
+
+        runtime = Runtime(resolve)
+        runtime.evaluate_nodes(library_nodes)
+        env = runtime.evaluate_nodes(program_nodes)
+    return {name: value for name, value in env.items() if isinstance(value, models.DatapointSeries)}
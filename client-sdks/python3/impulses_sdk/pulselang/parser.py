@@ -0,0 +1,117 @@
+"""Tokenizer and parser of PulseLang, an s-expression language (see docs/PulseLang.md)."""
+import collections
+import dataclasses
+import hashlib
+import re
+import threading
+from typing import Iterator, Union
+
+from ..exceptions import PulseLangError
+
+_NUMBER_REGEX = re.compile(r"-?\d+(?:\.\d+)?")
+_SYMBOL_REGEX = re.compile(r"[^\s()]+")
+_CACHE_SIZE = 128
+
+
+@dataclasses.dataclass(frozen=True)
+class NumberNode:
+    value: Union[int, float]
+
+
+@dataclasses.dataclass(frozen=True)
+class StringNode:
+    value: str
+
+
+@dataclasses.dataclass(frozen=True)
+class SymbolNode:
+    name: str
+
+
+@dataclasses.dataclass(frozen=True)
+class ListNode:
+    items: tuple
+
+
+AstNode = Union[ListNode, NumberNode, StringNode, SymbolNode]
+
+
+_cache: collections.OrderedDict[str, tuple[AstNode, ...]] = collections.OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse(source: str) -> tuple[AstNode, ...]:
+    """Parses a program into its top-level expressions.
+
+    ASTs are immutable and cached by the program's sha256, so libraries evaluated over and over
+    (e.g. COMMON_LIBRARY for every chart of a dashboard) are only parsed once.
+    """
+    key = hashlib.sha256(source.encode()).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    tokens = iter(_tokenize(source))
+    nodes = tuple(_read_node(token, tokens) for token in tokens)
+    with _cache_lock:
+        _cache[key] = nodes
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return nodes
+
+
+def _read_node(token: tuple[str, str], tokens: Iterator[tuple[str, str]]) -> AstNode:
+    kind, value = token
+    if kind == "number":
+        return NumberNode(float(value) if "." in value else int(value))
+    if kind == "string":
+        return StringNode(value)
+    if kind == "symbol":
+        return SymbolNode(value)
+    if value == ")":
+        raise PulseLangError("Unexpected closing parenthesis")
+
+    items = []
+    for token in tokens:
+        if token == ("paren", ")"):
+            return ListNode(tuple(items))
+        items.append(_read_node(token, tokens))
+    raise PulseLangError("Unbalanced parentheses in DSL expression")
+
+
+def _tokenize(source: str) -> list[tuple[str, str]]:
+    tokens = []
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char in "()":
+            tokens.append(("paren", char))
+            i += 1
+        elif char.isspace():
+            i += 1
+        elif char == ";":
+            while i < len(source) and source[i] != "\n":
+                i += 1
+        elif char == '"':
+            value = []
+            i += 1
+            while i < len(source) and source[i] != '"':
+                if source[i] == "\\" and i + 1 < len(source):
+                    value.append(source[i + 1])
+                    i += 2
+                    continue
+                value.append(source[i])
+                i += 1
+            if i >= len(source):
+                raise PulseLangError("Unterminated string literal in DSL expression")
+            i += 1
+            tokens.append(("string", "".join(value)))
+        else:
+            match = _NUMBER_REGEX.match(source, i)
+            kind = "number"
+            if not match:
+                match = _SYMBOL_REGEX.match(source, i)
+                kind = "symbol"
+            tokens.append((kind, match.group()))
+            i = match.end()
+    return tokens
@@ -0,0 +1,166 @@
+"""
+Percentiles, exact or within a relative accuracy, e.g. for sliding windows and buckets:
+
+    >>> series.sliding_window(60 * 60 * 1000, Percentile(95, accuracy=0.01))  # hourly p95, within 1%
+
+Approximate percentiles come from a mergeable quantile sketch that counts values in logarithmically sized bins: a
+value is reported as its bin's representative, which is within the sketch's relative accuracy of it. Unlike KLL or
+t-digest, the bins' counts can also be decremented, so a sliding window removes the values leaving it in O(1), and
+memory depends on the range of the values rather than on their number.
+
+NaN sorts after every other value, as an unknown largest value.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import sys
+import typing
+
+# (sign, exponent) of a bin, ordered like the values in it
+Bin = tuple[int, float]
+
+
+def rank(percent: float, count: int) -> int:
+    """Index of the percentile among `count` sorted values."""
+    return min(count - 1, max(0, math.floor(percent / 100 * (count - 1))))
+
+
+def _sorted(values: list[float]) -> list[float]:
+    if any(map(math.isnan, values)):
+        return sorted(value for value in values if not math.isnan(value)) + [math.nan] * sum(map(math.isnan, values))
+    return sorted(values)
+
+
+class QuantileSketch:
+    """Counts values in bins of relative width 2 * relative_accuracy."""
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Percentile accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.counts: dict[Bin, int] = {}
+        # the bins with a non-zero count, sorted
+        self.bins: list[Bin] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def bin(self, value: float) -> Bin:
+        if math.isnan(value):
+            return 2, 0
+        if value == 0:
+            return 0, 0
+        exponent = math.inf if math.isinf(value) else math.ceil(math.log(abs(value)) / self.log_gamma)
+        return (1, exponent) if value > 0 else (-1, -exponent)
+
+    def representative(self, bin_: Bin) -> float:
+        sign, exponent = bin_
+        if sign == 2:
+            return math.nan
+        if sign == 0:
+            return 0.0
+        exponent *= sign
+        if math.isinf(exponent):
+            return math.inf * sign
+        try:
+            return sign * self.gamma ** exponent * (2 / (self.gamma + 1))
+        except OverflowError:
+            return sys.float_info.max * sign
+
+    def add(self, value: float, count: int = 1) -> None:
+        self._add_to(self.bin(value), count)
+
+    def remove(self, value: float, count: int = 1) -> None:
+        self._add_to(self.bin(value), -count)
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches of the same accuracy can be merged")
+        for bin_, count in other.counts.items():
+            self._add_to(bin_, count)
+
+    def value_at(self, index: int) -> float:
+        """Approximation of the index-th smallest value."""
+        if index < self.count // 2:
+            seen = 0
+            for bin_ in self.bins:
+                seen += self.counts[bin_]
+                if seen > index:
+                    return self.representative(bin_)
+        else:
+            # percentiles above the median are found from the top
+            seen = self.count
+            for bin_ in reversed(self.bins):
+                seen -= self.counts[bin_]
+                if seen <= index:
+                    return self.representative(bin_)
+        raise IndexError("Sketch index out of range")
+
+    def percentile(self, percent: float) -> float:
+        return self.value_at(rank(percent, self.count)) if self.count else 0
+
+    def _add_to(self, bin_: Bin, count: int) -> None:
+        if count == 0:
+            return
+        total = self.counts.get(bin_, 0) + count
+        if total < 0:
+            raise ValueError("Removed a value the sketch doesn't hold")
+        if total == 0:
+            self.counts.pop(bin_, None)
+            del self.bins[bisect.bisect_left(self.bins, bin_)]
+        else:
+            if bin_ not in self.counts:
+                bisect.insort(self.bins, bin_)
+            self.counts[bin_] = total
+        self.count += count
+
+
+class SortedValues:
+    """The values of a window in order, for exact percentiles."""
+    def __init__(self):
+        self.values: list[float] = []
+        self.nans = 0
+
+    def __len__(self) -> int:
+        return len(self.values) + self.nans
+
+    def add(self, value: float) -> None:
+        if math.isnan(value):
+            self.nans += 1
+        else:
+            bisect.insort(self.values, value)
+
+    def remove(self, value: float) -> None:
+        if math.isnan(value):
+            self.nans -= 1
+        else:
+            del self.values[bisect.bisect_left(self.values, value)]
+
+    def value_at(self, index: int) -> float:
+        return self.values[index] if index < len(self.values) else math.nan
+
+
+class Percentile:
+    """The `percent` percentile of values, exact if accuracy is None, else within the relative accuracy."""
+    def __init__(self, percent: float, accuracy: typing.Optional[float] = None):
+        self.percent = percent
+        self.accuracy = accuracy
+        # bins values for approximate percentiles
+        self.sketch = None if accuracy is None else QuantileSketch(accuracy)
+
+    def __call__(self, values: list[float]) -> float:
+        if not values:
+            return 0
+        value = _sorted(values)[rank(self.percent, len(values))]
+        # the bin the value is in is the one a sketch of the values would report
+        return value if self.sketch is None else self.sketch.representative(self.sketch.bin(value))
+
+    def window(self) -> typing.Union[QuantileSketch, SortedValues]:
+        """Holds the values of a sliding window, which are added and removed one by one."""
+        return SortedValues() if self.accuracy is None else QuantileSketch(self.accuracy)
+
+    def of(self, window: typing.Union[QuantileSketch, SortedValues]) -> float:
+        return window.value_at(rank(self.percent, len(window))) if len(window) else 0
@@ -1,5 +1,5 @@
 import fetchPolyfill, { Response } from "cross-fetch";
-import { DatapointSeries, DatapointDTO } from "./models.js";
+import { DatapointSeries, DatapointDTO, ColumnarSeriesDTO } from "./models.js";
 import {
   AuthenticationError,
   AuthorizationError,
@@ -10,6 +10,8 @@ import {
   ValidationError,
 } from "./exceptions.js";
 
+const COLUMNAR_MEDIA_TYPE = "application/vnd.impulses.columnar+json";
+
 export interface ImpulsesClientConfig {
   url: string;
   tokenValue: string;
@@ -61,9 +63,14 @@ export class ImpulsesClient {
 
     const response = await this.request(`/data/${encodeURIComponent(metricName)}`, {
       method: "GET",
+      headers: { Accept: `${COLUMNAR_MEDIA_TYPE}, application/json;q=0.9` },
     });
     const payload = await response.json();
 
+    if ((response.headers.get("Content-Type") ?? "").startsWith(COLUMNAR_MEDIA_TYPE)) {
+      return DatapointSeries.fromColumnarDTO(payload as ColumnarSeriesDTO);
+    }
+
     if (!Array.isArray(payload)) {
       throw new ImpulsesError(
         `Unexpected response format while fetching '${metricName}' (expected list)`
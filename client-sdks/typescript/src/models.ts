@@ -8,6 +8,14 @@ export interface DatapointDTO {
   dimensions?: Dimensions;
 }
 
+/** Columnar shape of a series: d[i] indexes into dims. */
+export interface ColumnarSeriesDTO {
+  t: number[];
+  v: number[];
+  d: number[];
+  dims: Dimensions[];
+}
+
 export class Datapoint {
   constructor(
     public readonly timestamp: number,
@@ -60,6 +68,13 @@ export class DatapointSeries implements Iterable<Datapoint>, EvaluatedImpulse {
     return new DatapointSeries(series.map(Datapoint.fromDTO), initValue);
   }
 
+  static fromColumnarDTO(columns: ColumnarSeriesDTO, initValue = 0): DatapointSeries {
+    const series = columns.t.map(
+      (timestamp, idx) => new Datapoint(timestamp, columns.v[idx], columns.dims[columns.d[idx]])
+    );
+    return new DatapointSeries(series, initValue);
+  }
+
   toDTO(): DatapointDTO[] {
     return this.series.map((dp) => dp.toDTO());
   }
@@ -0,0 +1,16 @@
+create table if not exists retention_policy (
+  id text primary key,
+  user_id text not null references app_user(id),
+  -- empty string means the policy applies to every metric of the user without its own policy
+  metric_name text not null default '',
+  max_age_ms integer check (max_age_ms is null or max_age_ms > 0),
+  max_points integer check (max_points is null or max_points > 0),
+  downsample_after_ms integer check (downsample_after_ms is null or downsample_after_ms > 0),
+  downsample_resolution_ms integer check (downsample_resolution_ms is null or downsample_resolution_ms > 0),
+  downsample_aggregate text not null default 'avg' check (downsample_aggregate in ('avg', 'sum', 'min', 'max', 'last')),
+  created_at integer not null,
+  updated_at integer not null,
+  unique (user_id, metric_name)
+);
+
+create index if not exists idx_retention_policy_user_id on retention_policy(user_id);
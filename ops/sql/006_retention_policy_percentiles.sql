@@ -0,0 +1,22 @@
+-- sqlite can't alter a check constraint, the table is rebuilt to allow percentile downsampling
+create table retention_policy_new (
+  id text primary key,
+  user_id text not null references app_user(id),
+  -- empty string means the policy applies to every metric of the user without its own policy
+  metric_name text not null default '',
+  max_age_ms integer check (max_age_ms is null or max_age_ms > 0),
+  max_points integer check (max_points is null or max_points > 0),
+  downsample_after_ms integer check (downsample_after_ms is null or downsample_after_ms > 0),
+  downsample_resolution_ms integer check (downsample_resolution_ms is null or downsample_resolution_ms > 0),
+  downsample_aggregate text not null default 'avg'
+    check (downsample_aggregate in ('avg', 'sum', 'min', 'max', 'last', 'p50', 'p90', 'p95', 'p99')),
+  created_at integer not null,
+  updated_at integer not null,
+  unique (user_id, metric_name)
+);
+
+insert into retention_policy_new select * from retention_policy;
+drop table retention_policy;
+alter table retention_policy_new rename to retention_policy;
+
+create index if not exists idx_retention_policy_user_id on retention_policy(user_id);
@@ -0,0 +1,3 @@
+-- the messages of the requests on a page of a chat
+create index if not exists idx_ai_chat_message_chat_id_request_started_at
+  on ai_chat_message(chat_id, request_started_at);
@@ -122,6 +122,10 @@ class ClientSessionRegistry:
                     connection.last_seen_at = time.time()
                     return
 
+    def queue_depths(self) -> list[int]:
+        """Messages waiting to be sent to every connection, read without the lock (a snapshot is enough)."""
+        return [connection.outgoing_queue.qsize() for connection in list(self._connections_by_id.values())]
+
     async def count_user_sessions(self, user_id: str) -> int:
         async with self._lock:
             return len(self._connections_by_user.get(user_id, []))
@@ -0,0 +1,116 @@
+"""
+Conversations of chats as sent to their model: the user's messages and the assistant's answers.
+
+They are kept in memory per chat and appended to as messages are saved, so that a turn doesn't reload the chat's
+history. Long conversations are cut to their newest turns that fit a token budget. The cut moves in steps of half the
+budget, so that the start of the conversation, and with it the prompt prefix providers cache, stays the same for many
+turns.
+"""
+from __future__ import annotations
+
+import collections
+import threading
+
+from src.common import metrics
+from src.dao.ai_chat_repo import AiChatMessage, AiChatRepo
+
+MAX_CHATS = 256
+TOKEN_BUDGET = 24_000
+# a rough estimate, for English text
+_CHARS_PER_TOKEN = 4
+# role and separators
+_TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(message: dict[str, str]) -> int:
+    return len(message["content"]) // _CHARS_PER_TOKEN + _TOKENS_PER_MESSAGE
+
+
+def _is_conversation_message(message: AiChatMessage) -> bool:
+    if message.message_type != "text" or message.role not in ("user", "assistant"):
+        return False
+    if not isinstance(message.content, str):
+        return False
+    return message.role == "user" or bool(message.content.strip())
+
+
+def conversation_of(messages: list[AiChatMessage]) -> list[dict[str, str]]:
+    return [
+        {"role": message.role, "content": message.content}
+        for message in messages
+        if _is_conversation_message(message)
+    ]
+
+
+class _Conversation:
+    def __init__(self, messages: list[AiChatMessage]):
+        self.ids = {message.id for message in messages}
+        self.messages = conversation_of(messages)
+        self.tokens = [estimate_tokens(message) for message in self.messages]
+        # index of the first message sent
+        self.start = 0
+
+    def append(self, message: AiChatMessage) -> None:
+        if message.id in self.ids or not _is_conversation_message(message):
+            return
+        self.ids.add(message.id)
+        self.messages.extend(conversation_of([message]))
+        self.tokens.append(estimate_tokens(self.messages[-1]))
+
+    def window(self, token_budget: int) -> list[dict[str, str]]:
+        """The newest messages within the budget, starting with a user's message. Once the budget is exceeded, the
+        start moves until half of it is used."""
+        if sum(self.tokens[self.start:]) > token_budget:
+            total = sum(self.tokens[self.start:])
+            last_user_message = max(
+                (index for index, message in enumerate(self.messages) if message["role"] == "user"),
+                default=len(self.messages) - 1,
+            )
+            while self.start < last_user_message and (
+                total > token_budget // 2 or self.messages[self.start]["role"] != "user"
+            ):
+                total -= self.tokens[self.start]
+                self.start += 1
+        return [dict(message) for message in self.messages[self.start:]]
+
+
+class ConversationContexts:
+    """Conversations of the most recently used chats."""
+    def __init__(self, max_chats: int = MAX_CHATS, token_budget: int = TOKEN_BUDGET):
+        self.max_chats = max_chats
+        self.token_budget = token_budget
+        self.chats: collections.OrderedDict[str, _Conversation] = collections.OrderedDict()
+        # chat id -> messages appended to the chat, cached or not; a chat loaded while this changed may miss a message
+        self.generations: dict[str, int] = {}
+        self.mu = threading.Lock()
+
+    def get(self, chat_repo: AiChatRepo, chat_id: str) -> list[dict[str, str]]:
+        """The conversation of the chat within the token budget, loaded from chat_repo if it isn't cached."""
+        with self.mu:
+            conversation = self.chats.get(chat_id)
+            if conversation is not None:
+                self.chats.move_to_end(chat_id)
+            generation = self.generations.get(chat_id, 0)
+        metrics.cache_lookup("conversation", conversation is not None)
+        if conversation is None:
+            loaded = _Conversation(chat_repo.list_messages(chat_id))
+            with self.mu:
+                if self.generations.get(chat_id, 0) != generation:
+                    # isn't cached: the appended message may not be in it, nor would it be appended to it
+                    return loaded.window(self.token_budget)
+                conversation = self.chats.setdefault(chat_id, loaded)
+                while len(self.chats) > self.max_chats:
+                    self.chats.popitem(last=False)
+        with self.mu:
+            return conversation.window(self.token_budget)
+
+    def append(self, message: AiChatMessage) -> None:
+        """Adds a saved message to the conversation of its chat, if cached."""
+        with self.mu:
+            self.generations[message.chat_id] = self.generations.get(message.chat_id, 0) + 1
+            conversation = self.chats.get(message.chat_id)
+            if conversation is not None:
+                conversation.append(message)
+
+    def size(self) -> int:
+        return len(self.chats)
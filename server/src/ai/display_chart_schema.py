@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import pydantic
 
-from src.ai.pulselang_parser import validate_pulselang
+from src.pulselang import compiler
 
 
 class DisplayChartVariableArgs(pydantic.BaseModel):
@@ -55,5 +55,6 @@ class DisplayChartArgs(pydantic.BaseModel):
             return value
         if not value.strip():
             raise ValueError("Chart program must be non-empty")
-        validate_pulselang(value)
+        # charts are evaluated with COMMON_LIBRARY preloaded
+        compiler.compile_program(value)
         return value
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any
 
 import fastapi
@@ -9,11 +10,13 @@ import httpx
 import pydantic
 
 from src.ai.client_session_registry import ClientSessionRegistry
+from src.ai.upstream_clients import UpstreamClients
 from src.dao.llm_model_repo import LlmModel, LlmModelRepo, LlmModelSettings
 
 
 LOCALHOST_MODEL_TIMEOUT_SECONDS = 120.0
-UPSTREAM_MODEL_TIMEOUT_SECONDS = 120.0
+
+DeltaCallback = Callable[[str], Awaitable[None]]
 
 
 class LlmChatCompletionResult(pydantic.BaseModel):
@@ -31,6 +34,17 @@ def _build_chat_completions_url(base_url: str) -> str:
     return f"{trimmed}/chat/completions"
 
 
+def _mark_cached_prefix(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Marks the system prompt, the static prefix of every request, as a cache breakpoint."""
+    if not messages or messages[0].get("role") != "system" or not isinstance(messages[0].get("content"), str):
+        return messages
+    system_message = {
+        **messages[0],
+        "content": [{"type": "text", "text": messages[0]["content"], "cache_control": {"type": "ephemeral"}}],
+    }
+    return [system_message, *messages[1:]]
+
+
 def _extract_message_content(message: dict[str, Any]) -> str:
     content = message.get("content")
     if isinstance(content, str):
@@ -101,6 +115,118 @@ def _extract_chat_completion_result(payload: dict[str, Any]) -> LlmChatCompletio
     )
 
 
+class _StreamedCompletion:
+    """Assembles the chunks of a streamed chat completion into the payload of a non-streamed one."""
+
+    def __init__(self) -> None:
+        self.model: str | None = None
+        self.content_parts: list[str] = []
+        # tool calls arrive in fragments, keyed by their index
+        self.tool_calls: dict[int, dict[str, Any]] = {}
+        self.finish_reason: str | None = None
+        self.usage: dict[str, Any] | None = None
+
+    def add(self, chunk: dict[str, Any]) -> str:
+        """Adds a chunk and returns the content it adds to the message."""
+        if isinstance(chunk.get("model"), str):
+            self.model = chunk["model"]
+        if isinstance(chunk.get("usage"), dict):
+            self.usage = chunk["usage"]
+        choices = chunk.get("choices")
+        if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+            return ""
+        choice = choices[0]
+        if isinstance(choice.get("finish_reason"), str):
+            self.finish_reason = choice["finish_reason"]
+        delta = choice.get("delta")
+        if not isinstance(delta, dict):
+            return ""
+
+        for fragment in _normalize_tool_calls(delta.get("tool_calls")):
+            index = fragment.get("index")
+            if not isinstance(index, int):
+                index = len(self.tool_calls)
+            tool_call = self.tool_calls.setdefault(index, {
+                "id": None,
+                "type": "function",
+                "function": {"name": "", "arguments": ""},
+            })
+            if isinstance(fragment.get("id"), str):
+                tool_call["id"] = fragment["id"]
+            if isinstance(fragment.get("type"), str):
+                tool_call["type"] = fragment["type"]
+            function = fragment.get("function")
+            if isinstance(function, dict):
+                for key in ("name", "arguments"):
+                    if isinstance(function.get(key), str):
+                        tool_call["function"][key] += function[key]
+
+        content = delta.get("content")
+        if isinstance(content, str) and content:
+            self.content_parts.append(content)
+            return content
+        return ""
+
+    def payload(self) -> dict[str, Any]:
+        message: dict[str, Any] = {
+            "role": "assistant",
+            "content": "".join(self.content_parts),
+        }
+        if self.tool_calls:
+            message["tool_calls"] = [self.tool_calls[index] for index in sorted(self.tool_calls)]
+        payload: dict[str, Any] = {
+            "model": self.model,
+            "choices": [{"index": 0, "message": message, "finish_reason": self.finish_reason}],
+        }
+        if self.usage is not None:
+            payload["usage"] = self.usage
+        return payload
+
+
+async def _server_sent_events(response: httpx.Response) -> AsyncIterator[str]:
+    """The data of every event of a text/event-stream response, until `[DONE]`.
+
+    Reads the response to its end even after `[DONE]`, so that its connection can be reused.
+    """
+    done = False
+    data_lines: list[str] = []
+    async for line in response.aiter_lines():
+        if done:
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[5:].removeprefix(" "))
+            continue
+        if line or not data_lines:
+            # comments, other fields and blank lines between events
+            continue
+        data = "\n".join(data_lines)
+        data_lines = []
+        if data.strip() == "[DONE]":
+            done = True
+            continue
+        yield data
+    if not done and data_lines and "\n".join(data_lines).strip() != "[DONE]":
+        yield "\n".join(data_lines)
+
+
+async def _read_streamed_completion(response: httpx.Response, on_delta: DeltaCallback) -> dict[str, Any]:
+    streamed = _StreamedCompletion()
+    async for data in _server_sent_events(response):
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            raise fastapi.HTTPException(status_code=502, detail="Model endpoint streamed an invalid event")
+        if not isinstance(chunk, dict):
+            continue
+        if chunk.get("error") is not None:
+            raise fastapi.HTTPException(status_code=502, detail=_extract_error_message(
+                chunk, "Model endpoint failed while streaming"))
+        delta = streamed.add(chunk)
+        if delta:
+            await on_delta(delta)
+    return streamed.payload()
+
+
 def _extract_error_message(payload: Any, fallback: str) -> str:
     if isinstance(payload, dict):
         for key in ("error", "detail", "message"):
@@ -114,47 +240,64 @@ def _extract_error_message(payload: Any, fallback: str) -> str:
     return fallback
 
 
+def _completion_payload(response: httpx.Response) -> dict[str, Any]:
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = None
+
+    if response.status_code >= 400:
+        detail = _extract_error_message(payload, f"Model endpoint returned status {response.status_code}")
+        raise fastapi.HTTPException(status_code=502, detail=detail)
+
+    if not isinstance(payload, dict):
+        raise fastapi.HTTPException(status_code=502, detail="Model endpoint returned a non-JSON response")
+    return payload
+
+
 async def _execute_remote_chat_completion(
     settings: LlmModelSettings,
     model: str,
     messages: list[dict[str, str]],
     extra_body: dict[str, Any] | None = None,
+    on_delta: DeltaCallback | None = None,
+    *,
+    clients: UpstreamClients,
 ) -> LlmChatCompletionResult:
+    """Calls the model endpoint, streaming the reply into on_delta as it is generated if on_delta is given.
+
+    The timeout applies to every read, so a streamed reply may take longer as long as it keeps coming.
+    """
     request_body = {
         "model": model,
         "messages": messages,
     }
     if extra_body:
         request_body.update(extra_body)
+    if on_delta is not None:
+        request_body["stream"] = True
     headers = {
         header.name: header.value
         for header in settings.headers
     }
+    url = _build_chat_completions_url(settings.base_url)
 
     try:
-        async with httpx.AsyncClient(timeout=UPSTREAM_MODEL_TIMEOUT_SECONDS) as client:
-            response = await client.post(
-                _build_chat_completions_url(settings.base_url),
-                headers=headers,
-                json=request_body,
-            )
+        async with clients.get(url).stream("POST", url, headers=headers, json=request_body) as response:
+            is_event_stream = response.headers.get("content-type", "").startswith("text/event-stream")
+            if on_delta is not None and response.status_code < 400 and is_event_stream:
+                payload = await _read_streamed_completion(response, on_delta)
+            else:
+                # errors, and endpoints that don't stream
+                await response.aread()
+                payload = _completion_payload(response)
+    except httpx.PoolTimeout:
+        raise fastapi.HTTPException(status_code=503, detail="Too many concurrent calls to the model endpoint")
     except httpx.TimeoutException:
         raise fastapi.HTTPException(status_code=504, detail="Timed out while calling the model endpoint")
     except httpx.HTTPError as exc:
         raise fastapi.HTTPException(status_code=502, detail=f"Failed to call the model endpoint: {exc}")
 
-    try:
-        payload = response.json()
-    except ValueError:
-        payload = None
-
-    if response.status_code >= 400:
-        detail = _extract_error_message(payload, f"Model endpoint returned status {response.status_code}")
-        raise fastapi.HTTPException(status_code=502, detail=detail)
-
-    if not isinstance(payload, dict):
-        raise fastapi.HTTPException(status_code=502, detail="Model endpoint returned a non-JSON response")
-
     return _extract_chat_completion_result(payload)
 
 
@@ -217,12 +360,18 @@ async def execute_chat_completion_from_settings(
     *,
     user_id: str | None = None,
     registry: ClientSessionRegistry | None = None,
+    clients: UpstreamClients,
+    on_delta: DeltaCallback | None = None,
 ) -> LlmChatCompletionResult:
+    """Completes the chat with the model. Replies of remote models are streamed into on_delta, if given; localhost
+    models answer through the user's browser, in one piece."""
     trimmed_model = model.strip()
     if not trimmed_model:
         raise fastapi.HTTPException(status_code=422, detail="LLM model is required")
     if not messages:
         raise fastapi.HTTPException(status_code=422, detail="At least one chat message is required")
+    if settings.prompt_caching:
+        messages = _mark_cached_prefix(messages)
 
     if settings.is_localhost:
         return await _execute_localhost_chat_completion(
@@ -234,7 +383,14 @@ async def execute_chat_completion_from_settings(
             registry=registry,
         )
 
-    return await _execute_remote_chat_completion(settings, trimmed_model, messages, extra_body)
+    return await _execute_remote_chat_completion(
+        settings,
+        trimmed_model,
+        messages,
+        extra_body,
+        on_delta,
+        clients=clients,
+    )
 
 
 async def execute_chat_completion_from_stored_model(
@@ -245,6 +401,8 @@ async def execute_chat_completion_from_stored_model(
     extra_body: dict[str, Any] | None = None,
     *,
     registry: ClientSessionRegistry | None = None,
+    clients: UpstreamClients,
+    on_delta: DeltaCallback | None = None,
 ) -> tuple[LlmModel, LlmChatCompletionResult]:
     stored_model = repo.get_model_by_id(user_id, model_id)
     if not stored_model:
@@ -257,5 +415,7 @@ async def execute_chat_completion_from_stored_model(
         extra_body,
         user_id=user_id,
         registry=registry,
+        clients=clients,
+        on_delta=on_delta,
     )
     return stored_model, result
@@ -0,0 +1,76 @@
+"""
+Cache of the results of the AI tools, which only read: per user, by tool and canonical arguments.
+
+Every result depends on one source of the user's: a metric, the list of metrics, the charts or the dashboards. A
+change of a source bumps its generation, and results computed in an older generation aren't served, including those
+whose computation overlapped the change.
+"""
+from __future__ import annotations
+
+import collections
+import threading
+import typing
+from typing import Any
+
+from src.ai.tool_executor import tool_cache_key
+from src.common import metrics
+from src.dao.chart_repo import ChartRepo
+from src.dao.dashboard_repo import DashboardRepo
+from src.dao.data_dao import DataDao
+
+MAX_ENTRIES = 1024
+
+
+class ToolResultCache:
+    def __init__(self, data_dao: DataDao, chart_repo: ChartRepo, dashboard_repo: DashboardRepo,
+                 max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        # (user id, tool, arguments) -> (generation of the source, result)
+        self.entries: collections.OrderedDict[tuple[str, str, str], tuple[int, dict[str, Any]]] = \
+            collections.OrderedDict()
+        # (user id, source) -> generation, for the sources results were computed from
+        self.generations: dict[tuple[str, str], int] = {}
+        self.mu = threading.Lock()
+        data_dao.add_listener(self.on_metric_changed)
+        chart_repo.add_listener(lambda user_id: self.invalidate(user_id, "charts"))
+        dashboard_repo.add_listener(lambda user_id: self.invalidate(user_id, "dashboards"))
+
+    def get_or_run(self, user_id: str, tool_name: str, arguments: Any,
+                   run: typing.Callable[[], dict[str, Any]]) -> tuple[dict[str, Any], bool]:
+        """The cached result of the tool call, or run's; and whether it was cached. Errors aren't cached."""
+        cache_key = tool_cache_key(tool_name, arguments)
+        if cache_key is None:
+            return run(), False
+        source, canonical_arguments = cache_key
+        key = (user_id, tool_name, canonical_arguments)
+        with self.mu:
+            generation = self.generations.setdefault((user_id, source), 0)
+            entry = self.entries.get(key)
+            hit = entry is not None and entry[0] == generation
+            if hit:
+                self.entries.move_to_end(key)
+        metrics.cache_lookup("ai_tool", hit)
+        if hit:
+            return entry[1], True
+
+        result = run()
+        with self.mu:
+            self.entries[key] = (generation, result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result, False
+
+    def invalidate(self, user_id: str, source: str) -> None:
+        with self.mu:
+            # sources no result was computed from have nothing to invalidate
+            if (user_id, source) in self.generations:
+                self.generations[(user_id, source)] += 1
+
+    def on_metric_changed(self, user_id: str, metric_name: str, _: typing.Optional[int]) -> None:
+        self.invalidate(user_id, f"metric:{metric_name}")
+        # the metric may be new or deleted
+        self.invalidate(user_id, "metrics")
+
+    def size(self) -> int:
+        return len(self.entries)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import datetime
 import json
+from collections.abc import Callable
 from typing import Any
 
 import fastapi
@@ -279,6 +280,32 @@ def _parse_arguments(arguments: Any) -> dict[str, Any]:
     raise fastapi.HTTPException(status_code=422, detail="Tool arguments must be an object or JSON object string")
 
 
+# what the result of a read tool depends on: a metric, the list of metrics, the charts or the dashboards of the user
+_TOOL_SOURCES: dict[str, Callable[[dict[str, Any]], str]] = {
+    "list_metric_names": lambda arguments: "metrics",
+    "get_metric_last_10_datapoints": lambda arguments: f"metric:{arguments.get('metric_name')}",
+    "get_metric_summary": lambda arguments: f"metric:{arguments.get('metric_name')}",
+    "get_metric_common_dimensions": lambda arguments: f"metric:{arguments.get('metric_name')}",
+    "list_charts": lambda arguments: "charts",
+    "get_chart": lambda arguments: "charts",
+    "list_dashboards": lambda arguments: "dashboards",
+    "get_dashboard": lambda arguments: "dashboards",
+}
+
+
+def tool_cache_key(tool_name: str, arguments: Any) -> tuple[str, str] | None:
+    """The source the tool's result depends on and its canonical arguments, None if the result isn't worth caching
+    (static or invalid calls)."""
+    source = _TOOL_SOURCES.get(tool_name)
+    if source is None:
+        return None
+    try:
+        parsed_arguments = _parse_arguments(arguments)
+    except fastapi.HTTPException:
+        return None
+    return source(parsed_arguments), json.dumps(parsed_arguments, sort_keys=True, separators=(",", ":"))
+
+
 def execute_ai_tool(
     *,
     user_id: str,
@@ -0,0 +1,64 @@
+"""
+The worker threads the AI tools run on, shared by all users.
+
+A tool call's timeout starts when a worker starts running it, not while it waits for one. A user's calls take at most
+`per_user` workers at a time, so the calls of one user (a round of many calls, or calls that timed out but still run)
+don't hold every worker while the other users' calls wait.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import typing
+
+T = typing.TypeVar("T")
+
+DEFAULT_WORKERS = 8
+DEFAULT_WORKERS_PER_USER = 4
+
+
+class ToolWorkers:
+    def __init__(self, timeout_seconds: float, workers: int = DEFAULT_WORKERS,
+                 per_user: int = DEFAULT_WORKERS_PER_USER):
+        self.timeout_seconds = timeout_seconds
+        self.per_user = per_user
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-tool")
+        # user id -> (the user's free workers, number of the user's calls waiting or running)
+        self.slots: dict[str, tuple[asyncio.Semaphore, int]] = {}
+
+    async def run(self, user_id: str, fn: typing.Callable[[], T]) -> T:
+        """fn's result, run on a worker; raises asyncio.TimeoutError if it runs longer than the timeout."""
+        loop = asyncio.get_running_loop()
+        slot = self._enter(user_id)
+        try:
+            await slot.acquire()
+        except BaseException:
+            self._exit(user_id, acquired=False)
+            raise
+
+        started = asyncio.Event()
+
+        def run_started() -> T:
+            loop.call_soon_threadsafe(started.set)
+            return fn()
+
+        future = loop.run_in_executor(self.executor, run_started)
+        # a call that timed out holds its slot until the worker is done with it
+        future.add_done_callback(lambda _: self._exit(user_id, acquired=True))
+        await started.wait()
+        # a worker can't be interrupted, a call that times out finishes in the background and its result is dropped
+        return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_seconds)
+
+    def _enter(self, user_id: str) -> asyncio.Semaphore:
+        slot, calls = self.slots.get(user_id) or (asyncio.Semaphore(self.per_user), 0)
+        self.slots[user_id] = (slot, calls + 1)
+        return slot
+
+    def _exit(self, user_id: str, acquired: bool) -> None:
+        slot, calls = self.slots[user_id]
+        if acquired:
+            slot.release()
+        if calls == 1:
+            del self.slots[user_id]
+        else:
+            self.slots[user_id] = (slot, calls - 1)
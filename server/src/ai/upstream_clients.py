@@ -0,0 +1,66 @@
+"""
+Shared HTTP clients of upstream model endpoints, one per origin, so that the rounds of a chat turn reuse connections.
+
+A multi-round tool loop would otherwise pay DNS, TCP and TLS setup in every round. HTTP/2 is negotiated when the
+endpoint supports it (over TLS), so concurrent requests to one endpoint share a connection.
+
+A client is shared by every user's requests to its origin, so it keeps no cookies: a session an endpoint (or a proxy
+in front of it) sets for one user would otherwise be sent with everyone's requests.
+"""
+from __future__ import annotations
+
+import http.cookiejar
+
+import httpx
+
+UPSTREAM_MODEL_TIMEOUT_SECONDS = 120.0
+# how long a request waits for a connection of a full pool
+POOL_TIMEOUT_SECONDS = 5.0
+# per origin; a streamed reply holds its HTTP/1.1 connection until it ends
+DEFAULT_MAX_CONNECTIONS = 200
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY_SECONDS = 60.0
+
+
+def _origin(url: str) -> tuple[str, str, int | None]:
+    parsed = httpx.URL(url)
+    return parsed.scheme, parsed.host, parsed.port
+
+
+def _no_cookies() -> http.cookiejar.CookieJar:
+    """A jar that rejects every cookie set by a response."""
+    return http.cookiejar.CookieJar(policy=http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+
+
+class UpstreamClients:
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self.clients: dict[tuple[str, str, int | None], httpx.AsyncClient] = {}
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """The client of the url's origin, created on first use. Headers are sent per request, as models of one
+        origin may authenticate differently."""
+        origin = _origin(url)
+        client = self.clients.get(origin)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=True,
+                cookies=_no_cookies(),
+                timeout=httpx.Timeout(UPSTREAM_MODEL_TIMEOUT_SECONDS, pool=POOL_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+                ),
+            )
+            self.clients[origin] = client
+        return client
+
+    def size(self) -> int:
+        return len(self.clients)
+
+    async def aclose(self) -> None:
+        """Closes the connections of every client, when the server shuts down."""
+        clients, self.clients = list(self.clients.values()), {}
+        for client in clients:
+            await client.aclose()
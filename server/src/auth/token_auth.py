@@ -2,6 +2,7 @@ import fastapi
 
 from src.auth.token_cache import TokenCache
 from src.common import state
+from src.common import tracing
 
 
 def _parse_data_token_header(x_data_token: str) -> str:
@@ -14,7 +15,8 @@ async def _check_data_token(required_caps: set[str],
                             cache: TokenCache = state.injected(TokenCache)) -> str:
     plaintext = _parse_data_token_header(x_data_token)
     
-    result = cache.get(plaintext)
+    with tracing.span("auth.token"):
+        result = cache.get(plaintext)
     if not result:
         raise fastapi.HTTPException(status_code=401, detail="Invalid or expired data token")
     
@@ -8,6 +8,7 @@ import threading
 import time
 from typing import Optional
 
+from src.common import metrics
 from src.dao.token_repo import TokenRepo
 
 
@@ -28,6 +29,7 @@ class TokenCache:
         token_hash = self._hash_token(token_plaintext)
         with self._lock:
             entry = self._cache.get(token_hash)
+            metrics.cache_lookup("token", entry is not None)
             if entry is None:
                 return None
             
@@ -2,6 +2,7 @@ import fastapi
 
 from src.auth.session import SessionStore, Session
 from src.common import state
+from src.common import tracing
 from src.dao.user_repo import UserRepo, User as UserModel
 
 
@@ -20,7 +21,8 @@ async def get_session(sid: str = fastapi.Depends(get_session_token),
 
 async def get_current_user(users: UserRepo = state.injected(UserRepo),
                            sess: Session = fastapi.Depends(get_session)) -> UserModel:
-    u = users.get_user_by_id(sess.user_id)
+    with tracing.span("auth.user"):
+        u = users.get_user_by_id(sess.user_id)
     if not u:
         raise fastapi.HTTPException(status_code=404, detail="User not found")
     return u
@@ -31,3 +33,8 @@ async def get_session_and_token(sid: str = fastapi.Depends(get_session_token),
     if not sess:
         raise fastapi.HTTPException(status_code=401, detail="Invalid session")
     return sid, sess
+
+async def require_admin(user: UserModel = fastapi.Depends(get_current_user)) -> UserModel:
+    if user.role != "ADMIN":
+        raise fastapi.HTTPException(status_code=403, detail="Admin role required")
+    return user
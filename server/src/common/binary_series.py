@@ -0,0 +1,82 @@
+"""Packed binary wire format of a datapoint series.
+
+All numbers are little-endian:
+    header (16 bytes): magic b"IMPS" | format version u16 | reserved u16 | datapoint count u32 | dims length u32
+    timestamps: count x int64
+    values: count x float64
+    dimension indices: count x uint32, index into dims
+    dims: utf-8 JSON list of the distinct dimension objects
+
+Timestamp and value columns are 8-byte aligned, so clients can load them into arrays without copying.
+"""
+import array
+import struct
+import sys
+
+import orjson
+
+MEDIA_TYPE = "application/vnd.impulses.series"
+MAGIC = b"IMPS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+
+
+class BinarySeriesError(ValueError):
+    pass
+
+
+def _to_le_bytes(typecode: str, values: list) -> bytes:
+    arr = array.array(typecode, values)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le_bytes(typecode: str, buf: memoryview) -> array.array:
+    arr = array.array(typecode)
+    arr.frombytes(buf)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def encode(timestamps: list[int], values: list[float], dim_indices: list[int], dims: list[dict]) -> bytes:
+    dims_json = orjson.dumps(dims)
+    return b"".join([
+        HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(timestamps), len(dims_json)),
+        _to_le_bytes("q", timestamps),
+        _to_le_bytes("d", values),
+        _to_le_bytes("I", dim_indices),
+        dims_json,
+    ])
+
+
+def decode(buf: bytes) -> tuple[array.array, array.array, array.array, list[dict]]:
+    """Returns (timestamps, values, dimension indices, dims), raises BinarySeriesError on malformed input."""
+    if len(buf) < HEADER.size:
+        raise BinarySeriesError("Payload shorter than the header")
+    magic, format_version, _, count, dims_len = HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise BinarySeriesError("Not a binary series payload")
+    if format_version != FORMAT_VERSION:
+        raise BinarySeriesError(f"Unsupported binary series format version {format_version}")
+    if len(buf) != HEADER.size + count * 20 + dims_len:
+        raise BinarySeriesError("Payload length doesn't match the header")
+
+    view = memoryview(buf)
+    offset = HEADER.size
+    timestamps = _from_le_bytes("q", view[offset:offset + count * 8])
+    offset += count * 8
+    values = _from_le_bytes("d", view[offset:offset + count * 8])
+    offset += count * 8
+    dim_indices = _from_le_bytes("I", view[offset:offset + count * 4])
+    offset += count * 4
+    try:
+        dims = orjson.loads(view[offset:])
+    except orjson.JSONDecodeError as e:
+        raise BinarySeriesError(f"Invalid dims: {e}")
+    if not isinstance(dims, list) or not all(isinstance(dim, dict) for dim in dims):
+        raise BinarySeriesError("dims must be a list of objects")
+    if any(index >= len(dims) for index in dim_indices):
+        raise BinarySeriesError("Dimension index out of range")
+    return timestamps, values, dim_indices, dims
@@ -0,0 +1,160 @@
+"""
+Logging pipeline of the server: records are queued by the thread logging them and written by a background thread.
+
+The server logs through the root logger, so the levels of LOG_LEVELS apply to the module a record comes from (e.g.
+`src.db.dao`), or to its logger's name for libraries' named loggers (e.g. `uvicorn.access`).
+"""
+from __future__ import annotations
+
+import atexit
+import copy
+import datetime
+import functools
+import json
+import logging
+import logging.handlers
+import math
+import pathlib
+import queue
+import threading
+import typing
+
+SERVER_DIR = pathlib.Path(__file__).resolve().parents[2]
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s - %(message)s"
+
+# attributes every LogRecord has, anything else was passed in `extra` (but uvicorn's terminal colors)
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "color_message"}
+
+
+@functools.lru_cache(maxsize=None)
+def _module_of_path(pathname: str) -> typing.Optional[str]:
+    path = pathlib.Path(pathname)
+    if not path.is_relative_to(SERVER_DIR):
+        return None
+    return ".".join(path.relative_to(SERVER_DIR).with_suffix("").parts)
+
+
+def source(record: logging.LogRecord) -> str:
+    """The module a record of the root logger comes from, e.g. `src.db.dao`, the logger's name otherwise."""
+    if record.name != "root":
+        return record.name
+    return _module_of_path(record.pathname) or record.name
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, the `extra` fields and the exception, if any."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+                .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": source(record),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def parse_level(level: str, of: str = "LOG_LEVEL") -> int:
+    """`INFO` (in any case) as logging.INFO."""
+    value = logging.getLevelName(level.strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Invalid log level {level} of {of}")
+    return value
+
+
+def parse_levels(levels: str) -> dict[str, int]:
+    """`src.db=INFO,uvicorn.access=WARNING` as {name: level}."""
+    result = {}
+    for entry in filter(None, (entry.strip() for entry in levels.split(","))):
+        name, _, level = entry.partition("=")
+        result[name.strip()] = parse_level(level, name)
+    return result
+
+
+class LevelFilter(logging.Filter):
+    """Drops records below the level of their module's (or package's) entry, or below the default."""
+    def __init__(self, default: int, levels: dict[str, int]):
+        super().__init__()
+        self.default = default
+        self.levels = levels
+
+    @functools.lru_cache(maxsize=4096)
+    def level_of(self, name: str) -> int:
+        while name:
+            if name in self.levels:
+                return self.levels[name]
+            name = name.rpartition(".")[0]
+        return self.default
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.level_of(source(record))
+
+
+class DebugSampler(logging.Filter):
+    """Keeps `rate` of the DEBUG records of every call site, evenly spread: 0.1 keeps every 10th."""
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.counts: dict[tuple[str, int], int] = {}
+        # records are filtered by the threads logging them
+        self.mu = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self.rate >= 1:
+            return True
+        key = (record.pathname, record.lineno)
+        with self.mu:
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+        return math.floor(count * self.rate) > math.floor((count - 1) * self.rate)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Formats the message (its arguments may change once queued) and the traceback, leaves the rest to the
+        formatter of the writer thread."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _TRACEBACKS.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+_TRACEBACKS = logging.Formatter()
+
+
+def configure(handlers: list[logging.Handler], level: int = logging.DEBUG, levels: typing.Optional[dict[str, int]] = None,
+              debug_sample_rate: float = 1.0, json_format: bool = True) -> logging.handlers.QueueListener:
+    """Sends the root logger's records through a queue to `handlers`, which a background thread writes to.
+
+    Records are filtered before they are queued, so dropped records cost the logging thread little.
+    """
+    levels = levels or {}
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = _QueueHandler(records)
+    queue_handler.addFilter(LevelFilter(level, levels))
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    # records below every level aren't even created
+    root.setLevel(min([level, *levels.values()]))
+
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    # writes what is still queued when the server exits
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,301 @@
+"""
+Counters, gauges and histograms of the server, exposed at /metrics in the Prometheus text format.
+
+Metrics are registered once, at import, in REGISTRY and updated by the code they measure. Values that are cheaper to
+read when scraped than to keep up to date (cache sizes, websocket queue depths) are gauges computed by a callback.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+import typing
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds, from a cached read to a slow request
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# seconds, waiting for an uncontended lock takes microseconds
+LOCK_BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+# bytes
+SIZE_BUCKETS = tuple(float(4 ** i) for i in range(4, 15))
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: typing.Sequence[str], values: typing.Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: typing.Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.mu = threading.Lock()
+
+    def _key(self, labels: typing.Sequence[str]) -> Labels:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} takes the labels {self.label_names}")
+        return tuple(str(label) for label in labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> list[tuple[str, Labels, float]]:
+        """(sample name, label values, value) of every sample."""
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return self.header() + [f"{name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                                for name, labels, value in self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: typing.Sequence[str] = ()):
+        super().__init__(name, help_text, label_names)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self.mu:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self.mu:
+            return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> list[tuple[str, Labels, float]]:
+        with self.mu:
+            return [(self.name, labels, value) for labels, value in sorted(self.values.items())]
+
+
+class Gauge(Metric):
+    """A value read from `collect` when scraped, {label values: value}."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_names: typing.Sequence[str],
+                 collect: typing.Callable[[], dict[Labels, float]]):
+        super().__init__(name, help_text, label_names)
+        self.collect = collect
+
+    def samples(self) -> list[tuple[str, Labels, float]]:
+        return [(self.name, self._key(labels), value) for labels, value in sorted(self.collect().items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: typing.Sequence[str] = (),
+                 buckets: typing.Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (count of every bucket, not cumulative, +Inf last; sum)
+        self.values: dict[Labels, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.mu:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    def time(self, *labels: str) -> typing.ContextManager[None]:
+        """Observes the duration of a with block, in seconds."""
+        return _Timer(self, labels)
+
+    def snapshot(self, *labels: str) -> tuple[list[int], float]:
+        """Cumulative counts of the buckets (+Inf last) and the sum of the observations."""
+        with self.mu:
+            counts, total = self.values.get(self._key(labels)) or ([0] * (len(self.buckets) + 1), 0.0)
+            return _cumulative(counts), total
+
+    def merged(self) -> tuple[list[int], float]:
+        """Cumulative counts of the buckets and the sum of the observations of all label values together."""
+        with self.mu:
+            values = [(list(counts), total) for counts, total in self.values.values()]
+        counts = [0] * (len(self.buckets) + 1)
+        for label_counts, _ in values:
+            counts = [a + b for a, b in zip(counts, label_counts)]
+        return _cumulative(counts), sum(total for _, total in values)
+
+    def quantile(self, q: float, *labels: str) -> typing.Optional[float]:
+        """Estimate of the q quantile, interpolated within its bucket like Prometheus' histogram_quantile."""
+        counts, _ = self.snapshot(*labels)
+        return quantile(self.buckets, counts, q)
+
+    def samples(self) -> list[tuple[str, Labels, float]]:
+        with self.mu:
+            values = sorted((labels, list(counts), total) for labels, (counts, total) in self.values.items())
+        samples = []
+        for labels, counts, total in values:
+            cumulative = _cumulative(counts)
+            for bound, count in zip(self.buckets + (math.inf,), cumulative):
+                samples.append((f"{self.name}_bucket", labels + (_format_value(bound),), count))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, cumulative[-1]))
+        return samples
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for name, labels, value in self.samples():
+            names = self.label_names + ("le",) if name.endswith("_bucket") else self.label_names
+            lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *_):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+def _cumulative(counts: list[int]) -> list[int]:
+    result, running = [], 0
+    for count in counts:
+        running += count
+        result.append(running)
+    return result
+
+
+def quantile(buckets: typing.Sequence[float], cumulative: list[int], q: float) -> typing.Optional[float]:
+    """The q quantile of a histogram's cumulative bucket counts, None without observations."""
+    if not cumulative or cumulative[-1] == 0:
+        return None
+    rank = q * cumulative[-1]
+    index = bisect.bisect_left(cumulative, rank)
+    if index >= len(buckets):
+        # in the +Inf bucket, the largest finite bound is the best estimate
+        return buckets[-1]
+    lower = buckets[index - 1] if index > 0 else 0.0
+    below = cumulative[index - 1] if index > 0 else 0
+    in_bucket = cumulative[index] - below
+    return lower + (buckets[index] - lower) * ((rank - below) / in_bucket if in_bucket else 1)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+        self.mu = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self.mu:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names: typing.Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: typing.Sequence[str] = (),
+                  buckets: typing.Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def gauge(self, name: str, help_text: str, collect: typing.Callable[[], dict[Labels, float]],
+              label_names: typing.Sequence[str] = ()) -> Gauge:
+        """Registers a gauge, replacing the one of the same name (the server wires them up once it runs)."""
+        gauge = Gauge(name, help_text, label_names, collect)
+        with self.mu:
+            self.metrics[name] = gauge
+        return gauge
+
+    def get(self, name: str) -> typing.Optional[Metric]:
+        with self.mu:
+            return self.metrics.get(name)
+
+    def render(self) -> str:
+        with self.mu:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CACHE_REQUESTS = REGISTRY.counter("impulses_cache_requests_total", "Lookups of in-memory caches.",
+                                  ["cache", "result"])
+HTTP_REQUEST_SECONDS = REGISTRY.histogram("impulses_http_request_duration_seconds",
+                                          "Duration of HTTP requests, by route template.",
+                                          ["method", "route", "status"])
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def cache_hit_ratios() -> dict[Labels, float]:
+    lookups: dict[str, list[float]] = {}
+    for _, (cache, result), value in CACHE_REQUESTS.samples():
+        lookups.setdefault(cache, [0.0, 0.0])[result == "hit"] += value
+    return {(cache,): hits / (misses + hits) for cache, (misses, hits) in lookups.items() if misses + hits}
+
+
+REGISTRY.gauge("impulses_cache_hit_ratio", "Share of cache lookups that hit, since the server started.",
+               cache_hit_ratios, ["cache"])
+
+
+def route_template(scope: Scope) -> str:
+    """Path of the request with its path parameters' values replaced by their names, e.g. /data/{metric_name}.
+
+    Rebuilt from the path, as routes of included routers only know their path relative to the router's prefix.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    params = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(f"{{{params[segment]}}}" if segment in params else segment for segment in scope["path"].split("/"))
+
+
+class RequestMetricsMiddleware:
+    """Observes the duration of every HTTP request, labeled by its route's path template.
+
+    Requests matching no route are labeled "unmatched", so arbitrary paths don't create new series.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route_template(scope), status)
@@ -0,0 +1,71 @@
+"""
+Sampling profiler of the server's threads, with output in the collapsed stack format of flamegraph.pl and speedscope.
+
+Samples the Python stacks of every thread with sys._current_frames, so it needs no instrumentation and costs nothing
+when not running.
+"""
+from __future__ import annotations
+
+import collections
+import os
+import sys
+import threading
+import time
+import types
+
+# leaf frames of threads waiting for work: idle workers, the event loop's select, the job scheduler
+IDLE_FRAMES = {
+    ("threading.py", "Condition.wait"),
+    ("threading.py", "Event.wait"),
+    ("threading.py", "Thread.join"),
+    ("queue.py", "Queue.get"),
+    # concurrent.futures workers, blocked in SimpleQueue.get
+    ("thread.py", "_worker"),
+    # the log writer thread, blocked in SimpleQueue.get
+    ("handlers.py", "QueueListener.dequeue"),
+    ("selectors.py", "EpollSelector.select"),
+    ("selectors.py", "PollSelector.select"),
+    ("selectors.py", "KqueueSelector.select"),
+    ("selectors.py", "SelectSelector.select"),
+}
+
+
+def _frame_name(frame: types.FrameType) -> str:
+    code = frame.f_code
+    # semicolons separate frames in the collapsed format
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _is_idle(frame: types.FrameType) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_qualname) in IDLE_FRAMES
+
+
+def _stack(frame: types.FrameType) -> list[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def sample(seconds: float, interval_sec: float = 0.005, include_idle: bool = False) -> collections.Counter[str]:
+    """Samples the stacks of every other thread for `seconds`, counting the collapsed stacks (root first, prefixed
+    with the thread's name)."""
+    me = threading.get_ident()
+    counts: collections.Counter[str] = collections.Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me or (not include_idle and _is_idle(frame)):
+                continue
+            thread_name = names.get(thread_id, str(thread_id)).replace(";", ":")
+            counts[";".join([thread_name] + _stack(frame))] += 1
+        time.sleep(interval_sec)
+    return counts
+
+
+def collapsed(counts: collections.Counter[str]) -> str:
+    """One `frame;frame;frame count` line per stack, the input of flamegraph.pl."""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -3,6 +3,7 @@ import typing
 import fastapi
 
 from src.common import health
+from src.common import tracing
 from src.job import job
 from src.job.gcal_sync.gcal_state import GoogleOAuth2State
 
@@ -58,5 +59,6 @@ def get_state() -> AppState:
 
 def injected(cls: typing.Type[T]) -> T:
     def getter(state: AppState = fastapi.Depends(get_state)) -> T:
-        return state.get_obj(cls)
+        with tracing.span("inject", cls=cls.__name__):
+            return state.get_obj(cls)
     return fastapi.Depends(getter)
@@ -0,0 +1,111 @@
+"""
+Opt-in tracing of requests: a tree of timed spans per request, logged when the request is slower than a threshold.
+
+Code marks the steps worth timing with `with tracing.span("name"):`. Outside of a traced request (tracing disabled,
+jobs) a span is a no-op, so marking hot paths costs a context variable lookup.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+import typing
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.common import metrics
+
+_current: contextvars.ContextVar[typing.Optional["Span"]] = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name: str, attrs: dict[str, typing.Any]):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: typing.Optional[float] = None
+        self.children: list[Span] = []
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def render(self, origin: typing.Optional[float] = None, depth: int = 0) -> list[str]:
+        """One line per span, indented by depth: offset from the root's start, duration, name and attributes."""
+        origin = self.start if origin is None else origin
+        attrs = "".join(f" {key}={value}" for key, value in self.attrs.items())
+        lines = [f"{'  ' * depth}+{(self.start - origin) * 1000:.1f}ms {self.duration_ms:.1f}ms {self.name}{attrs}"]
+        # spans of threadpool calls are appended when they start, which isn't always in order
+        for child in sorted(self.children, key=lambda child: child.start):
+            lines.extend(child.render(origin, depth + 1))
+        return lines
+
+
+class _ChildSpan:
+    def __init__(self, parent: Span, name: str, attrs: dict[str, typing.Any]):
+        self.parent = parent
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> None:
+        self.span = Span(self.name, self.attrs)
+        self.parent.children.append(self.span)
+        self.token = _current.set(self.span)
+
+    def __exit__(self, *_) -> None:
+        self.span.end = time.perf_counter()
+        _current.reset(self.token)
+
+
+class _NoSpan:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *_) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **attrs) -> typing.ContextManager[None]:
+    """Times the with block as a child of the current span, if a request is being traced."""
+    parent = _current.get()
+    if parent is None:
+        return _NO_SPAN
+    return _ChildSpan(parent, name, attrs)
+
+
+class TracingMiddleware:
+    """Traces every HTTP request and logs the span tree of those slower than slow_request_ms."""
+    def __init__(self, app: ASGIApp, slow_request_ms: float):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        root = Span("request", {})
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            root.end = time.perf_counter()
+            _current.reset(token)
+            if root.duration_ms >= self.slow_request_ms:
+                root.attrs.update(method=scope["method"], route=metrics.route_template(scope), status=status)
+                logging.warning("Slow request %s %s took %.1fms:\n%s", scope["method"], scope["path"],
+                                root.duration_ms, "\n".join(root.render()),
+                                extra={"route": root.attrs["route"], "status": status,
+                                       "duration_ms": round(root.duration_ms, 1)})
@@ -1,14 +1,43 @@
 from __future__ import annotations
 
+import bisect
+import collections
 import json
+import threading
 import time
 import uuid
 from typing import Any
 
 import pydantic
 
+from src.common import metrics
 from src.db.sqlite import SqlitePool
 
+# chats whose collapsed messages are kept in memory
+MAX_CACHED_CHATS = 64
+
+_MESSAGE_COLUMNS = """
+    id,
+    chat_id,
+    role,
+    content,
+    message_type,
+    model_id,
+    model_name,
+    request_started_at,
+    payload_json,
+    tool_call_id,
+    round,
+    created_at
+"""
+# the same, without the (large) payloads of tool responses
+_MESSAGE_COLUMNS_WITHOUT_TOOL_RESPONSES = _MESSAGE_COLUMNS.replace(
+    "payload_json",
+    "case when message_type = 'tool_response' then null else payload_json end as payload_json",
+)
+
+Cursor = tuple[int, str]
+
 
 class AiChatSummary(pydantic.BaseModel):
     id: str
@@ -110,6 +139,7 @@ def _collapse_chat_messages(raw_messages: list[AiChatMessage]) -> list[AiChatMes
                 "name": message.content or "(missing name)",
                 "arguments": tool_payload.get("arguments"),
                 "response": None,
+                "cached": None,
             }
             group["tool_calls"].append(tool_trace)
             group["tool_calls_by_id"][tool_trace["tool_call_id"]] = tool_trace
@@ -123,6 +153,7 @@ def _collapse_chat_messages(raw_messages: list[AiChatMessage]) -> list[AiChatMes
             response = payload.get("response")
             if existing_trace is not None:
                 existing_trace["response"] = response
+                existing_trace["cached"] = payload.get("cached")
             else:
                 tool_trace = {
                     "round": message.round if message.round is not None else 0,
@@ -130,6 +161,7 @@ def _collapse_chat_messages(raw_messages: list[AiChatMessage]) -> list[AiChatMes
                     "name": "(missing name)",
                     "arguments": None,
                     "response": response,
+                    "cached": payload.get("cached"),
                 }
                 group["tool_calls"].append(tool_trace)
                 group["tool_calls_by_id"][tool_call_id] = tool_trace
@@ -166,6 +198,7 @@ def _collapse_chat_messages(raw_messages: list[AiChatMessage]) -> list[AiChatMes
                         "name": tool_trace["name"],
                         "arguments": tool_trace["arguments"],
                         "response": tool_trace["response"],
+                        "cached": tool_trace["cached"],
                     }
                     for tool_trace in grouped["tool_calls"]
                 ],
@@ -183,9 +216,49 @@ def _collapse_chat_messages(raw_messages: list[AiChatMessage]) -> list[AiChatMes
     return collapsed_messages
 
 
+def _message_order(message: AiChatMessage) -> tuple[int, str]:
+    """The order of a chat's messages, the same in every read."""
+    return message.created_at, message.id
+
+
+def _request_of(message: AiChatMessage) -> int:
+    return message.request_started_at if message.request_started_at is not None else message.created_at
+
+
+class _CollapsedChat:
+    """Collapsed messages of a chat. An appended message only changes the messages of its request, so only those are
+    collapsed again."""
+    def __init__(self, raw_messages: list[AiChatMessage]):
+        self.raw_by_request: dict[int, list[AiChatMessage]] = {}
+        for message in raw_messages:
+            self.raw_by_request.setdefault(_request_of(message), []).append(message)
+        self.messages = _collapse_chat_messages(raw_messages)
+
+    def append(self, message: AiChatMessage) -> None:
+        request = _request_of(message)
+        raw_messages = self.raw_by_request.setdefault(request, [])
+        if any(raw.id == message.id for raw in raw_messages):
+            # saved before the chat was read, and read with it
+            return
+        bisect.insort(raw_messages, message, key=_message_order)
+        collapsed = {collapsed.id: collapsed for collapsed in _collapse_chat_messages(raw_messages)}
+        self.messages = [
+            collapsed.get(current.id, current) if _request_of(current) == request else current
+            for current in self.messages
+        ]
+        if message.id in collapsed:
+            # messages of concurrent turns may be saved out of order
+            index = bisect.bisect_right(self.messages, _message_order(message), key=_message_order)
+            self.messages.insert(index, collapsed[message.id])
+
+
 class AiChatRepo:
     def __init__(self, pool: SqlitePool):
         self.pool = pool
+        self.collapsed: collections.OrderedDict[str, _CollapsedChat] = collections.OrderedDict()
+        # chat id -> messages appended to the chat, cached or not; a chat read while this changed may miss a message
+        self.generations: dict[str, int] = {}
+        self.mu = threading.Lock()
 
     def list_chats(self, user_id: str) -> list[AiChatSummary]:
         rows = self.pool.execute(
@@ -225,27 +298,110 @@ class AiChatRepo:
         return _to_chat_summary(rows[0]) if rows else None
 
     def list_messages(self, chat_id: str) -> list[AiChatMessage]:
+        """Every message of the chat, collapsed, from memory for recently used chats."""
+        with self.mu:
+            collapsed = self.collapsed.get(chat_id)
+            if collapsed is not None:
+                self.collapsed.move_to_end(chat_id)
+                messages = list(collapsed.messages)
+            generation = self.generations.get(chat_id, 0)
+        metrics.cache_lookup("chat_messages", collapsed is not None)
+        if collapsed is not None:
+            return messages
+
         rows = self.pool.execute(
-            """
-            select id,
-                   chat_id,
-                   role,
-                   content,
-                   message_type,
-                   model_id,
-                   model_name,
-                   request_started_at,
-                   payload_json,
-                   tool_call_id,
-                   round,
-                   created_at
+            f"""
+            select {_MESSAGE_COLUMNS}
             from ai_chat_message
             where chat_id = ?
-            order by created_at asc, rowid asc
+            order by created_at asc, id asc
             """,
             [chat_id],
         )
-        return _collapse_chat_messages([_to_chat_message(row) for row in rows])
+        loaded = _CollapsedChat([_to_chat_message(row) for row in rows])
+        with self.mu:
+            if self.generations.get(chat_id, 0) != generation:
+                # isn't cached: the appended message isn't in it, nor would it be appended to it
+                return list(loaded.messages)
+            collapsed = self.collapsed.setdefault(chat_id, loaded)
+            while len(self.collapsed) > MAX_CACHED_CHATS:
+                self.collapsed.popitem(last=False)
+            return list(collapsed.messages)
+
+    def list_messages_page(
+        self,
+        chat_id: str,
+        *,
+        limit: int,
+        before: Cursor | None = None,
+        after: Cursor | None = None,
+        tool_responses: bool = True,
+    ) -> tuple[list[AiChatMessage], bool]:
+        """Up to limit collapsed messages between the (created_at, id) cursors: the newest ones, or the oldest ones
+        after `after` if only it is given. Also whether more messages lie beyond the page."""
+        conditions = ["chat_id = ?", "message_type = 'text'"]
+        params: list[Any] = [chat_id]
+        if before is not None:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(before)
+        if after is not None:
+            conditions.append("(created_at, id) > (?, ?)")
+            params.extend(after)
+        oldest_first = after is not None and before is None
+        order = "asc" if oldest_first else "desc"
+        rows = self.pool.execute(
+            f"""
+            select {_MESSAGE_COLUMNS}
+            from ai_chat_message
+            where {" and ".join(conditions)}
+            order by created_at {order}, id {order}
+            limit ?
+            """,
+            [*params, limit + 1],
+        )
+        has_more = len(rows) > limit
+        visible = [_to_chat_message(row) for row in rows[:limit]]
+        if not oldest_first:
+            visible.reverse()
+        return self._with_requests(chat_id, visible, tool_responses), has_more
+
+    def _with_requests(
+        self,
+        chat_id: str,
+        visible: list[AiChatMessage],
+        tool_responses: bool,
+    ) -> list[AiChatMessage]:
+        """The visible messages, collapsed with the reasoning and charts of their requests."""
+        requests = sorted({_request_of(message) for message in visible})
+        if not requests:
+            return []
+        rows = self.pool.execute(
+            f"""
+            select {_MESSAGE_COLUMNS if tool_responses else _MESSAGE_COLUMNS_WITHOUT_TOOL_RESPONSES}
+            from ai_chat_message
+            where chat_id = ?
+              and message_type != 'text'
+              and request_started_at in ({", ".join("?" * len(requests))})
+            """,
+            [chat_id, *requests],
+        )
+        messages = visible + [_to_chat_message(row) for row in rows]
+        messages.sort(key=_message_order)
+        return _collapse_chat_messages(messages)
+
+    def get_message(self, chat_id: str, message_id: str) -> AiChatMessage | None:
+        """A visible message of the chat, collapsed with the full reasoning of its request."""
+        rows = self.pool.execute(
+            f"""
+            select {_MESSAGE_COLUMNS}
+            from ai_chat_message
+            where chat_id = ? and id = ? and message_type = 'text'
+            """,
+            [chat_id, message_id],
+        )
+        if not rows:
+            return None
+        return self._with_requests(chat_id, [_to_chat_message(rows[0])], tool_responses=True)[0]
 
     def get_chat(self, user_id: str, chat_id: str) -> AiChat | None:
         summary = self.get_chat_summary(user_id, chat_id)
@@ -366,4 +522,10 @@ class AiChatRepo:
             """,
             [now, chat_id],
         )
-        return _to_chat_message(row)
+        message = _to_chat_message(row)
+        with self.mu:
+            self.generations[chat_id] = self.generations.get(chat_id, 0) + 1
+            collapsed = self.collapsed.get(chat_id)
+            if collapsed is not None:
+                collapsed.append(message)
+        return message
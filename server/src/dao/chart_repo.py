@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import json
+import logging
 import time
 import uuid
+from collections.abc import Callable
 from typing import Any
 
 import pydantic
@@ -42,9 +44,24 @@ def _to_chart(row: dict) -> Chart:
     )
 
 
+ChartChangeListener = Callable[[str], None]
+
+
 class ChartRepo:
     def __init__(self, pool: SqlitePool):
         self.pool = pool
+        self.listeners: list[ChartChangeListener] = []
+
+    def add_listener(self, listener: ChartChangeListener) -> None:
+        """Calls listener(user_id) after every change of the user's charts."""
+        self.listeners.append(listener)
+
+    def _notify(self, user_id: str) -> None:
+        for listener in self.listeners:
+            try:
+                listener(user_id)
+            except Exception:
+                logging.exception(f"Chart change listener failed for user {user_id}")
 
     def list_charts(self, user_id: str) -> list[Chart]:
         rows = self.pool.execute(
@@ -153,6 +170,7 @@ class ChartRepo:
                 row["updated_at"],
             ],
         )
+        self._notify(user_id)
         return _to_chart(row)
 
     def update_chart(
@@ -196,6 +214,7 @@ class ChartRepo:
                 chart_id,
             ],
         )
+        self._notify(user_id)
         return self.get_chart_by_id(user_id, chart_id)
 
     def delete_chart(self, user_id: str, chart_id: str) -> None:
@@ -206,3 +225,4 @@ class ChartRepo:
             """,
             [user_id, chart_id],
         )
+        self._notify(user_id)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import json
+import logging
 import time
 import uuid
+from collections.abc import Callable
 from typing import Any
 
 import pydantic
@@ -38,9 +40,24 @@ def _to_dashboard(row: dict) -> Dashboard:
     )
 
 
+DashboardChangeListener = Callable[[str], None]
+
+
 class DashboardRepo:
     def __init__(self, pool: SqlitePool):
         self.pool = pool
+        self.listeners: list[DashboardChangeListener] = []
+
+    def add_listener(self, listener: DashboardChangeListener) -> None:
+        """Calls listener(user_id) after every change of the user's dashboards."""
+        self.listeners.append(listener)
+
+    def _notify(self, user_id: str) -> None:
+        for listener in self.listeners:
+            try:
+                listener(user_id)
+            except Exception:
+                logging.exception(f"Dashboard change listener failed for user {user_id}")
 
     def list_dashboards(self, user_id: str) -> list[Dashboard]:
         rows = self.pool.execute(
@@ -137,6 +154,7 @@ class DashboardRepo:
                 row["updated_at"],
             ],
         )
+        self._notify(user_id)
         return _to_dashboard(row)
 
     def update_dashboard(
@@ -174,6 +192,7 @@ class DashboardRepo:
                 dashboard_id,
             ],
         )
+        self._notify(user_id)
         return self.get_dashboard_by_id(user_id, dashboard_id)
 
     def delete_dashboard(self, user_id: str, dashboard_id: str) -> None:
@@ -184,3 +203,4 @@ class DashboardRepo:
             """,
             [user_id, dashboard_id],
         )
+        self._notify(user_id)
@@ -1,8 +1,13 @@
+import bisect
 import pydantic
 import logging
 import typing
+from src.common import metrics
+from src.common import tracing
 from src.db import dao
 
+INGESTED_DATAPOINTS = metrics.REGISTRY.counter("impulses_ingested_datapoints_total", "Datapoints written to metrics.")
+
 class PerTimestampDimensionsKey:
     def __init__(self, dimensions, timestamp):
         self.timestamp = timestamp
@@ -22,19 +27,59 @@ class DatapointsDto(pydantic.RootModel):
     root: typing.List[DatapointDto]
 class StringsListDto(pydantic.RootModel):
     root: typing.List[str]
+class MetricVersionDto(pydantic.BaseModel):
+    """Monotonic version of a metric.
+
+    point_versions[i] is the version in which the i-th datapoint was last added or changed.
+    Changes that drop datapoints (deletion, retention) set reset_version, deltas can't be served from before it.
+    """
+    version: int = 0
+    reset_version: int = 0
+    point_versions: typing.List[int] = []
 
 MetricType = dao.Type.for_pydantic_model(DatapointsDto, lambda: DatapointsDto([]))
 StringsListType = dao.Type.for_pydantic_model(StringsListDto, lambda: StringsListDto([]))
+MetricVersionType = dao.Type.for_pydantic_model(MetricVersionDto, lambda: MetricVersionDto())
+MetricChangeListener = typing.Callable[[str, str, typing.Optional[int]], None]
 
 class DataDao:
     def __init__(self, dao_instance: dao.PersistentDao):
         self.metric_dao = dao.TypedPersistentDao(dao_instance, MetricType)
         self.metric_names_dao = dao.TypedPersistentDao(dao_instance, StringsListType)
+        self.metric_version_dao = dao.TypedPersistentDao(dao_instance, MetricVersionType)
+        self.listeners: typing.List[MetricChangeListener] = []
+    def add_listener(self, listener: MetricChangeListener):
+        """Calls listener(user_id, metric_name, changed_from) after every change of a metric.
+
+        changed_from is the earliest timestamp of the added or changed datapoints, or None if datapoints were removed.
+        """
+        self.listeners.append(listener)
+    def _notify(self, user_id: str, metric_name: str, changed_from: typing.Optional[int]):
+        for listener in self.listeners:
+            try:
+                listener(user_id, metric_name, changed_from)
+            except Exception:
+                logging.exception(f"Metric change listener failed for {metric_name}")
     def _metric_names_path(self, user_id: str) -> list[str]:
         return ["users", user_id, "metric_names"]
     def _metric_path(self, user_id: str, metric_name: str) -> list[str]:
         return ["users", user_id, "data", metric_name]
-    def add(self, user_id: str, metric_name: str, dps: typing.List[DatapointDto]):
+    def _metric_version_path(self, user_id: str, metric_name: str) -> list[str]:
+        return ["users", user_id, "metric_versions", metric_name]
+    def _bump_version(self, user_id: str, metric_name: str, point_count: int):
+        with self.metric_version_dao.locked_access(self._metric_version_path(user_id, metric_name)) \
+                as (metric_version, set_metric_version):
+            new_version = metric_version.version + 1
+            set_metric_version(MetricVersionDto(version=new_version, reset_version=new_version,
+                                                point_versions=[new_version] * point_count))
+    def add(self, user_id: str, metric_name: str, dps: typing.List[DatapointDto], count_ingested: bool = True):
+        """count_ingested=False leaves the datapoints out of INGESTED_DATAPOINTS, for the server's own metrics."""
+        with tracing.span("data_dao.add", points=len(dps)):
+            self._add(user_id, metric_name, dps, count_ingested)
+
+    def _add(self, user_id: str, metric_name: str, dps: typing.List[DatapointDto], count_ingested: bool):
+        if count_ingested:
+            INGESTED_DATAPOINTS.inc(amount=len(dps))
         self.log_duplicates(dps)
 
         with self.metric_names_dao.locked_access(self._metric_names_path(user_id)) as (__metric_names, set_metric_names):
@@ -43,26 +88,109 @@ class DataDao:
                 metric_names = metric_names + [metric_name]
                 set_metric_names(StringsListDto(metric_names))
 
-        with self.metric_dao.locked_access(self._metric_path(user_id, metric_name)) as (datapoints, set_datapoints):
+        with self.metric_dao.locked_access(self._metric_path(user_id, metric_name)) as (datapoints, set_datapoints), \
+                self.metric_version_dao.locked_access(self._metric_version_path(user_id, metric_name)) \
+                as (metric_version, set_metric_version):
             dp_list = datapoints.root
+            point_versions = metric_version.point_versions
+            if len(point_versions) != len(dp_list):
+                # metric written before versioning was introduced
+                point_versions = [metric_version.version] * len(dp_list)
+            new_version = metric_version.version + 1
 
-            datapoints_map = {PerTimestampDimensionsKey(dp.dimensions, dp.timestamp): dp.value for dp in dp_list}
-            for dp in dps:
-                datapoints_map[PerTimestampDimensionsKey(dp.dimensions, dp.timestamp)] = dp.value
-            dp_list = [DatapointDto(timestamp=k.timestamp, dimensions=k.dimensions, value=v)
-                    for k, v in datapoints_map.items()]
-            dp_list.sort(key=lambda dp: dp.timestamp)
+            with tracing.span("data_dao.merge", stored=len(dp_list)):
+                datapoints_map = {PerTimestampDimensionsKey(dp.dimensions, dp.timestamp): (dp.value, point_version)
+                                  for dp, point_version in zip(dp_list, point_versions)}
+                changed_from = None
+                for dp in dps:
+                    key = PerTimestampDimensionsKey(dp.dimensions, dp.timestamp)
+                    if key in datapoints_map and datapoints_map[key][0] == dp.value:
+                        continue
+                    datapoints_map[key] = (dp.value, new_version)
+                    changed_from = dp.timestamp if changed_from is None else min(changed_from, dp.timestamp)
+                entries = sorted(datapoints_map.items(), key=lambda entry: entry[0].timestamp)
+                dp_list = [DatapointDto(timestamp=k.timestamp, dimensions=k.dimensions, value=v)
+                        for k, (v, _) in entries]
             set_datapoints(DatapointsDto(dp_list))
+            if changed_from is not None:
+                set_metric_version(MetricVersionDto(version=new_version,
+                                                    reset_version=metric_version.reset_version,
+                                                    point_versions=[v for _, (_, v) in entries]))
+        if changed_from is not None:
+            self._notify(user_id, metric_name, changed_from)
+
+    def rewrite_if_idle(self, user_id: str, metric_name: str,
+                        rewrite: typing.Callable[[typing.List[DatapointDto]], typing.List[DatapointDto]]) -> typing.Optional[int]:
+        """Replaces the metric's datapoints with rewrite(datapoints) unless someone else holds the metric's lock.
+
+        Returns the number of datapoints removed, or None if the metric was busy and got skipped.
+        """
+        with self.metric_dao.try_locked_access(self._metric_path(user_id, metric_name)) as access:
+            if access is None:
+                return None
+            datapoints, set_datapoints = access
+            dp_list = datapoints.root
+            new_dp_list = rewrite(dp_list)
+            if new_dp_list == dp_list:
+                return 0
+            set_datapoints(DatapointsDto(new_dp_list))
+            self._bump_version(user_id, metric_name, len(new_dp_list))
+        self._notify(user_id, metric_name, None)
+        return len(dp_list) - len(new_dp_list)
 
     def list_metric_names(self, user_id: str) -> list[str]:
         return self.metric_names_dao.read(self._metric_names_path(user_id)).root
     def get_metric_by_metric_name(self, user_id: str, metric_name: str):
         return self.metric_dao.read(self._metric_path(user_id, metric_name))
+    def get_metric_range(self, user_id: str, metric_name: str,
+                         start: typing.Optional[int], end: typing.Optional[int], include_previous: bool = False,
+                         dimension_filter: typing.Optional[typing.Callable[[typing.Mapping[str, str]], bool]] = None) \
+            -> typing.List[DatapointDto]:
+        """Datapoints with start <= timestamp <= end (None = unbounded) matching dimension_filter.
+
+        With include_previous, the matching datapoints at the latest timestamp before start are included as well.
+        """
+        dp_list = self.get_metric_by_metric_name(user_id, metric_name).root
+        lo = 0 if start is None else bisect.bisect_left(dp_list, start, key=lambda dp: dp.timestamp)
+        hi = len(dp_list) if end is None else bisect.bisect_right(dp_list, end, key=lambda dp: dp.timestamp)
+        result = [dp for dp in dp_list[lo:hi] if dimension_filter is None or dimension_filter(dp.dimensions)]
+        if include_previous:
+            previous = []
+            for dp in reversed(dp_list[:lo]):
+                if previous and dp.timestamp != previous[-1].timestamp:
+                    break
+                if dimension_filter is None or dimension_filter(dp.dimensions):
+                    previous.append(dp)
+            result = previous[::-1] + result
+        return result
+    def get_metric_version(self, user_id: str, metric_name: str) -> MetricVersionDto:
+        return self.metric_version_dao.read(self._metric_version_path(user_id, metric_name))
+    def get_metric_since_version(self, user_id: str, metric_name: str, since_version: int) \
+            -> typing.Tuple[int, bool, DatapointsDto]:
+        """Returns (version, is_delta, datapoints).
+
+        If the metric hasn't been reset after since_version, only the datapoints added or changed after it are returned,
+        otherwise the whole metric is.
+        """
+        with self.metric_dao.locked_access(self._metric_path(user_id, metric_name)) as (datapoints, _), \
+                self.metric_version_dao.locked_access(self._metric_version_path(user_id, metric_name)) \
+                as (metric_version, _):
+            dp_list = datapoints.root
+            point_versions = metric_version.point_versions
+            if not (metric_version.reset_version <= since_version <= metric_version.version) \
+                    or len(point_versions) != len(dp_list):
+                return metric_version.version, False, datapoints
+            return metric_version.version, True, DatapointsDto([dp for dp, point_version in zip(dp_list, point_versions)
+                                                                if point_version > since_version])
     def delete_metric_name(self, user_id: str, metric_name: str):
         with self.metric_names_dao.locked_access(self._metric_names_path(user_id)) as (__metric_names, set_metric_names):
             metric_names = __metric_names.root
             set_metric_names(StringsListDto([name for name in metric_names if name != metric_name]))
-        return self.metric_dao.delete(self._metric_path(user_id, metric_name))
+        # the version is kept, so that clients holding an older version get an empty series instead of a stale one
+        self._bump_version(user_id, metric_name, 0)
+        result = self.metric_dao.delete(self._metric_path(user_id, metric_name))
+        self._notify(user_id, metric_name, None)
+        return result
     def log_duplicates(self, dps: list[DatapointDto]):
         dps_map = {}
         for dp in dps:
@@ -0,0 +1,89 @@
+"""
+Staging area for resumable bulk data imports.
+
+Storage structure:
+  imports/
+    {user_id}/
+      {upload_id}
+    staging/
+      {chunk_id}  (chunk being received, appended to its upload once complete)
+"""
+
+import logging
+import os
+import pathlib
+import shutil
+import threading
+import time
+import typing
+import uuid
+
+# uploads that haven't been touched for this long are removed when a new upload is created
+STALE_UPLOAD_SEC = 24 * 60 * 60
+
+
+class OffsetMismatchError(Exception):
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class DataImportDao:
+    def __init__(self, storage_dir: pathlib.Path):
+        self.imports_dir = storage_dir / "imports"
+        self.staging_dir = self.imports_dir / "staging"
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self.mu = threading.Lock()
+
+    def _path(self, user_id: str, upload_id: str) -> pathlib.Path:
+        # upload ids come from urls, only accept ones we could have generated
+        return self.imports_dir / user_id / str(uuid.UUID(upload_id))
+
+    def create(self, user_id: str) -> str:
+        self.remove_stale_uploads()
+        upload_id = str(uuid.uuid4())
+        path = self._path(user_id, upload_id)
+        os.makedirs(path.parent, exist_ok=True)
+        path.touch()
+        return upload_id
+
+    def get_offset(self, user_id: str, upload_id: str) -> typing.Optional[int]:
+        try:
+            return self._path(user_id, upload_id).stat().st_size
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def staging_path(self) -> pathlib.Path:
+        return self.staging_dir / str(uuid.uuid4())
+
+    def append(self, user_id: str, upload_id: str, offset: int, chunk_path: pathlib.Path) -> int:
+        """Appends the chunk file at offset, which has to be the current size of the upload. Returns the new size."""
+        with self.mu:
+            current = self.get_offset(user_id, upload_id)
+            if current is None:
+                raise FileNotFoundError(upload_id)
+            if current != offset:
+                raise OffsetMismatchError(current)
+            path = self._path(user_id, upload_id)
+            with open(path, "ab") as file, open(chunk_path, "rb") as chunk:
+                shutil.copyfileobj(chunk, file)
+            return path.stat().st_size
+
+    def open(self, user_id: str, upload_id: str) -> typing.BinaryIO:
+        return open(self._path(user_id, upload_id), "rb")
+
+    def delete(self, user_id: str, upload_id: str) -> None:
+        try:
+            os.remove(self._path(user_id, upload_id))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def remove_stale_uploads(self) -> None:
+        cutoff = time.time() - STALE_UPLOAD_SEC
+        for path in self.imports_dir.glob("*/*"):  # includes abandoned staging chunks
+            try:
+                if path.stat().st_mtime < cutoff:
+                    logging.info(f"Removing stale data import {path}")
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
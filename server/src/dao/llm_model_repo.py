@@ -42,6 +42,8 @@ class LlmModelSettings(pydantic.BaseModel):
     base_url: str
     headers: list[LlmHeader] = pydantic.Field(default_factory=list)
     is_localhost: bool = False
+    # marks the system prompt as cacheable, for endpoints taking `cache_control` (e.g. Anthropic's, OpenRouter)
+    prompt_caching: bool = False
 
     @pydantic.field_validator("base_url")
     @classmethod
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+import uuid
+
+import pydantic
+
+from src.db.sqlite import SqlitePool
+
+
+DOWNSAMPLE_AGGREGATES = ("avg", "sum", "min", "max", "last", "p50", "p90", "p95", "p99")
+
+
+class RetentionPolicy(pydantic.BaseModel):
+    id: str
+    user_id: str
+    metric_name: str | None = None  # None = default for every metric of the user
+    max_age_ms: int | None = None
+    max_points: int | None = None
+    downsample_after_ms: int | None = None
+    downsample_resolution_ms: int | None = None
+    downsample_aggregate: str = "avg"
+    created_at: int
+    updated_at: int
+
+
+def _to_policy(row: dict) -> RetentionPolicy:
+    return RetentionPolicy(
+        id=row.get("id"),
+        user_id=row.get("user_id"),
+        metric_name=row.get("metric_name") or None,
+        max_age_ms=row.get("max_age_ms"),
+        max_points=row.get("max_points"),
+        downsample_after_ms=row.get("downsample_after_ms"),
+        downsample_resolution_ms=row.get("downsample_resolution_ms"),
+        downsample_aggregate=row.get("downsample_aggregate") or "avg",
+        created_at=int(row.get("created_at")),
+        updated_at=int(row.get("updated_at")),
+    )
+
+
+class RetentionPolicyRepo:
+    def __init__(self, pool: SqlitePool):
+        self.pool = pool
+
+    def list_policies(self, user_id: str) -> list[RetentionPolicy]:
+        rows = self.pool.execute(
+            """
+            select id,
+                   user_id,
+                   metric_name,
+                   max_age_ms,
+                   max_points,
+                   downsample_after_ms,
+                   downsample_resolution_ms,
+                   downsample_aggregate,
+                   created_at,
+                   updated_at
+            from retention_policy
+            where user_id = ?
+            order by metric_name asc
+            """,
+            [user_id],
+        )
+        return [_to_policy(row) for row in rows]
+
+    def list_all_policies(self) -> list[RetentionPolicy]:
+        rows = self.pool.execute(
+            """
+            select id,
+                   user_id,
+                   metric_name,
+                   max_age_ms,
+                   max_points,
+                   downsample_after_ms,
+                   downsample_resolution_ms,
+                   downsample_aggregate,
+                   created_at,
+                   updated_at
+            from retention_policy
+            order by user_id asc, metric_name asc
+            """,
+        )
+        return [_to_policy(row) for row in rows]
+
+    def get_policy(self, user_id: str, metric_name: str | None) -> RetentionPolicy | None:
+        rows = self.pool.execute(
+            """
+            select id,
+                   user_id,
+                   metric_name,
+                   max_age_ms,
+                   max_points,
+                   downsample_after_ms,
+                   downsample_resolution_ms,
+                   downsample_aggregate,
+                   created_at,
+                   updated_at
+            from retention_policy
+            where user_id = ? and metric_name = ?
+            """,
+            [user_id, metric_name or ""],
+        )
+        return _to_policy(rows[0]) if rows else None
+
+    def upsert_policy(
+        self,
+        user_id: str,
+        metric_name: str | None,
+        max_age_ms: int | None,
+        max_points: int | None,
+        downsample_after_ms: int | None,
+        downsample_resolution_ms: int | None,
+        downsample_aggregate: str,
+    ) -> RetentionPolicy:
+        now = int(time.time())
+        self.pool.execute(
+            """
+            insert into retention_policy (
+                id,
+                user_id,
+                metric_name,
+                max_age_ms,
+                max_points,
+                downsample_after_ms,
+                downsample_resolution_ms,
+                downsample_aggregate,
+                created_at,
+                updated_at
+            )
+            values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            on conflict (user_id, metric_name) do update
+            set max_age_ms = excluded.max_age_ms,
+                max_points = excluded.max_points,
+                downsample_after_ms = excluded.downsample_after_ms,
+                downsample_resolution_ms = excluded.downsample_resolution_ms,
+                downsample_aggregate = excluded.downsample_aggregate,
+                updated_at = excluded.updated_at
+            """,
+            [
+                str(uuid.uuid4()),
+                user_id,
+                metric_name or "",
+                max_age_ms,
+                max_points,
+                downsample_after_ms,
+                downsample_resolution_ms,
+                downsample_aggregate,
+                now,
+                now,
+            ],
+        )
+        return self.get_policy(user_id, metric_name)
+
+    def delete_policy(self, user_id: str, policy_id: str) -> None:
+        self.pool.execute(
+            """
+            delete from retention_policy
+            where user_id = ? and id = ?
+            """,
+            [user_id, policy_id],
+        )
@@ -81,6 +81,17 @@ class UserRepo:
         )
         return _to_user(rows[0]) if rows else None
 
+    def list_users_by_role(self, role: str) -> list[User]:
+        rows = self.pool.execute(
+            """
+            select id, email, role, created_at
+            from app_user
+            where role = ? and deleted_at is null
+            """,
+            [role],
+        )
+        return [_to_user(row) for row in rows]
+
     def soft_delete_user(self, user_id: str) -> None:
         self.pool.execute(
             """
@@ -5,12 +5,35 @@ import logging
 import os
 import pathlib
 import threading
+import time
 import typing
 
 import pydantic
 
+from src.common import metrics
+from src.common import tracing
+
 T = typing.TypeVar("T", bound=pydantic.BaseModel)
 
+LOCK_WAIT_SECONDS = metrics.REGISTRY.histogram("impulses_store_lock_wait_seconds",
+                                               "Time spent waiting for a data store path's lock.",
+                                               buckets=metrics.LOCK_BUCKETS)
+LOCK_BUSY = metrics.REGISTRY.counter("impulses_store_lock_busy_total",
+                                     "Attempts to lock a data store path that was already locked, without waiting.")
+STORE_SECONDS = metrics.REGISTRY.histogram("impulses_store_operation_duration_seconds",
+                                           "Duration of data store writes and of reads missing the cache.",
+                                           ["operation"])
+STORE_BYTES = metrics.REGISTRY.histogram("impulses_store_operation_bytes",
+                                         "Size of the files written and read by the data store.",
+                                         ["operation"], buckets=metrics.SIZE_BUCKETS)
+
+
+def _file_size(path: pathlib.Path) -> int:
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
 class Type(abc.ABC, typing.Generic[T]):
     @abc.abstractmethod
     def serialize(self, value: T, filepath: pathlib.Path) -> None:
@@ -26,7 +49,6 @@ class Type(abc.ABC, typing.Generic[T]):
                 self.default = default
             def serialize(self, value, filepath: pathlib.Path) -> None:
                 with open(filepath, "w") as file:
-                    print(value)
                     file.write(value.model_dump_json())
             def deserialize(self, filepath: pathlib.Path) -> typing.Optional[T]:
                 try:
@@ -46,11 +68,20 @@ class PerStringLock:
         with self.mu:
             lock = self.locks[key]
             self.counter[key] += 1
-        lock.acquire()
-    def release(self, key: str):
+        with LOCK_WAIT_SECONDS.time(), tracing.span("store.lock_wait", key=key):
+            lock.acquire()
+    def try_acquire(self, key: str) -> bool:
         with self.mu:
             lock = self.locks[key]
+            if not lock.acquire(blocking=False):
+                LOCK_BUSY.inc()
+                return False
             self.counter[key] += 1
+            return True
+    def release(self, key: str):
+        with self.mu:
+            lock = self.locks[key]
+            self.counter[key] -= 1
             if self.counter[key] == 0:
                 del self.locks[key]
                 del self.counter[key]
@@ -79,13 +110,17 @@ class PersistentDao:
 
     def flush(self, path: typing.Sequence[str], value, type_obj: Type):
         key = self._key_for_path(path)
-        logging.debug(f"Writing {type_obj} {key} to data store")
+        logging.debug("Writing %s to data store", key)
         self.cache[key] = value
         tmp_path = self.get_tmp_path()
         obj_path = self.get_path(path)
-        os.makedirs(obj_path.parent, exist_ok=True)
-        type_obj.serialize(value, tmp_path)
-        os.replace(tmp_path, obj_path)
+        start = time.perf_counter()
+        with tracing.span("store.flush", key=key):
+            os.makedirs(obj_path.parent, exist_ok=True)
+            type_obj.serialize(value, tmp_path)
+            STORE_BYTES.observe(_file_size(tmp_path), "flush")
+            os.replace(tmp_path, obj_path)
+        STORE_SECONDS.observe(time.perf_counter() - start, "flush")
 
     @contextlib.contextmanager
     def locked_access(self, path: typing.Sequence[str], type_obj: Type):
@@ -96,17 +131,33 @@ class PersistentDao:
         finally:
             self.locks.release(key)
 
+    @contextlib.contextmanager
+    def try_locked_access(self, path: typing.Sequence[str], type_obj: Type):
+        """Like locked_access, but yields None instead of waiting when the path is already locked."""
+        key = self._key_for_path(path)
+        if not self.locks.try_acquire(key):
+            yield None
+            return
+        try:
+            yield self.read(path, type_obj), lambda new: self.flush(path, new, type_obj)
+        finally:
+            self.locks.release(key)
+
     def read(self, path: typing.Sequence[str], type_obj: Type):
         key = self._key_for_path(path)
         cached = self.cache[key] if key in self.cache else None
+        metrics.cache_lookup("persistent_dao", cached != None)
         if cached != None:
             return cached
-        self.cache[key] = result = type_obj.deserialize(self.get_path(path))
+        obj_path = self.get_path(path)
+        with STORE_SECONDS.time("read"), tracing.span("store.read", key=key):
+            self.cache[key] = result = type_obj.deserialize(obj_path)
+        STORE_BYTES.observe(_file_size(obj_path), "read")
         return result
 
     def delete(self, path: typing.Sequence[str]):
         key = self._key_for_path(path)
-        logging.debug(f"Deleting {key} from the data store")
+        logging.debug("Deleting %s from the data store", key)
         self.cache[key] = None
         try:
             os.remove(self.get_path(path))
@@ -130,3 +181,5 @@ class TypedPersistentDao(typing.Generic[T]):
         return self.dao.delete(path)
     def locked_access(self, path: typing.Sequence[str]) -> typing.ContextManager[typing.Tuple[T, typing.Callable[[T], None]]]:
         return self.dao.locked_access(path, self.type_obj)
+    def try_locked_access(self, path: typing.Sequence[str]) -> typing.ContextManager[typing.Optional[typing.Tuple[T, typing.Callable[[T], None]]]]:
+        return self.dao.try_locked_access(path, self.type_obj)
@@ -2,8 +2,17 @@ from __future__ import annotations
 
 import pathlib
 import sqlite3
+import sys
+import time
 import typing
 
+from src.common import metrics
+from src.common import tracing
+
+QUERY_SECONDS = metrics.REGISTRY.histogram("impulses_sqlite_query_duration_seconds",
+                                           "Duration of SQLite queries, by the repository method running them.",
+                                           ["method"])
+
 
 class DuplicateKeyError(Exception):
     pass
@@ -21,10 +30,16 @@ class SqlitePool:
         return conn
 
     def execute(self, sql: str, params: typing.Sequence[typing.Any] | None = None) -> list[dict]:
-        with self.getconn() as conn:
-            cur = conn.execute(sql, params or [])
-            rows = [dict(row) for row in cur.fetchall()] if cur.description else []
-            conn.commit()
+        # e.g. TokenRepo.list_tokens
+        method = sys._getframe(1).f_code.co_qualname
+        start = time.perf_counter()
+        try:
+            with tracing.span("sqlite", method=method), self.getconn() as conn:
+                cur = conn.execute(sql, params or [])
+                rows = [dict(row) for row in cur.fetchall()] if cur.description else []
+                conn.commit()
+        finally:
+            QUERY_SECONDS.observe(time.perf_counter() - start, method)
         return rows
 
 
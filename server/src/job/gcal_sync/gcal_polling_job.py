@@ -3,9 +3,11 @@ import datetime
 import threading
 import typing
 import logging
+import os
 import pydantic
 import re
 import time
+import zoneinfo
 
 from src.dao import data_dao
 from src.dao.gcal_dao import GCalDao, GCalCredentials, GCalEvent, GCalEventState
@@ -40,6 +42,8 @@ class GCalPollingJob(job.Job):
         self.token_repo = state.get_obj(TokenRepo)
         self.google_oauth2_state = state.get_google_oauth2_state()
         self.mu = threading.Lock()
+        # all-day events start and end at midnight in this time zone
+        self.all_day_events_tz = zoneinfo.ZoneInfo(os.environ.get("GCAL_ALL_DAY_EVENTS_TZ", "UTC"))
     
     def interval(self) -> int:
         return 5 * 60
@@ -65,7 +69,7 @@ class GCalPollingJob(job.Job):
                 if token and token.expires_at > int(time.time()):
                     active_creds.append((creds, token))
                 else:
-                    logging.debug(f"Skipping expired/deleted token {creds.token_id}")
+                    logging.debug("Skipping expired/deleted token %s", creds.token_id)
             
             logging.info(f"Polling {len(active_creds)} active Google Calendar integrations")
             
@@ -79,7 +83,7 @@ class GCalPollingJob(job.Job):
     
     def poll_calendar_for_token(self, creds: GCalCredentials, token):
         """Poll a single token's calendar."""
-        logging.debug(f"Fetching GCal events for token {creds.token_id} (user {creds.user_id})")
+        logging.debug("Fetching GCal events for token %s (user %s)", creds.token_id, creds.user_id)
         
         # Build Google credentials
         google_creds = credentials.Credentials(
@@ -103,7 +107,7 @@ class GCalPollingJob(job.Job):
                     refresh_token=google_creds.refresh_token,
                     token_expiry=int(google_creds.expiry.timestamp())
                 )
-                logging.debug(f"Refreshed GCal credentials for token {creds.token_id}")
+                logging.debug("Refreshed GCal credentials for token %s", creds.token_id)
             except Exception as e:
                 logging.error(f"Failed to refresh credentials for token {creds.token_id}: {e}")
                 return
@@ -168,7 +172,7 @@ class GCalPollingJob(job.Job):
             # Tombstone event - remove from state
             if status == "cancelled":
                 event_state.events.pop(event_id, None)
-                logging.debug(f"Removed cancelled event {event_id}")
+                logging.debug("Removed cancelled event %s", event_id)
                 continue
             
             # Add or update event in state
@@ -185,7 +189,7 @@ class GCalPollingJob(job.Job):
                     start=start,
                     end=end
                 )
-                logging.debug(f"Updated event {event_id}: {summary}")
+                logging.debug("Updated event %s: %s", event_id, summary)
     
     def generate_metrics_from_state(self, event_state: GCalEventState) -> dict[str, list[data_dao.DatapointDto]]:
         """Generate metrics from full event state (all events)."""
@@ -221,7 +225,7 @@ class GCalPollingJob(job.Job):
                     try:
                         custom_values[m.group(1)] = float(m.group(2))
                     except ValueError as e:
-                        logging.debug(f"Couldn't parse metric value: {e}")
+                        logging.debug("Couldn't parse metric value: %s", e)
             
             # Create duration datapoint
             new_dp = data_dao.DatapointDto(
@@ -240,7 +244,7 @@ class GCalPollingJob(job.Job):
                 )
                 metrics_dps["imp.events.custom." + name].append(new_dp)
         
-        logging.debug(f"Generated metrics from {events_synchronized} events")
+        logging.debug("Generated metrics from %s events", events_synchronized)
         return dict(metrics_dps)
 
     def poll_events(self, creds: credentials.Credentials, last_sync_token: typing.Optional[str]) \
@@ -266,10 +270,10 @@ class GCalPollingJob(job.Job):
                 nextPageToken = curr_res.get("nextPageToken", None)
                 # should send the last sync token only on the first request
                 last_sync_token = None
-            logging.debug(f"Fetched {len(result)} events")
+            logging.debug("Fetched %s events", len(result))
             return result, nextSyncToken
         except Exception as e:
-            logging.warning("Exception occurred during actual events fetching", e)
+            logging.warning("Exception occurred during actual events fetching: %s", e)
             return None
     
     def get_date(self, gcal_api_time_info) -> str | None:
@@ -277,8 +281,8 @@ class GCalPollingJob(job.Job):
         if not gcal_api_time_info:
             return None
         if "date" in gcal_api_time_info:
-            # TODO: default timezone should be configurable
-            return gcal_api_time_info["date"] + "T00:00:00+00:00"
+            date = datetime.date.fromisoformat(gcal_api_time_info["date"])
+            return datetime.datetime.combine(date, datetime.time(), tzinfo=self.all_day_events_tz).isoformat()
         return gcal_api_time_info.get("dateTime")
 
 
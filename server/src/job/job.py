@@ -1,11 +1,16 @@
 import abc
 import datetime
 import logging
+import time
 import typing
 import uuid
 
+from src.common import metrics
 from src.common import state
 
+JOB_SECONDS = metrics.REGISTRY.histogram("impulses_job_duration_seconds", "Duration of background job runs.",
+                                         ["job", "outcome"])
+
 
 class Job:
     def __init__(self, state: "state.AppState"):
@@ -24,7 +29,13 @@ def runner(job: Job) -> typing.Callable[[], None]:
         job_id = uuid.uuid4()
         job_start_time = datetime.datetime.now(datetime.timezone.utc)
         logging.info(f"Starting job: {job.job_name()} at {job_start_time}. Job id: {job_id}")
-        job.run()
+        start = time.perf_counter()
+        outcome = "failure"
+        try:
+            job.run()
+            outcome = "success"
+        finally:
+            JOB_SECONDS.observe(time.perf_counter() - start, job.job_name(), outcome)
         job_end_time = datetime.datetime.now(datetime.timezone.utc)
         logging.info(f"Finishing job: {job.job_name()} at {job_end_time}. Job took: {job_end_time - job_start_time}. Job id: {job_id}")
     return __
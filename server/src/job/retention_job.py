@@ -0,0 +1,126 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+from src.common import state
+from src.dao import data_dao
+from src.dao.retention_policy_repo import RetentionPolicy, RetentionPolicyRepo
+from src.job import job
+from src.pulselang import quantiles
+
+
+def _aggregate(values: list[float], aggregate: str) -> float:
+    if aggregate == "sum":
+        return sum(values)
+    if aggregate == "min":
+        return min(values)
+    if aggregate == "max":
+        return max(values)
+    if aggregate == "last":
+        return values[-1]
+    if aggregate.startswith("p"):
+        return quantiles.Percentile(float(aggregate[1:]))(values)
+    return sum(values) / len(values)
+
+
+def _downsample(dps: list[data_dao.DatapointDto], resolution_ms: int, aggregate: str) \
+        -> list[data_dao.DatapointDto]:
+    """Collapses datapoints sharing dimensions into one datapoint per resolution_ms bucket.
+
+    A bucket holding a single datapoint at the bucket's start is left as is, so downsampling is idempotent.
+    """
+    buckets: dict[tuple, list[data_dao.DatapointDto]] = collections.defaultdict(list)
+    for dp in dps:
+        bucket_start = dp.timestamp - dp.timestamp % resolution_ms
+        buckets[(bucket_start, frozenset(dp.dimensions.items()))].append(dp)
+
+    result = []
+    for (bucket_start, _), bucket in buckets.items():
+        if len(bucket) == 1 and bucket[0].timestamp == bucket_start:
+            result.append(bucket[0])
+            continue
+        result.append(data_dao.DatapointDto(
+            timestamp=bucket_start,
+            dimensions=bucket[0].dimensions,
+            value=_aggregate([dp.value for dp in bucket], aggregate),
+        ))
+    return result
+
+
+def apply_retention_policy(dps: list[data_dao.DatapointDto], policy: RetentionPolicy, now_ms: int) \
+        -> list[data_dao.DatapointDto]:
+    """Returns the datapoints left after downsampling, age expiry and point count capping (in that order)."""
+    result = list(dps)
+    if policy.downsample_after_ms is not None and policy.downsample_resolution_ms:
+        # whole buckets only, so that no bucket is downsampled twice and aggregates aren't aggregated again
+        cutoff = now_ms - policy.downsample_after_ms
+        cutoff -= cutoff % policy.downsample_resolution_ms
+        old = [dp for dp in result if dp.timestamp < cutoff]
+        if old:
+            recent = [dp for dp in result if dp.timestamp >= cutoff]
+            result = _downsample(old, policy.downsample_resolution_ms, policy.downsample_aggregate) + recent
+            result.sort(key=lambda dp: dp.timestamp)
+    if policy.max_age_ms is not None:
+        cutoff = now_ms - policy.max_age_ms
+        result = [dp for dp in result if dp.timestamp >= cutoff]
+    if policy.max_points is not None and len(result) > policy.max_points:
+        result = result[-policy.max_points:]
+    return result
+
+
+class RetentionJob(job.Job):
+    """Applies users' retention policies to their metrics.
+
+    The job yields to ingest: a metric that is currently locked by a writer is skipped until the next run,
+    and the job sleeps between metrics so that it never hogs the data store.
+    """
+    def __init__(self, state: state.AppState):
+        super().__init__(state)
+        self.data_dao = state.get_obj(data_dao.DataDao)
+        self.policy_repo = state.get_obj(RetentionPolicyRepo)
+        self.pause_between_metrics_sec = int(os.environ.get("RETENTION_JOB_PAUSE_MS", "50")) / 1000
+        self.mu = threading.Lock()
+
+    def interval(self) -> int:
+        return int(os.environ.get("RETENTION_JOB_INTERVAL_SEC", str(60 * 60)))
+
+    def run(self):
+        if not self.mu.acquire(blocking=False):
+            logging.warning("Not running another retention job as the previous run hasn't finished")
+            return
+
+        try:
+            policies_by_user: dict[str, list[RetentionPolicy]] = collections.defaultdict(list)
+            for policy in self.policy_repo.list_all_policies():
+                policies_by_user[policy.user_id].append(policy)
+
+            for user_id, policies in policies_by_user.items():
+                try:
+                    self.apply_for_user(user_id, policies)
+                except Exception as e:
+                    logging.error(f"Error applying retention policies for user {user_id}: {e}")
+        finally:
+            self.mu.release()
+
+    def apply_for_user(self, user_id: str, policies: list[RetentionPolicy]):
+        default_policy = next((policy for policy in policies if policy.metric_name is None), None)
+        per_metric_policies = {policy.metric_name: policy for policy in policies if policy.metric_name is not None}
+
+        for metric_name in self.data_dao.list_metric_names(user_id):
+            policy = per_metric_policies.get(metric_name, default_policy)
+            if policy is None:
+                continue
+            now_ms = int(time.time() * 1000)
+            removed = self.data_dao.rewrite_if_idle(
+                user_id,
+                metric_name,
+                lambda dps: apply_retention_policy(dps, policy, now_ms),
+            )
+            if removed is None:
+                logging.debug("Skipping retention of busy metric %s of user %s", metric_name, user_id)
+            elif removed:
+                logging.info(f"Retention removed {removed} datapoints from metric {metric_name} of user {user_id}")
+            time.sleep(self.pause_between_metrics_sec)
+
@@ -0,0 +1,117 @@
+"""
+Reports the server's own metrics (/metrics) as imp.server.* metrics of every admin user, so that Impulses can be
+charted in Impulses dashboards.
+"""
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+import time
+
+from src.common import metrics, state
+from src.dao import data_dao, user_repo
+from src.job import job
+
+PREFIX = "imp.server."
+
+
+def interval_sec() -> int:
+    """Seconds between reports, 0 (the default) disables the reporter."""
+    return int(os.environ.get("SERVER_METRICS_INTERVAL_SEC", "0"))
+
+
+@dataclasses.dataclass
+class Snapshot:
+    """Cumulative counters of the server at `at` (seconds since the epoch), and the current cache sizes."""
+    at: float
+    ingested: float
+    # cumulative bucket counts of all requests' durations
+    requests: list[int]
+    # (cache, hit or miss) -> lookups
+    cache_lookups: dict[tuple[str, ...], float]
+    cache_entries: dict[tuple[str, ...], float]
+    result_cache_bytes: float
+    # job -> (runs, seconds)
+    jobs: dict[str, tuple[int, float]]
+
+    @staticmethod
+    def take() -> Snapshot:
+        jobs: dict[str, tuple[int, float]] = {}
+        for name, labels, value in job.JOB_SECONDS.samples():
+            job_name = labels[0]
+            runs, seconds = jobs.get(job_name, (0, 0.0))
+            if name.endswith("_count"):
+                jobs[job_name] = (runs + int(value), seconds)
+            elif name.endswith("_sum"):
+                jobs[job_name] = (runs, seconds + value)
+        return Snapshot(
+            at=time.time(),
+            ingested=data_dao.INGESTED_DATAPOINTS.value(),
+            requests=metrics.HTTP_REQUEST_SECONDS.merged()[0],
+            cache_lookups={labels: value for _, labels, value in metrics.CACHE_REQUESTS.samples()},
+            cache_entries=_gauge("impulses_cache_entries"),
+            result_cache_bytes=_gauge("impulses_result_cache_bytes").get((), 0.0),
+            jobs=jobs,
+        )
+
+
+def _gauge(name: str) -> dict[tuple[str, ...], float]:
+    # gauges are wired up by the server, a reporter run before that finds none
+    gauge = metrics.REGISTRY.get(name)
+    return {labels: value for _, labels, value in gauge.samples()} if gauge is not None else {}
+
+
+def report(previous: Snapshot, current: Snapshot) -> dict[str, list[data_dao.DatapointDto]]:
+    """Datapoints of the imp.server.* metrics, rates and latencies are of the time between the snapshots."""
+    timestamp = int(current.at * 1000)
+    elapsed = max(current.at - previous.at, 1e-9)
+    result: dict[str, list[data_dao.DatapointDto]] = {}
+    def add(name: str, value: float, **dimensions: str):
+        result.setdefault(PREFIX + name, []).append(
+            data_dao.DatapointDto(timestamp=timestamp, dimensions=dimensions, value=value))
+
+    add("ingest.rate", (current.ingested - previous.ingested) / elapsed)
+    requests = [now - before for now, before in zip(current.requests, previous.requests)]
+    add("requests.rate", requests[-1] / elapsed)
+    if requests[-1]:
+        add("requests.latency.p50", metrics.quantile(metrics.HTTP_REQUEST_SECONDS.buckets, requests, 0.5) * 1000)
+        add("requests.latency.p99", metrics.quantile(metrics.HTTP_REQUEST_SECONDS.buckets, requests, 0.99) * 1000)
+
+    for (cache,), entries in current.cache_entries.items():
+        add("cache.entries", entries, cache=cache)
+        hits = current.cache_lookups.get((cache, "hit"), 0) - previous.cache_lookups.get((cache, "hit"), 0)
+        misses = current.cache_lookups.get((cache, "miss"), 0) - previous.cache_lookups.get((cache, "miss"), 0)
+        if hits + misses:
+            add("cache.hit_ratio", hits / (hits + misses), cache=cache)
+    add("result_cache.bytes", current.result_cache_bytes)
+
+    for job_name, (runs, seconds) in current.jobs.items():
+        previous_runs, previous_seconds = previous.jobs.get(job_name, (0, 0.0))
+        if runs > previous_runs:
+            add("job.duration", (seconds - previous_seconds) / (runs - previous_runs) * 1000, job=job_name)
+    return result
+
+
+class ServerMetricsJob(job.Job):
+    """Writes a report every SERVER_METRICS_INTERVAL_SEC seconds, one batch per metric and admin user."""
+    def __init__(self, state: state.AppState):
+        super().__init__(state)
+        self.data_dao = state.get_obj(data_dao.DataDao)
+        self.user_repo = state.get_obj(user_repo.UserRepo)
+        self.previous = Snapshot.take()
+
+    def interval(self) -> int:
+        return interval_sec()
+
+    def run(self):
+        current = Snapshot.take()
+        previous, self.previous = self.previous, current
+        datapoints = report(previous, current)
+        for admin in self.user_repo.list_users_by_role("ADMIN"):
+            for metric_name, dps in datapoints.items():
+                try:
+                    # ingest.rate is of the users' writes, not of these
+                    self.data_dao.add(admin.id, metric_name, dps, count_ingested=False)
+                except Exception:
+                    logging.exception(f"Failed to report {metric_name} for {admin.id}")
@@ -0,0 +1,280 @@
+"""
+Compiles PulseLang programs into a resolved intermediate form.
+
+Compilation resolves every symbol (to a lambda local, a top-level definition or a builtin), checks the
+arity of builtin calls and folds duration arguments like "30d" into milliseconds. Compiled programs are
+cached by content hash, so the validator and evaluators share the work, and the prelude (COMMON_LIBRARY)
+is compiled once instead of once per chart.
+"""
+from __future__ import annotations
+
+import collections
+import dataclasses
+import hashlib
+import re
+import threading
+import typing
+
+from src.common import metrics
+from src.pulselang import parser
+from src.pulselang.library import COMMON_LIBRARY
+
+DEFAULT_CACHE_SIZE = 256
+
+_DURATION_REGEX = re.compile(r"(-?\d+)(d|h|min|ms|m|s)")
+_UNIT_MS = {
+    "d": 24 * 60 * 60 * 1000,
+    "h": 60 * 60 * 1000,
+    "min": 60 * 1000,
+    "m": 60 * 1000,
+    "s": 1000,
+    "ms": 1,
+}
+
+
+def parse_duration(text: str) -> int:
+    """Parses durations like "1h30min" into milliseconds. Returns 0 if nothing matches."""
+    return sum(int(amount) * _UNIT_MS[unit] for amount, unit in _DURATION_REGEX.findall(text))
+
+
+@dataclasses.dataclass(frozen=True)
+class Const:
+    value: int | float | str
+
+
+@dataclasses.dataclass(frozen=True)
+class Duration:
+    text: str
+    ms: int
+
+
+@dataclasses.dataclass(frozen=True)
+class EmptyList:
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class BuiltinRef:
+    name: str
+
+
+@dataclasses.dataclass(frozen=True)
+class GlobalRef:
+    name: str
+
+
+@dataclasses.dataclass(frozen=True)
+class LocalRef:
+    name: str
+
+
+@dataclasses.dataclass(frozen=True)
+class Call:
+    fn: Node
+    args: tuple[Node, ...]
+
+
+@dataclasses.dataclass(frozen=True)
+class Define:
+    name: str
+    value: Node
+
+
+@dataclasses.dataclass(frozen=True)
+class Lambda:
+    params: tuple[str, ...]
+    body: tuple[Node, ...]
+
+
+Node = Const | Duration | EmptyList | BuiltinRef | GlobalRef | LocalRef | Call | Define | Lambda
+
+# (min, max) number of arguments, None = variadic
+BUILTIN_ARITY: dict[str, tuple[int, int | None]] = {
+    "data": (1, 1),
+    "window": (3, 3),
+    "prefix": (2, 2),
+    "bucketize": (3, 4),
+    "bucketize-days": (3, 4),
+    "bucketize-weeks": (3, 4),
+    "bucketize-months": (3, 4),
+    "shift": (2, 2),
+    "before-now": (0, 0),
+    "filter": (2, 2),
+    "map": (1, None),
+    "compose": (2, None),
+    "not": (1, 1),
+    "and": (0, None),
+    "or": (0, None),
+    "dimension-is": (2, 2),
+    "dim-matches": (2, 2),
+    "no-dimension": (1, 1),
+    "<": (1, 2),
+    ">": (1, 2),
+    "<=": (1, 2),
+    ">=": (1, 2),
+    "=": (1, 2),
+    "+": (0, None),
+    "-": (2, 2),
+    "*": (0, None),
+    "/": (2, 2),
+    "exp": (2, 2),
+    "abs": (1, 1),
+    "sgn": (1, 1),
+    "aggregate-from": (1, 1),
+    "p": (1, 2),
+    "count": (1, 1),
+    "sum": (1, 1),
+    "avg": (1, 1),
+    "min": (1, 1),
+    "max": (1, 1),
+    "std": (1, 1),
+}
+# position of the duration argument of builtins that take one
+DURATION_ARGS = {"window": 1, "bucketize": 1, "shift": 0}
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledProgram:
+    forms: tuple[Node, ...]
+    # top-level definitions, including the prelude's
+    definitions: frozenset[str]
+    # top-level names bound exactly once to a literal, including the prelude's
+    constants: typing.Mapping[str, Const]
+    # metrics referenced by literal (data "name") calls
+    metrics: frozenset[str]
+    prelude: CompiledProgram | None = None
+
+
+def _top_level_definitions(nodes: typing.Iterable[parser.AstNode]) -> list[tuple[str, parser.AstNode | None]]:
+    definitions = []
+    for node in nodes:
+        if isinstance(node, parser.ListNode) and len(node.items) >= 2 and node.items[0] == parser.SymbolNode("define") \
+                and isinstance(node.items[1], parser.SymbolNode):
+            definitions.append((node.items[1].name, node.items[2] if len(node.items) > 2 else None))
+    return definitions
+
+
+class _Compiler:
+    def __init__(self, nodes: tuple[parser.AstNode, ...], prelude: CompiledProgram | None):
+        definitions = _top_level_definitions(nodes)
+        names = collections.Counter(name for name, _ in definitions)
+        self.globals = set(names) | (prelude.definitions if prelude else set())
+        self.constants = {name: const for name, const in (prelude.constants if prelude else {}).items()
+                          if name not in names}
+        for name, value in definitions:
+            if names[name] == 1 and isinstance(value, (parser.NumberNode, parser.StringNode)):
+                self.constants[name] = Const(value.value)
+        self.metrics: set[str] = set()
+
+    def compile_node(self, node: parser.AstNode, scopes: list[set[str]]) -> Node:
+        if isinstance(node, (parser.NumberNode, parser.StringNode)):
+            return Const(node.value)
+        if isinstance(node, parser.SymbolNode):
+            return self.resolve(node.name, scopes)
+        if not node.items:
+            return EmptyList()
+
+        head = node.items[0]
+        if head == parser.SymbolNode("define"):
+            if len(node.items) < 2 or not isinstance(node.items[1], parser.SymbolNode):
+                raise ValueError("define expects a symbol name")
+            if len(node.items) < 3:
+                raise ValueError("define missing value expression")
+            return Define(node.items[1].name, self.compile_node(node.items[2], scopes))
+
+        if head == parser.SymbolNode("lambda"):
+            if len(node.items) < 2 or not isinstance(node.items[1], parser.ListNode):
+                raise ValueError("lambda expects a parameter list")
+            params = []
+            for param in node.items[1].items:
+                if not isinstance(param, parser.SymbolNode):
+                    raise ValueError("lambda parameter must be a symbol")
+                params.append(param.name)
+            body = node.items[2:]
+            scope = set(params) | {name for name, _ in _top_level_definitions(body)}
+            return Lambda(tuple(params), tuple(self.compile_node(expr, scopes + [scope]) for expr in body))
+
+        fn = self.compile_node(head, scopes)
+        args = [self.compile_node(arg, scopes) for arg in node.items[1:]]
+        if isinstance(fn, BuiltinRef):
+            self.check_builtin_call(fn.name, args)
+        return Call(fn, tuple(args))
+
+    def resolve(self, name: str, scopes: list[set[str]]) -> Node:
+        if any(name in scope for scope in scopes):
+            return LocalRef(name)
+        if name in self.globals:
+            return GlobalRef(name)
+        if name in BUILTIN_ARITY:
+            return BuiltinRef(name)
+        raise ValueError(f"Undefined symbol '{name}'")
+
+    def check_builtin_call(self, name: str, args: list[Node]) -> None:
+        min_args, max_args = BUILTIN_ARITY[name]
+        if len(args) < min_args or (max_args is not None and len(args) > max_args):
+            expected = str(min_args) if min_args == max_args \
+                else f"at least {min_args}" if max_args is None else f"{min_args} to {max_args}"
+            raise ValueError(f"{name} expects {expected} argument(s), got {len(args)}")
+
+        position = DURATION_ARGS.get(name)
+        if position is not None:
+            args[position] = self.fold_duration(name, args[position])
+        if name == "data" and isinstance(args[0], Const) and isinstance(args[0].value, str):
+            self.metrics.add(args[0].value)
+
+    def fold_duration(self, name: str, arg: Node) -> Node:
+        if isinstance(arg, GlobalRef) and arg.name in self.constants:
+            arg = self.constants[arg.name]
+        if not isinstance(arg, Const):
+            return arg
+        if not isinstance(arg.value, str):
+            raise ValueError(f"{name} expects a duration string")
+        ms = parse_duration(arg.value)
+        if name == "window" and ms == 0:
+            raise ValueError("Duration of a window must be non-zero")
+        return Duration(arg.value, ms)
+
+
+def _compile(program: str, prelude: CompiledProgram | None) -> CompiledProgram:
+    nodes = parser.parse(program)
+    compiler = _Compiler(nodes, prelude)
+    forms = tuple(compiler.compile_node(node, []) for node in nodes)
+    return CompiledProgram(forms=forms,
+                           definitions=frozenset(compiler.globals),
+                           constants=compiler.constants,
+                           metrics=frozenset(compiler.metrics),
+                           prelude=prelude)
+
+
+class CompiledProgramCache:
+    """Bounded LRU of compiled programs keyed by the sha256 of the prelude and the program."""
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries: collections.OrderedDict[str, CompiledProgram] = collections.OrderedDict()
+        self.mu = threading.Lock()
+
+    def compile(self, program: str, prelude: str = COMMON_LIBRARY) -> CompiledProgram:
+        """Raises ValueError if the program is invalid."""
+        compiled_prelude = self.compile(prelude, prelude="") if prelude else None
+        key = hashlib.sha256(f"{len(prelude)}:{prelude}{program}".encode()).hexdigest()
+        with self.mu:
+            metrics.cache_lookup("compiled_program", key in self.entries)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        # compiled outside of the lock, at worst a program is compiled twice
+        compiled = _compile(program, compiled_prelude)
+        with self.mu:
+            self.entries[key] = compiled
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return compiled
+
+
+cache = CompiledProgramCache()
+
+
+def compile_program(program: str, prelude: str = COMMON_LIBRARY) -> CompiledProgram:
+    return cache.compile(program, prelude)
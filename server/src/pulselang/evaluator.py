@@ -0,0 +1,390 @@
+"""
+Evaluates compiled PulseLang programs on the server, with the same builtins as the SDK interpreters.
+"""
+from __future__ import annotations
+
+import inspect
+import math
+import re
+import statistics
+import time
+import typing
+
+from src.pulselang import buckets, compiler, quantiles
+from src.pulselang.series import Point, Series, compose
+
+Resolver = typing.Callable[[str], Series]
+
+
+class EvaluationError(ValueError):
+    pass
+
+
+class Environment:
+    def __init__(self, parent: Environment | None = None):
+        self.values: dict[str, typing.Any] = {}
+        self.parent = parent
+    def define(self, name: str, value) -> None:
+        self.values[name] = value
+    def lookup(self, name: str):
+        env = self
+        while env is not None:
+            if name in env.values:
+                return env.values[name]
+            env = env.parent
+        raise EvaluationError(f"Undefined symbol '{name}'")
+
+
+# (variadic, arity) by code object, as every runtime defines its natives anew
+_signatures: dict[typing.Any, tuple[bool, int]] = {}
+
+
+class NativeFunction:
+    """Extra arguments are dropped and missing ones are None, like in the TypeScript interpreter."""
+    def __init__(self, name: str, impl: typing.Callable):
+        self.name = name
+        self.impl = impl
+        code = getattr(impl, "__code__", None)
+        shape = _signatures.get(code)
+        if shape is None:
+            params = inspect.signature(impl).parameters.values()
+            shape = (any(param.kind == param.VAR_POSITIONAL for param in params),
+                     sum(1 for param in params if param.kind == param.POSITIONAL_OR_KEYWORD))
+            if code is not None:
+                _signatures[code] = shape
+        self.variadic, self.arity = shape
+    def __call__(self, args: list):
+        if not self.variadic:
+            args = (list(args) + [None] * self.arity)[:self.arity]
+        return self.impl(*args)
+
+
+class PercentileFunction(NativeFunction):
+    """The aggregate of (p percent [accuracy]), which windows and buckets apply to their values directly."""
+    def __init__(self, percentile: quantiles.Percentile):
+        super().__init__("percentile", lambda values: percentile(expect_number_list(values)))
+        self.percentile = percentile
+
+
+class Closure:
+    def __init__(self, node: compiler.Lambda, env: Environment):
+        self.node = node
+        self.env = env
+
+
+def truthy(value) -> bool:
+    if isinstance(value, (bool, int, float, str, list)):
+        return bool(value)
+    return value is not None
+
+
+def expect_number(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise EvaluationError("Expected number")
+    return value
+
+
+def expect_string(value) -> str:
+    if not isinstance(value, str):
+        raise EvaluationError("Expected string")
+    return value
+
+
+def expect_duration(value) -> int:
+    if isinstance(value, compiler.Duration):
+        return value.ms
+    return compiler.parse_duration(expect_string(value))
+
+
+def expect_zone(value) -> str:
+    """An IANA time zone name, UTC if omitted."""
+    return buckets.UTC if value is None else expect_string(value)
+
+
+def expect_series(value) -> Series:
+    if not isinstance(value, Series):
+        raise EvaluationError("Expected datapoint series")
+    return value
+
+
+def expect_function(value):
+    if not isinstance(value, (NativeFunction, Closure)):
+        raise EvaluationError("Expected function value")
+    return value
+
+
+def expect_point(value) -> Point:
+    if isinstance(value, Point):
+        return value
+    if isinstance(value, Series):
+        raise EvaluationError("Expected datapoint but received series")
+    raise EvaluationError("Expected datapoint")
+
+
+def expect_number_list(value) -> list[float]:
+    if not isinstance(value, list):
+        raise EvaluationError("Expected list of numbers")
+    return [expect_number(item) for item in value]
+
+
+class Runtime:
+    def __init__(self, resolver: Resolver):
+        self.resolver = resolver
+        self.resolver_cache: dict[str, Series] = {}
+        self.builtins: dict[str, NativeFunction] = {}
+        self._register_builtins()
+        self.global_env = Environment()
+
+    def run(self, program: compiler.CompiledProgram) -> dict[str, typing.Any]:
+        """Evaluates the program (after its prelude) and returns its top-level bindings."""
+        try:
+            if program.prelude is not None:
+                self.run(program.prelude)
+            for form in program.forms:
+                self.eval_node(form, self.global_env)
+        except RecursionError:
+            raise EvaluationError("Maximum recursion depth exceeded")
+        return dict(self.global_env.values)
+
+    def eval_node(self, node: compiler.Node, env: Environment):
+        match node:
+            case compiler.Const(value):
+                return value
+            case compiler.Duration():
+                return node
+            case compiler.EmptyList():
+                return []
+            case compiler.LocalRef(name):
+                return env.lookup(name)
+            case compiler.GlobalRef(name):
+                # a global can shadow a builtin, but only once it's defined
+                if name in self.global_env.values:
+                    return self.global_env.values[name]
+                if name in self.builtins:
+                    return self.builtins[name]
+                raise EvaluationError(f"Undefined symbol '{name}'")
+            case compiler.BuiltinRef(name):
+                return self.builtins[name]
+            case compiler.Define(name, value):
+                result = self.eval_node(value, env)
+                env.define(name, result)
+                return result
+            case compiler.Lambda():
+                return Closure(node, env)
+            case compiler.Call(fn, args):
+                return self.call_function(self.eval_node(fn, env), [self.eval_node(arg, env) for arg in args])
+        raise EvaluationError(f"Unknown node {node}")
+
+    def call_function(self, fn, args: list):
+        if isinstance(fn, NativeFunction):
+            try:
+                return fn(args)
+            except (TypeError, ZeroDivisionError, OverflowError, re.error) as e:
+                raise EvaluationError(f"{fn.name}: {e}") from e
+        if not isinstance(fn, Closure):
+            raise EvaluationError("Attempted to call non-function value")
+        scope = Environment(fn.env)
+        for i, param in enumerate(fn.node.params):
+            scope.define(param, args[i] if i < len(args) else None)
+        result = 0
+        for expr in fn.node.body:
+            result = self.eval_node(expr, scope)
+        return result
+
+    def _aggregate_with(self, fn) -> typing.Callable[[list[float]], float]:
+        return lambda values: expect_number(self.call_function(fn, [values]))
+
+    def _values_aggregate(self, fn) -> typing.Callable[[list[float]], float]:
+        """Builtin aggregates reduce the values of a window or bucket directly, they are numbers already."""
+        if isinstance(fn, PercentileFunction):
+            return fn.percentile
+        for name, reduce in [("sum", sum), ("count", len), ("avg", statistics.fmean), ("min", min), ("max", max)]:
+            if fn is self.builtins[name]:
+                return reduce
+        return self._aggregate_with(fn)
+
+    @staticmethod
+    def _calendar(unit: str, size: float, zone) -> buckets.Calendar:
+        try:
+            return buckets.Calendar(unit, size, expect_zone(zone))
+        except ValueError as e:
+            raise EvaluationError(str(e))
+
+    def _mapping_with(self, mapper) -> typing.Callable[[Point], Point]:
+        def mapping(point: Point) -> Point:
+            mapped = self.call_function(mapper, [point.value, point])
+            if isinstance(mapped, Point):
+                return mapped
+            return Point(point.timestamp, expect_number(mapped), point.dimensions)
+        return mapping
+
+    def _define_native(self, name: str, impl: typing.Callable) -> None:
+        self.builtins[name] = NativeFunction(name, impl)
+
+    def _register_builtins(self) -> None:
+        def data(name):
+            metric_name = expect_string(name)
+            if metric_name not in self.resolver_cache:
+                self.resolver_cache[metric_name] = self.resolver(metric_name)
+            return self.resolver_cache[metric_name]
+
+        def window(series, duration, aggregate):
+            series = expect_series(series)
+            duration = expect_duration(duration)
+            if duration == 0:
+                raise EvaluationError("Duration of a window must be non-zero")
+            return series.sliding_window(duration, self._values_aggregate(expect_function(aggregate)))
+
+        def prefix(series, aggregate):
+            return expect_series(series).prefix_op(self._aggregate_with(expect_function(aggregate)))
+
+        def bucketize(series, duration, aggregate, zone=None):
+            return bucketize_by(series, "fixed", expect_duration(duration), aggregate, zone)
+
+        def bucketize_days(series, days, aggregate, zone=None):
+            return bucketize_by(series, "days", expect_number(days), aggregate, zone)
+
+        def bucketize_weeks(series, weeks, aggregate, zone=None):
+            return bucketize_by(series, "weeks", expect_number(weeks), aggregate, zone)
+
+        def bucketize_months(series, months, aggregate, zone=None):
+            return bucketize_by(series, "months", expect_number(months), aggregate, zone)
+
+        def bucketize_by(series, unit, size, aggregate, zone):
+            series = expect_series(series)
+            return series.bucketize(self._calendar(unit, size, zone), self._values_aggregate(expect_function(aggregate)))
+
+        def shift(duration, series):
+            return expect_series(series).shift(expect_duration(duration))
+
+        def before_now():
+            return NativeFunction("before-now-predicate",
+                                  lambda _value, point: expect_point(point).timestamp < time.time() * 1000)
+
+        def filter_(target, predicate):
+            predicate = expect_function(predicate)
+            return expect_series(target).filter(
+                lambda point: truthy(self.call_function(predicate, [point.value, point])))
+
+        def map_(target, *mappers):
+            series = expect_series(target)
+            for mapper in mappers:
+                series = series.map(self._mapping_with(expect_function(mapper)))
+            return series
+
+        def compose_(*args):
+            if len(args) < 2:
+                raise EvaluationError("compose expects at least one stream and an aggregate function")
+            aggregate = expect_function(args[-1])
+            streams = [expect_series(stream) for stream in args[:-1]]
+            return compose(streams, lambda values: expect_number(self.call_function(aggregate, values)))
+
+        def not_(predicate):
+            predicate = expect_function(predicate)
+            return NativeFunction("not-predicate", lambda *args: not truthy(self.call_function(predicate, list(args))))
+
+        def and_(*predicates):
+            predicates = [expect_function(predicate) for predicate in predicates]
+            return NativeFunction("and-predicate", lambda *args: all(
+                truthy(self.call_function(predicate, list(args))) for predicate in predicates))
+
+        def or_(*predicates):
+            predicates = [expect_function(predicate) for predicate in predicates]
+            return NativeFunction("or-predicate", lambda *args: any(
+                truthy(self.call_function(predicate, list(args))) for predicate in predicates))
+
+        def dimension_is(key, value):
+            key, expected = expect_string(key), expect_string(value)
+            return NativeFunction("dimension-is-predicate",
+                                  lambda _value, point: expect_point(point).dimensions.get(key) == expected)
+
+        def dim_matches(key, regex):
+            key, regex = expect_string(key), re.compile(expect_string(regex))
+            def predicate(_value, point):
+                value = expect_point(point).dimensions.get(key)
+                return value is not None and regex.search(value) is not None
+            return NativeFunction("dim-matches-predicate", predicate)
+
+        def no_dimension(key):
+            key = expect_string(key)
+            return NativeFunction("no-dimension-predicate", lambda _value, point: key not in expect_point(point).dimensions)
+
+        for name, impl in [("data", data), ("window", window), ("prefix", prefix), ("bucketize", bucketize),
+                           ("bucketize-days", bucketize_days), ("bucketize-weeks", bucketize_weeks),
+                           ("bucketize-months", bucketize_months), ("shift", shift), ("before-now", before_now),
+                           ("filter", filter_), ("map", map_), ("compose", compose_), ("not", not_), ("and", and_),
+                           ("or", or_), ("dimension-is", dimension_is), ("dim-matches", dim_matches),
+                           ("no-dimension", no_dimension)]:
+            self._define_native(name, impl)
+        self._install_comparators()
+        self._install_arithmetic()
+        self._install_aggregates()
+
+    def _install_arithmetic(self) -> None:
+        self._define_native("+", lambda *args: sum(expect_number(arg) for arg in args))
+        self._define_native("-", lambda a, b: expect_number(a) - expect_number(b))
+        self._define_native("*", lambda *args: math.prod(expect_number(arg) for arg in args))
+        self._define_native("/", lambda a, b: _divide(expect_number(a), expect_number(b)))
+        self._define_native("exp", lambda a, b: math.pow(expect_number(a), expect_number(b)))
+        self._define_native("abs", lambda value: abs(expect_number(value)))
+        self._define_native("sgn", lambda value: _sign(expect_number(value)))
+
+    def _install_comparators(self) -> None:
+        def register(name: str, op: typing.Callable[[float, float], bool]) -> None:
+            def comparator(a, b):
+                if b is None:
+                    bound = expect_number(a)
+                    return NativeFunction(f"{name}-predicate", lambda value: op(expect_number(value), bound))
+                return op(expect_number(a), expect_number(b))
+            self._define_native(name, comparator)
+
+        register("<", lambda l, r: l < r)
+        register(">", lambda l, r: l > r)
+        register("<=", lambda l, r: l <= r)
+        register(">=", lambda l, r: l >= r)
+        register("=", lambda l, r: l == r)
+
+    def _install_aggregates(self) -> None:
+        def aggregate_from(fn):
+            binary = expect_function(fn)
+            def aggregate(values):
+                values = expect_number_list(values)
+                if not values:
+                    return 0
+                acc = values[0]
+                for value in values[1:]:
+                    acc = expect_number(self.call_function(binary, [acc, value]))
+                return acc
+            return NativeFunction("aggregate-from-result", aggregate)
+
+        def percentile(percent, accuracy=None):
+            percent = expect_number(percent)
+            try:
+                return PercentileFunction(
+                    quantiles.Percentile(percent, None if accuracy is None else expect_number(accuracy)))
+            except ValueError as e:
+                raise EvaluationError(str(e))
+
+        def std(values):
+            values = expect_number_list(values)
+            return statistics.stdev(values) if len(values) > 1 else 0
+
+        self._define_native("aggregate-from", aggregate_from)
+        self._define_native("p", percentile)
+        self._define_native("count", lambda values: len(expect_number_list(values)))
+        self._define_native("sum", lambda values: sum(expect_number_list(values)))
+        self._define_native("avg", lambda values: statistics.fmean(values) if expect_number_list(values) else 0)
+        self._define_native("min", lambda values: min(expect_number_list(values), default=0))
+        self._define_native("max", lambda values: max(expect_number_list(values), default=0))
+        self._define_native("std", std)
+
+
+def _divide(a: float, b: float) -> float:
+    if b == 0:
+        # like JavaScript, which the UI evaluates programs with
+        return math.nan if a == 0 or math.isnan(a) else math.copysign(math.inf, a)
+    return a / b
+
+
+def _sign(value: float) -> float:
+    return math.nan if math.isnan(value) else (value > 0) - (value < 0)
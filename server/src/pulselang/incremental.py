@@ -0,0 +1,374 @@
+"""
+Incremental evaluation of PulseLang programs, for charts that are kept up to date as their metrics change.
+
+A program is evaluated once into a graph of operators instead of series. Every operator keeps the state it had
+after the part of its input that can't change anymore (a checkpoint: the running prefix accumulator, the contents
+of a window, the latest values of composed streams, the current bucket) and the input points after it. An update
+replays only those points from the checkpoint, so its cost doesn't depend on the length of the history.
+
+Updates are exchanged as deltas: the output points at or after `start` are replaced by `points`. A source metric can
+only change at or after its latest timestamp this way; any other change (backdated points, deletion, retention)
+raises Resync and the program has to be evaluated again.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import typing
+
+from src.pulselang import compiler, evaluator, quantiles
+from src.pulselang.series import Point
+
+# delta start replacing the whole output
+FULL = -math.inf
+
+Reader = typing.Callable[[str, typing.Optional[int]], list[Point]]
+Aggregate = typing.Callable[[list[float]], float]
+
+
+class Delta(typing.NamedTuple):
+    start: float
+    points: list[Point]
+
+
+class Resync(Exception):
+    """The change can't be applied incrementally, the program has to be evaluated again."""
+
+
+class Node:
+    def __init__(self, inputs: list[Node], init_val: float):
+        self.inputs = inputs
+        self.init_val = init_val
+        # output points before this won't change anymore, unless Resync is raised
+        self.final_before: float = FULL
+    def update(self, deltas: list[Delta | None]) -> Delta | None:
+        raise NotImplementedError()
+
+
+class SourceNode(Node):
+    def __init__(self, metric: str, read: Reader):
+        super().__init__([], 0.0)
+        self.metric = metric
+        self.read = read
+    def refresh(self, changed_from: int | None) -> Delta:
+        """Re-reads the metric after a change of its points at or after changed_from (None = any points)."""
+        if self.final_before != FULL and (changed_from is None or changed_from < self.final_before):
+            raise Resync()
+        start = self.final_before
+        points = self.read(self.metric, None if start == FULL else int(start))
+        if points:
+            self.final_before = points[-1].timestamp
+        return Delta(start, points)
+
+
+class FilterNode(Node):
+    def __init__(self, source: Node, predicate: typing.Callable[[Point], bool]):
+        super().__init__([source], source.init_val)
+        self.predicate = predicate
+    def update(self, deltas: list[Delta | None]) -> Delta | None:
+        delta, = deltas
+        self.final_before = self.inputs[0].final_before
+        return None if delta is None else Delta(delta.start, [p for p in delta.points if self.predicate(p)])
+
+
+class MapNode(Node):
+    def __init__(self, source: Node, mapping: typing.Callable[[Point], Point]):
+        super().__init__([source], source.init_val)
+        self.mapping = mapping
+    def update(self, deltas: list[Delta | None]) -> Delta | None:
+        delta, = deltas
+        self.final_before = self.inputs[0].final_before
+        if delta is None:
+            return None
+        points = [self.mapping(point) for point in delta.points]
+        if delta.start != FULL and any(m.timestamp != p.timestamp for m, p in zip(points, delta.points)):
+            # points moved in time could replace points outside of the delta
+            raise Resync()
+        return Delta(delta.start, points)
+
+
+class ShiftNode(Node):
+    def __init__(self, source: Node, duration: int):
+        super().__init__([source], source.init_val)
+        self.duration = duration
+    def update(self, deltas: list[Delta | None]) -> Delta | None:
+        delta, = deltas
+        self.final_before = self.inputs[0].final_before + self.duration
+        if delta is None:
+            return None
+        return Delta(delta.start + self.duration,
+                     [Point(p.timestamp + self.duration, p.value, p.dimensions) for p in delta.points])
+
+
+class _ReplayingNode(Node):
+    """Keeps a checkpoint of its state after all input points before `boundary` and replays the points after it."""
+    def __init__(self, inputs: list[Node], init_val: float, state):
+        super().__init__(inputs, init_val)
+        self.boundary: float = FULL
+        self.tails: list[list[Point]] = [[] for _ in inputs]
+        self.checkpoint = state
+    def update(self, deltas: list[Delta | None]) -> Delta | None:
+        if all(delta is None for delta in deltas):
+            return None
+        for i, delta in enumerate(deltas):
+            if delta is None:
+                continue
+            if delta.start < self.boundary:
+                raise Resync()
+            self.tails[i] = [p for p in self.tails[i] if p.timestamp < delta.start] + delta.points
+        boundary = min(node.final_before for node in self.inputs)
+        points, self.checkpoint, final_before = self.replay(self.checkpoint, boundary)
+        self.tails = [[p for p in tail if p.timestamp >= boundary] for tail in self.tails]
+        self.boundary = boundary
+        start, self.final_before = self.final_before, final_before
+        return Delta(start, points)
+    def replay(self, state, boundary: float) -> tuple[list[Point], typing.Any, float]:
+        """Returns (output points, state after the input points before boundary, new final_before).
+
+        Must not modify state, and all output points have to be at or after the current final_before.
+        """
+        raise NotImplementedError()
+
+
+class PrefixNode(_ReplayingNode):
+    def __init__(self, source: Node, operation: Aggregate):
+        super().__init__([source], operation([source.init_val]), source.init_val)
+        self.operation = operation
+    def replay(self, prev: float, boundary: float):
+        points = []
+        checkpoint = None
+        for point in self.tails[0]:
+            if checkpoint is None and point.timestamp >= boundary:
+                checkpoint = prev
+            prev = self.operation([prev, point.value])
+            points.append(Point(point.timestamp, prev, point.dimensions))
+        return points, prev if checkpoint is None else checkpoint, boundary
+
+
+class ComposeNode(_ReplayingNode):
+    def __init__(self, sources: list[Node], operation: Aggregate):
+        last_vals = [source.init_val for source in sources]
+        super().__init__(sources, operation(list(last_vals)), last_vals)
+        self.operation = operation
+    def replay(self, last_vals: list[float], boundary: float):
+        last_vals = list(last_vals)
+        points = []
+        checkpoint = None
+        merged = heapq.merge(*([(p.timestamp, p.value, i) for p in tail] for i, tail in enumerate(self.tails)),
+                             key=lambda event: event[0])
+        for time, events in itertools.groupby(merged, key=lambda event: event[0]):
+            if checkpoint is None and time >= boundary:
+                checkpoint = list(last_vals)
+            for _, value, i in events:
+                last_vals[i] = value
+            points.append(Point(time, self.operation(list(last_vals)), {}))
+        return points, last_vals if checkpoint is None else checkpoint, boundary
+
+
+class WindowNode(_ReplayingNode):
+    def __init__(self, source: Node, window: int, operation: Aggregate):
+        # (number of values in the window, value -> count, pending removals)
+        super().__init__([source], source.init_val, (0, {}, []))
+        self.window = window
+        self.operation = operation
+    def replay(self, state, boundary: float):
+        count, values, events = state[0], dict(state[1]), list(state[2])
+        # percentiles keep the window's values in order instead of sorting them at every point
+        ordered = self.operation.window() if isinstance(self.operation, quantiles.Percentile) else None
+        if ordered is not None:
+            for value, value_count in values.items():
+                for _ in range(value_count):
+                    ordered.add(value)
+        for point in self.tails[0]:
+            heapq.heappush(events, (point.timestamp, "add", point.value))
+        if not events:
+            return [], state, boundary
+        # the point emitted once the values added before boundary left the window is dropped if no points follow,
+        # which can still happen as the points after boundary may be replaced by none
+        leaving = [time + (self.window if kind == "add" else 0) for time, kind, _ in events
+                   if kind == "remove" or time < boundary]
+        checkpoint_at = min(boundary, max(leaving)) if leaving else boundary
+
+        points = []
+        checkpoint = None
+        while events:
+            if checkpoint is None and events[0][0] >= checkpoint_at:
+                removals = [event for event in events if event[1] == "remove"]
+                heapq.heapify(removals)
+                checkpoint = (count, dict(values), removals)
+            time, kind, value = heapq.heappop(events)
+            if kind == "add":
+                count += 1
+                values[value] = values.get(value, 0) + 1
+                if ordered is not None:
+                    ordered.add(value)
+                heapq.heappush(events, (time + self.window, "remove", value))
+            else:
+                count -= 1
+                values[value] -= 1
+                if values[value] == 0:
+                    del values[value]
+                if ordered is not None:
+                    ordered.remove(value)
+
+            if events and events[0][0] == time:
+                continue
+            if count == 0:
+                points.append(Point(time, self.init_val, {}))
+                continue
+            if ordered is not None:
+                points.append(Point(time, self.operation.of(ordered), {}))
+                continue
+            flat = []
+            for v, c in values.items():
+                flat.extend([v] * c)
+            points.append(Point(time, self.operation(flat), {}))
+        points.pop()
+        return points, checkpoint, checkpoint_at
+
+
+class BucketNode(_ReplayingNode):
+    def __init__(self, source: Node, first_start: typing.Callable[[int], int],
+                 next_start: typing.Callable[[int], int], aggregate: Aggregate):
+        # None before the first point, else (current bucket start, next bucket start, values in the current bucket)
+        super().__init__([source], source.init_val, None)
+        self.first_start = first_start
+        self.next_start = next_start
+        self.aggregate = aggregate
+    def replay(self, state, boundary: float):
+        points = []
+        checkpoint, checkpointed = None, False
+        current_start, next_start, bucket_values = state if state is not None else (None, None, [])
+        bucket_values = list(bucket_values)
+        for point in self.tails[0]:
+            if not checkpointed and point.timestamp >= boundary:
+                checkpoint, checkpointed = state_of(current_start, next_start, bucket_values), True
+            if current_start is None:
+                current_start = self.first_start(point.timestamp)
+                next_start = self.next_start(current_start)
+            while point.timestamp >= next_start:
+                points.append(Point(current_start, self.aggregate(bucket_values) if bucket_values else self.init_val, {}))
+                bucket_values = []
+                current_start, next_start = next_start, self.next_start(next_start)
+            bucket_values.append(point.value)
+        if current_start is not None:
+            points.append(Point(current_start, self.aggregate(bucket_values) if bucket_values else self.init_val, {}))
+        if not checkpointed:
+            checkpoint = state_of(current_start, next_start, bucket_values)
+        return points, checkpoint, FULL if checkpoint is None else checkpoint[0]
+
+
+def state_of(current_start: int | None, next_start: int | None, bucket_values: list[float]):
+    return None if current_start is None else (current_start, next_start, list(bucket_values))
+
+
+def expect_node(value) -> Node:
+    if not isinstance(value, Node):
+        raise evaluator.EvaluationError("Expected datapoint series")
+    return value
+
+
+class IncrementalRuntime(evaluator.Runtime):
+    """Evaluates programs into operator graphs: the stream builtins build nodes instead of computing series."""
+    def _register_builtins(self) -> None:
+        super()._register_builtins()
+
+        def window(series, duration, aggregate):
+            series = expect_node(series)
+            duration = evaluator.expect_duration(duration)
+            if duration == 0:
+                raise evaluator.EvaluationError("Duration of a window must be non-zero")
+            return WindowNode(series, duration, self._values_aggregate(evaluator.expect_function(aggregate)))
+
+        def prefix(series, aggregate):
+            return PrefixNode(expect_node(series), self._aggregate_with(evaluator.expect_function(aggregate)))
+
+        def bucketize(series, duration, aggregate, zone=None):
+            return bucketize_by(series, "fixed", evaluator.expect_duration(duration), aggregate, zone)
+
+        def bucketize_days(series, days, aggregate, zone=None):
+            return bucketize_by(series, "days", evaluator.expect_number(days), aggregate, zone)
+
+        def bucketize_weeks(series, weeks, aggregate, zone=None):
+            return bucketize_by(series, "weeks", evaluator.expect_number(weeks), aggregate, zone)
+
+        def bucketize_months(series, months, aggregate, zone=None):
+            return bucketize_by(series, "months", evaluator.expect_number(months), aggregate, zone)
+
+        def bucketize_by(series, unit, size, aggregate, zone):
+            series = expect_node(series)
+            calendar = self._calendar(unit, size, zone)
+            return BucketNode(series, calendar.first_start, calendar.next_start,
+                              self._values_aggregate(evaluator.expect_function(aggregate)))
+
+        def shift(duration, series):
+            return ShiftNode(expect_node(series), evaluator.expect_duration(duration))
+
+        def filter_(target, predicate):
+            predicate = evaluator.expect_function(predicate)
+            return FilterNode(expect_node(target),
+                              lambda point: evaluator.truthy(self.call_function(predicate, [point.value, point])))
+
+        def map_(target, *mappers):
+            node = expect_node(target)
+            for mapper in mappers:
+                node = MapNode(node, self._mapping_with(evaluator.expect_function(mapper)))
+            return node
+
+        def compose_(*args):
+            if len(args) < 2:
+                raise evaluator.EvaluationError("compose expects at least one stream and an aggregate function")
+            aggregate = evaluator.expect_function(args[-1])
+            return ComposeNode([expect_node(stream) for stream in args[:-1]],
+                               lambda values: evaluator.expect_number(self.call_function(aggregate, values)))
+
+        for name, impl in [("window", window), ("prefix", prefix), ("bucketize", bucketize),
+                           ("bucketize-days", bucketize_days), ("bucketize-weeks", bucketize_weeks),
+                           ("bucketize-months", bucketize_months), ("shift", shift), ("filter", filter_),
+                           ("map", map_), ("compose", compose_)]:
+            self._define_native(name, impl)
+
+
+class LiveProgram:
+    """A compiled program evaluated into operators, whose outputs are updated as its metrics change."""
+    def __init__(self, program: compiler.CompiledProgram, outputs: typing.Iterable[str], read: Reader):
+        runtime = IncrementalRuntime(lambda metric: SourceNode(metric, read))
+        env = runtime.run(program)
+        self.outputs: dict[str, Node] = {name: env[name] for name in outputs if isinstance(env.get(name), Node)}
+        self.nodes = _topological_order(self.outputs.values())
+        self.metrics = {node.metric for node in self.nodes if isinstance(node, SourceNode)}
+
+    def evaluate(self) -> dict[str, Delta]:
+        """Initial evaluation, all outputs are returned as deltas replacing everything."""
+        return self.update({metric: None for metric in self.metrics})
+
+    def update(self, changes: typing.Mapping[str, int | None]) -> dict[str, Delta]:
+        """Applies changes of metrics (metric -> earliest changed timestamp, None = unknown) to the outputs.
+
+        Returns the deltas of the outputs that changed. Raises Resync if a change isn't an append.
+        """
+        deltas: dict[int, Delta | None] = {}
+        for node in self.nodes:
+            if isinstance(node, SourceNode):
+                deltas[id(node)] = node.refresh(changes[node.metric]) if node.metric in changes else None
+            else:
+                deltas[id(node)] = node.update([deltas[id(source)] for source in node.inputs])
+        return {name: deltas[id(node)] for name, node in self.outputs.items() if deltas[id(node)] is not None}
+
+
+def _topological_order(outputs: typing.Iterable[Node]) -> list[Node]:
+    order: list[Node] = []
+    visited: set[int] = set()
+    stack: list[tuple[Node, bool]] = [(node, False) for node in outputs]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
+        stack.append((node, True))
+        stack.extend((source, False) for source in node.inputs if id(source) not in visited)
+    return order
@@ -0,0 +1,159 @@
+"""
+Charts watched by clients over /ws/app, kept up to date as the metrics they read change.
+
+A watched chart's program is evaluated incrementally (see incremental.py). Every change of a metric it reads produces
+only the new output points, which are pushed to all of the user's connections as a `chart_delta`:
+
+    {"type": "chart_delta", "chart_id": "...", "series": {"<variable>": {"start": 1700000000000, "points": [...]}}}
+
+The client replaces the points of a variable at or after `start` (all of them if `start` is null) with `points`.
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import threading
+import typing
+
+from fastapi.concurrency import run_in_threadpool
+
+from src.ai.client_session_registry import ClientSessionRegistry
+from src.dao.chart_repo import Chart, ChartRepo
+from src.dao.data_dao import DataDao
+from src.pulselang import compiler, evaluator, incremental
+from src.pulselang.series import Point
+from src.resources import data
+
+
+@dataclasses.dataclass
+class LiveChart:
+    chart: Chart
+    connection_ids: set[str]
+    program: incremental.LiveProgram | None = None
+    # serializes evaluations and updates of the chart
+    lock: threading.Lock = dataclasses.field(default_factory=threading.Lock)
+
+
+class LiveChartRegistry:
+    def __init__(self, data_dao: DataDao, chart_repo: ChartRepo, sessions: ClientSessionRegistry):
+        self.data_dao = data_dao
+        self.chart_repo = chart_repo
+        self.sessions = sessions
+        # user id -> chart id -> chart
+        self._charts: dict[str, dict[str, LiveChart]] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        data_dao.add_listener(self.on_metric_changed)
+
+    async def subscribe(self, user_id: str, connection_id: str, chart_id: str) -> None:
+        """Starts pushing the chart's deltas to the user, beginning with its whole result."""
+        self._loop = asyncio.get_running_loop()
+        chart = self.chart_repo.get_chart_by_id(user_id, chart_id)
+        if chart is None:
+            await self.sessions.send_to_connection(connection_id, {
+                "type": "chart_error",
+                "chart_id": chart_id,
+                "error": "Chart not found",
+            })
+            return
+        with self._lock:
+            charts = self._charts.setdefault(user_id, {})
+            live = charts.get(chart_id)
+            if live is None or live.chart.updated_at != chart.updated_at:
+                live = charts[chart_id] = LiveChart(chart, set() if live is None else live.connection_ids)
+            live.connection_ids.add(connection_id)
+        await run_in_threadpool(self._evaluate, user_id, live)
+
+    def unsubscribe(self, user_id: str, connection_id: str, chart_id: str) -> None:
+        with self._lock:
+            live = self._charts.get(user_id, {}).get(chart_id)
+            if live is not None:
+                live.connection_ids.discard(connection_id)
+            self._drop_unwatched(user_id)
+
+    def drop_connection(self, user_id: str, connection_id: str) -> None:
+        with self._lock:
+            for live in self._charts.get(user_id, {}).values():
+                live.connection_ids.discard(connection_id)
+            self._drop_unwatched(user_id)
+
+    def _drop_unwatched(self, user_id: str) -> None:
+        charts = {chart_id: live for chart_id, live in self._charts.get(user_id, {}).items() if live.connection_ids}
+        if charts:
+            self._charts[user_id] = charts
+        else:
+            self._charts.pop(user_id, None)
+
+    def on_metric_changed(self, user_id: str, metric_name: str, changed_from: int | None) -> None:
+        with self._lock:
+            charts = list(self._charts.get(user_id, {}).values())
+        for live in charts:
+            with live.lock:
+                if live.program is None or metric_name not in live.program.metrics:
+                    continue
+                try:
+                    deltas = live.program.update({metric_name: changed_from})
+                except incremental.Resync:
+                    self._evaluate_locked(user_id, live)
+                    continue
+                except evaluator.EvaluationError as e:
+                    live.program = None
+                    self._publish_error(user_id, live.chart.id, f"Evaluation failed: {e}")
+                    continue
+                if deltas:
+                    self._publish(user_id, live.chart.id, deltas)
+
+    def _evaluate(self, user_id: str, live: LiveChart) -> None:
+        with live.lock:
+            self._evaluate_locked(user_id, live)
+
+    def _evaluate_locked(self, user_id: str, live: LiveChart) -> None:
+        live.program = None
+        try:
+            program = compiler.compile_program(live.chart.program)
+        except ValueError as e:
+            self._publish_error(user_id, live.chart.id, f"Invalid program: {e}")
+            return
+        outputs = [variable.get("variable") for variable in live.chart.variables if variable.get("variable")]
+        try:
+            live.program = incremental.LiveProgram(program, outputs, lambda metric, start: self._read(user_id, metric, start))
+            deltas = live.program.evaluate()
+        except evaluator.EvaluationError as e:
+            live.program = None
+            self._publish_error(user_id, live.chart.id, f"Evaluation failed: {e}")
+            return
+        # outputs that aren't series or didn't produce a delta are empty
+        self._publish(user_id, live.chart.id, {name: deltas.get(name, incremental.Delta(incremental.FULL, []))
+                                               for name in live.program.outputs})
+
+    def _read(self, user_id: str, metric_name: str, start: int | None) -> list[Point]:
+        if not data.is_symbol_valid(metric_name):
+            raise evaluator.EvaluationError(f"Metric name ({metric_name}) is invalid")
+        return [Point(dp.timestamp, dp.value, dp.dimensions)
+                for dp in self.data_dao.get_metric_range(user_id, metric_name, start, None)]
+
+    def _publish(self, user_id: str, chart_id: str, deltas: typing.Mapping[str, incremental.Delta]) -> None:
+        self._broadcast(user_id, {
+            "type": "chart_delta",
+            "chart_id": chart_id,
+            "series": {name: {
+                "start": None if delta.start == incremental.FULL else int(delta.start),
+                "points": [{"timestamp": p.timestamp, "dimensions": p.dimensions, "value": p.value}
+                           for p in delta.points],
+            } for name, delta in deltas.items()},
+        })
+
+    def _publish_error(self, user_id: str, chart_id: str, error: str) -> None:
+        self._broadcast(user_id, {"type": "chart_error", "chart_id": chart_id, "error": error})
+
+    def _broadcast(self, user_id: str, payload: dict[str, typing.Any]) -> None:
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self.sessions.broadcast_to_user(user_id, payload), self._loop)
+        future.add_done_callback(_log_failure)
+
+
+def _log_failure(future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logging.error(f"Failed to push a chart update: {future.exception()}")
@@ -1,29 +1,59 @@
 from __future__ import annotations
 
+import dataclasses
 
-def validate_pulselang(source: str) -> None:
-    _parse(source)
 
+@dataclasses.dataclass(frozen=True)
+class NumberNode:
+    value: int | float
 
-def _parse(source: str) -> None:
+
+@dataclasses.dataclass(frozen=True)
+class StringNode:
+    value: str
+
+
+@dataclasses.dataclass(frozen=True)
+class SymbolNode:
+    name: str
+
+
+@dataclasses.dataclass(frozen=True)
+class ListNode:
+    items: tuple[AstNode, ...]
+
+
+AstNode = NumberNode | StringNode | SymbolNode | ListNode
+
+
+def parse(source: str) -> tuple[AstNode, ...]:
     tokens = _tokenize(source)
+    nodes = []
     index = 0
     while index < len(tokens):
-        index = _read_node(tokens, index)
+        node, index = _read_node(tokens, index)
+        nodes.append(node)
+    return tuple(nodes)
 
 
-def _read_node(tokens: list[tuple[str, str]], index: int) -> int:
+def _read_node(tokens: list[tuple[str, str]], index: int) -> tuple[AstNode, int]:
     token_type, token_value = tokens[index]
-    if token_type in {"number", "string", "symbol"}:
-        return index + 1
+    if token_type == "number":
+        return NumberNode(float(token_value) if "." in token_value else int(token_value)), index + 1
+    if token_type == "string":
+        return StringNode(token_value), index + 1
+    if token_type == "symbol":
+        return SymbolNode(token_value), index + 1
     if token_type == "paren":
         if token_value == "(":
+            items = []
             index += 1
             while index < len(tokens):
                 next_type, next_value = tokens[index]
                 if next_type == "paren" and next_value == ")":
-                    return index + 1
-                index = _read_node(tokens, index)
+                    return ListNode(tuple(items)), index + 1
+                node, index = _read_node(tokens, index)
+                items.append(node)
             raise ValueError("Unbalanced parentheses in DSL expression")
         raise ValueError("Unexpected closing parenthesis")
     raise ValueError("Unexpected token in DSL expression")
@@ -0,0 +1,338 @@
+"""
+Works out which part of every `data` source a compiled program needs to produce its outputs in a time range.
+
+The planner walks the dataflow backwards from the requested bindings, carrying the range the consumer
+needs: `window` and `shift` move it back by their duration, `prefix` needs the whole history, `compose`
+needs the point preceding the range (a seed) to know the latest values at its start, and dimension
+predicates filtering a source directly are pushed down to the read. Calls to user and library lambdas are
+followed through their parameters. Anything the planner doesn't understand reads the full series.
+"""
+from __future__ import annotations
+
+import dataclasses
+import re
+import typing
+
+from src.pulselang import buckets, compiler
+
+# give up narrowing (and read everything) for programs that take more visits than this to analyze
+MAX_VISITS = 10_000
+
+_BUCKET_UNITS = {"bucketize": "fixed", "bucketize-days": "days", "bucketize-weeks": "weeks",
+                 "bucketize-months": "months"}
+
+
+@dataclasses.dataclass(frozen=True)
+class Requirement:
+    start: int | None
+    end: int | None
+    # whether the last point before start is needed as well
+    seed: bool = False
+
+
+UNBOUNDED = Requirement(None, None)
+
+
+@dataclasses.dataclass(frozen=True)
+class DimensionPredicate:
+    """Conjunction of ("is", key, value), ("absent", key, None) and ("matches", key, regex) conditions."""
+    conditions: tuple[tuple[str, str, str | None], ...]
+
+    def matches(self, dimensions: typing.Mapping[str, str]) -> bool:
+        for kind, key, value in self.conditions:
+            actual = dimensions.get(key)
+            if kind == "is" and actual != value:
+                return False
+            if kind == "absent" and actual is not None:
+                return False
+            if kind == "matches" and (actual is None or re.search(value, actual) is None):
+                return False
+        return True
+
+
+@dataclasses.dataclass
+class SourcePlan:
+    metric: str
+    start: int | None
+    end: int | None
+    seed: bool
+    # None = no pushdown, otherwise a point is needed if it matches any of the predicates
+    dimension_predicates: list[DimensionPredicate] | None
+    # whether a consumer filtering the source needs its seed, which is only read right with that filter alone
+    filtered_seed: bool = False
+
+    def matches(self, dimensions: typing.Mapping[str, str]) -> bool:
+        return self.dimension_predicates is None \
+            or any(predicate.matches(dimensions) for predicate in self.dimension_predicates)
+
+    def merge(self, requirement: Requirement, predicate: DimensionPredicate | None) -> None:
+        self.start = None if self.start is None or requirement.start is None else min(self.start, requirement.start)
+        self.end = None if self.end is None or requirement.end is None else max(self.end, requirement.end)
+        self.seed = self.seed or requirement.seed
+        if predicate is None or self.dimension_predicates is None:
+            self.dimension_predicates = None
+        elif predicate not in self.dimension_predicates:
+            self.dimension_predicates.append(predicate)
+        self.filtered_seed = self.filtered_seed or (requirement.seed and predicate is not None)
+        if self.filtered_seed and (self.dimension_predicates is None or len(self.dimension_predicates) > 1):
+            # the point before start may not be the one the filtering consumer's seed is
+            self.start = None
+
+
+@dataclasses.dataclass
+class Plan:
+    sources: dict[str, SourcePlan]
+    # data calls with computed metric names, whose sources can't be known before evaluation
+    dynamic_sources: bool = False
+
+
+class _Scope(typing.NamedTuple):
+    """Arguments of a lambda call, each with the scope it has to be analyzed in."""
+    args: typing.Mapping[str, tuple[compiler.Node, typing.Optional['_Scope']]]
+    parent: typing.Optional['_Scope']
+
+
+class _TooComplex(Exception):
+    pass
+
+
+class _Planner:
+    def __init__(self, program: compiler.CompiledProgram):
+        self.definitions: dict[str, list[compiler.Node]] = {}
+        for compiled in [program.prelude, program] if program.prelude else [program]:
+            for form in compiled.forms:
+                if isinstance(form, compiler.Define):
+                    self.definitions.setdefault(form.name, []).append(form.value)
+        self.plan = Plan({})
+        self.visits = 0
+        # (node, requirement) pairs already visited outside of any lambda call
+        self.visited: set[tuple[int, Requirement]] = set()
+
+    def definition(self, name: str) -> compiler.Node | None:
+        # names defined more than once can't be followed statically
+        values = self.definitions.get(name, [])
+        return values[0] if len(values) == 1 else None
+
+    def resolve(self, node: compiler.Node, scope: _Scope | None) -> tuple[compiler.Node, _Scope | None]:
+        """Follows references to lambda arguments and to global definitions."""
+        for _ in range(100):
+            if isinstance(node, compiler.LocalRef):
+                arg_scope = scope
+                while arg_scope is not None and node.name not in arg_scope.args:
+                    arg_scope = arg_scope.parent
+                if arg_scope is None:
+                    return node, scope
+                node, scope = arg_scope.args[node.name]
+            elif isinstance(node, compiler.GlobalRef) and self.definition(node.name) is not None:
+                node, scope = self.definition(node.name), None
+            else:
+                return node, scope
+        return node, scope
+
+    def constant(self, node: compiler.Node, scope: _Scope | None) -> typing.Any:
+        """Value of a node if it's known before evaluation, else None."""
+        node, _ = self.resolve(node, scope)
+        if isinstance(node, compiler.Const):
+            return node.value
+        if isinstance(node, compiler.Duration):
+            return node.text
+        return None
+
+    def duration(self, node: compiler.Node, scope: _Scope | None) -> int | None:
+        value = self.constant(node, scope)
+        return compiler.parse_duration(value) if isinstance(value, str) else None
+
+    def calendar(self, name: str, args: tuple[compiler.Node, ...], scope: _Scope | None) -> buckets.Calendar | None:
+        """Buckets of a bucketize call if they are known before evaluation, else None."""
+        size = self.duration(args[1], scope) if name == "bucketize" else self.constant(args[1], scope)
+        zone = self.constant(args[3], scope) if len(args) > 3 else buckets.UTC
+        if not isinstance(size, int) or not isinstance(zone, str):
+            return None
+        try:
+            return buckets.Calendar(_BUCKET_UNITS[name], size, zone)
+        except ValueError:
+            return None
+
+    def dimension_predicate(self, node: compiler.Node, scope: _Scope | None) -> DimensionPredicate | None:
+        """The predicate as a pure condition on dimensions, if it is one."""
+        node, scope = self.resolve(node, scope)
+        if not isinstance(node, compiler.Call) or not isinstance(node.fn, compiler.BuiltinRef):
+            return None
+        name = node.fn.name
+        values = [self.constant(arg, scope) for arg in node.args]
+        if name in ("dimension-is", "dim-matches") and len(values) == 2 and all(isinstance(v, str) for v in values):
+            return DimensionPredicate((("is" if name == "dimension-is" else "matches", values[0], values[1]),))
+        if name == "no-dimension" and len(values) == 1 and isinstance(values[0], str):
+            return DimensionPredicate((("absent", values[0], None),))
+        if name == "and" and node.args:
+            conditions = []
+            for arg in node.args:
+                predicate = self.dimension_predicate(arg, scope)
+                if predicate is None:
+                    return None
+                conditions.extend(predicate.conditions)
+            return DimensionPredicate(tuple(conditions))
+        return None
+
+    def data_source(self, node: compiler.Node, scope: _Scope | None) -> str | None:
+        """Metric name if the node is a (data "name") call."""
+        node, scope = self.resolve(node, scope)
+        if isinstance(node, compiler.Call) and node.fn == compiler.BuiltinRef("data") and len(node.args) == 1:
+            name = self.constant(node.args[0], scope)
+            return name if isinstance(name, str) else None
+        return None
+
+    def add_source(self, metric: str, requirement: Requirement, predicate: DimensionPredicate | None) -> None:
+        if metric in self.plan.sources:
+            self.plan.sources[metric].merge(requirement, predicate)
+        else:
+            self.plan.sources[metric] = SourcePlan(metric, requirement.start, requirement.end, requirement.seed,
+                                                   None if predicate is None else [predicate],
+                                                   requirement.seed and predicate is not None)
+
+    def visit_global(self, name: str, requirement: Requirement) -> None:
+        values = self.definitions.get(name, [])
+        for value in values:
+            self.visit(value, requirement if len(values) == 1 else UNBOUNDED, None)
+
+    def visit(self, node: compiler.Node, requirement: Requirement, scope: _Scope | None) -> None:
+        self.visits += 1
+        if self.visits > MAX_VISITS:
+            raise _TooComplex()
+        if scope is None:
+            if (id(node), requirement) in self.visited:
+                return
+            self.visited.add((id(node), requirement))
+
+        match node:
+            case compiler.LocalRef(name):
+                arg_scope = scope
+                while arg_scope is not None and name not in arg_scope.args:
+                    arg_scope = arg_scope.parent
+                if arg_scope is not None:
+                    arg, arg_scope = arg_scope.args[name]
+                    self.visit(arg, requirement, arg_scope)
+            case compiler.GlobalRef(name):
+                self.visit_global(name, requirement)
+            case compiler.Define(_, value):
+                self.visit(value, UNBOUNDED, scope)
+            case compiler.Lambda(_, body):
+                # a function value: whatever it reads is used in ways that can't be seen from here
+                for expr in body:
+                    self.visit(expr, UNBOUNDED, scope)
+            case compiler.Call(compiler.BuiltinRef(name), args):
+                self.visit_builtin(name, args, requirement, scope)
+            case compiler.Call(fn, args):
+                self.visit_call(fn, args, requirement, scope)
+
+    def visit_call(self, fn: compiler.Node, args: tuple[compiler.Node, ...], requirement: Requirement,
+                   scope: _Scope | None) -> None:
+        lambda_node, lambda_scope = self.resolve(fn, scope)
+        if not isinstance(lambda_node, compiler.Lambda):
+            self.visit(fn, UNBOUNDED, scope)
+            for arg in args:
+                self.visit(arg, UNBOUNDED, scope)
+            return
+        for arg in args[len(lambda_node.params):]:
+            self.visit(arg, UNBOUNDED, scope)
+        call_scope = _Scope({param: (arg, scope) for param, arg in zip(lambda_node.params, args)}, lambda_scope)
+        for i, expr in enumerate(lambda_node.body):
+            self.visit(expr, requirement if i == len(lambda_node.body) - 1 else UNBOUNDED, call_scope)
+
+    def visit_builtin(self, name: str, args: tuple[compiler.Node, ...], requirement: Requirement,
+                      scope: _Scope | None) -> None:
+        def visit_arg(index: int, arg_requirement: Requirement) -> None:
+            if index < len(args):
+                self.visit(args[index], arg_requirement, scope)
+
+        def visit_rest(start_index: int) -> None:
+            for arg in args[start_index:]:
+                self.visit(arg, UNBOUNDED, scope)
+
+        start, end, seed = requirement.start, requirement.end, requirement.seed
+        match name:
+            case "data":
+                metric = self.constant(args[0], scope)
+                if isinstance(metric, str):
+                    self.add_source(metric, requirement, None)
+                else:
+                    self.plan.dynamic_sources = True
+                    visit_rest(0)
+            case "filter":
+                predicate = self.dimension_predicate(args[1], scope)
+                metric = self.data_source(args[0], scope)
+                if predicate is not None and metric is not None:
+                    # the filter is applied by the read, so the seed is the last matching point
+                    self.add_source(metric, requirement, predicate)
+                elif seed:
+                    # the last point before start that passes the filter could be anywhere
+                    visit_arg(0, Requirement(None, end))
+                else:
+                    visit_arg(0, requirement)
+                visit_rest(1)
+            case "map":
+                visit_arg(0, requirement)
+                visit_rest(1)
+            case "compose":
+                for arg in args[:-1]:
+                    self.visit(arg, Requirement(start, end, True), scope)
+                visit_rest(len(args) - 1)
+            case "prefix":
+                visit_arg(0, Requirement(None, end))
+                visit_rest(1)
+            case "window":
+                duration = self.duration(args[1], scope)
+                if duration is None or duration <= 0 or start is None:
+                    visit_arg(0, Requirement(None, None))
+                else:
+                    # points are emitted when values leave the window too, so the end isn't bounded
+                    visit_arg(0, Requirement(start - (2 * duration if seed else duration), None, seed))
+                visit_rest(1)
+            case "shift":
+                duration = self.duration(args[0], scope)
+                if duration is None:
+                    visit_arg(1, UNBOUNDED)
+                else:
+                    visit_arg(1, Requirement(None if start is None else start - duration,
+                                             None if end is None else end - duration, seed))
+                visit_rest(2)
+            case "bucketize" | "bucketize-days" | "bucketize-weeks" | "bucketize-months":
+                calendar = self.calendar(name, args, scope)
+                if calendar is None or not calendar.aligned or start is None:
+                    # buckets are aligned to the first point, reading less could move them
+                    visit_arg(0, UNBOUNDED)
+                else:
+                    # with the seed, the empty buckets between it and the range are emitted as in a full read
+                    first = calendar.first_start(start)
+                    visit_arg(0, Requirement(calendar.first_start(first - 1) if seed else first, None, True))
+                visit_rest(1)
+            case _:
+                visit_rest(0)
+
+
+def plan(program: compiler.CompiledProgram, outputs: typing.Iterable[str],
+         start: int | None, end: int | None) -> Plan:
+    """Plans the reads needed for the given top-level bindings to be exact within [start, end]."""
+    planner = _Planner(program)
+    try:
+        for name in outputs:
+            planner.visit_global(name, Requirement(start, end))
+    except (_TooComplex, RecursionError):
+        return Plan({}, dynamic_sources=True)
+    return planner.plan
+
+
+def merge(plans: typing.Iterable[Plan]) -> Plan:
+    """Combines the plans of programs whose reads are shared, so every read covers all of its consumers."""
+    merged = Plan({})
+    for query_plan in plans:
+        merged.dynamic_sources = merged.dynamic_sources or query_plan.dynamic_sources
+        for metric, source in query_plan.sources.items():
+            if metric not in merged.sources:
+                predicates = None if source.dimension_predicates is None else list(source.dimension_predicates)
+                merged.sources[metric] = dataclasses.replace(source, dimension_predicates=predicates)
+                continue
+            requirement = Requirement(source.start, source.end, source.seed)
+            for predicate in source.dimension_predicates or [None]:
+                merged.sources[metric].merge(requirement, predicate)
+    return merged
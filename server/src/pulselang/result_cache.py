@@ -0,0 +1,121 @@
+"""
+Materialized results of PulseLang evaluations, shared by all the charts and dashboards of a user.
+
+A result is keyed by the scheduler's key of the expression that produced it (see scheduler.py) and by what each
+metric it depends on returned: the metric's version and the part of it that was read. A change of a metric drops
+the results that depend on it, and beyond a memory budget the least recently used results are evicted.
+"""
+from __future__ import annotations
+
+import collections
+import threading
+import typing
+
+from src.common import metrics
+from src.dao.data_dao import DataDao
+from src.pulselang import planner
+from src.pulselang.series import Series
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# rough in-memory size of a point, and of each of its dimensions
+POINT_BYTES = 150
+DIMENSION_BYTES = 120
+
+# (user id, expression key, (metric, version, read) of every metric it depends on)
+EntryKey = tuple[str, str, tuple[tuple[str, int, typing.Hashable], ...]]
+
+
+def estimate_size(series: Series) -> int:
+    return sum(POINT_BYTES + DIMENSION_BYTES * len(point.dimensions) for point in series.points)
+
+
+class _Entry(typing.NamedTuple):
+    series: Series
+    size: int
+    metrics: frozenset[str]
+
+
+class ResultCache:
+    def __init__(self, data_dao: DataDao, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.data_dao = data_dao
+        self.max_bytes = max_bytes
+        self.entries: collections.OrderedDict[EntryKey, _Entry] = collections.OrderedDict()
+        # (user id, metric) -> keys of the entries depending on the metric
+        self.by_metric: dict[tuple[str, str], set[EntryKey]] = collections.defaultdict(set)
+        self.size = 0
+        self.mu = threading.Lock()
+        data_dao.add_listener(self.on_metric_changed)
+
+    def view(self, user_id: str, query_plan: planner.Plan) -> ResultCacheView:
+        return ResultCacheView(self, user_id, query_plan)
+
+    def get(self, key: EntryKey) -> Series | None:
+        with self.mu:
+            entry = self.entries.get(key)
+            metrics.cache_lookup("result", entry is not None)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry.series
+
+    def put(self, key: EntryKey, metrics: frozenset[str], series: Series) -> None:
+        size = estimate_size(series)
+        if size > self.max_bytes:
+            return
+        with self.mu:
+            self._drop(key)
+            self.entries[key] = _Entry(series, size, metrics)
+            self.size += size
+            for metric in metrics:
+                self.by_metric[(key[0], metric)].add(key)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+
+    def on_metric_changed(self, user_id: str, metric_name: str, changed_from: int | None) -> None:
+        with self.mu:
+            for key in list(self.by_metric.get((user_id, metric_name), ())):
+                self._drop(key)
+
+    def _drop(self, key: EntryKey) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry.size
+        for metric in entry.metrics:
+            keys = self.by_metric[(key[0], metric)]
+            keys.discard(key)
+            if not keys:
+                del self.by_metric[(key[0], metric)]
+
+
+class ResultCacheView:
+    """The cache as seen by one evaluation, which reads the metrics as planned.
+
+    The version of a metric is read the first time the metric is looked up, which the scheduler does before
+    evaluating anything, so results are never stored under a version older than the data they were computed from.
+    """
+    def __init__(self, cache: ResultCache, user_id: str, query_plan: planner.Plan):
+        self.cache = cache
+        self.user_id = user_id
+        self.query_plan = query_plan
+        self.sources: dict[str, tuple[str, int, typing.Hashable]] = {}
+
+    def source(self, metric: str) -> tuple[str, int, typing.Hashable]:
+        if metric not in self.sources:
+            plan = self.query_plan.sources.get(metric)
+            if plan is not None:
+                predicates = None if plan.dimension_predicates is None else tuple(plan.dimension_predicates)
+                read = (plan.start, plan.end, plan.seed, predicates)
+            else:
+                read = "all" if self.query_plan.dynamic_sources else "none"
+            self.sources[metric] = (metric, self.cache.data_dao.get_metric_version(self.user_id, metric).version, read)
+        return self.sources[metric]
+
+    def key(self, key: str, metrics: frozenset[str]) -> EntryKey:
+        return self.user_id, key, tuple(self.source(metric) for metric in sorted(metrics))
+
+    def get(self, key: str, metrics: frozenset[str]) -> Series | None:
+        return self.cache.get(self.key(key, metrics))
+
+    def put(self, key: str, metrics: frozenset[str], series: Series) -> None:
+        self.cache.put(self.key(key, metrics), metrics, series)
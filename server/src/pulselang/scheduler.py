@@ -0,0 +1,348 @@
+"""
+Evaluates several compiled PulseLang programs together, like the charts of a dashboard, on a thread pool.
+
+Every top-level form of every program becomes a node of one DAG, depending on the earlier definitions of the
+globals it can reach (the globals it references and, transitively, the ones their definitions reference,
+lambda bodies included). A node is keyed by its expression and by what each of those globals is bound to, so
+a binding that several programs compute is evaluated once. Sub-expressions shared that way, like the same
+`(data "x")` or `(window ...)` in several charts, and all reads of literal metrics are split out into nodes
+of their own. Nodes run as soon as the nodes they depend on are done.
+
+With a result cache, nodes only depending on metrics read by literal name are looked up first, from the forms
+down, and the nodes only needed by the ones found aren't evaluated at all.
+
+Programs defining globals from within expressions are evaluated as a whole, as a single node.
+"""
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import dataclasses
+import hashlib
+import typing
+
+from src.pulselang import compiler, evaluator, result_cache
+from src.pulselang.series import Series
+
+DEFAULT_WORKERS = 8
+# builtins whose results depend on more than their arguments (beyond reads of literal metrics)
+_IMPURE_BUILTINS = {"data", "before-now"}
+
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=DEFAULT_WORKERS, thread_name_prefix="pulselang")
+
+
+@dataclasses.dataclass(frozen=True)
+class Job:
+    program: compiler.CompiledProgram
+    # top-level bindings to return
+    outputs: tuple[str, ...]
+
+
+class _Task:
+    def __init__(self, key: str, node: compiler.Node | None, prelude: compiler.CompiledProgram | None,
+                 bindings: dict[str, _Task], program: compiler.CompiledProgram | None = None):
+        self.key = key
+        self.node = node
+        self.prelude = prelude
+        # globals the node can reach that are bound by other tasks
+        self.bindings = bindings
+        # set instead of node for programs evaluated as a whole
+        self.program = program
+        self.value: typing.Any = None
+        self.error: evaluator.EvaluationError | None = None
+        # metrics read by literal name by the task and the tasks it depends on
+        self.metrics: frozenset[str] = frozenset()
+        # whether the value only depends on those metrics
+        self.pure = False
+
+
+def _global_refs(node: compiler.Node, refs: set[str]) -> set[str]:
+    match node:
+        case compiler.GlobalRef(name):
+            refs.add(name)
+        case compiler.Call(fn, args):
+            for child in (fn, *args):
+                _global_refs(child, refs)
+        case compiler.Define(_, value):
+            _global_refs(value, refs)
+        case compiler.Lambda(_, body):
+            for expr in body:
+                _global_refs(expr, refs)
+    return refs
+
+
+def _defines_globals(node: compiler.Node) -> bool:
+    """Whether evaluating the expression defines globals (defines in lambda bodies are local)."""
+    match node:
+        case compiler.Define():
+            return True
+        case compiler.Call(fn, args):
+            return any(_defines_globals(child) for child in (fn, *args))
+    return False
+
+
+def _is_literal_read(node: compiler.Node) -> bool:
+    return isinstance(node, compiler.Call) and node.fn == compiler.BuiltinRef("data") \
+        and isinstance(node.args[0], compiler.Const) and isinstance(node.args[0].value, str)
+
+
+def _reads(node: compiler.Node, metrics: set[str]) -> bool:
+    """Adds the metrics the expression reads by literal name to metrics and returns whether it may read others
+    (or depend on the time)."""
+    if _is_literal_read(node):
+        metrics.add(node.args[0].value)
+        return False
+    match node:
+        case compiler.BuiltinRef(name) | compiler.GlobalRef(name):
+            # globals not defined yet fall back to builtins
+            return name in _IMPURE_BUILTINS
+        case compiler.Call(fn, args):
+            return any([_reads(child, metrics) for child in (fn, *args)])
+        case compiler.Define(_, value):
+            return _reads(value, metrics)
+        case compiler.Lambda(_, body):
+            return any([_reads(expr, metrics) for expr in body])
+    return False
+
+
+def _expression(form: compiler.Node) -> compiler.Node:
+    return form.value if isinstance(form, compiler.Define) else form
+
+
+class _Program:
+    """Static view of a program and its prelude: where its globals are defined and what they reach."""
+    def __init__(self, program: compiler.CompiledProgram):
+        self.program = program
+        self.prelude = program.prelude
+        self.prelude_names = set(self.prelude.definitions) if self.prelude else set()
+        # keys outlive the compiled prelude in the result cache
+        self.prelude_key = hashlib.sha256(repr(self.prelude.forms).encode()).hexdigest() if self.prelude else ""
+        self.splittable = not any(_defines_globals(_expression(form)) for form in program.forms)
+        self.refs: dict[str, set[str]] = collections.defaultdict(set)
+        self.definitions: dict[str, list[compiler.Node]] = collections.defaultdict(list)
+        for compiled in [self.prelude, program] if self.prelude else [program]:
+            for form in compiled.forms:
+                if isinstance(form, compiler.Define):
+                    _global_refs(form.value, self.refs[form.name])
+                    self.definitions[form.name].append(form.value)
+        self.reach_of: dict[str, frozenset[str]] = {}
+
+    def reach(self, node: compiler.Node) -> set[str]:
+        names = set()
+        for name in _global_refs(node, set()):
+            names |= self.reach_name(name)
+        return names
+
+    def reach_name(self, name: str) -> frozenset[str]:
+        if name not in self.reach_of:
+            seen, stack = {name}, [name]
+            while stack:
+                for ref in self.refs.get(stack.pop(), ()):
+                    if ref not in seen:
+                        seen.add(ref)
+                        stack.append(ref)
+            self.reach_of[name] = frozenset(seen)
+        return self.reach_of[name]
+
+
+class _Graph:
+    def __init__(self, jobs: typing.Sequence[Job]):
+        self.programs = [_Program(job.program) for job in jobs]
+        self.tasks: dict[str, _Task] = {}
+        # occurrences of every sub-expression key across the programs
+        self.occurrences: collections.Counter[str] = collections.Counter()
+        # per job, per top-level form: the keys of the tasks the globals are bound to before the form
+        self.scopes: list[list[dict[str, str]]] = []
+        for program in self.programs:
+            self.scopes.append(self.count(program) if program.splittable else [])
+        # per job: the task of every form, in order, and the task each output is bound to
+        self.forms: list[list[_Task]] = []
+        self.bound: list[dict[str, _Task]] = []
+        for index, program in enumerate(self.programs):
+            if program.splittable:
+                self.build(program, self.scopes[index])
+            else:
+                task = _Task(f"program {index}", None, None, {}, program.program)
+                self.tasks[task.key] = task
+                self.forms.append([task])
+                self.bound.append({})
+
+    def key(self, program: _Program, node: compiler.Node, scope: dict[str, str]) -> str:
+        resolved = []
+        for name in sorted(program.reach(node)):
+            if name in scope:
+                resolved.append((name, scope[name]))
+            elif name in program.prelude_names:
+                resolved.append((name, f"prelude {program.prelude_key}"))
+        return hashlib.sha256(repr((node, resolved)).encode()).hexdigest()
+
+    def count(self, program: _Program) -> list[dict[str, str]]:
+        scopes, scope = [], {}
+        def visit(node: compiler.Node) -> str:
+            if isinstance(node, compiler.Call):
+                for child in (node.fn, *node.args):
+                    visit(child)
+            key = self.key(program, node, scope)
+            if isinstance(node, compiler.Call):
+                self.occurrences[key] += 1
+            return key
+        for form in program.program.forms:
+            scopes.append(dict(scope))
+            key = visit(_expression(form))
+            if isinstance(form, compiler.Define):
+                scope = {**scope, form.name: key}
+        return scopes
+
+    def build(self, program: _Program, scopes: list[dict[str, str]]) -> None:
+        forms, bound = [], {}
+        for form, scope in zip(program.program.forms, scopes):
+            # the tasks of earlier definitions were built by earlier forms
+            task = self.task(program, _expression(form), scope)
+            forms.append(task)
+            if isinstance(form, compiler.Define):
+                bound[form.name] = task
+        self.forms.append(forms)
+        self.bound.append(bound)
+
+    def task(self, program: _Program, node: compiler.Node, scope: dict[str, str]) -> _Task:
+        key = self.key(program, node, scope)
+        if key in self.tasks:
+            return self.tasks[key]
+        reach = program.reach(node)
+        bindings = {name: self.tasks[scope[name]] for name in reach if name in scope}
+        if isinstance(node, compiler.Call):
+            node = compiler.Call(self.split(program, node.fn, scope, bindings),
+                                 tuple(self.split(program, arg, scope, bindings) for arg in node.args))
+        task = self.tasks[key] = _Task(key, node, program.prelude, bindings)
+
+        metrics = set()
+        impure = _reads(node, metrics)
+        for name in reach - set(scope):
+            impure = any([_reads(value, metrics) for value in program.definitions.get(name, [])]) or impure
+        for dependency in bindings.values():
+            metrics |= dependency.metrics
+            impure = impure or not dependency.pure
+        task.metrics, task.pure = frozenset(metrics), not impure
+        return task
+
+    def split(self, program: _Program, node: compiler.Node, scope: dict[str, str],
+              bindings: dict[str, _Task]) -> compiler.Node:
+        """Replaces shared sub-expressions and reads of the node by references to tasks of their own."""
+        if not isinstance(node, compiler.Call):
+            return node
+        key = self.key(program, node, scope)
+        if self.occurrences[key] > 1 or _is_literal_read(node):
+            # can't clash with user symbols, which have no spaces
+            name = f"<shared {key}>"
+            bindings[name] = self.task(program, node, scope)
+            return compiler.GlobalRef(name)
+        return compiler.Call(self.split(program, node.fn, scope, bindings),
+                             tuple(self.split(program, arg, scope, bindings) for arg in node.args))
+
+
+def _evaluate_task(task: _Task, resolver: evaluator.Resolver,
+                   preludes: typing.Mapping[int, dict[str, typing.Any]]) -> typing.Any:
+    runtime = evaluator.Runtime(resolver)
+    if task.program is not None:
+        return runtime.run(task.program)
+    if task.prelude is not None:
+        runtime.global_env.values.update(preludes[id(task.prelude)])
+    for name, dependency in task.bindings.items():
+        runtime.global_env.define(name, dependency.value)
+    try:
+        return runtime.eval_node(task.node, runtime.global_env)
+    except RecursionError:
+        raise evaluator.EvaluationError("Maximum recursion depth exceeded")
+
+
+def _cached(task: _Task) -> bool:
+    # reads are left to the data store
+    return task.pure and task.program is None and not _is_literal_read(task.node)
+
+
+def _needed(roots: typing.Iterable[_Task], cache: result_cache.ResultCacheView | None) -> list[_Task]:
+    """Tasks the roots need evaluated, taking the values of the ones found in the cache."""
+    needed, seen, stack = [], set(), list(roots)
+    while stack:
+        task = stack.pop()
+        if task in seen:
+            continue
+        seen.add(task)
+        if cache is not None and _cached(task):
+            task.value = cache.get(task.key, task.metrics)
+            if task.value is not None:
+                continue
+        needed.append(task)
+        stack.extend(task.bindings.values())
+    return needed
+
+
+def _run(tasks: typing.Collection[_Task], resolver: evaluator.Resolver,
+         preludes: typing.Mapping[int, dict[str, typing.Any]], executor: concurrent.futures.Executor,
+         cache: result_cache.ResultCacheView | None) -> None:
+    waiting_on = {task: {dependency for dependency in task.bindings.values() if dependency in tasks}
+                  for task in tasks}
+    dependents: dict[_Task, list[_Task]] = collections.defaultdict(list)
+    for task, dependencies in waiting_on.items():
+        for dependency in dependencies:
+            dependents[dependency].append(task)
+    ready = [task for task, dependencies in waiting_on.items() if not dependencies]
+    running: dict[concurrent.futures.Future, _Task] = {}
+
+    def finish(task: _Task) -> None:
+        for dependent in dependents[task]:
+            waiting_on[dependent].discard(task)
+            if task.error is not None and dependent.error is None:
+                # tasks depending on a failed one fail with it, without running
+                dependent.error = task.error
+                finish(dependent)
+            elif not waiting_on[dependent] and dependent.error is None:
+                ready.append(dependent)
+
+    while ready or running:
+        for task in ready:
+            running[executor.submit(_evaluate_task, task, resolver, preludes)] = task
+        ready.clear()
+        done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            task = running.pop(future)
+            try:
+                task.value = future.result()
+            except evaluator.EvaluationError as e:
+                task.error = e
+            if cache is not None and task.error is None and _cached(task) and isinstance(task.value, Series):
+                cache.put(task.key, task.metrics, task.value)
+            finish(task)
+
+
+def evaluate(jobs: typing.Sequence[Job], resolver: evaluator.Resolver,
+             executor: concurrent.futures.Executor | None = None,
+             cache: result_cache.ResultCacheView | None = None) \
+        -> list[dict[str, typing.Any] | evaluator.EvaluationError]:
+    """Evaluates the programs and returns, per job, its outputs or the error of the earliest form that failed.
+
+    The resolver is called from the executor's threads. Series computed from metrics read by literal name are
+    taken from and stored in the cache.
+    """
+    graph = _Graph(jobs)
+    preludes = {}
+    for program in graph.programs:
+        if program.prelude is not None and id(program.prelude) not in preludes:
+            preludes[id(program.prelude)] = evaluator.Runtime(resolver).run(program.prelude)
+    _run(set(_needed((task for forms in graph.forms for task in forms), cache)), resolver, preludes,
+         executor or _executor, cache)
+
+    results = []
+    for index, (job, program) in enumerate(zip(jobs, graph.programs)):
+        error = next((task.error for task in graph.forms[index] if task.error is not None), None)
+        if error is not None:
+            results.append(error)
+            continue
+        if not program.splittable:
+            values = graph.forms[index][0].value
+        else:
+            values = {name: task.value for name, task in graph.bound[index].items()}
+            for name, value in preludes.get(id(program.prelude), {}).items():
+                values.setdefault(name, value)
+        results.append({name: values[name] for name in job.outputs if name in values})
+    return results
@@ -0,0 +1,116 @@
+"""
+Datapoint series and the stream operations of PulseLang, ported from the Python SDK's models and operations.
+"""
+from __future__ import annotations
+
+import collections
+import heapq
+import typing
+
+from src.pulselang import buckets, quantiles
+
+
+class Point(typing.NamedTuple):
+    timestamp: int
+    value: float
+    dimensions: typing.Mapping[str, str]
+
+
+class Series:
+    def __init__(self, points: typing.Optional[list[Point]] = None, init_val: float = 0.0):
+        self.points = points if points is not None else []
+        self.init_val = init_val
+    def __len__(self) -> int:
+        return len(self.points)
+    def __iter__(self) -> typing.Iterator[Point]:
+        return iter(self.points)
+    def __repr__(self):
+        return f"Series({self.points!r}, init_val={self.init_val!r})"
+    def filter(self, predicate: typing.Callable[[Point], bool]) -> Series:
+        return Series([point for point in self.points if predicate(point)], self.init_val)
+    def map(self, mapping: typing.Callable[[Point], Point]) -> Series:
+        return Series([mapping(point) for point in self.points], self.init_val)
+    def clip(self, start: typing.Optional[int], end: typing.Optional[int]) -> Series:
+        return Series([point for point in self.points
+                       if (start is None or point.timestamp >= start) and (end is None or point.timestamp <= end)],
+                      self.init_val)
+    def shift(self, duration: int) -> Series:
+        return Series([Point(p.timestamp + duration, p.value, p.dimensions) for p in self.points], self.init_val)
+    def prefix_op(self, operation: typing.Callable[[list[float]], float]) -> Series:
+        prev = self.init_val
+        points = []
+        for point in self.points:
+            prev = operation([prev, point.value])
+            points.append(Point(point.timestamp, prev, point.dimensions))
+        return Series(points, operation([self.init_val]))
+    def sliding_window(self, window: int, operation: typing.Callable[[list[float]], float]) -> Series:
+        """Aggregates the values of the last `window` milliseconds at every point and every point's expiry."""
+        if not self.points:
+            return Series([], self.init_val)
+
+        points = []
+        count = 0
+        values: collections.defaultdict[float, int] = collections.defaultdict(int)
+        # percentiles keep the window's values in order instead of sorting them at every point
+        ordered = operation.window() if isinstance(operation, quantiles.Percentile) else None
+        events = [(point.timestamp, "add", point.value) for point in self.points]
+        heapq.heapify(events)
+        while events:
+            time, kind, value = heapq.heappop(events)
+            if kind == "add":
+                count += 1
+                if ordered is None:
+                    values[value] += 1
+                else:
+                    ordered.add(value)
+                heapq.heappush(events, (time + window, "remove", value))
+            else:
+                count -= 1
+                if ordered is None:
+                    values[value] -= 1
+                    if values[value] == 0:
+                        del values[value]
+                else:
+                    ordered.remove(value)
+
+            # don't emit two points with the same timestamp
+            if events and events[0][0] == time:
+                continue
+            if count == 0:
+                points.append(Point(time, self.init_val, {}))
+                continue
+            if ordered is not None:
+                points.append(Point(time, operation.of(ordered), {}))
+                continue
+            flat = []
+            for v, c in values.items():
+                flat.extend([v] * c)
+            points.append(Point(time, operation(flat), {}))
+
+        # the last point is the init_val emitted after the last value left the window
+        points.pop()
+        return Series(points, self.init_val)
+    def bucketize(self, calendar: buckets.Calendar, aggregate: typing.Callable[[list[float]], float]) -> Series:
+        """Buckets of the calendar from the one of the first point to the one of the last point."""
+        bucketized = buckets.bucketize([point.timestamp for point in self.points],
+                                       [point.value for point in self.points], calendar, aggregate, self.init_val)
+        return Series([Point(start, value, {}) for start, value in bucketized], self.init_val)
+
+
+def compose(series: list[Series], operation: typing.Callable[[list[float]], float]) -> Series:
+    """Applies operation to the latest values of all series at every timestamp of any of them."""
+    last_vals = [s.init_val for s in series]
+    new_init = operation(list(last_vals))
+    if all(not s.points for s in series):
+        return Series([], new_init)
+
+    points = []
+    merged = heapq.merge(*([(point.timestamp, point.value, i) for point in s.points] for i, s in enumerate(series)))
+    curr_time = None
+    for time, value, i in merged:
+        if curr_time is not None and time > curr_time:
+            points.append(Point(curr_time, operation(list(last_vals)), {}))
+        curr_time = time
+        last_vals[i] = value
+    points.append(Point(curr_time, operation(list(last_vals)), {}))
+    return Series(points, new_init)
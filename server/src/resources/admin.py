@@ -0,0 +1,26 @@
+import threading
+
+import fastapi
+from fastapi.concurrency import run_in_threadpool
+
+from src.auth import user_auth
+from src.common import profiler
+
+router = fastapi.APIRouter()
+
+# profiles of concurrent requests would sample each other
+profile_lock = threading.Lock()
+
+@router.get("/profile")
+async def profile(seconds: float = fastapi.Query(default=10, gt=0, le=60),
+                  interval_ms: float = fastapi.Query(default=5, ge=1, le=1000),
+                  idle: bool = False,
+                  _=fastapi.Depends(user_auth.require_admin)):
+    """Samples the server's threads for `seconds`, returns the stacks in the collapsed format of flamegraph.pl."""
+    if not profile_lock.acquire(blocking=False):
+        raise fastapi.HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        counts = await run_in_threadpool(profiler.sample, seconds, interval_ms / 1000, idle)
+    finally:
+        profile_lock.release()
+    return fastapi.Response(profiler.collapsed(counts), media_type="text/plain")
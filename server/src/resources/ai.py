@@ -1,5 +1,7 @@
 import asyncio
+import functools
 import json
+import os
 import pathlib
 import time
 from collections.abc import Awaitable, Callable
@@ -9,8 +11,12 @@ import fastapi
 import pydantic
 
 from src.ai.client_session_registry import ClientSessionRegistry
+from src.ai.conversation_context import ConversationContexts
 from src.ai.model_client import LlmChatCompletionResult, execute_chat_completion_from_stored_model
+from src.ai.tool_cache import ToolResultCache
 from src.ai.tool_executor import TOOL_DEFINITIONS, execute_ai_tool
+from src.ai.tool_workers import ToolWorkers
+from src.ai.upstream_clients import UpstreamClients
 from src.auth import user_auth
 from src.auth.session import SessionStore
 from src.common import state
@@ -24,11 +30,16 @@ from src.dao.user_repo import UserRepo
 router = fastapi.APIRouter()
 
 _MAX_TOOL_ROUNDS = 8
+_TOOL_TIMEOUT_SECONDS = float(os.environ.get("AI_TOOL_TIMEOUT_SEC", "30"))
 _TITLE_MAX_LENGTH = 120
+_MAX_CHAT_PAGE_SIZE = 500
 _WS_HEARTBEAT_INTERVAL_SECONDS = 15.0
 _PULSELANG_DOCS_PATH = pathlib.Path(__file__).resolve().parents[3] / "docs" / "PulseLang.md"
 _PULSELANG_DOCS = _PULSELANG_DOCS_PATH.read_text(encoding="utf-8").strip()
 
+# tools read metrics and charts synchronously, off the event loop
+_tool_workers = ToolWorkers(_TOOL_TIMEOUT_SECONDS)
+
 SYSTEM_PROMPT="""You are Pulse Wizard, the Impulses AI assistant.
 You are Pulse Wizard, the Impulses AI assistant.  
 Operate in strict **read‑only mode**. Inspect and explain dashboards, charts, and PulseLang via tools; **never claim writes or external actions**.
@@ -142,7 +153,10 @@ class ToolTraceDto(pydantic.BaseModel):
     tool_call_id: str
     name: str
     arguments: Any = None
-    response: dict[str, Any]
+    # None while the tool runs, or if left out of the page
+    response: dict[str, Any] | None = None
+    # whether the response came from the tool result cache, None for calls from before it
+    cached: bool | None = None
 
 
 class ReasoningNoteDto(pydantic.BaseModel):
@@ -153,6 +167,8 @@ class ReasoningNoteDto(pydantic.BaseModel):
 class ChatReasoningDto(pydantic.BaseModel):
     notes: list[ReasoningNoteDto] = pydantic.Field(default_factory=list)
     tool_calls: list[ToolTraceDto] = pydantic.Field(default_factory=list)
+    # the responses of the tool calls are loaded separately, from /chats/{chat_id}/messages/{message_id}/reasoning
+    tool_responses_omitted: bool = False
 
 
 class DisplayChartDto(pydantic.BaseModel):
@@ -189,6 +205,8 @@ class ChatDto(pydantic.BaseModel):
     created_at: int
     updated_at: int
     messages: list[ChatMessageDto]
+    # whether there are more messages beyond the page
+    has_more: bool = False
 
 
 ProgressCallback = Callable[[dict[str, Any]], Awaitable[None]]
@@ -275,10 +293,11 @@ def _to_chat_summary_dto(chat: AiChatSummary) -> ChatSummaryDto:
     )
 
 
-def _to_chat_message_dto(message: AiChatMessage) -> ChatMessageDto:
+def _to_chat_message_dto(message: AiChatMessage, tool_responses: bool = True) -> ChatMessageDto:
     reasoning = None
     if isinstance(message.reasoning, dict):
         reasoning = ChatReasoningDto.model_validate(message.reasoning)
+        reasoning.tool_responses_omitted = not tool_responses and bool(reasoning.tool_calls)
     return ChatMessageDto(
         id=message.id,
         role=message.role,
@@ -295,7 +314,7 @@ def _to_chat_message_dto(message: AiChatMessage) -> ChatMessageDto:
     )
 
 
-def _to_chat_dto(chat: AiChat) -> ChatDto:
+def _to_chat_dto(chat: AiChat, has_more: bool = False, tool_responses: bool = True) -> ChatDto:
     return ChatDto(
         id=chat.summary.id,
         model_id=chat.summary.model_id,
@@ -303,26 +322,20 @@ def _to_chat_dto(chat: AiChat) -> ChatDto:
         title=chat.summary.title,
         created_at=chat.summary.created_at,
         updated_at=chat.summary.updated_at,
-        messages=[_to_chat_message_dto(message) for message in chat.messages],
+        messages=[_to_chat_message_dto(message, tool_responses) for message in chat.messages],
+        has_more=has_more,
     )
 
 
-def _load_persisted_conversation(chat: AiChat | None) -> list[dict[str, str]]:
-    if chat is None:
-        return []
-    conversation: list[dict[str, str]] = []
-    for message in chat.messages:
-        if message.role not in ("user", "assistant"):
-            continue
-        if not isinstance(message.content, str):
-            continue
-        if message.role == "assistant" and not message.content.strip():
-            continue
-        conversation.append({
-            "role": message.role,
-            "content": message.content,
-        })
-    return conversation
+def _parse_cursor(cursor: str | None) -> tuple[int, str] | None:
+    """`created_at:id` of a message."""
+    if cursor is None:
+        return None
+    created_at, _, message_id = cursor.partition(":")
+    try:
+        return int(created_at), message_id
+    except ValueError:
+        raise fastapi.HTTPException(status_code=422, detail="Cursor must be created_at:id of a message")
 
 
 async def _authenticate_chat_websocket(
@@ -348,6 +361,91 @@ async def _authenticate_chat_websocket(
     return session_token, user.id
 
 
+def _tool_call_payload(
+    *,
+    user_id: str,
+    function: Any,
+    data_dao: DataDao,
+    chart_repo: ChartRepo,
+    dashboard_repo: DashboardRepo,
+    tool_cache: ToolResultCache,
+) -> tuple[dict[str, Any], bool]:
+    """The payload of the tool's result or error, and whether the result was cached."""
+    if not isinstance(function, dict):
+        return {
+            "ok": False,
+            "error": "Tool call payload was missing function data",
+        }, False
+    if not isinstance(function.get("name"), str) or not function.get("name").strip():
+        return {
+            "ok": False,
+            "error": "Tool call payload was missing function name",
+        }, False
+    try:
+        tool_data, cached = tool_cache.get_or_run(
+            user_id,
+            function["name"],
+            function.get("arguments"),
+            functools.partial(
+                execute_ai_tool,
+                user_id=user_id,
+                tool_name=function["name"],
+                arguments=function.get("arguments"),
+                data_dao=data_dao,
+                chart_repo=chart_repo,
+                dashboard_repo=dashboard_repo,
+            ),
+        )
+        return {
+            "ok": True,
+            "data": tool_data,
+        }, cached
+    except fastapi.HTTPException as exc:
+        detail = exc.detail if isinstance(exc.detail, str) else str(exc.detail)
+        return {
+            "ok": False,
+            "error": detail,
+        }, False
+    except pydantic.ValidationError as exc:
+        return {
+            "ok": False,
+            "error": f"Invalid tool arguments: {exc}",
+        }, False
+    except Exception as exc:
+        return {
+            "ok": False,
+            "error": f"Tool execution failed: {exc}",
+        }, False
+
+
+async def _execute_tool_call(
+    *,
+    user_id: str,
+    function: Any,
+    data_dao: DataDao,
+    chart_repo: ChartRepo,
+    dashboard_repo: DashboardRepo,
+    tool_cache: ToolResultCache,
+) -> tuple[dict[str, Any], bool]:
+    """Runs the tool on the tool workers, the tool calls of a round run concurrently."""
+    run = functools.partial(
+        _tool_call_payload,
+        user_id=user_id,
+        function=function,
+        data_dao=data_dao,
+        chart_repo=chart_repo,
+        dashboard_repo=dashboard_repo,
+        tool_cache=tool_cache,
+    )
+    try:
+        return await _tool_workers.run(user_id, run)
+    except asyncio.TimeoutError:
+        return {
+            "ok": False,
+            "error": f"Tool execution timed out after {_TOOL_TIMEOUT_SECONDS:g} seconds",
+        }, False
+
+
 async def _run_chat_completion(
     *,
     user_id: str,
@@ -359,6 +457,8 @@ async def _run_chat_completion(
     dashboard_repo: DashboardRepo,
     model_repo: LlmModelRepo,
     client_session_registry: ClientSessionRegistry,
+    upstream_clients: UpstreamClients,
+    tool_cache: ToolResultCache,
     persist_aux_message: MessageSavedCallback | None = None,
     on_progress: ProgressCallback | None = None,
 ) -> LlmChatCompletionResult:
@@ -380,6 +480,16 @@ async def _run_chat_completion(
                 "tool_choice": "auto",
             }
 
+        on_delta = None
+        if on_progress is not None:
+            async def on_delta(delta: str, round_number: int = round_number) -> None:
+                await on_progress({
+                    "type": "chat_delta",
+                    "chat_id": chat_id,
+                    "round": round_number,
+                    "delta": delta,
+                })
+
         _, result = await execute_chat_completion_from_stored_model(
             model_repo,
             user_id,
@@ -387,6 +497,8 @@ async def _run_chat_completion(
             upstream_messages,
             extra_body=extra_body,
             registry=client_session_registry,
+            clients=upstream_clients,
+            on_delta=on_delta,
         )
 
         raw_message = result.raw_message or {}
@@ -415,6 +527,7 @@ async def _run_chat_completion(
         if not isinstance(tool_calls, list) or not tool_calls:
             return result
 
+        calls = []
         for tool_call in tool_calls:
             if not isinstance(tool_call, dict):
                 continue
@@ -428,48 +541,22 @@ async def _run_chat_completion(
             if isinstance(function, dict):
                 tool_name = function.get("name") if isinstance(function.get("name"), str) and function.get("name").strip() else "(missing name)"
                 arguments = _normalize_tool_arguments(function.get("arguments"))
-
-            if not isinstance(function, dict):
-                payload = {
-                    "ok": False,
-                    "error": "Tool call payload was missing function data",
-                }
-            elif not isinstance(function.get("name"), str) or not function.get("name").strip():
-                payload = {
-                    "ok": False,
-                    "error": "Tool call payload was missing function name",
-                }
-            else:
-                try:
-                    tool_data = execute_ai_tool(
-                        user_id=user_id,
-                        tool_name=function["name"],
-                        arguments=function.get("arguments"),
-                        data_dao=data_dao,
-                        chart_repo=chart_repo,
-                        dashboard_repo=dashboard_repo,
-                    )
-                    payload = {
-                        "ok": True,
-                        "data": tool_data,
-                    }
-                except fastapi.HTTPException as exc:
-                    detail = exc.detail if isinstance(exc.detail, str) else str(exc.detail)
-                    payload = {
-                        "ok": False,
-                        "error": detail,
-                    }
-                except pydantic.ValidationError as exc:
-                    payload = {
-                        "ok": False,
-                        "error": f"Invalid tool arguments: {exc}",
-                    }
-                except Exception as exc:
-                    payload = {
-                        "ok": False,
-                        "error": f"Tool execution failed: {exc}",
-                    }
-
+            calls.append((tool_call_id, tool_name, arguments, function))
+
+        # results come back in the order of the calls, and are persisted in that order
+        results = await asyncio.gather(*(
+            _execute_tool_call(
+                user_id=user_id,
+                function=function,
+                data_dao=data_dao,
+                chart_repo=chart_repo,
+                dashboard_repo=dashboard_repo,
+                tool_cache=tool_cache,
+            )
+            for _, _, _, function in calls
+        ))
+
+        for (tool_call_id, tool_name, arguments, _), (payload, cached) in zip(calls, results):
             upstream_messages.append(_tool_result_message(tool_call_id, payload))
             if tool_name == "display_chart" and isinstance(arguments, dict) and payload.get("ok"):
                 display_chart_payload = {
@@ -496,6 +583,7 @@ async def _run_chat_completion(
                 "name": tool_name,
                 "arguments": arguments,
                 "response": payload,
+                "cached": cached,
             }
             if persist_aux_message is not None:
                 await persist_aux_message({
@@ -514,6 +602,7 @@ async def _run_chat_completion(
                     "content": "",
                     "payload": {
                         "response": payload,
+                        "cached": cached,
                     },
                 })
             if on_progress is not None:
@@ -526,12 +615,12 @@ async def _run_chat_completion(
     raise fastapi.HTTPException(status_code=502, detail="LLM exceeded maximum tool-call iterations")
 
 
-def _resolve_chat_model_id(body_model_id: str | None, persisted_chat: AiChat | None) -> str:
+def _resolve_chat_model_id(body_model_id: str | None, persisted_chat: AiChatSummary | None) -> str:
     requested_model_id = (body_model_id or "").strip()
     if requested_model_id:
         return requested_model_id
-    if persisted_chat is not None and persisted_chat.summary.model_id:
-        return persisted_chat.summary.model_id
+    if persisted_chat is not None and persisted_chat.model_id:
+        return persisted_chat.model_id
     raise fastapi.HTTPException(status_code=422, detail="Saved model is required")
 
 
@@ -539,7 +628,7 @@ def _create_or_update_chat(
     *,
     chat_repo: AiChatRepo,
     user_id: str,
-    persisted_chat: AiChat | None,
+    persisted_chat: AiChatSummary | None,
     model_id: str,
     first_user_message: str,
 ) -> AiChatSummary:
@@ -549,7 +638,7 @@ def _create_or_update_chat(
             raise fastapi.HTTPException(status_code=500, detail="Failed to create chat")
         return created
 
-    updated = chat_repo.update_chat_model(user_id, persisted_chat.summary.id, model_id)
+    updated = chat_repo.update_chat_model(user_id, persisted_chat.id, model_id)
     if updated is None:
         raise fastapi.HTTPException(status_code=404, detail="Chat not found")
     return updated
@@ -565,13 +654,16 @@ async def _handle_chat_turn(
     model_repo: LlmModelRepo,
     chat_repo: AiChatRepo,
     client_session_registry: ClientSessionRegistry,
+    upstream_clients: UpstreamClients,
+    conversation_contexts: ConversationContexts,
+    tool_cache: ToolResultCache,
     on_chat_created: ChatCreatedCallback | None = None,
     on_message_saved: MessageSavedCallback | None = None,
     on_progress: ProgressCallback | None = None,
 ) -> str:
     user_content = _normalize_user_message_content(body.content)
     chat_id = (body.chat_id or "").strip() or None
-    persisted_chat = None if chat_id is None else chat_repo.get_chat(user_id, chat_id)
+    persisted_chat = None if chat_id is None else chat_repo.get_chat_summary(user_id, chat_id)
     if chat_id is not None and persisted_chat is None:
         raise fastapi.HTTPException(status_code=404, detail="Chat not found")
 
@@ -597,6 +689,7 @@ async def _handle_chat_turn(
         request_started_at=user_message_created_at,
         created_at=user_message_created_at,
     )
+    conversation_contexts.append(user_message)
     if on_message_saved is not None:
         await on_message_saved(user_message)
 
@@ -623,7 +716,7 @@ async def _handle_chat_turn(
         if on_message_saved is not None and auxiliary_message["message_type"] in ("reasoning_note", "display_chart"):
             await on_message_saved(saved)
 
-    conversation_messages = _load_persisted_conversation(chat_repo.get_chat(user_id, chat_summary.id))
+    conversation_messages = conversation_contexts.get(chat_repo, chat_summary.id)
     result = await _run_chat_completion(
         user_id=user_id,
         chat_id=chat_summary.id,
@@ -634,6 +727,8 @@ async def _handle_chat_turn(
         dashboard_repo=dashboard_repo,
         model_repo=model_repo,
         client_session_registry=client_session_registry,
+        upstream_clients=upstream_clients,
+        tool_cache=tool_cache,
         persist_aux_message=persist_auxiliary_message,
         on_progress=on_progress,
     )
@@ -650,6 +745,7 @@ async def _handle_chat_turn(
             request_started_at=user_message_created_at,
             created_at=last_created_at,
         )
+        conversation_contexts.append(final_message)
         if on_message_saved is not None:
             await on_message_saved(final_message)
         return chat_summary.id
@@ -690,10 +786,42 @@ def list_chats(
 @router.get("/chats/{chat_id}", response_model=ChatDto)
 def get_chat(
     chat_id: str,
+    limit: int | None = fastapi.Query(default=None, ge=1, le=_MAX_CHAT_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
+    tool_responses: bool = True,
     chat_repo: AiChatRepo = state.injected(AiChatRepo),
     u=fastapi.Depends(user_auth.get_current_user),
 ) -> ChatDto:
-    chat = chat_repo.get_chat(u.id, chat_id)
-    if chat is None:
+    """The chat with all of its messages, or with a page of them: the newest `limit` ones, those before or after a
+    `created_at:id` cursor. Pages may leave out the responses of tool calls."""
+    summary = chat_repo.get_chat_summary(u.id, chat_id)
+    if summary is None:
+        raise fastapi.HTTPException(status_code=404, detail="Chat not found")
+    if limit is None and before is None and after is None and tool_responses:
+        return _to_chat_dto(AiChat(summary=summary, messages=chat_repo.list_messages(chat_id)))
+
+    messages, has_more = chat_repo.list_messages_page(
+        chat_id,
+        limit=limit or _MAX_CHAT_PAGE_SIZE,
+        before=_parse_cursor(before),
+        after=_parse_cursor(after),
+        tool_responses=tool_responses,
+    )
+    return _to_chat_dto(AiChat(summary=summary, messages=messages), has_more, tool_responses)
+
+
+@router.get("/chats/{chat_id}/messages/{message_id}/reasoning", response_model=ChatReasoningDto)
+def get_message_reasoning(
+    chat_id: str,
+    message_id: str,
+    chat_repo: AiChatRepo = state.injected(AiChatRepo),
+    u=fastapi.Depends(user_auth.get_current_user),
+) -> ChatReasoningDto:
+    """The reasoning of a message, with the responses of its tool calls."""
+    if chat_repo.get_chat_summary(u.id, chat_id) is None:
         raise fastapi.HTTPException(status_code=404, detail="Chat not found")
-    return _to_chat_dto(chat)
+    message = chat_repo.get_message(chat_id, message_id)
+    if message is None:
+        raise fastapi.HTTPException(status_code=404, detail="Message not found")
+    return _to_chat_message_dto(message).reasoning or ChatReasoningDto()
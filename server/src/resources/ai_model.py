@@ -1,3 +1,5 @@
+import os
+
 import fastapi
 import pydantic
 
@@ -17,6 +19,7 @@ class LlmModelSettingsDto(pydantic.BaseModel):
     base_url: str
     headers: list[LlmHeaderDto] = pydantic.Field(default_factory=list)
     is_localhost: bool = False
+    prompt_caching: bool = False
 
 
 class LlmModelDto(pydantic.BaseModel):
@@ -32,11 +35,17 @@ class UpsertLlmModelBody(pydantic.BaseModel):
     settings: LlmModelSettingsDto
 
 
+def _check_remote_models_allowed(settings: LlmModelSettingsDto) -> None:
+    if not settings.is_localhost and os.getenv("ALLOW_REMOTE_MODELS", "").lower() != "true":
+        raise fastapi.HTTPException(status_code=503, detail="Creation of non-localhost models is disabled as of now")
+
+
 def _to_settings(dto: LlmModelSettingsDto) -> LlmModelSettings:
     return LlmModelSettings(
         base_url=dto.base_url,
         headers=[LlmHeader(name=header.name, value=header.value) for header in dto.headers],
         is_localhost=dto.is_localhost,
+        prompt_caching=dto.prompt_caching,
     )
 
 
@@ -48,6 +57,7 @@ def _to_dto(model: LlmModel) -> LlmModelDto:
             base_url=model.settings.base_url,
             headers=[LlmHeaderDto(name=header.name, value=header.value) for header in model.settings.headers],
             is_localhost=model.settings.is_localhost,
+            prompt_caching=model.settings.prompt_caching,
         ),
         created_at=model.created_at,
         updated_at=model.updated_at,
@@ -85,8 +95,7 @@ async def create_model(
     model_name = body.model.strip()
     if not model_name:
         raise fastapi.HTTPException(status_code=422, detail="Model name is required")
-    if not body.settings.is_localhost:
-        raise fastapi.HTTPException(status_code=503, detail="Creation of non-localhost models is disabled as of now")
+    _check_remote_models_allowed(body.settings)
     model = repo.create_model(u.id, model_name, _to_settings(body.settings))
     return _to_dto(model)
 
@@ -101,8 +110,7 @@ async def update_model(
     model_name = body.model.strip()
     if not model_name:
         raise fastapi.HTTPException(status_code=422, detail="Model name is required")
-    if not body.settings.is_localhost:
-        raise fastapi.HTTPException(status_code=503, detail="Creation of non-localhost models is disabled as of now")
+    _check_remote_models_allowed(body.settings)
     model = repo.update_model(u.id, model_id, model_name, _to_settings(body.settings))
     if not model:
         raise fastapi.HTTPException(status_code=404, detail="Model not found")
@@ -6,6 +6,9 @@ import fastapi
 import pydantic
 
 from src.ai.client_session_registry import ClientSessionRegistry
+from src.ai.conversation_context import ConversationContexts
+from src.ai.tool_cache import ToolResultCache
+from src.ai.upstream_clients import UpstreamClients
 from src.common import state
 from src.dao.ai_chat_repo import AiChatRepo
 from src.dao.chart_repo import ChartRepo
@@ -14,6 +17,7 @@ from src.dao.data_dao import DataDao
 from src.dao.llm_model_repo import LlmModelRepo
 from src.dao.user_repo import UserRepo
 from src.auth.session import SessionStore
+from src.pulselang.live_charts import LiveChartRegistry
 from src.resources.ai import (
     ChatSendRequestBody,
     ChatWebSocketSendBody,
@@ -41,6 +45,10 @@ async def app_socket(
     model_repo = app_state.get_obj(LlmModelRepo)
     chat_repo = app_state.get_obj(AiChatRepo)
     registry = app_state.get_obj(ClientSessionRegistry)
+    upstream_clients = app_state.get_obj(UpstreamClients)
+    conversation_contexts = app_state.get_obj(ConversationContexts)
+    tool_cache = app_state.get_obj(ToolResultCache)
+    live_charts = app_state.get_obj(LiveChartRegistry)
 
     try:
         session_token, user_id = await _authenticate_chat_websocket(websocket, sessions, users)
@@ -113,6 +121,9 @@ async def app_socket(
                 model_repo=model_repo,
                 chat_repo=chat_repo,
                 client_session_registry=registry,
+                upstream_clients=upstream_clients,
+                conversation_contexts=conversation_contexts,
+                tool_cache=tool_cache,
                 on_chat_created=on_chat_created,
                 on_message_saved=on_message_saved,
                 on_progress=on_progress,
@@ -175,6 +186,22 @@ async def app_socket(
                 task.add_done_callback(active_tasks.discard)
                 continue
 
+            if message_type in ("chart_subscribe", "chart_unsubscribe"):
+                chart_id = message.get("chart_id")
+                if not isinstance(chart_id, str) or not chart_id:
+                    await registry.send_to_connection(connection.connection_id, {
+                        "type": "chart_error",
+                        "chart_id": None,
+                        "error": "chart_id is required",
+                    })
+                elif message_type == "chart_subscribe":
+                    task = asyncio.create_task(live_charts.subscribe(user_id, connection.connection_id, chart_id))
+                    active_tasks.add(task)
+                    task.add_done_callback(active_tasks.discard)
+                else:
+                    live_charts.unsubscribe(user_id, connection.connection_id, chart_id)
+                continue
+
             await registry.send_to_connection(connection.connection_id, {
                 "type": "chat_error",
                 "error": f"Unsupported websocket message type: {message_type or 'unknown'}",
@@ -191,4 +218,5 @@ async def app_socket(
             task.cancel()
         if active_tasks:
             await asyncio.gather(*active_tasks, return_exceptions=True)
+        live_charts.drop_connection(user_id, connection.connection_id)
         await registry.unregister(user_id, connection.connection_id)
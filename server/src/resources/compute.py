@@ -0,0 +1,131 @@
+import typing
+
+import fastapi
+import pydantic
+
+from src.auth import token_auth
+from src.common import responses
+from src.common import state
+from src.common import tracing
+from src.dao import data_dao
+from src.pulselang import compiler, evaluator, planner, result_cache, scheduler
+from src.pulselang.series import Point, Series
+from src.resources import data
+
+router = fastapi.APIRouter(default_response_class=responses.OrjsonResponse)
+
+
+class ComputeRequestDto(pydantic.BaseModel):
+    program: str
+    # top-level bindings to return, all series bindings of the program if not given
+    variables: typing.Optional[typing.List[str]] = None
+    start: typing.Optional[int] = None
+    end: typing.Optional[int] = None
+
+
+class SourceReadDto(pydantic.BaseModel):
+    metric: str
+    start: typing.Optional[int]
+    end: typing.Optional[int]
+    datapoints: int
+
+
+class ComputeResultDto(pydantic.BaseModel):
+    series: typing.Dict[str, typing.List[data_dao.DatapointDto]]
+    sources: typing.List[SourceReadDto]
+
+
+def defined_names(program: compiler.CompiledProgram) -> list[str]:
+    names = []
+    for form in program.forms:
+        if isinstance(form, compiler.Define) and form.name not in names:
+            names.append(form.name)
+    return names
+
+
+def planned_resolver(dao: data_dao.DataDao, user_id: str, query_plan: planner.Plan,
+                     sources: list[SourceReadDto]) -> evaluator.Resolver:
+    """Reads metrics as planned, recording every read in sources."""
+    def resolve(metric_name: str) -> Series:
+        if not data.is_symbol_valid(metric_name):
+            raise evaluator.EvaluationError(f"Metric name ({metric_name}) is invalid")
+        source = query_plan.sources.get(metric_name)
+        if source is None and not query_plan.dynamic_sources:
+            # no requested binding depends on it
+            return Series()
+        if source is None:
+            source = planner.SourcePlan(metric_name, None, None, False, None)
+        dps = dao.get_metric_range(user_id, metric_name, source.start, source.end, source.seed,
+                                   None if source.dimension_predicates is None else source.matches)
+        sources.append(SourceReadDto(metric=metric_name, start=source.start, end=source.end, datapoints=len(dps)))
+        return Series([Point(dp.timestamp, dp.value, dp.dimensions) for dp in dps])
+    return resolve
+
+
+def to_points(series: Series, start: int | None, end: int | None) -> list[dict]:
+    return [{"timestamp": point.timestamp, "dimensions": point.dimensions, "value": point.value}
+            for point in series.clip(start, end)]
+
+
+def compute(dao: data_dao.DataDao, results: result_cache.ResultCache, user_id: str, request: ComputeRequestDto) -> dict:
+    try:
+        with tracing.span("compile"):
+            program = compiler.compile_program(request.program)
+    except ValueError as e:
+        raise fastapi.HTTPException(status_code=422, detail=f"Invalid program: {e}")
+    outputs = request.variables if request.variables is not None else defined_names(program)
+    query_plan = planner.plan(program, outputs, request.start, request.end)
+
+    sources = []
+    with tracing.span("evaluate"):
+        [env] = scheduler.evaluate([scheduler.Job(program, tuple(outputs))],
+                                   planned_resolver(dao, user_id, query_plan, sources),
+                                   cache=results.view(user_id, query_plan))
+    if isinstance(env, evaluator.EvaluationError):
+        raise fastapi.HTTPException(status_code=422, detail=f"Evaluation failed: {env}")
+
+    with tracing.span("to_points"):
+        series = {name: to_points(value, request.start, request.end)
+                  for name, value in env.items() if isinstance(value, Series)}
+    return {"series": series, "sources": [source.model_dump() for source in sources]}
+
+
+def compute_charts(dao: data_dao.DataDao, results: result_cache.ResultCache, user_id: str,
+                   programs: typing.Mapping[str, str],
+                   variables: typing.Mapping[str, list[str]], start: int | None, end: int | None) -> dict:
+    """Evaluates the programs of several charts together, sharing what they have in common.
+
+    Charts whose program is invalid or fails to evaluate are reported in errors instead.
+    """
+    jobs, chart_ids, errors = [], [], {}
+    for chart_id, program in programs.items():
+        try:
+            jobs.append(scheduler.Job(compiler.compile_program(program), tuple(variables[chart_id])))
+            chart_ids.append(chart_id)
+        except ValueError as e:
+            errors[chart_id] = f"Invalid program: {e}"
+    query_plan = planner.merge(planner.plan(job.program, job.outputs, start, end) for job in jobs)
+
+    sources = []
+    charts = {}
+    envs = scheduler.evaluate(jobs, planned_resolver(dao, user_id, query_plan, sources),
+                              cache=results.view(user_id, query_plan))
+    for chart_id, env in zip(chart_ids, envs):
+        if isinstance(env, evaluator.EvaluationError):
+            errors[chart_id] = f"Evaluation failed: {env}"
+            continue
+        charts[chart_id] = {name: to_points(value, start, end) for name, value in env.items() if isinstance(value, Series)}
+    return {"charts": charts, "errors": errors, "sources": [source.model_dump() for source in sources]}
+
+
+@router.post("", response_model=ComputeResultDto)
+def compute_program(request: ComputeRequestDto,
+                    dao = state.injected(data_dao.DataDao),
+                    results = state.injected(result_cache.ResultCache),
+                    user_id: str = fastapi.Depends(token_auth.require_api_token)):
+    """Evaluates a PulseLang program (with COMMON_LIBRARY preloaded) and returns its series within [start, end].
+
+    Only the parts of the metrics the requested variables depend on are read, and series computed before from
+    the same data are reused.
+    """
+    return responses.OrjsonResponse(compute(dao, results, user_id, request))
@@ -6,9 +6,13 @@ import fastapi
 import pydantic
 
 from src.auth import user_auth
+from src.common import responses
 from src.common import state
+from src.dao import data_dao
 from src.dao.chart_repo import ChartRepo
 from src.dao.dashboard_repo import Dashboard, DashboardRepo
+from src.pulselang import result_cache
+from src.resources import compute
 
 router = fastapi.APIRouter()
 
@@ -108,6 +112,60 @@ async def get_dashboard(
     return _to_dto(dashboard)
 
 
+class DashboardSeriesDto(pydantic.BaseModel):
+    # chart id -> variable -> datapoints
+    charts: dict[str, dict[str, list[data_dao.DatapointDto]]]
+    # chart id -> why the chart couldn't be evaluated
+    errors: dict[str, str]
+    sources: list[compute.SourceReadDto]
+
+
+@router.get("/{dashboard_id}/series", response_model=DashboardSeriesDto)
+def get_dashboard_series(
+    dashboard_id: str,
+    start: int | None = None,
+    end: int | None = None,
+    repo: DashboardRepo = state.injected(DashboardRepo),
+    chart_repo: ChartRepo = state.injected(ChartRepo),
+    dao: data_dao.DataDao = state.injected(data_dao.DataDao),
+    results: result_cache.ResultCache = state.injected(result_cache.ResultCache),
+    u=fastapi.Depends(user_auth.get_current_user),
+):
+    """Evaluates the dashboard's charts on the server, within [start, end].
+
+    Like in the UI, the charts plot the bindings of the dashboard's program if it has one, and their own otherwise.
+    Independent bindings are evaluated in parallel, what the charts share is evaluated once and series computed
+    before from the same data are reused.
+    """
+    dashboard = repo.get_dashboard_by_id(u.id, dashboard_id)
+    if not dashboard:
+        raise fastapi.HTTPException(status_code=404, detail="Dashboard not found")
+    charts = {}
+    for item in dashboard.layout:
+        chart = chart_repo.get_chart_by_id(u.id, item.get("chartId"))
+        if chart is not None:
+            charts[chart.id] = chart
+    variables = {chart_id: [variable.get("variable") for variable in chart.variables if variable.get("variable")]
+                 for chart_id, chart in charts.items()}
+
+    if not dashboard.program.strip():
+        result = compute.compute_charts(dao, results, u.id, {chart_id: chart.program for chart_id, chart in charts.items()},
+                                        variables, start, end)
+        return responses.OrjsonResponse(result)
+
+    result = compute.compute_charts(dao, results, u.id, {dashboard.id: dashboard.program},
+                                    {dashboard.id: sorted({name for names in variables.values() for name in names})},
+                                    start, end)
+    error = result["errors"].get(dashboard.id)
+    series = result["charts"].get(dashboard.id, {})
+    return responses.OrjsonResponse({
+        "charts": {} if error else {chart_id: {name: series.get(name, []) for name in names}
+                                    for chart_id, names in variables.items()},
+        "errors": {chart_id: error for chart_id in charts} if error else {},
+        "sources": result["sources"],
+    })
+
+
 @router.post("", response_model=DashboardDto)
 @router.post("/", response_model=DashboardDto)
 async def create_dashboard(
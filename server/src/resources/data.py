@@ -2,9 +2,14 @@ import string
 import typing
 
 import fastapi
+import pydantic
+from fastapi.concurrency import run_in_threadpool
 
 from src.auth import token_auth
+from src.common import binary_series
+from src.common import responses
 from src.common import state
+from src.common import tracing
 from src.dao import data_dao
 
 VALID_SYMBOL_CHARACTERS = string.ascii_letters + string.digits + "!$%&*+,-.:;<=>?@_()[]{}"
@@ -31,27 +36,123 @@ def assert_dps_validity(dps: typing.List[data_dao.DatapointDto]):
     for dp in dps:
         assert_dp_validity(dp)
 
-router = fastapi.APIRouter()
+COLUMNAR_MEDIA_TYPE = "application/vnd.impulses.columnar+json"
+
+def to_columns(dps: typing.List[data_dao.DatapointDto]) -> tuple[list[int], list[float], list[int], list[dict]]:
+    """Returns (timestamps, values, indices into dims, distinct dimensions)."""
+    dims_indices: dict[frozenset, int] = {}
+    dims = []
+    indices = []
+    for dp in dps:
+        key = frozenset(dp.dimensions.items())
+        index = dims_indices.get(key)
+        if index is None:
+            index = dims_indices[key] = len(dims)
+            dims.append(dp.dimensions)
+        indices.append(index)
+    return [dp.timestamp for dp in dps], [dp.value for dp in dps], indices, dims
+
+def datapoints_response(dps: typing.List[data_dao.DatapointDto], accept: typing.Optional[str],
+                        headers: dict[str, str]) -> fastapi.Response:
+    with tracing.span("serialize", points=len(dps)):
+        return _datapoints_response(dps, accept, headers)
+
+def _datapoints_response(dps: typing.List[data_dao.DatapointDto], accept: typing.Optional[str],
+                         headers: dict[str, str]) -> fastapi.Response:
+    headers = {**headers, "Vary": "Accept"}
+    if accept and binary_series.MEDIA_TYPE in accept:
+        return fastapi.Response(binary_series.encode(*to_columns(dps)), headers=headers,
+                                media_type=binary_series.MEDIA_TYPE)
+    if accept and COLUMNAR_MEDIA_TYPE in accept:
+        timestamps, values, indices, dims = to_columns(dps)
+        return responses.OrjsonResponse({"t": timestamps, "v": values, "d": indices, "dims": dims},
+                                        headers=headers, media_type=COLUMNAR_MEDIA_TYPE)
+    return responses.OrjsonResponse([{"timestamp": dp.timestamp, "dimensions": dp.dimensions, "value": dp.value}
+                                     for dp in dps], headers=headers)
+
+DATAPOINTS_ADAPTER = pydantic.TypeAdapter(typing.List[data_dao.DatapointDto])
+
+def parse_datapoints(body: bytes, content_type: typing.Optional[str]) -> typing.List[data_dao.DatapointDto]:
+    with tracing.span("parse", bytes=len(body)):
+        return _parse_datapoints(body, content_type)
+
+def parse_valid_datapoints(body: bytes, content_type: typing.Optional[str]) -> typing.List[data_dao.DatapointDto]:
+    payload = parse_datapoints(body, content_type)
+    assert_dps_validity(payload)
+    return payload
+
+def _parse_datapoints(body: bytes, content_type: typing.Optional[str]) -> typing.List[data_dao.DatapointDto]:
+    try:
+        if content_type and content_type.startswith(binary_series.MEDIA_TYPE):
+            try:
+                timestamps, values, indices, dims = binary_series.decode(body)
+            except binary_series.BinarySeriesError as e:
+                raise fastapi.HTTPException(status_code=422, detail=f"Invalid binary series: {e}")
+            return [data_dao.DatapointDto(timestamp=t, value=v, dimensions=dims[d])
+                    for t, v, d in zip(timestamps, values, indices)]
+        return DATAPOINTS_ADAPTER.validate_json(body)
+    except pydantic.ValidationError as e:
+        raise fastapi.exceptions.RequestValidationError(e.errors(include_url=False))
+
+router = fastapi.APIRouter(default_response_class=responses.OrjsonResponse)
 
 @router.get("")
 def list_metric_names(dao = state.injected(data_dao.DataDao),
                       user_id: str = fastapi.Depends(token_auth.require_api_token)):
     return dao.list_metric_names(user_id)
 
+def etag_for_version(version: int) -> str:
+    return f'W/"{version}"'
+
+def etag_matches(if_none_match: typing.Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+def version_headers(version: int) -> dict[str, str]:
+    return {
+        "ETag": etag_for_version(version),
+        "X-Metric-Version": str(version),
+        # caches have to revalidate with If-None-Match, which is cheap
+        "Cache-Control": "no-cache",
+    }
+
 @router.get("/{metric_name}")
-def get_metric_by_metric_name(metric_name: str, dao = state.injected(data_dao.DataDao),
+def get_metric_by_metric_name(metric_name: str,
+                              since_version: typing.Optional[int] = fastapi.Query(default=None, ge=0),
+                              if_none_match: typing.Optional[str] = fastapi.Header(default=None),
+                              accept: typing.Optional[str] = fastapi.Header(default=None),
+                              dao = state.injected(data_dao.DataDao),
                               user_id: str = fastapi.Depends(token_auth.require_api_token)):
     assert_metric_name_validity(metric_name)
-    return dao.get_metric_by_metric_name(user_id, metric_name)
+
+    version = dao.get_metric_version(user_id, metric_name).version
+    if etag_matches(if_none_match, etag_for_version(version)):
+        return fastapi.Response(status_code=304, headers=version_headers(version))
+
+    if since_version is None:
+        datapoints = dao.get_metric_by_metric_name(user_id, metric_name)
+        is_delta = False
+    else:
+        version, is_delta, datapoints = dao.get_metric_since_version(user_id, metric_name, since_version)
+
+    headers = {**version_headers(version), "X-Metric-Delta": "true" if is_delta else "false"}
+    return datapoints_response(datapoints.root, accept, headers)
     
-@router.post("/{metric_name}")
-def post_datapoints_for_metric_name(metric_name: str, payload: typing.List[data_dao.DatapointDto],
-                                    dao = state.injected(data_dao.DataDao),
-                                    user_id: str = fastapi.Depends(token_auth.require_ingest_token)):
+@router.post("/{metric_name}", openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"type": "array", "items": data_dao.DatapointDto.model_json_schema()}},
+    binary_series.MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+}}})
+async def post_datapoints_for_metric_name(metric_name: str, request: fastapi.Request,
+                                          dao = state.injected(data_dao.DataDao),
+                                          user_id: str = fastapi.Depends(token_auth.require_ingest_token)):
     assert_metric_name_validity(metric_name)
     assert_metric_name_is_writable(metric_name)
-    assert_dps_validity(payload)
-    dao.add(user_id, metric_name, payload)
+    body = await request.body()
+    # parsing a large body takes seconds, off the event loop like the write
+    payload = await run_in_threadpool(parse_valid_datapoints, body, request.headers.get("Content-Type"))
+    await run_in_threadpool(dao.add, user_id, metric_name, payload)
 
 @router.delete("/{metric_name}")
 def delete_metric_name(metric_name: str, dao = state.injected(data_dao.DataDao),
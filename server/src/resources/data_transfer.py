@@ -0,0 +1,173 @@
+import typing
+
+import fastapi
+import orjson
+import pydantic
+from fastapi.concurrency import run_in_threadpool
+
+from src.auth import token_auth
+from src.common import state
+from src.dao import data_dao
+from src.dao.data_import_dao import DataImportDao, OffsetMismatchError
+from src.resources import data
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_CHUNK_POINTS = 10_000
+
+router = fastapi.APIRouter()
+
+
+class MetricChunkDto(pydantic.BaseModel):
+    """One line of an export: (a part of) a metric's datapoints in the columnar shape."""
+    metric: str
+    t: typing.List[int]
+    v: typing.List[float]
+    d: typing.List[int]
+    dims: typing.List[typing.Dict[str, str]]
+
+
+class UploadDto(pydantic.BaseModel):
+    upload_id: str
+    offset: int
+
+
+class ImportResultDto(pydantic.BaseModel):
+    metrics: int
+    datapoints: int
+    skipped_metrics: typing.List[str]
+
+
+def export_lines(dao: data_dao.DataDao, user_id: str) -> typing.Iterator[bytes]:
+    for metric_name in dao.list_metric_names(user_id):
+        dps = dao.get_metric_by_metric_name(user_id, metric_name).root
+        for start in range(0, max(len(dps), 1), EXPORT_CHUNK_POINTS):
+            timestamps, values, indices, dims = data.to_columns(dps[start:start + EXPORT_CHUNK_POINTS])
+            yield orjson.dumps({"metric": metric_name, "t": timestamps, "v": values, "d": indices, "dims": dims}) + b"\n"
+
+
+def parse_line(line_no: int, line: bytes) -> tuple[str, typing.List[data_dao.DatapointDto]]:
+    def invalid(reason: str):
+        raise fastapi.HTTPException(status_code=422, detail=f"Line {line_no}: {reason}")
+
+    try:
+        chunk = MetricChunkDto.model_validate_json(line)
+    except pydantic.ValidationError as e:
+        invalid(str(e))
+    if not data.is_symbol_valid(chunk.metric):
+        invalid(f"invalid metric name ({chunk.metric})")
+    if not len(chunk.t) == len(chunk.v) == len(chunk.d):
+        invalid("t, v and d must have the same length")
+    if any(not 0 <= index < len(chunk.dims) for index in chunk.d):
+        invalid("dimension index out of range")
+    for dims in chunk.dims:
+        if not all(data.is_symbol_valid(key) for key in dims):
+            invalid(f"invalid dimension key in {dims}")
+    return chunk.metric, [data_dao.DatapointDto(timestamp=t, value=v, dimensions=chunk.dims[d])
+                          for t, v, d in zip(chunk.t, chunk.v, chunk.d)]
+
+
+def apply_import(dao: data_dao.DataDao, import_dao: DataImportDao, user_id: str, upload_id: str) -> ImportResultDto:
+    # validate everything first, so that a bad line doesn't leave a half-applied import behind
+    with import_dao.open(user_id, upload_id) as file:
+        for line_no, line in enumerate(file, start=1):
+            if line.strip():
+                parse_line(line_no, line)
+
+    metrics = set()
+    skipped_metrics = set()
+    datapoints = 0
+    # an export writes a metric's lines one after another, they are added at once, as every add rewrites the metric
+    pending_metric, pending_dps = None, []
+
+    def add_pending():
+        if pending_metric is not None:
+            dao.add(user_id, pending_metric, pending_dps)
+
+    with import_dao.open(user_id, upload_id) as file:
+        for line_no, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            metric_name, dps = parse_line(line_no, line)
+            if metric_name.startswith("imp."):
+                skipped_metrics.add(metric_name)
+                continue
+            if metric_name != pending_metric:
+                add_pending()
+                pending_metric, pending_dps = metric_name, []
+            pending_dps.extend(dps)
+            metrics.add(metric_name)
+            datapoints += len(dps)
+    add_pending()
+    import_dao.delete(user_id, upload_id)
+    return ImportResultDto(metrics=len(metrics), datapoints=datapoints, skipped_metrics=sorted(skipped_metrics))
+
+
+@router.get("/export")
+def export_data(dao = state.injected(data_dao.DataDao),
+                user_id: str = fastapi.Depends(token_auth.require_api_token)):
+    """Streams every metric as NDJSON, one line per metric (big metrics are split across lines)."""
+    return fastapi.responses.StreamingResponse(export_lines(dao, user_id), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post("/import", response_model=UploadDto)
+def create_import(import_dao = state.injected(DataImportDao),
+                  user_id: str = fastapi.Depends(token_auth.require_ingest_token)) -> UploadDto:
+    return UploadDto(upload_id=import_dao.create(user_id), offset=0)
+
+
+@router.get("/import/{upload_id}", response_model=UploadDto)
+def get_import(upload_id: str,
+               import_dao = state.injected(DataImportDao),
+               user_id: str = fastapi.Depends(token_auth.require_ingest_token)) -> UploadDto:
+    offset = import_dao.get_offset(user_id, upload_id)
+    if offset is None:
+        raise fastapi.HTTPException(status_code=404, detail="Import not found")
+    return UploadDto(upload_id=upload_id, offset=offset)
+
+
+@router.put("/import/{upload_id}", response_model=UploadDto)
+async def upload_import_chunk(upload_id: str,
+                              request: fastapi.Request,
+                              upload_offset: int = fastapi.Header(alias="Upload-Offset", ge=0),
+                              import_dao = state.injected(DataImportDao),
+                              user_id: str = fastapi.Depends(token_auth.require_ingest_token)) -> UploadDto:
+    """Appends the body to the upload. Upload-Offset has to match the upload's current size."""
+    if import_dao.get_offset(user_id, upload_id) is None:
+        raise fastapi.HTTPException(status_code=404, detail="Import not found")
+
+    chunk_path = import_dao.staging_path()
+    # the chunk is removed even if the client disconnects mid-stream
+    try:
+        chunk = await run_in_threadpool(open, chunk_path, "wb")
+        try:
+            async for part in request.stream():
+                await run_in_threadpool(chunk.write, part)
+        finally:
+            await run_in_threadpool(chunk.close)
+        offset = await run_in_threadpool(import_dao.append, user_id, upload_id, upload_offset, chunk_path)
+    except OffsetMismatchError as e:
+        raise fastapi.HTTPException(status_code=409, detail=f"Upload-Offset mismatch, upload is at offset {e.offset}",
+                                    headers={"Upload-Offset": str(e.offset)})
+    except FileNotFoundError:
+        raise fastapi.HTTPException(status_code=404, detail="Import not found")
+    finally:
+        chunk_path.unlink(missing_ok=True)
+    return UploadDto(upload_id=upload_id, offset=offset)
+
+
+@router.post("/import/{upload_id}/commit", response_model=ImportResultDto)
+def commit_import(upload_id: str,
+                  dao = state.injected(data_dao.DataDao),
+                  import_dao = state.injected(DataImportDao),
+                  user_id: str = fastapi.Depends(token_auth.require_ingest_token)) -> ImportResultDto:
+    """Applies an uploaded export. Metrics starting with 'imp.' are skipped, they can't be written by clients."""
+    if import_dao.get_offset(user_id, upload_id) is None:
+        raise fastapi.HTTPException(status_code=404, detail="Import not found")
+    return apply_import(dao, import_dao, user_id, upload_id)
+
+
+@router.delete("/import/{upload_id}")
+def delete_import(upload_id: str,
+                  import_dao = state.injected(DataImportDao),
+                  user_id: str = fastapi.Depends(token_auth.require_ingest_token)):
+    import_dao.delete(user_id, upload_id)
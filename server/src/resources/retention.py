@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import fastapi
+import pydantic
+
+from src.auth import user_auth
+from src.common import state
+from src.dao.retention_policy_repo import DOWNSAMPLE_AGGREGATES, RetentionPolicy, RetentionPolicyRepo
+from src.resources import data
+
+router = fastapi.APIRouter()
+
+
+class RetentionPolicyBody(pydantic.BaseModel):
+    metric_name: str | None = None
+    max_age_ms: int | None = None
+    max_points: int | None = None
+    downsample_after_ms: int | None = None
+    downsample_resolution_ms: int | None = None
+    downsample_aggregate: str = "avg"
+
+
+class RetentionPolicyDto(RetentionPolicyBody):
+    id: str
+    created_at: int
+    updated_at: int
+
+
+def _to_dto(policy: RetentionPolicy) -> RetentionPolicyDto:
+    return RetentionPolicyDto(
+        id=policy.id,
+        metric_name=policy.metric_name,
+        max_age_ms=policy.max_age_ms,
+        max_points=policy.max_points,
+        downsample_after_ms=policy.downsample_after_ms,
+        downsample_resolution_ms=policy.downsample_resolution_ms,
+        downsample_aggregate=policy.downsample_aggregate,
+        created_at=policy.created_at,
+        updated_at=policy.updated_at,
+    )
+
+
+def _validate_body(body: RetentionPolicyBody) -> None:
+    if body.metric_name is not None:
+        data.assert_metric_name_validity(body.metric_name)
+    if body.max_age_ms is None and body.max_points is None and body.downsample_after_ms is None:
+        raise fastapi.HTTPException(
+            status_code=422,
+            detail="Retention policy must set at least one of max_age_ms, max_points or downsample_after_ms",
+        )
+    for field in ("max_age_ms", "max_points", "downsample_after_ms", "downsample_resolution_ms"):
+        value = getattr(body, field)
+        if value is not None and value <= 0:
+            raise fastapi.HTTPException(status_code=422, detail=f"{field} must be positive")
+    if (body.downsample_after_ms is None) != (body.downsample_resolution_ms is None):
+        raise fastapi.HTTPException(
+            status_code=422,
+            detail="downsample_after_ms and downsample_resolution_ms must be set together",
+        )
+    if body.downsample_aggregate not in DOWNSAMPLE_AGGREGATES:
+        raise fastapi.HTTPException(
+            status_code=422,
+            detail=f"downsample_aggregate must be one of: {', '.join(DOWNSAMPLE_AGGREGATES)}",
+        )
+
+
+@router.get("", response_model=list[RetentionPolicyDto])
+@router.get("/", response_model=list[RetentionPolicyDto])
+async def list_policies(
+    repo: RetentionPolicyRepo = state.injected(RetentionPolicyRepo),
+    u=fastapi.Depends(user_auth.get_current_user),
+) -> list[RetentionPolicyDto]:
+    return [_to_dto(policy) for policy in repo.list_policies(u.id)]
+
+
+@router.put("", response_model=RetentionPolicyDto)
+@router.put("/", response_model=RetentionPolicyDto)
+async def upsert_policy(
+    body: RetentionPolicyBody,
+    repo: RetentionPolicyRepo = state.injected(RetentionPolicyRepo),
+    u=fastapi.Depends(user_auth.get_current_user),
+) -> RetentionPolicyDto:
+    _validate_body(body)
+    policy = repo.upsert_policy(
+        user_id=u.id,
+        metric_name=body.metric_name,
+        max_age_ms=body.max_age_ms,
+        max_points=body.max_points,
+        downsample_after_ms=body.downsample_after_ms,
+        downsample_resolution_ms=body.downsample_resolution_ms,
+        downsample_aggregate=body.downsample_aggregate,
+    )
+    return _to_dto(policy)
+
+
+@router.delete("/{policy_id}")
+async def delete_policy(
+    policy_id: str,
+    repo: RetentionPolicyRepo = state.injected(RetentionPolicyRepo),
+    u=fastapi.Depends(user_auth.get_current_user),
+) -> None:
+    if not any(policy.id == policy_id for policy in repo.list_policies(u.id)):
+        raise fastapi.HTTPException(status_code=404, detail="Retention policy not found")
+    repo.delete_policy(u.id, policy_id)
+    return None
@@ -7,14 +7,22 @@ import logging
 import os
 import pathlib
 import sys
+import typing
 import uvicorn
 from apscheduler.schedulers.background import BackgroundScheduler
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.ai.client_session_registry import ClientSessionRegistry
+from src.ai.conversation_context import ConversationContexts
+from src.ai.tool_cache import ToolResultCache
+from src.ai.upstream_clients import UpstreamClients
+from src.common import compression
 from src.common import health
+from src.common import logs
+from src.common import metrics
 from src.common import state
+from src.common import tracing
 from src.dao import data_dao
 from src.db import dao
 from src.db import sqlite as dbsqlite
@@ -23,7 +31,13 @@ from src.dao.chart_repo import ChartRepo
 from src.dao.dashboard_repo import DashboardRepo
 from src.dao.llm_model_repo import LlmModelRepo
 from src.dao.ai_chat_repo import AiChatRepo
+from src.dao.retention_policy_repo import RetentionPolicyRepo
+from src.dao.data_import_dao import DataImportDao
+from src.pulselang.live_charts import LiveChartRegistry
+from src.pulselang import compiler, result_cache
 from src.resources import data
+from src.resources import data_transfer
+from src.resources import compute
 from src.resources import google_oauth2
 from src.resources import user
 from src.resources import token
@@ -33,22 +47,28 @@ from src.resources import local_storage
 from src.resources import ai
 from src.resources import ai_model
 from src.resources import app_websocket
+from src.resources import retention
+from src.resources import admin
 from src.dao import local_storage_repo
 from src.job import job
 from src.job import heartbeat_job
+from src.job import retention_job
+from src.job import server_metrics_job
 from src.job.gcal_sync import gcal_polling_job
+from src.auth import user_auth
 from src.auth.session import SessionStore
 from src.auth.token_cache import TokenCache
 from src.dao.gcal_dao import GCalDao
 
 def setup_logging():
     log_filename = "./log-" + str(datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))
-    logging.basicConfig(
-        filename=log_filename,
-        level=logging.DEBUG,
-        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    logs.configure(
+        [logging.FileHandler(log_filename), logging.StreamHandler(sys.stdout)],
+        level=logs.parse_level(os.environ.get("LOG_LEVEL", "DEBUG")),
+        levels=logs.parse_levels(os.environ.get("LOG_LEVELS", "")),
+        debug_sample_rate=float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "1")),
+        json_format=os.environ.get("LOG_FORMAT", "json") == "json",
     )
-    logging.getLogger().addHandler(logging.StreamHandler(sys.stdout))
 
     os.symlink(log_filename, log_filename + "_link")
     os.replace(log_filename + "_link", "./log-latest")
@@ -71,6 +91,27 @@ def schedule_jobs(jobs: list[job.Job]):
         scheduler.add_job(runner_fn, 'interval', seconds=job_obj.interval())
     scheduler.start()
 
+def register_gauges(db_dao: dao.PersistentDao, series_cache: result_cache.ResultCache, token_cache: TokenCache,
+                    client_session_registry: ClientSessionRegistry, conversation_contexts: ConversationContexts,
+                    ai_chat_repo: AiChatRepo, tool_cache: ToolResultCache):
+    metrics.REGISTRY.gauge("impulses_cache_entries", "Entries of in-memory caches.", lambda: {
+        ("persistent_dao",): len(db_dao.cache),
+        ("result",): len(series_cache.entries),
+        ("token",): token_cache.size(),
+        ("compiled_program",): len(compiler.cache.entries),
+        ("conversation",): conversation_contexts.size(),
+        ("chat_messages",): len(ai_chat_repo.collapsed),
+        ("ai_tool",): tool_cache.size(),
+    }, ["cache"])
+    metrics.REGISTRY.gauge("impulses_result_cache_bytes", "Estimated size of the cached series.",
+                           lambda: {(): series_cache.size})
+    metrics.REGISTRY.gauge("impulses_websocket_connections", "Open app websocket connections.",
+                           lambda: {(): len(client_session_registry.queue_depths())})
+    metrics.REGISTRY.gauge("impulses_websocket_queued_messages", "Messages waiting to be sent on app websockets.",
+                           lambda: {(): sum(client_session_registry.queue_depths())})
+    metrics.REGISTRY.gauge("impulses_websocket_max_queue_depth", "Most messages waiting on one app websocket.",
+                           lambda: {(): max(client_session_registry.queue_depths(), default=0)})
+
 def get_storage_dir() -> pathlib.Path:
     default_dir = pathlib.Path(__file__).resolve().parents[1] / "data-store"
     return pathlib.Path(os.environ.get("DATA_STORE_DIR", str(default_dir)))
@@ -95,28 +136,51 @@ def main():
     # Initialize GCalDao with file-based storage
     gcal_dao = GCalDao(db_dao)
 
+    metric_data_dao = data_dao.DataDao(db_dao)
+    chart_repo = ChartRepo(db_pool)
+    client_session_registry = ClientSessionRegistry()
+    upstream_clients = UpstreamClients(int(os.environ.get("AI_UPSTREAM_MAX_CONNECTIONS", "200")))
+    conversation_contexts = ConversationContexts()
+    ai_chat_repo = AiChatRepo(db_pool)
+    dashboard_repo = DashboardRepo(db_pool)
+    tool_cache = ToolResultCache(metric_data_dao, chart_repo, dashboard_repo)
+    result_cache_max_bytes = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(result_cache.DEFAULT_MAX_BYTES)))
+    series_cache = result_cache.ResultCache(metric_data_dao, result_cache_max_bytes)
+    register_gauges(db_dao, series_cache, token_cache, client_session_registry, conversation_contexts,
+                    ai_chat_repo, tool_cache)
+
     app_state = state.set_state(state.AppState(
             status=status,
             google_oauth2_state=state.GoogleOAuth2State(google_oauth2_creds),
             api_origin=get_from_env_or_fail("ORIGIN_API"),
             ui_origin=get_from_env_or_fail("ORIGIN")
     )) \
-        .provide_obj(data_dao.DataDao(db_dao)) \
+        .provide_obj(metric_data_dao) \
+        .provide_obj(DataImportDao(storage_dir)) \
         .provide_obj(db_dao) \
         .provide_obj(db_pool) \
         .provide_obj(user_repo.UserRepo(db_pool)) \
         .provide_obj(token_repository) \
-        .provide_obj(ChartRepo(db_pool)) \
-        .provide_obj(DashboardRepo(db_pool)) \
+        .provide_obj(chart_repo) \
+        .provide_obj(dashboard_repo) \
         .provide_obj(LlmModelRepo(db_pool)) \
-        .provide_obj(AiChatRepo(db_pool)) \
+        .provide_obj(ai_chat_repo) \
+        .provide_obj(RetentionPolicyRepo(db_pool)) \
         .provide_obj(local_storage_repo.LocalStorageRepo(db_pool)) \
-        .provide_obj(ClientSessionRegistry()) \
+        .provide_obj(client_session_registry) \
+        .provide_obj(upstream_clients) \
+        .provide_obj(conversation_contexts) \
+        .provide_obj(tool_cache) \
+        .provide_obj(LiveChartRegistry(metric_data_dao, chart_repo, client_session_registry)) \
+        .provide_obj(series_cache) \
         .provide_obj(session_store) \
         .provide_obj(token_cache) \
         .provide_obj(gcal_dao) \
         .register_job(heartbeat_job.HeartbeatJob) \
-        .register_job(gcal_polling_job.GCalPollingJob)
+        .register_job(gcal_polling_job.GCalPollingJob) \
+        .register_job(retention_job.RetentionJob)
+    if server_metrics_job.interval_sec() > 0:
+        app_state.register_job(server_metrics_job.ServerMetricsJob)
 
 
     @asynccontextmanager
@@ -124,6 +188,7 @@ def main():
         app_state.provide_obj_as(asyncio.AbstractEventLoop, asyncio.get_running_loop())
         schedule_jobs(app_state.get_jobs())
         yield
+        await upstream_clients.aclose()
         shutdown_handler(status)
     app = fastapi.FastAPI(lifespan=lifespan, dependencies = [fastapi.Depends(state.get_state)])
     
@@ -134,11 +199,23 @@ def main():
         allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
         allow_headers=["Content-Type", "Authorization", "X-Requested-With",
                        "Accept", "Origin", "Referer", "User-Agent", "Cache-Control",
-                       "Pragma", "Expires", "X-Data-Token"],
+                       "Pragma", "Expires", "X-Data-Token", "If-None-Match", "Upload-Offset"],
+        expose_headers=["ETag", "X-Metric-Version", "X-Metric-Delta", "Upload-Offset"],
     )
+    app.add_middleware(
+        compression.CompressionMiddleware,
+        minimum_size=int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024")),
+    )
+    slow_request_ms = os.environ.get("SLOW_REQUEST_MS")
+    if slow_request_ms:
+        app.add_middleware(tracing.TracingMiddleware, slow_request_ms=float(slow_request_ms))
+    # outermost, so that request durations include compression
+    app.add_middleware(metrics.RequestMetricsMiddleware)
     
     app.include_router(google_oauth2.router, prefix="/oauth2/google")
     app.include_router(data.router, prefix="/data")
+    app.include_router(data_transfer.router, prefix="/data-transfer")
+    app.include_router(compute.router, prefix="/compute")
     app.include_router(user.router, prefix="/user")
     app.include_router(token.router, prefix="/token")
     app.include_router(chart.router, prefix="/chart")
@@ -147,12 +224,29 @@ def main():
     app.include_router(ai.router, prefix="/ai")
     app.include_router(ai_model.router, prefix="/ai/models")
     app.include_router(app_websocket.router, prefix="/ws")
+    app.include_router(retention.router, prefix="/retention-policy")
+    app.include_router(admin.router, prefix="/admin")
 
 
     @app.get("/healthz")
     async def healthz():
         return status
 
+    # scrapers authenticate with the token, and admins with their session
+    metrics_token = os.environ.get("METRICS_TOKEN")
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint(request: fastapi.Request,
+                               authorization: typing.Optional[str] = fastapi.Header(default=None),
+                               sessions: SessionStore = state.injected(SessionStore),
+                               users: user_repo.UserRepo = state.injected(user_repo.UserRepo)):
+        if authorization is not None:
+            if not metrics_token or authorization != f"Bearer {metrics_token}":
+                raise fastapi.HTTPException(status_code=401, detail="Invalid metrics token")
+        else:
+            sess = await user_auth.get_session(await user_auth.get_session_token(request), sessions)
+            await user_auth.require_admin(await user_auth.get_current_user(users, sess))
+        return fastapi.Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
     port = get_from_env_or_fail("PORT")
     config = uvicorn.Config(
         app, 
@@ -172,7 +266,7 @@ def main():
     loop.run_until_complete(server.serve())
 
     # suppress unused
-    _ = healthz
+    _ = healthz, metrics_endpoint
 
 if __name__ == "__main__":
     try:
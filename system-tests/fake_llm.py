@@ -0,0 +1,146 @@
+"""A stand-in OpenAI-compatible model endpoint, and a chat client of the app websocket, for the AI chat scenarios."""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from websockets.sync.client import connect
+
+# the host the app reaches the stand-in at (the tester's, when the app runs in another container)
+FAKE_LLM_HOST = os.environ.get("FAKE_LLM_HOST", "127.0.0.1")
+# streamed content comes in deltas of this many characters
+DELTA_CHARS = 5
+
+
+def tool_call(call_id: str, name: str, arguments: dict) -> dict:
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def tools_then_answer(tool_calls: list, note: str = "Looking at the metrics", answer: str = "All metrics look fine."):
+    """Replies with the tool calls to a user's message, and with the answer once the tool responses are in."""
+    def reply(body: dict) -> dict:
+        if body["messages"][-1]["role"] == "user" and body.get("tools"):
+            return {"role": "assistant", "content": note, "tool_calls": tool_calls}
+        return {"role": "assistant", "content": answer}
+    return reply
+
+
+class FakeLlm:
+    """Serves /v1/chat/completions with the messages of `reply`, streamed as SSE when asked to.
+
+    Every request is recorded with its headers, body and client port. With `set_cookie`, every response sets a cookie
+    named after the request's model, like a proxy's session would.
+    """
+    def __init__(self, reply, set_cookie: bool = False):
+        self.reply = reply
+        self.set_cookie = set_cookie
+        self.requests = []
+        self.mu = threading.Lock()
+        self.server = ThreadingHTTPServer(("0.0.0.0", 0), self._handler())
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{FAKE_LLM_HOST}:{self.server.server_port}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *_):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with fake.mu:
+                    fake.requests.append({"headers": dict(self.headers), "body": body, "port": self.client_address[1]})
+                message = fake.reply(body)
+                finish_reason = "tool_calls" if message.get("tool_calls") else "stop"
+                if body.get("stream"):
+                    self.stream(message, finish_reason, body["model"])
+                    return
+                payload = json.dumps({"model": body["model"], "choices": [
+                    {"index": 0, "message": message, "finish_reason": finish_reason}
+                ]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.cookie(body["model"])
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def cookie(self, model: str):
+                if fake.set_cookie:
+                    self.send_header("Set-Cookie", f"session={model}; Path=/")
+
+            def stream(self, message: dict, finish_reason: str, model: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.cookie(model)
+                self.end_headers()
+
+                def event(data: str):
+                    chunk = f"data: {data}\n\n".encode()
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.flush()
+
+                def delta(delta: dict, **extra):
+                    event(json.dumps({"choices": [{"index": 0, "delta": delta, **extra}]}))
+
+                content = message.get("content") or ""
+                for start in range(0, len(content), DELTA_CHARS):
+                    delta({"content": content[start:start + DELTA_CHARS]})
+                # a tool call's id and name come first, its arguments in fragments
+                for index, call in enumerate(message.get("tool_calls", [])):
+                    delta({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                           "function": {"name": call["function"]["name"], "arguments": ""}}]})
+                    arguments = call["function"]["arguments"]
+                    middle = len(arguments) // 2
+                    for fragment in [arguments[:middle], arguments[middle:]]:
+                        delta({"tool_calls": [{"index": index, "function": {"arguments": fragment}}]})
+                delta({}, finish_reason=finish_reason)
+                event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def chat_turn(base_url: str, session: requests.Session, model_id: str, content: str, chat_id: str = None,
+              timeout: float = 60) -> list:
+    """Sends a message over the app websocket and returns the chat events up to chat_done or chat_error.
+
+    Requests of localhost models are answered like the browser would, by calling the endpoint.
+    """
+    ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://") + "/ws/app"
+    events = []
+    with connect(ws_url, additional_headers={"Cookie": f"sid={session.cookies.get('sid')}"},
+                 max_size=None) as socket:
+        socket.send(json.dumps({"type": "chat_send", "content": content, "model_id": model_id, "chat_id": chat_id}))
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            message = json.loads(socket.recv(timeout=max(0.1, deadline - time.time())))
+            if message.get("type") == "ping":
+                socket.send(json.dumps({"type": "pong"}))
+            elif message.get("type") == "llm_request":
+                resp = requests.post(message["url"], json=message["body"], timeout=timeout,
+                                     headers={header["name"]: header["value"] for header in message["headers"]})
+                socket.send(json.dumps({"type": "llm_response", "request_id": message["request_id"],
+                                        "ok": resp.ok, "data": resp.json()}))
+            elif message.get("type", "").startswith("chat_"):
+                events.append(message)
+                if message["type"] in ("chat_done", "chat_error"):
+                    return events
+    raise TimeoutError(f"Chat turn didn't finish within {timeout}s")
@@ -30,6 +30,26 @@ SCENARIOS = [
     SCENARIOS_DIR / "scenario_16_sdk_exceptions.py",
     SCENARIOS_DIR / "scenario_17_dimension_validation.py",
     SCENARIOS_DIR / "scenario_18_sdk_fluent_api.py",
+    SCENARIOS_DIR / "scenario_19_retention_policies.py",
+    SCENARIOS_DIR / "scenario_20_conditional_fetch.py",
+    SCENARIOS_DIR / "scenario_21_response_encoding.py",
+    SCENARIOS_DIR / "scenario_22_binary_format.py",
+    SCENARIOS_DIR / "scenario_23_export_import.py",
+    SCENARIOS_DIR / "scenario_24_sdk_pulselang.py",
+    SCENARIOS_DIR / "scenario_25_compute.py",
+    SCENARIOS_DIR / "scenario_26_live_charts.py",
+    SCENARIOS_DIR / "scenario_27_dashboard_series.py",
+    SCENARIOS_DIR / "scenario_28_result_cache.py",
+    SCENARIOS_DIR / "scenario_29_calendar_buckets.py",
+    SCENARIOS_DIR / "scenario_30_percentiles.py",
+    SCENARIOS_DIR / "scenario_31_metrics_endpoint.py",
+    SCENARIOS_DIR / "scenario_32_server_metrics_reporter.py",
+    SCENARIOS_DIR / "scenario_33_admin_profiler.py",
+    SCENARIOS_DIR / "scenario_34_logging.py",
+    SCENARIOS_DIR / "scenario_35_remote_models.py",
+    SCENARIOS_DIR / "scenario_36_tool_workers.py",
+    SCENARIOS_DIR / "scenario_37_chat_pages.py",
+    SCENARIOS_DIR / "scenario_38_tool_cache.py",
 ]
 
 
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Scenario 19: Retention Policies."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+
+def test_retention_policies():
+    """Test retention policy CRUD and validation."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    # Retention policies require a session
+    resp = requests.get(f"{base_url}/retention-policy")
+    assert_true(resp.status_code == 401, f"Listing policies without session rejected (got {resp.status_code})")
+
+    user_email = f"test_retention_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+
+    resp = session.get(f"{base_url}/retention-policy")
+    assert_true(resp.status_code == 200 and resp.json() == [], "No policies initially")
+
+    # Validation
+    invalid_bodies = [
+        ({}, "policy without any rule"),
+        ({"max_age_ms": 0}, "non-positive max_age_ms"),
+        ({"max_points": -5}, "negative max_points"),
+        ({"downsample_after_ms": 1000}, "downsampling without resolution"),
+        ({"downsample_after_ms": 1000, "downsample_resolution_ms": 100, "downsample_aggregate": "median"},
+         "unknown aggregate"),
+        ({"metric_name": "bad name!", "max_points": 10}, "invalid metric name"),
+    ]
+    for body, description in invalid_bodies:
+        resp = session.put(f"{base_url}/retention-policy", json=body)
+        assert_true(resp.status_code == 422, f"Rejected {description} (got {resp.status_code})")
+
+    # User-wide default policy
+    resp = session.put(f"{base_url}/retention-policy", json={"max_age_ms": 86_400_000})
+    assert_true(resp.status_code == 200, f"Default policy created (got {resp.status_code})")
+    default_policy = resp.json()
+    assert_true(default_policy["metric_name"] is None, "Default policy has no metric name")
+    assert_true(default_policy["max_age_ms"] == 86_400_000, "Default policy max_age_ms stored")
+
+    # Per-metric policy
+    resp = session.put(
+        f"{base_url}/retention-policy",
+        json={
+            "metric_name": "cpu_usage",
+            "max_points": 100,
+            "downsample_after_ms": 3_600_000,
+            "downsample_resolution_ms": 60_000,
+            "downsample_aggregate": "max",
+        }
+    )
+    assert_true(resp.status_code == 200, f"Per-metric policy created (got {resp.status_code})")
+    metric_policy = resp.json()
+    assert_true(metric_policy["downsample_aggregate"] == "max", "Per-metric policy aggregate stored")
+
+    # Upserting the same metric updates the existing policy
+    resp = session.put(
+        f"{base_url}/retention-policy",
+        json={"metric_name": "cpu_usage", "max_points": 50}
+    )
+    assert_true(resp.status_code == 200, "Per-metric policy updated")
+    updated_policy = resp.json()
+    assert_true(updated_policy["id"] == metric_policy["id"], "Upsert keeps policy id")
+    assert_true(updated_policy["max_points"] == 50, "Upsert updates max_points")
+    assert_true(updated_policy["downsample_after_ms"] is None, "Upsert replaces omitted rules")
+
+    resp = session.get(f"{base_url}/retention-policy")
+    assert_true(resp.status_code == 200 and len(resp.json()) == 2, "Two policies listed")
+
+    # Deletion
+    resp = session.delete(f"{base_url}/retention-policy/{metric_policy['id']}")
+    assert_true(resp.status_code == 200, f"Policy deleted (got {resp.status_code})")
+    resp = session.delete(f"{base_url}/retention-policy/{metric_policy['id']}")
+    assert_true(resp.status_code == 404, f"Deleting missing policy returns 404 (got {resp.status_code})")
+
+    resp = session.get(f"{base_url}/retention-policy")
+    policies = resp.json()
+    assert_true(len(policies) == 1 and policies[0]["id"] == default_policy["id"], "Only default policy left")
+
+    # Other users can't see or delete the policy
+    other = requests.Session()
+    other_email = f"test_retention_other_{int(time.time())}@example.com"
+    other.post(f"{base_url}/user", json={"email": other_email, "password": "Password123!", "role": "STANDARD"})
+    other.post(f"{base_url}/user/login", json={"email": other_email, "password": "Password123!"})
+    resp = other.get(f"{base_url}/retention-policy")
+    assert_true(resp.status_code == 200 and resp.json() == [], "Other user sees no policies")
+    resp = other.delete(f"{base_url}/retention-policy/{default_policy['id']}")
+    assert_true(resp.status_code == 404, "Other user can't delete the policy")
+
+    # Cleanup
+    other.delete(f"{base_url}/user")
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 19: Retention Policies ==")
+    test_retention_policies()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Scenario 20: Conditional GET and delta fetch of metrics."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries
+
+
+def test_conditional_fetch():
+    """Test ETag/If-None-Match, since_version deltas and the SDK's series cache."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_conditional_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"cond-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    headers = {"X-Data-Token": resp.json().get("token_plaintext")}
+
+    metric_name = f"conditional_metric_{int(time.time())}"
+    url = f"{base_url}/data/{metric_name}"
+
+    resp = requests.post(url, headers=headers, json=[
+        {"timestamp": 1000, "dimensions": {"env": "test"}, "value": 1.0},
+        {"timestamp": 2000, "dimensions": {"env": "test"}, "value": 2.0},
+    ])
+    assert_true(resp.status_code == 200, "Initial datapoints ingested")
+
+    resp = requests.get(url, headers=headers)
+    assert_true(resp.status_code == 200 and len(resp.json()) == 2, "Full fetch returns 2 datapoints")
+    etag = resp.headers.get("ETag")
+    version = int(resp.headers.get("X-Metric-Version"))
+    assert_true(etag is not None, f"ETag returned ({etag})")
+    assert_true(resp.headers.get("X-Metric-Delta") == "false", "Full fetch is not a delta")
+
+    # Conditional GET
+    resp = requests.get(url, headers={**headers, "If-None-Match": etag})
+    assert_true(resp.status_code == 304, f"Unchanged metric returns 304 (got {resp.status_code})")
+    assert_true(resp.content == b"", "304 has no body")
+
+    # Re-ingesting identical datapoints doesn't change the version
+    resp = requests.post(url, headers=headers, json=[{"timestamp": 1000, "dimensions": {"env": "test"}, "value": 1.0}])
+    resp = requests.get(url, headers={**headers, "If-None-Match": etag})
+    assert_true(resp.status_code == 304, "Identical re-ingest keeps the version")
+
+    # Delta fetch
+    resp = requests.post(url, headers=headers, json=[
+        {"timestamp": 2000, "dimensions": {"env": "test"}, "value": 20.0},
+        {"timestamp": 3000, "dimensions": {"env": "test"}, "value": 3.0},
+    ])
+    assert_true(resp.status_code == 200, "More datapoints ingested")
+    resp = requests.get(url, headers={**headers, "If-None-Match": etag})
+    assert_true(resp.status_code == 200, "Changed metric no longer matches the ETag")
+
+    resp = requests.get(url, headers=headers, params={"since_version": version})
+    assert_true(resp.status_code == 200, "Delta fetch succeeded")
+    assert_true(resp.headers.get("X-Metric-Delta") == "true", "Response is a delta")
+    delta = resp.json()
+    assert_true(sorted(dp["timestamp"] for dp in delta) == [2000, 3000], f"Delta has only changed points ({delta})")
+    new_version = int(resp.headers.get("X-Metric-Version"))
+    assert_true(new_version > version, "Version increased")
+
+    resp = requests.get(url, headers=headers, params={"since_version": new_version})
+    assert_true(resp.status_code == 200 and resp.json() == [], "Delta since the current version is empty")
+
+    resp = requests.get(url, headers=headers, params={"since_version": -1})
+    assert_true(resp.status_code == 422, f"Negative since_version rejected (got {resp.status_code})")
+
+    # SDK keeps the series up to date through deltas
+    client = ImpulsesClient(url=base_url, token_value=headers["X-Data-Token"], timeout=10)
+    series = client.fetch_datapoints(metric_name)
+    assert_true([dp.value for dp in series] == [1.0, 20.0, 3.0], "SDK fetched full series")
+    series = client.fetch_datapoints(metric_name)
+    assert_true([dp.value for dp in series] == [1.0, 20.0, 3.0], "SDK served unchanged series from cache")
+    client.upload_datapoints(metric_name, DatapointSeries([Datapoint(1500, 1.5, {"env": "test"})]))
+    series = client.fetch_datapoints(metric_name)
+    assert_true([dp.timestamp for dp in series] == [1000, 1500, 2000, 3000], "SDK merged the delta")
+
+    # Deletion resets the series instead of serving a stale delta
+    resp = requests.delete(url, headers=headers)
+    assert_true(resp.status_code == 200, "Metric deleted")
+    resp = requests.get(url, headers=headers, params={"since_version": new_version})
+    assert_true(resp.headers.get("X-Metric-Delta") == "false" and resp.json() == [],
+                "Delta fetch after deletion returns the (empty) full series")
+    resp = requests.post(url, headers=headers, json=[{"timestamp": 5000, "dimensions": {}, "value": 5.0}])
+    series = client.fetch_datapoints(metric_name)
+    assert_true([dp.timestamp for dp in series] == [5000], "SDK picked up the recreated metric")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 20: Conditional Fetch ==")
+    test_conditional_fetch()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Scenario 21: Response compression and columnar responses."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.impulses.columnar+json"
+
+
+def test_response_encoding():
+    """Test gzip/brotli compression thresholds and the columnar response shape."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_encoding_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"enc-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    token = resp.json().get("token_plaintext")
+    headers = {"X-Data-Token": token}
+
+    metric_name = f"encoding_metric_{int(time.time())}"
+    url = f"{base_url}/data/{metric_name}"
+    dps = [
+        {"timestamp": 1000 * i, "dimensions": {"env": "prod" if i % 2 else "test"}, "value": float(i)}
+        for i in range(500)
+    ]
+    resp = requests.post(url, headers=headers, json=dps)
+    assert_true(resp.status_code == 200, "Datapoints ingested")
+
+    # Compression
+    resp = requests.get(url, headers={**headers, "Accept-Encoding": "gzip"})
+    assert_true(resp.headers.get("Content-Encoding") == "gzip", "Large response gzipped")
+    assert_true(len(resp.json()) == 500, "Gzipped response decodes to all datapoints")
+    assert_true("Accept-Encoding" in resp.headers.get("Vary", ""), "Vary includes Accept-Encoding")
+
+    resp = requests.get(url, headers={**headers, "Accept-Encoding": "gzip, br"}, stream=True)
+    assert_true(resp.headers.get("Content-Encoding") == "br", "Brotli preferred when accepted")
+    resp.close()
+
+    resp = requests.get(url, headers={**headers, "Accept-Encoding": "identity"})
+    assert_true(resp.headers.get("Content-Encoding") is None, "No compression unless accepted")
+
+    resp = requests.get(f"{base_url}/data", headers={**headers, "Accept-Encoding": "gzip"})
+    assert_true(resp.headers.get("Content-Encoding") is None, "Small response not compressed")
+
+    # Columnar shape
+    resp = requests.get(url, headers={**headers, "Accept": COLUMNAR_MEDIA_TYPE})
+    assert_true(resp.status_code == 200, "Columnar fetch succeeded")
+    assert_true(resp.headers.get("Content-Type", "").startswith(COLUMNAR_MEDIA_TYPE), "Columnar content type")
+    columns = resp.json()
+    assert_true(columns["t"] == [dp["timestamp"] for dp in dps], "Columnar timestamps")
+    assert_true(columns["v"] == [dp["value"] for dp in dps], "Columnar values")
+    assert_true(len(columns["dims"]) == 2, "Dimensions deduplicated")
+    assert_true([columns["dims"][d] for d in columns["d"]] == [dp["dimensions"] for dp in dps],
+                "Columnar dimensions")
+
+    resp = requests.get(url, headers={**headers, "Accept": "application/json"})
+    assert_true(isinstance(resp.json(), list), "Plain JSON still served by default")
+
+    client = ImpulsesClient(url=base_url, token_value=token, timeout=10)
+    series = client.fetch_datapoints(metric_name)
+    assert_true([(dp.timestamp, dp.value, dp.dimensions) for dp in series]
+                == [(dp["timestamp"], dp["value"], dp["dimensions"]) for dp in dps], "SDK decodes columnar series")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 21: Response Encoding ==")
+    test_response_encoding()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
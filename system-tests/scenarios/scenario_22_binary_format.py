@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Scenario 22: Binary wire format for ingest and fetch."""
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries
+from impulses_sdk import binary_format
+
+
+def test_binary_format():
+    """Test binary ingest/fetch through raw requests and the SDK."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_binary_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"bin-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    token = resp.json().get("token_plaintext")
+    headers = {"X-Data-Token": token}
+
+    metric_name = f"binary_metric_{int(time.time())}"
+    url = f"{base_url}/data/{metric_name}"
+    series = DatapointSeries([
+        Datapoint(1000 * i, i / 4, {"host": f"h{i % 3}"}) for i in range(1000)
+    ])
+
+    # Binary ingest, JSON fetch
+    resp = requests.post(url, headers={**headers, "Content-Type": binary_format.MEDIA_TYPE},
+                         data=binary_format.encode(series))
+    assert_true(resp.status_code == 200, f"Binary ingest accepted (got {resp.status_code})")
+    resp = requests.get(url, headers=headers)
+    fetched = resp.json()
+    assert_true(len(fetched) == 1000, "All binary-ingested datapoints stored")
+    assert_true(fetched[5] == {"timestamp": 5000, "dimensions": {"host": "h2"}, "value": 1.25},
+                f"Binary-ingested datapoint intact ({fetched[5]})")
+
+    # Binary fetch
+    resp = requests.get(url, headers={**headers, "Accept": binary_format.MEDIA_TYPE})
+    assert_true(resp.headers.get("Content-Type", "").startswith(binary_format.MEDIA_TYPE), "Binary content type")
+    columns = binary_format.decode(resp.content)
+    assert_true(list(columns.timestamps) == [dp.timestamp for dp in series], "Binary timestamps")
+    assert_true(list(columns.values) == [dp.value for dp in series], "Binary values")
+    assert_true(len(columns.dimensions) == 3, "Dimensions deduplicated")
+
+    # Malformed payloads
+    resp = requests.post(url, headers={**headers, "Content-Type": binary_format.MEDIA_TYPE}, data=b"garbage")
+    assert_true(resp.status_code == 422, f"Garbage binary payload rejected (got {resp.status_code})")
+    truncated = binary_format.encode(series)[:-10]
+    resp = requests.post(url, headers={**headers, "Content-Type": binary_format.MEDIA_TYPE}, data=truncated)
+    assert_true(resp.status_code == 422, f"Truncated binary payload rejected (got {resp.status_code})")
+    dims_json = b'[{"bad key": "x"}]'
+    bad_dims = struct.pack("<4sHHII", b"IMPS", 1, 0, 1, len(dims_json)) + struct.pack("<qdI", 1, 1.0, 0) + dims_json
+    resp = requests.post(url, headers={**headers, "Content-Type": binary_format.MEDIA_TYPE}, data=bad_dims)
+    assert_true(resp.status_code == 422, f"Invalid dimension key in binary payload rejected (got {resp.status_code})")
+    dims_json = b'[{"k": 1}]'
+    bad_dims = struct.pack("<4sHHII", b"IMPS", 1, 0, 1, len(dims_json)) + struct.pack("<qdI", 1, 1.0, 0) + dims_json
+    resp = requests.post(url, headers={**headers, "Content-Type": binary_format.MEDIA_TYPE}, data=bad_dims)
+    assert_true(resp.status_code == 422, f"Non-string dimension value rejected (got {resp.status_code})")
+
+    # SDK, binary when opted in and JSON by default
+    client = ImpulsesClient(url=base_url, token_value=token, timeout=10, binary=True)
+    other_metric = f"{metric_name}_sdk"
+    client.upload_datapoints(other_metric, series)
+    fetched_series = client.fetch_datapoints(other_metric)
+    assert_true([(dp.timestamp, dp.value, dp.dimensions) for dp in fetched_series]
+                == [(dp.timestamp, dp.value, dp.dimensions) for dp in series], "SDK binary round trip")
+    json_client = ImpulsesClient(url=base_url, token_value=token, timeout=10)
+    json_metric = f"{metric_name}_sdk_json"
+    json_client.upload_datapoints(json_metric, series)
+    fetched_series = json_client.fetch_datapoints(json_metric)
+    assert_true([(dp.timestamp, dp.value, dp.dimensions) for dp in fetched_series]
+                == [(dp.timestamp, dp.value, dp.dimensions) for dp in series], "SDK JSON round trip")
+    columns = client.fetch_columns(other_metric)
+    assert_true(len(columns) == 1000 and columns.values[4] == 1.0, "SDK fetch_columns")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 22: Binary Format ==")
+    test_binary_format()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Scenario 23: Bulk export and resumable import."""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient
+
+
+def create_user_with_token(base_url: str, prefix: str) -> tuple[requests.Session, str]:
+    session = requests.Session()
+    user_email = f"{prefix}_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, f"User {prefix} created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, f"User {prefix} logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"{prefix}-token", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, f"Token for {prefix} created")
+    return session, resp.json().get("token_plaintext")
+
+
+def test_export_import():
+    """Test exporting one user's data and importing it into another user."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+
+    source_session, source_token = create_user_with_token(base_url, "test_export_src")
+    target_session, target_token = create_user_with_token(base_url, "test_export_dst")
+    source_headers = {"X-Data-Token": source_token}
+    target_headers = {"X-Data-Token": target_token}
+
+    metrics = {
+        "cpu": [{"timestamp": i, "dimensions": {"host": f"h{i % 2}"}, "value": float(i)} for i in range(25_000)],
+        "mem": [{"timestamp": 5, "dimensions": {}, "value": 1.5}],
+    }
+    for name, dps in metrics.items():
+        resp = requests.post(f"{base_url}/data/{name}", headers=source_headers, json=dps)
+        assert_true(resp.status_code == 200, f"Metric {name} ingested")
+
+    # Export
+    resp = requests.get(f"{base_url}/data-transfer/export", headers=source_headers)
+    assert_true(resp.status_code == 200, f"Export succeeded (got {resp.status_code})")
+    assert_true(resp.headers.get("Content-Type", "").startswith("application/x-ndjson"), "Export is NDJSON")
+    lines = [json.loads(line) for line in resp.content.splitlines() if line]
+    assert_true(sorted({line["metric"] for line in lines}) == ["cpu", "mem"], "Export contains all metrics")
+    assert_true(len([line for line in lines if line["metric"] == "cpu"]) == 3, "Big metric split across lines")
+    assert_true(sum(len(line["t"]) for line in lines) == 25_001, "Export contains all datapoints")
+
+    resp = requests.get(f"{base_url}/data-transfer/export")
+    assert_true(resp.status_code in [401, 422], f"Export requires a token (got {resp.status_code})")
+
+    # Resumable upload
+    payload = requests.get(f"{base_url}/data-transfer/export", headers=source_headers).content
+    resp = requests.post(f"{base_url}/data-transfer/import", headers=target_headers)
+    assert_true(resp.status_code == 200 and resp.json()["offset"] == 0, "Import created")
+    upload_url = f"{base_url}/data-transfer/import/{resp.json()['upload_id']}"
+
+    half = len(payload) // 2
+    resp = requests.put(upload_url, headers={**target_headers, "Upload-Offset": "0"}, data=payload[:half])
+    assert_true(resp.status_code == 200 and resp.json()["offset"] == half, "First chunk uploaded")
+    resp = requests.put(upload_url, headers={**target_headers, "Upload-Offset": "0"}, data=payload[half:])
+    assert_true(resp.status_code == 409, f"Chunk at a wrong offset rejected (got {resp.status_code})")
+    assert_true(resp.headers.get("Upload-Offset") == str(half), "409 reports the current offset")
+    resp = requests.get(upload_url, headers=target_headers)
+    assert_true(resp.json()["offset"] == half, "Current offset can be queried")
+    resp = requests.put(upload_url, headers={**target_headers, "Upload-Offset": str(half)}, data=payload[half:])
+    assert_true(resp.status_code == 200 and resp.json()["offset"] == len(payload), "Second chunk uploaded")
+
+    resp = requests.get(f"{base_url}/data-transfer/import/{resp.json()['upload_id']}", headers=source_headers)
+    assert_true(resp.status_code == 404, "Other users can't see the upload")
+
+    resp = requests.post(f"{upload_url}/commit", headers=target_headers)
+    assert_true(resp.status_code == 200, f"Import committed (got {resp.status_code})")
+    result = resp.json()
+    assert_true(result["metrics"] == 2 and result["datapoints"] == 25_001, f"Import summary ({result})")
+
+    resp = requests.get(f"{base_url}/data/cpu", headers=target_headers)
+    assert_true(resp.json() == metrics["cpu"], "Imported metric matches the source")
+    resp = requests.get(upload_url, headers=target_headers)
+    assert_true(resp.status_code == 404, "Committed upload is removed")
+
+    # Validation and reserved metrics
+    bad_lines = b'{"metric": "ok", "t": [1], "v": [1.0], "d": [0], "dims": [{}]}\n{"metric": "broken", "t": [1]}\n'
+    resp = requests.post(f"{base_url}/data-transfer/import", headers=target_headers)
+    upload_url = f"{base_url}/data-transfer/import/{resp.json()['upload_id']}"
+    requests.put(upload_url, headers={**target_headers, "Upload-Offset": "0"}, data=bad_lines)
+    resp = requests.post(f"{upload_url}/commit", headers=target_headers)
+    assert_true(resp.status_code == 422 and "Line 2" in resp.json()["detail"], "Invalid line rejected")
+    resp = requests.get(f"{base_url}/data", headers=target_headers)
+    assert_true("ok" not in resp.json(), "Nothing applied from an invalid import")
+
+    reserved = b'{"metric": "imp.test", "t": [1], "v": [1.0], "d": [0], "dims": [{}]}\n'
+    resp = requests.post(f"{base_url}/data-transfer/import", headers=target_headers)
+    upload_url = f"{base_url}/data-transfer/import/{resp.json()['upload_id']}"
+    requests.put(upload_url, headers={**target_headers, "Upload-Offset": "0"}, data=reserved)
+    resp = requests.post(f"{upload_url}/commit", headers=target_headers)
+    assert_true(resp.status_code == 200 and resp.json()["skipped_metrics"] == ["imp.test"], "imp. metrics skipped")
+
+    # SDK round trip
+    sdk_session, sdk_token = create_user_with_token(base_url, "test_export_sdk")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "export.ndjson")
+        ImpulsesClient(url=base_url, token_value=source_token, timeout=10).export_data(path)
+        sdk_client = ImpulsesClient(url=base_url, token_value=sdk_token, timeout=10)
+        result = sdk_client.import_data(path, chunk_size=64 * 1024)
+        assert_true(result["datapoints"] == 25_001, "SDK import of SDK export")
+        assert_true(len(sdk_client.fetch_datapoints("cpu")) == 25_000, "SDK-imported metric complete")
+
+    # The transfer routes don't take metric names
+    for name in ["export", "import"]:
+        dps = [{"timestamp": 1, "dimensions": {}, "value": 2.0}]
+        resp = requests.post(f"{base_url}/data/{name}", headers=target_headers, json=dps)
+        assert_true(resp.status_code == 200, f"Metric named {name} ingested (got {resp.status_code})")
+        resp = requests.get(f"{base_url}/data/{name}", headers=target_headers)
+        assert_true(resp.status_code == 200 and resp.json() == dps, f"Metric named {name} fetched")
+
+    # Cleanup
+    source_session.delete(f"{base_url}/user")
+    target_session.delete(f"{base_url}/user")
+    sdk_session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 23: Export & Import ==")
+    test_export_import()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
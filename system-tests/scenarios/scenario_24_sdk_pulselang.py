@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Scenario 24: PulseLang evaluation through the Python SDK."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries, PulseLangError
+from impulses_sdk.pulselang import compute, COMMON_LIBRARY
+
+MINUTE = 60 * 1000
+
+
+def test_sdk_pulselang():
+    """Test evaluating PulseLang programs against metrics stored on the server."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_pulselang_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"pulselang-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    client = ImpulsesClient(url=base_url, token_value=resp.json().get("token_plaintext"), timeout=10)
+
+    client.upload_datapoints("deltas", DatapointSeries([
+        Datapoint(0, -5.0, {"category": "dining"}),
+        Datapoint(15 * MINUTE, 6.0, {"category": "income"}),
+        Datapoint(30 * MINUTE, 3.0, {"category": "income"}),
+        Datapoint(90 * MINUTE, 10.0, {}),
+    ]))
+    client.upload_datapoints("balance", DatapointSeries([Datapoint(1000, 120.0), Datapoint(2000, 80.0)]))
+    client.upload_datapoints("avg-expense", DatapointSeries([Datapoint(1500, 15.0), Datapoint(3000, 20.0)]))
+
+    program = """
+        (define deltas (data "deltas"))
+        (define expenses (filter deltas (> 0)))
+        (define expenses-prefix (prefix-sum expenses))
+        (define expenses-window (sum-window expenses HOUR))
+        (define dining (filter deltas (and (< 0) (dimension-is "category" "dining"))))
+        (define untagged (filter deltas (no-dimension "category")))
+        (define hourly (buckets deltas HOUR))
+        (define total
+          (compose (data "balance") (data "avg-expense")
+                   (lambda (balance avg) (+ balance avg))))
+        (define threshold 10)
+    """
+    streams = compute(client, COMMON_LIBRARY, program)
+
+    def values(name):
+        return [(dp.timestamp, dp.value) for dp in streams[name]]
+
+    assert_true("threshold" not in streams and "HOUR" not in streams, "Only series bindings are returned")
+    assert_true(len(streams["deltas"]) == 4, "data resolved through the client")
+    assert_true(values("expenses") == [(15 * MINUTE, 6), (30 * MINUTE, 3), (90 * MINUTE, 10)], "filter")
+    assert_true(values("expenses-prefix") == [(15 * MINUTE, 6), (30 * MINUTE, 9), (90 * MINUTE, 19)], "prefix")
+    assert_true(values("expenses-window") == [(15 * MINUTE, 6), (30 * MINUTE, 9), (75 * MINUTE, 3), (90 * MINUTE, 10)],
+                f"window ({values('expenses-window')})")
+    assert_true(values("dining") == [(0, -5)], "Combined value and dimension predicates")
+    assert_true(values("untagged") == [(90 * MINUTE, 10)], "no-dimension predicate")
+    assert_true(values("hourly") == [(0, 4), (60 * MINUTE, 10)], f"bucketize ({values('hourly')})")
+    assert_true(values("total") == [(1000, 120), (1500, 135), (2000, 95), (3000, 100)], f"compose ({values('total')})")
+
+    # Errors
+    for bad_program, description in [
+        ("(define x (data \"deltas\")", "Unbalanced parentheses"),
+        ("(define x (undefined-function 1))", "Undefined symbol"),
+        ("(define x (window (data \"deltas\") \"0s\" sum))", "Zero window"),
+    ]:
+        try:
+            compute(client, "", bad_program)
+            assert_true(False, f"{description} rejected")
+        except PulseLangError:
+            assert_true(True, f"{description} rejected")
+    streams = compute(client, "", "(define missing (data \"no-such-metric\"))")
+    assert_true(len(streams["missing"]) == 0, "Missing metric evaluates to an empty series")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 24: SDK PulseLang ==")
+    test_sdk_pulselang()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
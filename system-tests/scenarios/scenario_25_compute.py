@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Scenario 25: Server-side PulseLang evaluation with planned reads."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries, ValidationError
+from impulses_sdk.pulselang import compute, COMMON_LIBRARY
+
+HOUR = 60 * 60 * 1000
+DAY = 24 * HOUR
+
+
+def test_compute():
+    """Test POST /compute against the SDK interpreter, and that it only reads what it needs."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_compute_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"compute-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    token = resp.json().get("token_plaintext")
+    client = ImpulsesClient(url=base_url, token_value=token, timeout=10)
+
+    # 60 days of transactions every 6 hours, alternating between two categories
+    client.upload_datapoints("tx", DatapointSeries([
+        Datapoint(i * 6 * HOUR, float((i * 7) % 13 - 6), {"category": "dining" if i % 2 else "rent"})
+        for i in range(240)
+    ]))
+    client.upload_datapoints("balance", DatapointSeries([Datapoint(i * DAY, 100.0 + i) for i in range(60)]))
+
+    program = """
+        (define tx (data "tx"))
+        (define dining (filter tx (dimension-is "category" "dining")))
+        (define weekly (sum-window tx "7d"))
+        (define cumulative (prefix-sum tx))
+        (define daily (buckets dining "1d"))
+        (define shifted (shift "2d" tx))
+        (define total (compose (data "balance") dining (lambda (b d) (+ b d))))
+        (define summed (compose (data "balance") tx dining +))
+        (define net (compose (data "balance") tx -))
+        (define unused (data "balance"))
+    """
+    start, end = 30 * DAY + 3 * HOUR, 40 * DAY
+    expected = compute(client, COMMON_LIBRARY, program)
+
+    def points(series):
+        return [(dp.timestamp, dp.value, dict(dp.dimensions)) for dp in series]
+
+    headers = {"X-Data-Token": token}
+    for name in ["tx", "dining", "weekly", "cumulative", "daily", "shifted", "total", "summed", "net"]:
+        resp = requests.post(f"{base_url}/compute", headers=headers,
+                             json={"program": program, "variables": [name], "start": start, "end": end})
+        assert_true(resp.status_code == 200, f"{name} computed")
+        body = resp.json()
+        actual = [(dp["timestamp"], dp["value"], dp["dimensions"]) for dp in body["series"][name]]
+        clipped = [point for point in points(expected[name]) if start <= point[0] <= end]
+        assert_true(actual == clipped, f"{name} matches the SDK evaluation within the range")
+        reads = {source["metric"]: source for source in body["sources"]}
+        if name == "tx":
+            assert_true(reads["tx"]["start"] == start and reads["tx"]["end"] == end, "Plain reads are narrowed to the range")
+            assert_true(reads["tx"]["datapoints"] == 40, f"Only the range is read ({reads['tx']['datapoints']})")
+        if name == "dining":
+            assert_true(reads["tx"]["datapoints"] == 20, "Dimension predicate pushed down to the read")
+        if name == "weekly":
+            assert_true(reads["tx"]["start"] == start - 7 * DAY and reads["tx"]["end"] is None,
+                        "Window reads its duration before the range")
+        if name == "cumulative":
+            assert_true(reads["tx"]["start"] is None, "Prefix reads the whole history")
+        if name == "shifted":
+            assert_true(reads["tx"]["start"] == start - 2 * DAY and reads["tx"]["end"] == end - 2 * DAY,
+                        "Shift moves the read range")
+        assert_true(name in ["total", "summed", "net"] or "balance" not in reads,
+                    "Metrics the variable doesn't depend on aren't read")
+
+    # All series bindings when variables are omitted, through the SDK
+    streams = client.compute(program, start=start, end=end)
+    assert_true(set(streams) == set(expected), "All series bindings returned by default")
+    assert_true(points(streams["weekly"]) == [p for p in points(expected["weekly"]) if start <= p[0] <= end],
+                "SDK client compute")
+
+    # Errors
+    for bad_program, description in [
+        ("(define x (data \"tx\")", "Unbalanced parentheses"),
+        ("(define x (undefined-function 1))", "Undefined symbol"),
+        ("(define x (window (data \"tx\") \"0s\" sum))", "Zero window"),
+        ("(define x (data \"not a valid name\"))", "Invalid metric name"),
+    ]:
+        try:
+            client.compute(bad_program)
+            assert_true(False, f"{description} rejected")
+        except ValidationError:
+            assert_true(True, f"{description} rejected")
+    streams = client.compute("(define missing (data \"no-such-metric\"))")
+    assert_true(len(streams["missing"]) == 0, "Missing metric evaluates to an empty series")
+
+    resp = requests.post(f"{base_url}/compute", json={"program": "(define x 1)"})
+    assert_true(resp.status_code == 422, f"Token required (got {resp.status_code})")
+
+    # A metric may be named compute
+    dps = [{"timestamp": 1, "dimensions": {}, "value": 2.0}]
+    resp = requests.post(f"{base_url}/data/compute", headers=headers, json=dps)
+    assert_true(resp.status_code == 200, f"Metric named compute ingested (got {resp.status_code})")
+    resp = requests.get(f"{base_url}/data/compute", headers=headers)
+    assert_true(resp.status_code == 200 and resp.json() == dps, "Metric named compute fetched")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 25: Compute ==")
+    test_compute()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Scenario 26: Live charts pushed over the app websocket."""
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from websockets.sync.client import connect
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries
+from impulses_sdk.pulselang import compute, COMMON_LIBRARY
+
+HOUR = 60 * 60 * 1000
+DAY = 24 * HOUR
+
+PROGRAM = """
+    (define tx (data "tx"))
+    (define cumulative (prefix-sum tx))
+    (define weekly (sum-window (filter tx (dimension-is "category" "dining")) "7d"))
+    (define daily (buckets tx "1d"))
+    (define net (compose tx (shift DAY (data "other")) (lambda (a b) (- a b))))
+"""
+VARIABLES = ["cumulative", "weekly", "daily", "net"]
+
+
+def receive(socket, message_type, timeout=10):
+    """Next message of the given type, answering heartbeats in the meantime."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        message = json.loads(socket.recv(timeout=max(0.1, deadline - time.time())))
+        if message.get("type") == "ping":
+            socket.send(json.dumps({"type": "pong"}))
+            continue
+        if message.get("type") == message_type:
+            return message
+    raise AssertionError(f"No {message_type} message received")
+
+
+def apply_delta(series, delta):
+    for name, change in delta["series"].items():
+        kept = [] if change["start"] is None else [p for p in series.get(name, []) if p[0] < change["start"]]
+        series[name] = kept + [(p["timestamp"], p["value"]) for p in change["points"]]
+
+
+def test_live_charts():
+    """Test that a subscribed chart is pushed as a whole once and then only as the changes of its variables."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_live_charts_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"live-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    client = ImpulsesClient(url=base_url, token_value=resp.json().get("token_plaintext"), timeout=10)
+
+    client.upload_datapoints("tx", DatapointSeries([
+        Datapoint(i * 6 * HOUR, float((i * 7) % 13 - 6), {"category": "dining" if i % 2 else "rent"})
+        for i in range(200)
+    ]))
+    client.upload_datapoints("other", DatapointSeries([Datapoint(i * DAY, float(i)) for i in range(40)]))
+
+    resp = session.post(f"{base_url}/chart", json={
+        "name": "Live",
+        "program": PROGRAM,
+        "variables": [{"variable": name} for name in VARIABLES],
+    })
+    assert_true(resp.status_code == 200, "Chart created")
+    chart_id = resp.json()["id"]
+
+    def expected():
+        streams = compute(client, COMMON_LIBRARY, PROGRAM)
+        return {name: [(dp.timestamp, dp.value) for dp in streams[name]] for name in VARIABLES}
+
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/app"
+    with connect(ws_url, additional_headers={"Cookie": f"sid={session.cookies.get('sid')}"}) as socket:
+        receive(socket, "connected")
+        socket.send(json.dumps({"type": "chart_subscribe", "chart_id": chart_id}))
+        delta = receive(socket, "chart_delta")
+        assert_true(delta["chart_id"] == chart_id, "Delta of the subscribed chart")
+        assert_true(all(change["start"] is None for change in delta["series"].values()), "Whole result first")
+        series = {}
+        apply_delta(series, delta)
+        assert_true(series == expected(), "Initial result matches the SDK evaluation")
+
+        # appends only push what changed
+        last = 199 * 6 * HOUR
+        for step in range(1, 4):
+            client.upload_datapoints("tx", DatapointSeries([
+                Datapoint(last + step * HOUR, float(step), {"category": "dining"}),
+            ]))
+            delta = receive(socket, "chart_delta")
+            assert_true(all(change["start"] is not None for change in delta["series"].values()),
+                        f"Append {step} pushed as a delta")
+            assert_true(len(delta["series"]["cumulative"]["points"]) <= 2,
+                        f"Only new points pushed ({len(delta['series']['cumulative']['points'])})")
+            apply_delta(series, delta)
+            assert_true(series == expected(), f"Result after append {step} matches the SDK evaluation")
+
+        client.upload_datapoints("other", DatapointSeries([Datapoint(40 * DAY, 5.0)]))
+        apply_delta(series, receive(socket, "chart_delta"))
+        assert_true(series == expected(), "Changes of another metric of the chart are pushed")
+
+        # a backdated datapoint makes the chart evaluate again
+        client.upload_datapoints("tx", DatapointSeries([Datapoint(HOUR, 100.0, {"category": "dining"})]))
+        delta = receive(socket, "chart_delta")
+        assert_true(all(change["start"] is None for change in delta["series"].values()), "Backdated change resyncs")
+        apply_delta(series, delta)
+        assert_true(series == expected(), "Result after the resync matches the SDK evaluation")
+
+        socket.send(json.dumps({"type": "chart_unsubscribe", "chart_id": chart_id}))
+        socket.send(json.dumps({"type": "chart_subscribe", "chart_id": "no-such-chart"}))
+        error = receive(socket, "chart_error")
+        assert_true(error["chart_id"] == "no-such-chart", "Unknown chart rejected")
+
+        client.upload_datapoints("tx", DatapointSeries([Datapoint(last + 10 * HOUR, 1.0, {})]))
+        try:
+            receive(socket, "chart_delta", timeout=2)
+            assert_true(False, "No deltas after unsubscribing")
+        except (AssertionError, TimeoutError):
+            assert_true(True, "No deltas after unsubscribing")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 26: Live charts ==")
+    test_live_charts()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Scenario 27: Server-side evaluation of whole dashboards."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries
+from impulses_sdk.pulselang import compute, COMMON_LIBRARY
+
+HOUR = 60 * 60 * 1000
+DAY = 24 * HOUR
+
+CHARTS = {
+    "Weekly": ("(define weekly (sum-window (data \"tx\") \"7d\"))", ["weekly"]),
+    "Net": ("""
+        (define weekly (sum-window (data "tx") "7d"))
+        (define net (compose weekly (data "balance") (lambda (w b) (+ w b))))
+    """, ["weekly", "net"]),
+    "Dining": ("""
+        (define dining (filter (data "tx") (dimension-is "category" "dining")))
+        (define daily (buckets dining "1d"))
+        (define cumulative (prefix-sum (data "tx")))
+    """, ["daily", "cumulative"]),
+    "Broken": ("(define broken (window (data \"tx\") \"1d\" (lambda (values) \"text\")))", ["broken"]),
+}
+
+
+def test_dashboard_series():
+    """Test GET /dashboard/{id}/series against the SDK interpreter, chart by chart."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_dashboard_series_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"dashboard-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    client = ImpulsesClient(url=base_url, token_value=resp.json().get("token_plaintext"), timeout=10)
+
+    client.upload_datapoints("tx", DatapointSeries([
+        Datapoint(i * 6 * HOUR, float((i * 7) % 13 - 6), {"category": "dining" if i % 2 else "rent"})
+        for i in range(240)
+    ]))
+    client.upload_datapoints("balance", DatapointSeries([Datapoint(i * DAY, 100.0 + i) for i in range(60)]))
+
+    chart_ids = {}
+    for name, (program, variables) in CHARTS.items():
+        resp = session.post(f"{base_url}/chart", json={
+            "name": name,
+            "program": program,
+            "variables": [{"variable": variable} for variable in variables],
+        })
+        assert_true(resp.status_code == 200, f"Chart {name} created")
+        chart_ids[name] = resp.json()["id"]
+
+    resp = session.post(f"{base_url}/dashboard", json={
+        "name": "Overview",
+        "layout": [{"chartId": chart_id, "x": 0, "y": i, "w": 6, "h": 4} for i, chart_id in enumerate(chart_ids.values())],
+    })
+    assert_true(resp.status_code == 200, "Dashboard created")
+    dashboard_id = resp.json()["id"]
+
+    def points(series):
+        return [(dp.timestamp, dp.value, dict(dp.dimensions)) for dp in series]
+
+    def received(datapoints):
+        return [(dp["timestamp"], dp["value"], dp["dimensions"]) for dp in datapoints]
+
+    start, end = 30 * DAY + 3 * HOUR, 50 * DAY
+    for params, description in [({}, "whole series"), ({"start": start, "end": end}, "range")]:
+        resp = session.get(f"{base_url}/dashboard/{dashboard_id}/series", params=params)
+        assert_true(resp.status_code == 200, f"Dashboard evaluated ({description})")
+        body = resp.json()
+        for name, (program, variables) in CHARTS.items():
+            chart_id = chart_ids[name]
+            if name == "Broken":
+                assert_true(chart_id in body["errors"] and chart_id not in body["charts"],
+                            "A chart failing to evaluate is reported without failing the others")
+                continue
+            expected = compute(client, COMMON_LIBRARY, program)
+            for variable in variables:
+                clipped = [p for p in points(expected[variable])
+                           if params.get("start", 0) <= p[0] <= params.get("end", float("inf"))]
+                assert_true(received(body["charts"][chart_id][variable]) == clipped,
+                            f"{name}.{variable} matches the SDK evaluation ({description})")
+        reads = [source["metric"] for source in body["sources"]]
+        assert_true(sorted(reads) == ["balance", "tx"], f"Every metric read once across the charts ({reads})")
+
+    # with a program of its own, the dashboard's bindings are plotted
+    resp = session.put(f"{base_url}/dashboard/{dashboard_id}", json={
+        "name": "Overview",
+        "program": "(define weekly (sum-window (data \"balance\") \"7d\"))",
+        "layout": [{"chartId": chart_ids["Weekly"], "x": 0, "y": 0, "w": 6, "h": 4}],
+    })
+    assert_true(resp.status_code == 200, "Dashboard program set")
+    body = session.get(f"{base_url}/dashboard/{dashboard_id}/series").json()
+    expected = compute(client, COMMON_LIBRARY, "(define weekly (sum-window (data \"balance\") \"7d\"))")
+    assert_true(received(body["charts"][chart_ids["Weekly"]]["weekly"]) == points(expected["weekly"]),
+                "Charts plot the dashboard program's bindings")
+
+    resp = session.get(f"{base_url}/dashboard/no-such-dashboard/series")
+    assert_true(resp.status_code == 404, "Unknown dashboard")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 27: Dashboard series ==")
+    test_dashboard_series()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
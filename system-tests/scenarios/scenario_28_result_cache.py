@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Scenario 28: Computed series reused across requests until their metrics change."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries
+from impulses_sdk.pulselang import compute, COMMON_LIBRARY
+
+HOUR = 60 * 60 * 1000
+DAY = 24 * HOUR
+
+PROGRAM = """
+    (define cumulative (prefix-sum (data "tx")))
+    (define weekly (sum-window (data "tx") "7d"))
+    (define net (compose weekly (data "balance") (lambda (w b) (+ w b))))
+"""
+
+
+def test_result_cache():
+    """Test that computing the same series again reads nothing, and that changed metrics are read again."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_result_cache_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"cache-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    token = resp.json().get("token_plaintext")
+    client = ImpulsesClient(url=base_url, token_value=token, timeout=10)
+
+    client.upload_datapoints("tx", DatapointSeries([Datapoint(i * 6 * HOUR, float(i % 5 - 2)) for i in range(200)]))
+    client.upload_datapoints("balance", DatapointSeries([Datapoint(i * DAY, 100.0 + i) for i in range(50)]))
+
+    headers = {"X-Data-Token": token}
+    def compute_on_server():
+        resp = requests.post(f"{base_url}/compute", headers=headers,
+                             json={"program": PROGRAM, "variables": ["cumulative", "net"]})
+        assert_true(resp.status_code == 200, "Computed")
+        body = resp.json()
+        series = {name: [(dp["timestamp"], dp["value"]) for dp in datapoints] for name, datapoints in body["series"].items()}
+        return series, sorted(source["metric"] for source in body["sources"])
+
+    def expected():
+        streams = compute(client, COMMON_LIBRARY, PROGRAM)
+        return {name: [(dp.timestamp, dp.value) for dp in streams[name]] for name in ["cumulative", "net"]}
+
+    series, reads = compute_on_server()
+    assert_true(series == expected(), "First evaluation matches the SDK")
+    assert_true(reads == ["balance", "tx"], f"First evaluation reads its metrics ({reads})")
+
+    series, reads = compute_on_server()
+    assert_true(series == expected(), "Second evaluation matches the SDK")
+    assert_true(reads == [], f"Second evaluation is served from the cache ({reads})")
+
+    client.upload_datapoints("balance", DatapointSeries([Datapoint(50 * DAY, 7.0)]))
+    series, reads = compute_on_server()
+    assert_true(series == expected(), "Evaluation after a change matches the SDK")
+    assert_true(reads == ["balance"], f"Only what depends on the changed metric is evaluated again ({reads})")
+
+    series, reads = compute_on_server()
+    assert_true(reads == [], f"Cached again ({reads})")
+
+    cumulative = series["cumulative"]
+    client.delete_metric_name("balance")
+    series, reads = compute_on_server()
+    assert_true(reads == ["balance"], f"Deleted metric read again ({reads})")
+    assert_true(series["cumulative"] == cumulative, "Series not depending on the deleted metric kept")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 28: Result cache ==")
+    test_result_cache()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Scenario 29: Calendar buckets in IANA time zones, evaluated by the server and the SDK."""
+import datetime
+import sys
+import time
+import zoneinfo
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries
+from impulses_sdk.pulselang import compute, COMMON_LIBRARY
+
+HOUR = 60 * 60 * 1000
+WARSAW = zoneinfo.ZoneInfo("Europe/Warsaw")
+# 2024-01-01T00:00:00Z, the series spans both daylight saving time changes of 2024
+START = 1704067200000
+
+PROGRAM = """
+    (define daily (bucketize-days (data "spend") 1 sum "Europe/Warsaw"))
+    (define weekly (bucketize-weeks (data "spend") 1 max "Europe/Warsaw"))
+    (define monthly (bucketize-months (data "spend") 1 sum "Europe/Warsaw"))
+    (define quarterly (bucketize-months (data "spend") 3 (lambda (values) (- (max values) (min values))) "America/New_York"))
+    (define fixed (bucketize (data "spend") "6h" count))
+"""
+VARIABLES = ["daily", "weekly", "monthly", "quarterly", "fixed"]
+
+
+def local(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp / 1000, WARSAW)
+
+
+def test_calendar_buckets():
+    """Test that zoned day, week and month buckets follow the local calendar, on the server as in the SDK."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_calendar_buckets_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"buckets-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    token = resp.json().get("token_plaintext")
+    client = ImpulsesClient(url=base_url, token_value=token, timeout=10)
+
+    client.upload_datapoints("spend", DatapointSeries([
+        Datapoint(START + i * 7 * HOUR, float((i * 11) % 17 - 3)) for i in range(1300)
+    ]))
+
+    headers = {"X-Data-Token": token}
+    def compute_on_server(program, variables, **params):
+        resp = requests.post(f"{base_url}/compute", headers=headers,
+                             json={"program": program, "variables": variables, **params})
+        assert_true(resp.status_code == 200, "Computed")
+        body = resp.json()
+        series = {name: [(dp["timestamp"], dp["value"]) for dp in datapoints] for name, datapoints in body["series"].items()}
+        return series, body["sources"]
+
+    streams = compute(client, COMMON_LIBRARY, PROGRAM)
+    expected = {name: [(dp.timestamp, dp.value) for dp in streams[name]] for name in VARIABLES}
+    series, _ = compute_on_server(PROGRAM, VARIABLES)
+    for name in VARIABLES:
+        assert_true(series[name] == expected[name], f"{name} matches the SDK evaluation")
+
+    daily = [timestamp for timestamp, _ in series["daily"]]
+    assert_true(all(local(t).time() == datetime.time() for t in daily), "Days start at midnight in Warsaw")
+    lengths = {local(t).date().isoformat(): (u - t) // HOUR for t, u in zip(daily, daily[1:])}
+    assert_true(lengths["2024-03-31"] == 23 and lengths["2024-10-27"] == 25 and lengths["2024-06-01"] == 24,
+                "Days are 23 or 25 hours long across daylight saving time changes")
+    weekly = [timestamp for timestamp, _ in series["weekly"]]
+    assert_true(all(local(t).weekday() == 0 and local(t).time() == datetime.time() for t in weekly),
+                "Weeks start on Monday in Warsaw")
+    monthly = [local(timestamp) for timestamp, _ in series["monthly"]]
+    assert_true([(m.month, m.day, m.hour) for m in monthly[:3]] == [(1, 1, 0), (2, 1, 0), (3, 1, 0)],
+                "Months start on the first day of the month in Warsaw")
+    assert_true(sum(value for _, value in series["monthly"]) == sum(value for _, value in series["daily"]),
+                "Every datapoint is in one day and one month")
+    new_york = [datetime.datetime.fromtimestamp(t / 1000, zoneinfo.ZoneInfo("America/New_York"))
+                for t, _ in series["quarterly"]]
+    assert_true(all(d.month in (1, 4, 7, 10) and d.day == 1 and d.hour == 0 for d in new_york),
+                "Quarters start on the first day of the quarter in New York")
+
+    # a range only reads from the start of the month it starts in
+    start = int(datetime.datetime(2024, 6, 15, tzinfo=WARSAW).timestamp() * 1000)
+    end = int(datetime.datetime(2024, 9, 10, tzinfo=WARSAW).timestamp() * 1000)
+    program = '(define monthly (bucketize-months (data "spend") 1 sum "Europe/Warsaw"))'
+    ranged, sources = compute_on_server(program, ["monthly"], start=start, end=end)
+    assert_true(ranged["monthly"] == [p for p in expected["monthly"] if start <= p[0] <= end],
+                "Monthly buckets of a range match the whole series")
+    june = int(datetime.datetime(2024, 6, 1, tzinfo=WARSAW).timestamp() * 1000)
+    assert_true([source["start"] for source in sources] == [june], f"Read starts at the month of the range ({sources})")
+
+    resp = requests.post(f"{base_url}/compute", headers=headers,
+                         json={"program": '(define x (bucketize-days (data "spend") 1 sum "Mars/Olympus"))'})
+    assert_true(resp.status_code == 422 and "Unknown time zone" in resp.json()["detail"], "Unknown time zone rejected")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 29: Calendar buckets ==")
+    test_calendar_buckets()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Scenario 30: Exact and approximate percentiles of windows and buckets, evaluated by the server and the SDK."""
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries, QuantileSketch
+from impulses_sdk.pulselang import compute, COMMON_LIBRARY
+
+MINUTE = 60 * 1000
+START = 1704067200000
+
+PROGRAM = """
+    (define hourly-p95 (window (data "latency") "1h" (p 95)))
+    (define hourly-p95-approx (window (data "latency") "1h" (p 95 0.01)))
+    (define daily-p99 (bucketize-days (data "latency") 1 (p 99)))
+    (define daily-p99-approx (bucketize-days (data "latency") 1 (p 99 0.01)))
+    (define hourly-median (window (data "latency") "1h" (lambda (values) ((p 50) values))))
+"""
+VARIABLES = ["hourly-p95", "hourly-p95-approx", "daily-p99", "daily-p99-approx", "hourly-median"]
+
+
+def within(approx, exact, accuracy):
+    return all(a[0] == e[0] and abs(a[1] - e[1]) <= accuracy * abs(e[1]) for a, e in zip(approx, exact)) \
+        and len(approx) == len(exact)
+
+
+def test_percentiles():
+    """Test that (p percent [accuracy]) matches between the server and the SDK, and sketches stay within accuracy."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_percentiles_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"percentiles-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    token = resp.json().get("token_plaintext")
+    client = ImpulsesClient(url=base_url, token_value=token, timeout=10)
+
+    rng = random.Random(30)
+    client.upload_datapoints("latency", DatapointSeries([
+        Datapoint(START + i * MINUTE, round(rng.lognormvariate(4, 1), 3)) for i in range(3 * 24 * 60)
+    ]))
+
+    headers = {"X-Data-Token": token}
+    resp = requests.post(f"{base_url}/compute", headers=headers, json={"program": PROGRAM, "variables": VARIABLES})
+    assert_true(resp.status_code == 200, "Computed")
+    series = {name: [(dp["timestamp"], dp["value"]) for dp in datapoints]
+              for name, datapoints in resp.json()["series"].items()}
+
+    streams = compute(client, COMMON_LIBRARY, PROGRAM)
+    for name in VARIABLES:
+        expected = [(dp.timestamp, dp.value) for dp in streams[name]]
+        assert_true(series[name] == expected, f"{name} matches the SDK evaluation")
+
+    assert_true(len(series["hourly-p95"]) == len(series["hourly-median"]), "Every window has a percentile")
+    assert_true(all(p95 >= median for (_, p95), (_, median) in zip(series["hourly-p95"], series["hourly-median"])),
+                "The 95th percentile of a window is at least its median")
+    assert_true(within(series["hourly-p95-approx"], series["hourly-p95"], 0.01), "Window sketches are within 1%")
+    assert_true(within(series["daily-p99-approx"], series["daily-p99"], 0.01), "Bucket sketches are within 1%")
+    assert_true(len(series["daily-p99"]) == 3, "One bucket per day")
+
+    # sketches of the days merge into the sketch of the whole series
+    values = [dp.value for dp in client.fetch_datapoints("latency")]
+    merged = QuantileSketch(0.01)
+    for day in range(3):
+        sketch = QuantileSketch(0.01)
+        for value in values[day * 24 * 60:(day + 1) * 24 * 60]:
+            sketch.add(value)
+        merged.merge(sketch)
+    exact = sorted(values)[int(0.99 * (len(values) - 1))]
+    assert_true(len(merged) == len(values) and abs(merged.percentile(99) - exact) <= 0.01 * exact,
+                "Merged sketches are within 1% of the exact percentile")
+
+    resp = requests.post(f"{base_url}/compute", headers=headers,
+                         json={"program": '(define x (window (data "latency") "1h" (p 95 2)))'})
+    assert_true(resp.status_code == 422 and "accuracy" in resp.json()["detail"], "Invalid accuracy rejected")
+
+    resp = session.put(f"{base_url}/retention-policy", json={
+        "metric_name": "latency", "downsample_after_ms": 86_400_000, "downsample_resolution_ms": 3_600_000,
+        "downsample_aggregate": "p95",
+    })
+    assert_true(resp.status_code == 200 and resp.json()["downsample_aggregate"] == "p95",
+                "Retention policies downsample to percentiles")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 30: Percentiles ==")
+    test_percentiles()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
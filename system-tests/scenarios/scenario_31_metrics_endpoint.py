@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Scenario 31: Prometheus metrics of requests, the data store, caches, SQLite, jobs and websockets."""
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from websockets.sync.client import connect
+from utils import get_base_url, assert_true, wait_for_health
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries
+
+# the token the test stack's scrapers read /metrics with
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "test-metrics-token")
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})? (\S+)$')
+
+
+def scrape(base_url):
+    """{(name, labels): value} of every sample, labels as a frozenset of (label, value)."""
+    resp = requests.get(f"{base_url}/metrics", headers={"Authorization": f"Bearer {METRICS_TOKEN}"})
+    assert_true(resp.status_code == 200, "Metrics scraped")
+    assert_true(resp.headers["Content-Type"].startswith("text/plain; version=0.0.4"), "Prometheus text format")
+    samples = {}
+    for line in resp.text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = SAMPLE.match(line)
+        assert_true(match is not None, f"Sample line is well formed: {line}")
+        name, labels, value = match.groups()
+        labels = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', labels or ""))
+        samples[(name, labels)] = float(value)
+    return samples
+
+
+def value(samples, name, **labels):
+    return sum(v for (n, l), v in samples.items() if n == name and set(labels.items()) <= l)
+
+
+def test_metrics_endpoint():
+    """Test that /metrics reports what the server did, to scrapers with the token and to admins only."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+
+    user_email = f"test_metrics_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"metrics-token-{int(time.time())}", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    token = resp.json().get("token_plaintext")
+    client = ImpulsesClient(url=base_url, token_value=token, timeout=10)
+
+    before = scrape(base_url)
+    client.upload_datapoints("requests", DatapointSeries([Datapoint(i * 1000, float(i)) for i in range(100)]))
+    for _ in range(3):
+        client.fetch_datapoints("requests")
+    program = '(define total (prefix-sum (data "requests")))'
+    for _ in range(2):
+        resp = requests.post(f"{base_url}/compute", headers={"X-Data-Token": token}, json={"program": program})
+        assert_true(resp.status_code == 200, "Computed")
+    requests.get(f"{base_url}/no/such/route/{int(time.time())}")
+    after = scrape(base_url)
+
+    def delta(name, **labels):
+        return value(after, name, **labels) - value(before, name, **labels)
+
+    route = {"method": "GET", "route": "/data/{metric_name}", "status": "200"}
+    # the SDK fetches conditionally, repeated fetches are 304s
+    assert_true(delta("impulses_http_request_duration_seconds_count", method="GET", route="/data/{metric_name}") >= 3,
+                "Requests are counted by route template")
+    assert_true(value(after, "impulses_http_request_duration_seconds_bucket", le="+Inf", **route)
+                == value(after, "impulses_http_request_duration_seconds_count", **route), "Buckets are cumulative")
+    assert_true(delta("impulses_http_request_duration_seconds_count", route="unmatched", status="404") >= 1,
+                "Unknown paths are labeled unmatched")
+    assert_true(not any(("route", "/no/such/route") in labels or any("no/such" in v for _, v in labels)
+                        for _, labels in after), "Unknown paths don't create series")
+
+    assert_true(delta("impulses_store_operation_duration_seconds_count", operation="flush") >= 1, "Flushes timed")
+    assert_true(delta("impulses_store_operation_bytes_sum", operation="flush") > 0, "Flushed bytes measured")
+    assert_true(delta("impulses_store_lock_wait_seconds_count") >= 1, "Lock waits timed")
+    assert_true(delta("impulses_cache_requests_total", cache="token") >= 5, "Token cache lookups counted")
+    assert_true(delta("impulses_cache_requests_total", cache="result", result="hit") >= 1,
+                "The second compute hits the result cache")
+    assert_true(0 <= value(after, "impulses_cache_hit_ratio", cache="token") <= 1, "Token cache hit ratio")
+    assert_true(any(n == "impulses_sqlite_query_duration_seconds_count" and dict(l)["method"].startswith("UserRepo.")
+                    for n, l in after), "SQLite queries are labeled by repository method")
+    assert_true(value(after, "impulses_job_duration_seconds_count", job="HeartbeatJob") >= 1, "Job runs timed")
+
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/app"
+    with connect(ws_url, additional_headers={"Cookie": f"sid={session.cookies.get('sid')}"}):
+        time.sleep(0.5)
+        connected = scrape(base_url)
+        assert_true(value(connected, "impulses_websocket_connections") >= 1, "Websocket connections reported")
+        assert_true(value(connected, "impulses_websocket_queued_messages") >= 0, "Websocket queue depth reported")
+
+    resp = requests.get(f"{base_url}/metrics")
+    assert_true(resp.status_code == 401, f"Metrics aren't public (got {resp.status_code})")
+    resp = requests.get(f"{base_url}/metrics", headers={"Authorization": "Bearer wrong"})
+    assert_true(resp.status_code == 401, f"Metrics need the right token (got {resp.status_code})")
+    resp = session.get(f"{base_url}/metrics")
+    assert_true(resp.status_code == 403, f"Metrics aren't readable by standard users (got {resp.status_code})")
+    admin = requests.Session()
+    admin_email = f"test_metrics_admin_{int(time.time())}@example.com"
+    resp = admin.post(
+        f"{base_url}/user",
+        json={"email": admin_email, "password": "Password123!", "role": "ADMIN"}
+    )
+    assert_true(resp.status_code == 200, "Admin created")
+    resp = admin.post(
+        f"{base_url}/user/login",
+        json={"email": admin_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "Admin logged in")
+    resp = admin.get(f"{base_url}/metrics")
+    assert_true(resp.status_code == 200 and "impulses_http_request_duration_seconds" in resp.text,
+                "Metrics readable by admins")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+    admin.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 31: Metrics endpoint ==")
+    test_metrics_endpoint()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
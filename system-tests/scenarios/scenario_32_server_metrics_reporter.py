@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Scenario 32: The server reports its own metrics as imp.server.* metrics of admin users."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+# the test stack reports every 2 seconds (SERVER_METRICS_INTERVAL_SEC)
+TIMEOUT_SEC = 20
+
+
+def create_user(base_url, role):
+    session = requests.Session()
+    user_email = f"test_server_metrics_{role.lower()}_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": role}
+    )
+    assert_true(resp.status_code == 200, f"{role} user created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, f"{role} user logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"server-metrics-token-{int(time.time())}", "capability": "SUPER",
+              "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, f"{role} token created")
+    return session, {"X-Data-Token": resp.json().get("token_plaintext")}
+
+
+def test_server_metrics_reporter():
+    """Test that admins get imp.server.* metrics and other users don't."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    admin, admin_headers = create_user(base_url, "ADMIN")
+    standard, standard_headers = create_user(base_url, "STANDARD")
+
+    expected = {"imp.server.ingest.rate", "imp.server.requests.rate", "imp.server.cache.entries",
+                "imp.server.result_cache.bytes"}
+    deadline = time.time() + TIMEOUT_SEC
+    names = set()
+    while time.time() < deadline and not expected <= names:
+        # requests for the reporter to see
+        requests.get(f"{base_url}/healthz")
+        time.sleep(1)
+        resp = requests.get(f"{base_url}/data", headers=admin_headers)
+        assert_true(resp.status_code == 200, "Admin metrics listed")
+        names = set(resp.json())
+    assert_true(expected <= names, f"Server metrics reported to the admin ({sorted(names)})")
+
+    resp = requests.get(f"{base_url}/data/imp.server.requests.rate", headers=admin_headers)
+    rates = resp.json()
+    assert_true(len(rates) >= 1 and all(dp["value"] >= 0 for dp in rates), "Request rates are reported over time")
+    assert_true("imp.server.requests.latency.p99" in names, "Request latency is reported")
+    latency = requests.get(f"{base_url}/data/imp.server.requests.latency.p99", headers=admin_headers).json()
+    assert_true(all(dp["value"] > 0 for dp in latency), "Latencies are positive (milliseconds)")
+    entries = requests.get(f"{base_url}/data/imp.server.cache.entries", headers=admin_headers).json()
+    caches = {dp["dimensions"].get("cache") for dp in entries}
+    assert_true({"persistent_dao", "result", "token", "compiled_program"} <= caches, f"Cache sizes by cache ({caches})")
+
+    program = '(define rate (window (data "imp.server.requests.rate") "1min" max))'
+    resp = requests.post(f"{base_url}/compute", headers=admin_headers, json={"program": program})
+    assert_true(resp.status_code == 200 and resp.json()["series"]["rate"], "Server metrics can be charted")
+
+    resp = requests.get(f"{base_url}/data", headers=standard_headers)
+    assert_true(not any(name.startswith("imp.server.") for name in resp.json()), "Other users get no server metrics")
+    resp = requests.post(f"{base_url}/data/imp.server.requests.rate", headers=admin_headers,
+                         json=[{"timestamp": 1, "value": 1.0, "dimensions": {}}])
+    assert_true(resp.status_code == 403, "Server metrics can't be written through the API")
+
+    # the reporter's own writes aren't counted as ingest
+    def ingested():
+        for line in admin.get(f"{base_url}/metrics").text.splitlines():
+            if line.startswith("impulses_ingested_datapoints_total "):
+                return float(line.split()[1])
+        return None
+    before = ingested()
+    time.sleep(5)
+    assert_true(ingested() == before, "Reports don't count as ingested datapoints")
+
+    # Cleanup
+    admin.delete(f"{base_url}/user")
+    standard.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 32: Server metrics reporter ==")
+    test_server_metrics_reporter()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Scenario 33: Admins can profile the server, the stacks come back in the collapsed flamegraph format."""
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+
+COLLAPSED_LINE = re.compile(r"^[^;]+(;[^;]+)* \d+$")
+
+
+def create_user(base_url, role):
+    session = requests.Session()
+    user_email = f"test_profiler_{role.lower()}_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": role}
+    )
+    assert_true(resp.status_code == 200, f"{role} user created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, f"{role} user logged in")
+    return session
+
+
+def test_admin_profiler():
+    """Test the profiler's output, and that only admins can run it, one at a time."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    admin = create_user(base_url, "ADMIN")
+    standard = create_user(base_url, "STANDARD")
+
+    resp = requests.get(f"{base_url}/admin/profile", params={"seconds": 0.1})
+    assert_true(resp.status_code == 401, "Profiling requires a session")
+    resp = standard.get(f"{base_url}/admin/profile", params={"seconds": 0.1})
+    assert_true(resp.status_code == 403, "Profiling requires the admin role")
+    resp = admin.get(f"{base_url}/admin/profile", params={"seconds": 120})
+    assert_true(resp.status_code == 422, "Profiles are at most 60 seconds long")
+
+    # the profiled requests run while another request profiles the server
+    profiles = []
+    profiling = threading.Thread(target=lambda: profiles.append(
+        admin.get(f"{base_url}/admin/profile", params={"seconds": 1.5, "idle": "true"})))
+    profiling.start()
+    time.sleep(0.5)
+    resp = admin.get(f"{base_url}/admin/profile", params={"seconds": 0.1})
+    assert_true(resp.status_code == 409, "Only one profile runs at a time")
+    profiling.join()
+
+    [resp] = profiles
+    assert_true(resp.status_code == 200, "Profile returned")
+    assert_true(resp.headers["Content-Type"].startswith("text/plain"), "Profile is plain text")
+    lines = resp.text.splitlines()
+    assert_true(len(lines) > 0, "Profile has samples")
+    assert_true(all(COLLAPSED_LINE.match(line) for line in lines), "Every line is a collapsed stack and its count")
+    assert_true(any("MainThread;" in line for line in lines), "Stacks start with the thread's name")
+
+    resp = admin.get(f"{base_url}/admin/profile", params={"seconds": 0.2})
+    assert_true(resp.status_code == 200, "Profile without idle threads returned")
+    leaves = [line.rsplit(";", 1)[-1] for line in resp.text.splitlines()]
+    assert_true(not any(leaf.startswith("EpollSelector.select") for leaf in leaves),
+                "Idle threads are left out by default")
+
+    # Cleanup
+    admin.delete(f"{base_url}/user")
+    standard.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 33: Admin profiler ==")
+    test_admin_profiler()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Scenario 34: The server's logging pipeline applies per-module levels and samples DEBUG records."""
+import atexit
+import io
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory and the server to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "server"))
+
+from utils import assert_true
+
+from src.common import logs
+
+THREADS = 8
+RECORDS_PER_THREAD = 1000
+
+
+def sampled_debug_record(logger: logging.Logger, i: int):
+    # a single call site, sampling is per call site
+    logger.debug("sampled %d", i)
+
+
+def test_logging():
+    """Test levels by module, package and logger name, DEBUG sampling across threads and level validation."""
+    output = io.StringIO()
+    listener = logs.configure(
+        [logging.StreamHandler(output)],
+        level=logs.parse_level("info"),
+        levels=logs.parse_levels("src.db=DEBUG, src.db.dao_cache=WARNING, uvicorn.access=warning"),
+        debug_sample_rate=0.1,
+    )
+
+    logging.getLogger("src.auth.session").debug("default level drops debug")
+    logging.getLogger("src.auth.session").info("default level keeps info")
+    logging.getLogger("src.db.dao").info("package level keeps info")
+    logging.getLogger("src.db.dao_cache").info("module level drops info")
+    logging.getLogger("src.db.dao_cache").warning("module level keeps warning")
+    logging.getLogger("uvicorn.access").info("logger level drops info")
+    logging.getLogger("uvicorn.error").info("other loggers get the default level")
+
+    sampled = logging.getLogger("src.db.dao")
+    threads = [threading.Thread(target=lambda: [sampled_debug_record(sampled, i) for i in range(RECORDS_PER_THREAD)])
+               for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # writes what is still queued, instead of at exit
+    atexit.unregister(listener.stop)
+    listener.stop()
+
+    entries = [json.loads(line) for line in output.getvalue().splitlines()]
+    messages = [entry["message"] for entry in entries if not entry["message"].startswith("sampled")]
+    assert_true(messages == ["default level keeps info", "package level keeps info", "module level keeps warning",
+                             "other loggers get the default level"], f"Levels by module and logger ({messages})")
+    assert_true(all(entry["logger"] and entry["level"] for entry in entries), "Records are JSON with level and logger")
+    sampled_count = sum(entry["message"].startswith("sampled") for entry in entries)
+    assert_true(sampled_count == THREADS * RECORDS_PER_THREAD // 10,
+                f"Every 10th DEBUG record of a call site kept across threads ({sampled_count})")
+
+    for configure in [lambda: logs.parse_level("inf"), lambda: logs.parse_levels("src.db=verbose")]:
+        try:
+            configure()
+            assert_true(False, "Invalid level rejected")
+        except ValueError as e:
+            assert_true(True, f"Invalid level rejected ({e})")
+
+
+def main():
+    print("== Scenario 34: Logging ==")
+    test_logging()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
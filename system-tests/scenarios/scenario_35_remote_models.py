@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Scenario 35: Remote models are streamed into the chat over pooled connections that keep no cookies."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+from fake_llm import FakeLlm, chat_turn, tool_call, tools_then_answer
+
+NOTE = "Looking at the metrics"
+ANSWER = "All metrics look fine."
+
+
+def create_user(base_url, prefix):
+    session = requests.Session()
+    user_email = f"{prefix}_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, f"User {prefix} created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, f"User {prefix} logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": f"{prefix}-token", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, f"Token for {prefix} created")
+    headers = {"X-Data-Token": resp.json().get("token_plaintext")}
+    for name in ["m0", "m1"]:
+        resp = requests.post(f"{base_url}/data/{name}", headers=headers,
+                             json=[{"timestamp": t, "value": float(t), "dimensions": {}} for t in range(10)])
+        assert_true(resp.status_code == 200, f"Metric {name} of {prefix} ingested")
+    return session
+
+
+def create_model(base_url, session, model, fake):
+    resp = session.post(f"{base_url}/ai/models", json={"model": model, "settings": {"base_url": fake.base_url}})
+    assert_true(resp.status_code == 200, f"Remote model {model} created (got {resp.status_code})")
+    return resp.json()["id"]
+
+
+def deltas_of_round(events, round_number):
+    return "".join(event["delta"] for event in events
+                   if event["type"] == "chat_delta" and event["round"] == round_number)
+
+
+def test_remote_models():
+    """Test streaming of content and tool-call fragments, connection reuse and that no cookies are kept."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    first = create_user(base_url, "test_remote_model_a")
+    second = create_user(base_url, "test_remote_model_b")
+
+    calls = [tool_call("call_0", "get_metric_summary", {"metric_name": "m0"}),
+             tool_call("call_1", "get_metric_summary", {"metric_name": "m1"})]
+    with FakeLlm(tools_then_answer(calls, NOTE, ANSWER), set_cookie=True) as fake:
+        first_model = create_model(base_url, first, "model-a", fake)
+
+        events = chat_turn(base_url, first, first_model, "How are my metrics?")
+        assert_true(events[-1]["type"] == "chat_done", f"Turn finished ({events[-1]})")
+        assert_true(all(request["body"].get("stream") for request in fake.requests), "Remote model is streamed")
+        assert_true(deltas_of_round(events, 1) == NOTE and deltas_of_round(events, 2) == ANSWER,
+                    "Content deltas reach the chat")
+        tools = [event["tool_call"] for event in events if event["type"] == "chat_tool"]
+        assert_true([(tool["tool_call_id"], tool["arguments"]) for tool in tools]
+                    == [("call_0", {"metric_name": "m0"}), ("call_1", {"metric_name": "m1"})],
+                    "Tool-call fragments are assembled")
+        assert_true(all(tool["response"]["ok"] and tool["response"]["data"]["number_of_points"] == 10
+                        for tool in tools), "Assembled tool calls run")
+        answers = [event["message"]["content"] for event in events
+                   if event["type"] == "chat_message" and event["message"]["role"] == "assistant"]
+        assert_true(answers == [ANSWER], f"Streamed answer is saved ({answers})")
+
+        chat_id = events[-1]["chat_id"]
+        events = chat_turn(base_url, first, first_model, "And now?", chat_id)
+        assert_true(events[-1]["type"] == "chat_done", "Second turn finished")
+        ports = {request["port"] for request in fake.requests}
+        assert_true(len(fake.requests) == 4 and len(ports) == 1,
+                    f"Rounds and turns reuse one connection ({len(fake.requests)} requests, ports {ports})")
+
+        second_model = create_model(base_url, second, "model-b", fake)
+        events = chat_turn(base_url, second, second_model, "How are my metrics?")
+        assert_true(events[-1]["type"] == "chat_done", "Other user's turn finished")
+        cookies = [request["headers"].get("Cookie") for request in fake.requests]
+        assert_true(len(cookies) == 6 and not any(cookies), f"Cookies set by the endpoint aren't sent ({cookies})")
+
+    # Cleanup
+    first.delete(f"{base_url}/user")
+    second.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 35: Remote models ==")
+    test_remote_models()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
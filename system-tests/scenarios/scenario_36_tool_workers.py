@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Scenario 36: Tool calls of a round come back in order, and time out counting from when they start to run."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory and client SDK to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "client-sdks" / "python3"))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+from fake_llm import FakeLlm, chat_turn, tool_call, tools_then_answer
+
+from impulses_sdk import ImpulsesClient, Datapoint, DatapointSeries
+
+# a metric whose common dimensions take longer than the test stack's tool timeout (AI_TOOL_TIMEOUT_SEC=0.5)
+BIG_METRIC_POINTS = 300_000
+# the tool workers a user's calls take at a time
+WORKERS_PER_USER = 4
+
+
+def test_tool_workers():
+    """Test that slow calls time out, calls queued behind them don't, and results keep the order of the calls."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+    user_email = f"test_tool_workers_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": "tool-workers-token", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+
+    client = ImpulsesClient(url=base_url, token_value=resp.json().get("token_plaintext"), timeout=120, binary=True)
+    client.upload_datapoints("big", DatapointSeries([
+        Datapoint(i, float(i), {"id": str(i)}) for i in range(BIG_METRIC_POINTS)
+    ]))
+    for name in ["m0", "m1"]:
+        client.upload_datapoints(name, DatapointSeries([Datapoint(t, float(t), {}) for t in range(10)]))
+
+    # the slow calls take every worker of the user's, the last fast call waits for one longer than the timeout
+    slow = [tool_call(f"slow_{i}", "get_metric_common_dimensions", {"metric_name": "big"})
+            for i in range(WORKERS_PER_USER)]
+    calls = [slow[0], tool_call("fast_0", "get_metric_summary", {"metric_name": "m0"}), *slow[1:],
+             tool_call("fast_1", "get_metric_summary", {"metric_name": "m1"})]
+    with FakeLlm(tools_then_answer(calls)) as fake:
+        resp = session.post(f"{base_url}/ai/models", json={"model": "model-tools", "settings": {"base_url": fake.base_url}})
+        assert_true(resp.status_code == 200, f"Model created (got {resp.status_code})")
+        events = chat_turn(base_url, session, resp.json()["id"], "How are my metrics?")
+
+    assert_true(events[-1]["type"] == "chat_done", f"Turn finished ({events[-1]})")
+    tools = [event["tool_call"] for event in events if event["type"] == "chat_tool"]
+    assert_true([tool["tool_call_id"] for tool in tools] == [call["id"] for call in calls],
+                f"Results come in the order of the calls ({[tool['tool_call_id'] for tool in tools]})")
+    for tool in tools:
+        if tool["tool_call_id"].startswith("slow"):
+            assert_true(tool["response"] == {"ok": False, "error": "Tool execution timed out after 0.5 seconds"},
+                        f"Slow call {tool['tool_call_id']} timed out ({tool['response']})")
+        else:
+            assert_true(tool["response"]["ok"] and tool["response"]["data"]["number_of_points"] == 10,
+                        f"Fast call {tool['tool_call_id']} ran ({tool['response']})")
+
+    tool_messages = [message for message in fake.requests[-1]["body"]["messages"] if message["role"] == "tool"]
+    assert_true([message["tool_call_id"] for message in tool_messages] == [call["id"] for call in calls],
+                "Tool responses go to the model in the order of the calls")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 36: Tool workers ==")
+    test_tool_workers()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
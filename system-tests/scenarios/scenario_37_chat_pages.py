@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Scenario 37: Chat messages are paged by cursors, with tool responses left out or loaded per message."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+from fake_llm import FakeLlm, chat_turn, tool_call, tools_then_answer
+
+TURNS = 3
+
+
+def cursor(message):
+    return f"{message['created_at']}:{message['id']}"
+
+
+def ids(messages):
+    return [message["id"] for message in messages]
+
+
+def test_chat_pages():
+    """Test before/after cursors and has_more, pages without tool responses, the reasoning endpoint and that the
+    collapsed chat kept up to date by appends matches the one collapsed from the database."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    session = requests.Session()
+    user_email = f"test_chat_pages_{int(time.time())}@example.com"
+    resp = session.post(
+        f"{base_url}/user",
+        json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+    )
+    assert_true(resp.status_code == 200, "User created")
+    resp = session.post(
+        f"{base_url}/user/login",
+        json={"email": user_email, "password": "Password123!"}
+    )
+    assert_true(resp.status_code == 200, "User logged in")
+    resp = session.post(
+        f"{base_url}/token",
+        json={"name": "chat-pages-token", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+    )
+    assert_true(resp.status_code == 200, "Token created")
+    headers = {"X-Data-Token": resp.json().get("token_plaintext")}
+    for name in ["m0", "m1"]:
+        resp = requests.post(f"{base_url}/data/{name}", headers=headers,
+                             json=[{"timestamp": t, "value": float(t), "dimensions": {}} for t in range(10)])
+        assert_true(resp.status_code == 200, f"Metric {name} ingested")
+
+    calls = [tool_call("call_0", "get_metric_summary", {"metric_name": "m0"}),
+             tool_call("call_1", "get_metric_summary", {"metric_name": "m1"})]
+    chat_id = None
+    with FakeLlm(tools_then_answer(calls)) as fake:
+        resp = session.post(f"{base_url}/ai/models", json={"model": "model-pages", "settings": {"base_url": fake.base_url}})
+        assert_true(resp.status_code == 200, f"Model created (got {resp.status_code})")
+        model_id = resp.json()["id"]
+        for turn in range(TURNS):
+            events = chat_turn(base_url, session, model_id, f"How are my metrics, take {turn}?", chat_id)
+            assert_true(events[-1]["type"] == "chat_done", f"Turn {turn} finished")
+            chat_id = events[-1]["chat_id"]
+            if turn == 0:
+                # the collapsed chat is cached from here, the later turns update it by appends
+                resp = session.get(f"{base_url}/ai/chats/{chat_id}")
+                assert_true(resp.status_code == 200, "Chat read")
+
+    chat_url = f"{base_url}/ai/chats/{chat_id}"
+    full = session.get(chat_url).json()
+    messages = full["messages"]
+    assert_true([message["role"] for message in messages] == ["user", "assistant"] * TURNS,
+                f"Whole chat has the messages of {TURNS} turns")
+    assert_true(not full["has_more"], "Whole chat has no more messages")
+    answers = [message for message in messages if message["role"] == "assistant"]
+    assert_true(all(len(message["reasoning"]["tool_calls"]) == 2 and not message["reasoning"]["tool_responses_omitted"]
+                    and all(tool["response"]["ok"] for tool in message["reasoning"]["tool_calls"])
+                    for message in answers), "Answers carry their tool calls with responses")
+
+    resp = session.get(chat_url, params={"limit": 500})
+    assert_true(resp.status_code == 200 and resp.json() == full,
+                "Chat collapsed by appends matches the chat collapsed from the database")
+
+    # newest first, then earlier pages by the before cursor
+    pages = []
+    page = session.get(chat_url, params={"limit": 2}).json()
+    pages.append(page)
+    while page["has_more"]:
+        page = session.get(chat_url, params={"limit": 2, "before": cursor(page["messages"][0])}).json()
+        pages.append(page)
+    assert_true([page["has_more"] for page in pages] == [True] * (TURNS - 1) + [False],
+                "Earlier pages have more until the first message")
+    assert_true([message_id for page in reversed(pages) for message_id in ids(page["messages"])] == ids(messages),
+                "Pages before cursors cover the chat in order")
+    assert_true(pages[0]["messages"] == messages[-2:], "Page messages match the whole chat's")
+
+    page = session.get(chat_url, params={"limit": 2, "after": cursor(messages[0])}).json()
+    assert_true(ids(page["messages"]) == ids(messages[1:3]) and page["has_more"], "Page after a cursor, more follow")
+    page = session.get(chat_url, params={"limit": 2, "after": cursor(messages[-3])}).json()
+    assert_true(ids(page["messages"]) == ids(messages[-2:]) and not page["has_more"], "Last page after a cursor")
+    page = session.get(chat_url, params={"before": cursor(messages[-1]), "after": cursor(messages[0])}).json()
+    assert_true(ids(page["messages"]) == ids(messages[1:-1]) and not page["has_more"], "Page between cursors")
+    resp = session.get(chat_url, params={"before": "latest"})
+    assert_true(resp.status_code == 422, f"Malformed cursor rejected (got {resp.status_code})")
+
+    page = session.get(chat_url, params={"limit": 500, "tool_responses": "false"}).json()
+    assert_true(ids(page["messages"]) == ids(messages), "Page without tool responses has every message")
+    for message in page["messages"]:
+        if message["role"] == "user":
+            assert_true(message["reasoning"] is None, "User message has no reasoning")
+            continue
+        reasoning = message["reasoning"]
+        assert_true(reasoning["tool_responses_omitted"], "Reasoning is marked as without tool responses")
+        assert_true([(tool["tool_call_id"], tool["response"]) for tool in reasoning["tool_calls"]]
+                    == [("call_0", None), ("call_1", None)], "Tool calls are listed without responses")
+
+        resp = session.get(f"{chat_url}/messages/{message['id']}/reasoning")
+        assert_true(resp.status_code == 200, "Reasoning of a message loaded")
+        full_message = next(full_message for full_message in answers if full_message["id"] == message["id"])
+        assert_true(resp.json() == full_message["reasoning"], "Loaded reasoning has the tool responses")
+
+    resp = session.get(f"{chat_url}/messages/unknown/reasoning")
+    assert_true(resp.status_code == 404, f"Reasoning of an unknown message not found (got {resp.status_code})")
+
+    # Cleanup
+    session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 37: Chat pages ==")
+    test_chat_pages()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
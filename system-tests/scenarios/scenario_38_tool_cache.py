@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Scenario 38: Tool results are cached per user, until the user's metric, charts or dashboards change."""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import requests
+from utils import get_base_url, assert_true, wait_for_health
+from fake_llm import FakeLlm, chat_turn, tool_call, tools_then_answer
+
+CALLS = [
+    tool_call("call_m0", "get_metric_summary", {"metric_name": "m0"}),
+    tool_call("call_m1", "get_metric_summary", {"metric_name": "m1"}),
+    tool_call("call_metrics", "list_metric_names", {}),
+    tool_call("call_charts", "list_charts", {}),
+    tool_call("call_dashboards", "list_dashboards", {}),
+]
+
+
+class User:
+    def __init__(self, base_url, prefix, fake):
+        self.base_url = base_url
+        self.session = requests.Session()
+        user_email = f"{prefix}_{int(time.time())}@example.com"
+        resp = self.session.post(
+            f"{base_url}/user",
+            json={"email": user_email, "password": "Password123!", "role": "STANDARD"}
+        )
+        assert_true(resp.status_code == 200, f"User {prefix} created")
+        resp = self.session.post(
+            f"{base_url}/user/login",
+            json={"email": user_email, "password": "Password123!"}
+        )
+        assert_true(resp.status_code == 200, f"User {prefix} logged in")
+        resp = self.session.post(
+            f"{base_url}/token",
+            json={"name": f"{prefix}-token", "capability": "SUPER", "expires_at": int(time.time()) + 3600}
+        )
+        assert_true(resp.status_code == 200, f"Token for {prefix} created")
+        self.headers = {"X-Data-Token": resp.json().get("token_plaintext")}
+        for name in ["m0", "m1"]:
+            self.ingest(name, range(10))
+        resp = self.session.post(f"{base_url}/ai/models", json={"model": f"model-{prefix}",
+                                                                "settings": {"base_url": fake.base_url}})
+        assert_true(resp.status_code == 200, f"Model of {prefix} created (got {resp.status_code})")
+        self.model_id = resp.json()["id"]
+        self.chat_id = None
+
+    def ingest(self, name, timestamps):
+        resp = requests.post(f"{self.base_url}/data/{name}", headers=self.headers,
+                             json=[{"timestamp": t, "value": float(t), "dimensions": {}} for t in timestamps])
+        assert_true(resp.status_code == 200, f"Metric {name} ingested")
+
+    def ask(self):
+        """The tool traces of a turn, by call id."""
+        events = chat_turn(self.base_url, self.session, self.model_id, "How are my metrics?", self.chat_id)
+        assert_true(events[-1]["type"] == "chat_done", "Turn finished")
+        self.chat_id = events[-1]["chat_id"]
+        tools = [event["tool_call"] for event in events if event["type"] == "chat_tool"]
+        assert_true(all(tool["response"]["ok"] for tool in tools), "Tool calls succeeded")
+        return {tool["tool_call_id"]: tool for tool in tools}
+
+    def expect_cached(self, tools, cached, what):
+        misses = {call["id"] for call in CALLS} - set(cached)
+        assert_true({call_id: tool["cached"] for call_id, tool in tools.items()}
+                    == {**{call_id: True for call_id in cached}, **{call_id: False for call_id in misses}},
+                    f"{what}: cached {sorted(cached)}")
+
+
+def test_tool_cache():
+    """Test that repeated calls are hits, and that a user's write invalidates only the user's results of its source."""
+    base_url = get_base_url()
+    wait_for_health(base_url)
+    all_calls = [call["id"] for call in CALLS]
+
+    with FakeLlm(tools_then_answer(CALLS)) as fake:
+        first = User(base_url, "test_tool_cache_a", fake)
+        second = User(base_url, "test_tool_cache_b", fake)
+
+        first.expect_cached(first.ask(), [], "First calls")
+        first.expect_cached(first.ask(), all_calls, "Repeated calls")
+        second.expect_cached(second.ask(), [], "Other user's calls")
+
+        first.ingest("m0", [10])
+        tools = first.ask()
+        first.expect_cached(tools, ["call_m1", "call_charts", "call_dashboards"], "After a metric write")
+        assert_true(tools["call_m0"]["response"]["data"]["number_of_points"] == 11, "Written metric is read again")
+        second.expect_cached(second.ask(), all_calls, "Other user's calls after a metric write")
+
+        resp = first.session.post(f"{base_url}/chart", json={"name": "Cached", "program": "m0", "variables": []})
+        assert_true(resp.status_code == 200, "Chart created")
+        tools = first.ask()
+        first.expect_cached(tools, ["call_m0", "call_m1", "call_metrics", "call_dashboards"], "After a chart write")
+        assert_true([chart["name"] for chart in tools["call_charts"]["response"]["data"]["charts"]] == ["Cached"],
+                    "New chart is listed")
+        second.expect_cached(second.ask(), all_calls, "Other user's calls after a chart write")
+
+        resp = first.session.post(f"{base_url}/dashboard", json={"name": "Cached", "layout": []})
+        assert_true(resp.status_code == 200, "Dashboard created")
+        tools = first.ask()
+        first.expect_cached(tools, ["call_m0", "call_m1", "call_metrics", "call_charts"], "After a dashboard write")
+        assert_true([dashboard["name"] for dashboard in tools["call_dashboards"]["response"]["data"]["dashboards"]]
+                    == ["Cached"], "New dashboard is listed")
+        second.expect_cached(second.ask(), all_calls, "Other user's calls after a dashboard write")
+
+    chat = first.session.get(f"{base_url}/ai/chats/{first.chat_id}").json()
+    traces = [[tool["cached"] for tool in message["reasoning"]["tool_calls"]]
+              for message in chat["messages"] if message["role"] == "assistant"]
+    assert_true(traces[0] == [False] * len(CALLS) and traces[1] == [True] * len(CALLS),
+                f"Saved reasoning records whether results were cached ({traces[:2]})")
+
+    # Cleanup
+    first.session.delete(f"{base_url}/user")
+    second.session.delete(f"{base_url}/user")
+
+
+def main():
+    print("== Scenario 38: Tool cache ==")
+    test_tool_cache()
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
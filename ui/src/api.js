@@ -479,9 +479,26 @@ export const api = {
     }
   },
 
-  async getChat(chatId) {
+  async getChat(chatId, { limit, before, toolResponses = true } = {}) {
+    const params = new URLSearchParams();
+    if (limit) params.set('limit', String(limit));
+    if (before) params.set('before', before);
+    if (!toolResponses) params.set('tool_responses', 'false');
+    const query = params.toString();
     try {
-      const response = await fetch(`${API_BASE}/ai/chats/${chatId}`, {
+      const response = await fetch(`${API_BASE}/ai/chats/${chatId}${query ? `?${query}` : ''}`, {
+        credentials: includeCredentials,
+      });
+      return handleResponse(response);
+    } catch (err) {
+      if (err instanceof ApiError) throw err;
+      throw new ApiError('Network error: Unable to connect to server', 0, null);
+    }
+  },
+
+  async getChatMessageReasoning(chatId, messageId) {
+    try {
+      const response = await fetch(`${API_BASE}/ai/chats/${chatId}/messages/${messageId}/reasoning`, {
         credentials: includeCredentials,
       });
       return handleResponse(response);
@@ -16,6 +16,8 @@ import {
 const NEW_CHAT_VALUE = '__new__';
 const PENDING_USER_ID = 'pending-user';
 const PENDING_ASSISTANT_ID = 'pending-assistant';
+// messages loaded at once; older ones are loaded on demand
+const CHAT_PAGE_SIZE = 50;
 const INITIAL_MESSAGES = [
   {
     id: 'intro',
@@ -265,6 +267,15 @@ function isAssistantPlaceholderMessage(message) {
   return id === PENDING_ASSISTANT_ID || id.startsWith('remote-pending-');
 }
 
+function isPersistedMessage(message) {
+  const id = String(message?.id || '');
+  return !!id
+    && id !== 'intro'
+    && id !== PENDING_USER_ID
+    && !isAssistantPlaceholderMessage(message)
+    && !id.startsWith('assistant-finalized-');
+}
+
 function hasPendingAssistantActivity(message) {
   if (!isAssistantPlaceholderMessage(message)) {
     return false;
@@ -500,7 +511,7 @@ function ReasoningPanel({ reasoning, forceOpen = false, label = 'Reasoning' }) {
                       ? `(${formatInlineArguments(toolCall.arguments)})`
                       : '()'}
                   </code>
-                  <span className="chat-reasoning-call-meta">round {toolCall.round}</span>
+                  <span className="chat-reasoning-call-meta">round {toolCall.round}{toolCall.cached ? ', cached' : ''}</span>
                   <div className="chat-reasoning-tooltip">
                     <div className="chat-reasoning-tooltip-title">Tool response</div>
                     <pre>
@@ -608,6 +619,7 @@ export default function Chat() {
   const [loadingModels, setLoadingModels] = useState(true);
   const [loadingChats, setLoadingChats] = useState(true);
   const [loadingCurrentChat, setLoadingCurrentChat] = useState(false);
+  const [loadingEarlierMessages, setLoadingEarlierMessages] = useState(false);
   const [availableCharts, setAvailableCharts] = useState([]);
   const [error, setError] = useState('');
   const [notice, setNotice] = useState('');
@@ -661,7 +673,7 @@ export default function Chat() {
     if (!targetChatId) {
       return;
     }
-    const data = await api.getChat(targetChatId);
+    const data = await api.getChat(targetChatId, { limit: CHAT_PAGE_SIZE, toolResponses: false });
     applyLoadedChat(data);
   }
 
@@ -729,12 +741,29 @@ export default function Chat() {
         return;
       }
 
+      if (message.type === 'chat_delta') {
+        if (!message.chat_id || message.chat_id !== activeChatId || !message.delta) {
+          return;
+        }
+        // the text streamed in a round restarts the answer shown so far
+        setMessages((prev) => replacePendingAssistant(prev, message.chat_id, (assistantMessage) => ({
+          ...assistantMessage,
+          content: assistantMessage.streaming_round === message.round
+            ? `${assistantMessage.content || ''}${message.delta}`
+            : message.delta,
+          streaming_round: message.round,
+        })));
+        return;
+      }
+
       if (message.type === 'chat_assistant_note') {
         if (!message.chat_id || message.chat_id !== activeChatId) {
           return;
         }
+        // the streamed text of a round with tool calls was a note, not the answer
         setMessages((prev) => replacePendingAssistant(prev, message.chat_id, (assistantMessage) => ({
           ...assistantMessage,
+          content: '',
           reasoning: {
             ...(assistantMessage.reasoning || { notes: [], tool_calls: [] }),
             notes: [
@@ -753,6 +782,7 @@ export default function Chat() {
         }
         setMessages((prev) => replacePendingAssistant(prev, message.chat_id, (assistantMessage) => ({
           ...assistantMessage,
+          content: '',
           reasoning: {
             notes: getReasoningNotes(assistantMessage.reasoning),
             tool_calls: [
@@ -854,7 +884,7 @@ export default function Chat() {
 
       try {
         setLoadingCurrentChat(true);
-        const data = await api.getChat(chatId);
+        const data = await api.getChat(chatId, { limit: CHAT_PAGE_SIZE, toolResponses: false });
         if (cancelled) {
           return;
         }
@@ -923,6 +953,39 @@ export default function Chat() {
     }));
   }
 
+  async function loadOmittedToolResponses(chatIdValue, message) {
+    if (!chatIdValue || !message?.reasoning?.tool_responses_omitted) {
+      return;
+    }
+    try {
+      const reasoning = await api.getChatMessageReasoning(chatIdValue, message.id);
+      setMessages((prev) => prev.map((item) => (item.id === message.id ? { ...item, reasoning } : item)));
+    } catch (err) {
+      setError(err.message || 'Failed to load tool responses');
+    }
+  }
+
+  async function loadEarlierMessages() {
+    const oldestMessage = messages.find(isPersistedMessage);
+    if (!currentChat?.id || !oldestMessage) {
+      return;
+    }
+    try {
+      setLoadingEarlierMessages(true);
+      const data = await api.getChat(currentChat.id, {
+        limit: CHAT_PAGE_SIZE,
+        before: `${oldestMessage.created_at}:${oldestMessage.id}`,
+        toolResponses: false,
+      });
+      setMessages((prev) => normalizeMessageSequence([...(data.messages || []), ...prev]));
+      setCurrentChat((prev) => (prev && prev.id === data.id ? { ...prev, has_more: data.has_more } : prev));
+    } catch (err) {
+      setError(err.message || 'Failed to load earlier messages');
+    } finally {
+      setLoadingEarlierMessages(false);
+    }
+  }
+
   async function handleSaveDisplayedChartAsNew(chart, saveKey) {
     try {
       setSavingChartKey(saveKey);
@@ -1032,6 +1095,8 @@ export default function Chat() {
       </select>
     </label>
   );
+
+  const currentChatId = currentChat?.id || null;
   const transcriptContent = useMemo(() => {
     if (loadingCurrentChat) {
       return <div className="chat-loading">Loading chat...</div>;
@@ -1061,7 +1126,12 @@ export default function Chat() {
                 <button
                   type="button"
                   className="chat-reasoning-toggle"
-                  onClick={() => toggleReasoning(messageId)}
+                  onClick={() => {
+                    toggleReasoning(messageId);
+                    if (!isReasoningOpen) {
+                      loadOmittedToolResponses(currentChatId, message);
+                    }
+                  }}
                 >
                   {isReasoningOpen ? 'Hide reasoning' : 'Show reasoning'}
                 </button>
@@ -1092,7 +1162,7 @@ export default function Chat() {
           </div>
         );
       });
-  }, [availableCharts, expandedReasoning, loadingCurrentChat, messages, savingChartKey]);
+  }, [availableCharts, currentChatId, expandedReasoning, loadingCurrentChat, messages, savingChartKey]);
 
   return (
     <div>
@@ -1145,6 +1215,16 @@ export default function Chat() {
         </div>
 
         <div className="chat-transcript">
+          {currentChat?.has_more && !loadingCurrentChat && (
+            <button
+              type="button"
+              className="chat-load-earlier"
+              onClick={loadEarlierMessages}
+              disabled={loadingEarlierMessages}
+            >
+              {loadingEarlierMessages ? 'Loading earlier messages...' : 'Load earlier messages'}
+            </button>
+          )}
           {transcriptContent}
         </div>
 
@@ -12,6 +12,7 @@ function emptyForm() {
     baseUrl: '',
     headers: [emptyHeader()],
     isLocalhost: false,
+    promptCaching: false,
   };
 }
 
@@ -82,6 +83,7 @@ export default function LlmModels() {
           : []
       ),
       isLocalhost: !!model.settings.is_localhost,
+      promptCaching: !!model.settings.prompt_caching,
     });
     setError('');
   }
@@ -133,6 +135,7 @@ export default function LlmModels() {
             value: header.value.trim(),
           })),
         is_localhost: !!form.isLocalhost,
+        prompt_caching: !!form.promptCaching,
       },
     };
 
@@ -248,6 +251,15 @@ export default function LlmModels() {
             Localhost model
           </label>
 
+          <label className="checkbox-label">
+            <input
+              type="checkbox"
+              checked={form.promptCaching}
+              onChange={(event) => updateForm('promptCaching', event.target.checked)}
+            />
+            Mark the system prompt for prompt caching (cache_control)
+          </label>
+
           <div className="impulses-section">
             <h4>Headers</h4>
             {form.headers.map((header, index) => (